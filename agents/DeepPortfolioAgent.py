@@ -141,16 +141,7 @@ class DeepPortfolioAgentNetwork(tf.keras.Model):
             raise
 
         print(f"DPN __init__ > self.num_assets APÓS conversão: {self.num_assets}, tipo: {type(self.num_assets)}")
-        
-
-
-
-
-
-        self.num_assets = num_assets
-        self.sequence_length = sequence_length
-        self.num_features_per_asset = num_features_per_asset
-        self.asset_lstm_output_dim = asset_lstm_units2
+        # Os valores convertidos para int são mantidos: _process_assets usa-os como shapes estáticos
 
         self.asset_processor = AssetProcessor(
             sequence_length=self.sequence_length, num_features=self.num_features_per_asset,
@@ -196,19 +187,22 @@ class DeepPortfolioAgentNetwork(tf.keras.Model):
         self.dropout2 = Dropout(final_dropout, name="final_dropout2")
         self.output_allocation = Dense(self.num_assets, activation='softmax', name="portfolio_allocation_output")
 
+    @tf.function(reduce_retracing=True)
+    def _process_assets(self, market_data_flat, training=False):
+        # (batch, window, num_assets*features) -> (batch*num_assets, window, features): mesma fatia
+        # [i*features:(i+1)*features] por ativo que o antigo loop, mas o AssetProcessor roda uma única vez.
+        batch_size = tf.shape(market_data_flat)[0]
+        window = tf.shape(market_data_flat)[1]
+        x = tf.reshape(market_data_flat, [batch_size, window, self.num_assets, self.num_features_per_asset])
+        x = tf.transpose(x, [0, 2, 1, 3])  # (batch, num_assets, window, features)
+        x = tf.reshape(x, [batch_size * self.num_assets, window, self.num_features_per_asset])
+        processed = self.asset_processor(x, training=training)  # (batch*num_assets, asset_lstm_output_dim)
+        return tf.reshape(processed, [batch_size, self.num_assets, self.asset_lstm_output_dim])
+
     def call(self, inputs, training=False):
         market_data_flat = inputs 
         
-        print(type(self.num_assets))
-        asset_representations_list = []
-        for i in range(self.num_assets):
-            start_idx = i * self.num_features_per_asset
-            end_idx = (i + 1) * self.num_features_per_asset
-            current_asset_data = market_data_flat[:, :, start_idx:end_idx]
-            processed_asset_representation = self.asset_processor(current_asset_data, training=training)
-            asset_representations_list.append(processed_asset_representation)
-            
-        stacked_asset_features = tf.stack(asset_representations_list, axis=1)
+        stacked_asset_features = self._process_assets(market_data_flat, training=training)
         
         # Para MHA, query, value, key são (batch_size, Tq, dim), (batch_size, Tv, dim)
         # Aqui, T = num_assets, dim = asset_lstm_output_dim
@@ -328,19 +328,35 @@ if __name__ == '__main__':
             else:
                 raise
 
+        # Saídas em Parquet (RESULTS_FORMAT=arrow|csv para outro formato): schema tipado + metadados da run
+        from src.utils.results_io import results_suffix, write_equity, write_trades
+        suffix = results_suffix()
+        run_meta = {'ticker': 'ETH-USD', 'period': '2y', 'interval': '1h', 'start_capital': 100000.0}
+
         # Default backtest (unscaled features)
         out_default = run_backtest_from_features(feats, start_capital=100000.0)
         prefix = LOGS_DIR / f"backtest_ethusd_2y_1h_{dt.datetime.now(dt.timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
-        out_default['trades'].to_csv(str(prefix) + '_trades.csv', index=False)
-        out_default['equity'].to_csv(str(prefix) + '_equity.csv', header=['equity'])
+        write_trades(str(prefix) + '_trades' + suffix, out_default['trades'], {**run_meta, 'scaled': False})
+        write_equity(str(prefix) + '_equity' + suffix, out_default['equity'], {**run_meta, 'scaled': False})
 
         # Tuned run (scaled inputs)
         tuned = run_backtest_from_features(scaled_df, start_capital=100000.0)
         tuned_prefix = LOGS_DIR / f"backtest_ethusd_2y_1h_tuned_{dt.datetime.now(dt.timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
-        tuned['trades'].to_csv(str(tuned_prefix) + '_trades.csv', index=False)
-        tuned['equity'].to_csv(str(tuned_prefix) + '_equity.csv', header=['equity'])
+        write_trades(str(tuned_prefix) + '_trades' + suffix, tuned['trades'], {**run_meta, 'scaled': True})
+        write_equity(str(tuned_prefix) + '_equity' + suffix, tuned['equity'], {**run_meta, 'scaled': True})
         print(f"Tuned run saved to logs\\{tuned_prefix.stem}_* . End capital: {tuned['equity'].iloc[-1]:.2f}")
 
+        # Registra as duas runs no índice consultado por /backtest/status (sem reler os arquivos)
+        try:
+            from src.utils.results_store import ResultsStore
+            with ResultsStore() as store:
+                for run_prefix, out in ((prefix, out_default), (tuned_prefix, tuned)):
+                    store.record_outputs(str(run_prefix) + '_equity' + suffix,
+                                         trades_path=str(run_prefix) + '_trades' + suffix,
+                                         equity=out['equity'].to_numpy(), ticker='ETH-USD')
+        except Exception as e:
+            print(f'Aviso: falha ao registrar runs no índice de resultados: {e}')
+
     except Exception as e:
         print('Backtest aborted:', e)
         sys.exit(1)
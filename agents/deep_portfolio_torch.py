@@ -1,7 +1,6 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModel # Usar AutoModel para obter embeddings
 from typing import List
 
 from config import *
@@ -37,10 +36,14 @@ class DeepPortfolioAgentNetworkTorch(nn.Module):
                  asset_lstm_units1, asset_lstm_units2, asset_dropout,
                  mha_num_heads, mha_key_dim_divisor,
                  final_dense_units1, final_dense_units2, final_dropout,
-                 output_latent_features=False, use_sentiment_analysis=False):
+                 output_latent_features=False, use_sentiment_analysis=False,
+                 fold_assets_into_batch=True):
         super().__init__()
         self.num_assets = int(num_assets)
         self.num_features_per_asset = int(num_features_per_asset)
+        # True: um único conv/LSTM sobre (batch*num_assets, seq, features); False: loop por ativo.
+        # Só muda a execução - os pesos (state_dict) são os mesmos nos dois modos.
+        self.fold_assets_into_batch = fold_assets_into_batch
         self.output_latent_features = output_latent_features
         self.use_sentiment_analysis = use_sentiment_analysis
 
@@ -64,8 +67,7 @@ class DeepPortfolioAgentNetworkTorch(nn.Module):
         if not self.output_latent_features:
             self.output_allocation_head = nn.Linear(final_dense_units2, num_assets)
 
-    def forward(self, observations):
-        # observations: (batch, seq_len, num_assets * num_features_per_asset)
+    def _process_assets_loop(self, observations):
         asset_representations = []
         for i in range(self.num_assets):
             start = i * self.num_features_per_asset
@@ -73,8 +75,22 @@ class DeepPortfolioAgentNetworkTorch(nn.Module):
             asset_data = observations[:, :, start:end]
             asset_repr = self.asset_processor(asset_data)
             asset_representations.append(asset_repr)
-        
-        stacked = torch.stack(asset_representations, dim=1)
+        return torch.stack(asset_representations, dim=1)
+
+    def _process_assets_folded(self, observations):
+        # (batch, seq, assets*features) -> (batch*assets, seq, features): mesma fatia por ativo que o loop
+        batch_size, seq_len = observations.shape[0], observations.shape[1]
+        x = observations.reshape(batch_size, seq_len, self.num_assets, self.num_features_per_asset)
+        x = x.permute(0, 2, 1, 3).reshape(batch_size * self.num_assets, seq_len, self.num_features_per_asset)
+        asset_repr = self.asset_processor(x)  # (batch*assets, lstm_units2)
+        return asset_repr.reshape(batch_size, self.num_assets, -1)
+
+    def forward(self, observations):
+        # observations: (batch, seq_len, num_assets * num_features_per_asset)
+        if self.fold_assets_into_batch:
+            stacked = self._process_assets_folded(observations)
+        else:
+            stacked = self._process_assets_loop(observations)
         
         attn_output, _ = self.attention(stacked, stacked, stacked)
         attn_output = self.attention_norm(stacked + attn_output) # Conexão residual + LayerNorm
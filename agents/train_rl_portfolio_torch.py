@@ -0,0 +1,286 @@
+"""Pure-PyTorch PPO training entry point for the portfolio agent.
+
+Unlike agents/train_rl_portfolio_agent.py, nothing here imports TensorFlow: the policy uses
+new-rede-a's PortfolioFeaturesExtractorTorch (DeepPortfolioAgentNetworkTorch) end to end, so
+rollouts and gradient steps stay inside torch and only one ML runtime is loaded.
+
+Weights from an existing Keras DeepPortfolioAgentNetwork can be used as a starting point after
+converting them with scripts/convert_keras_portfolio_weights.py (--init-weights).
+
+Usage:
+    python agents/train_rl_portfolio_torch.py --features data/multi_asset_features.parquet
+    python agents/train_rl_portfolio_torch.py --synthetic --timesteps 5000
+    python agents/train_rl_portfolio_torch.py --synthetic --n-envs 16      # features em memória compartilhada
+    python agents/train_rl_portfolio_torch.py --synthetic --init-weights out/keras_converted_state_dict.pt
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+NEW_REDE_A_DIR = REPO_ROOT / 'new-rede-a'
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+# Hiperparâmetros da rede (mesmos defaults de agents/train_rl_portfolio_agent.py)
+NETWORK_DEFAULTS = dict(
+    asset_cnn_filters1=32,
+    asset_cnn_filters2=64,
+    asset_lstm_units1=64,
+    asset_lstm_units2=32,
+    asset_dropout=0.2,
+    mha_num_heads=4,
+    mha_key_dim_divisor=2,
+    final_dense_units1=128,
+    final_dropout=0.3,
+)
+FEATURES_DIM = 32
+PPO_LEARNING_RATE = 0.0005
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo atual (Linux/macOS via resource, Windows via psutil)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss é KB no Linux e bytes no macOS
+        return round(peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0, 1)
+    except ImportError:
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / (1024.0 * 1024.0), 1)
+        except Exception:
+            return None
+
+
+def _load_module(module_name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(module_name, str(path))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@contextmanager
+def _vendored_config(cfg):
+    """Os módulos de new-rede-a fazem `from config import *`: expõe o config deles só durante o load."""
+    original_config = sys.modules.get('config')
+    sys.modules['config'] = cfg
+    try:
+        yield
+    finally:
+        if original_config is not None:
+            sys.modules['config'] = original_config
+        else:
+            sys.modules.pop('config', None)
+
+
+def register_vendored_torch_modules():
+    """
+    Carrega new-rede-a/{config,deep_portfolio_torch,portfolio_features_extractor_torch} com os nomes
+    usados pelos zips SB3 existentes (ver scripts/export_sb3_policy.py), sem importar TensorFlow.
+    Retorna (config, deep_portfolio_torch, portfolio_features_extractor_torch).
+    """
+    if 'portfolio_features_extractor_torch' in sys.modules and 'new_rede_a_config' in sys.modules:
+        return (sys.modules['new_rede_a_config'], sys.modules['deep_portfolio_torch'],
+                sys.modules['portfolio_features_extractor_torch'])
+    cfg = _load_module('new_rede_a_config', NEW_REDE_A_DIR / 'config.py')
+    with _vendored_config(cfg):
+        dpt = _load_module('deep_portfolio_torch', NEW_REDE_A_DIR / 'deep_portfolio_torch.py')
+        pfe = _load_module('portfolio_features_extractor_torch', NEW_REDE_A_DIR / 'portfolio_features_extractor_torch.py')
+    sys.modules['new_rede_a.deep_portfolio_torch'] = dpt
+    sys.modules['new_rede_a.portfolio_features_extractor_torch'] = pfe
+    sys.modules['new_rede_a_portfolio_features_extractor_torch'] = pfe
+    return cfg, dpt, pfe
+
+
+def make_synthetic_features(asset_symbols, num_features_per_asset: int, num_rows: int = 2000,
+                            seed: int = 0) -> pd.DataFrame:
+    """
+    DataFrame sintético no layout esperado pelo PortfolioEnv/extrator: um bloco contíguo de
+    `num_features_per_asset` colunas por ativo, sendo a última `<ativo>_close`.
+    """
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range('2023-01-01', periods=num_rows, freq='h')
+    blocks = {}
+    for asset in asset_symbols:
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, num_rows)))
+        for j in range(num_features_per_asset - 1):
+            blocks[f'{asset}_f{j}'] = rng.normal(0.0, 1.0, num_rows).astype(np.float32)
+        blocks[f'{asset}_close'] = close
+    return pd.DataFrame(blocks, index=idx)
+
+
+def load_features(path: str) -> pd.DataFrame:
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+
+def build_policy_kwargs(extractor_cls, num_assets: int, num_features_per_asset: int, window_size: int,
+                        features_dim: int = FEATURES_DIM, **network_overrides) -> Dict:
+    network_kwargs = dict(NETWORK_DEFAULTS)
+    network_kwargs.update(network_overrides)
+    network_kwargs.update(
+        num_assets=num_assets,
+        num_features_per_asset=num_features_per_asset,
+        sequence_length=window_size,
+    )
+    return dict(
+        features_extractor_class=extractor_cls,
+        features_extractor_kwargs=dict(features_dim=features_dim, **network_kwargs),
+    )
+
+
+def initial_weights_network_kwargs(weights_path: str) -> Dict:
+    """kwargs de construção exigidos pelos pesos iniciais (ex.: latent_activation='relu' dos pesos do Keras)."""
+    import torch
+    checkpoint = torch.load(weights_path, map_location='cpu')
+    return dict(checkpoint.get('network_kwargs', {})) if isinstance(checkpoint, dict) else {}
+
+
+def load_initial_weights(model, weights_path: str) -> Tuple[list, list]:
+    """Carrega um state_dict de DeepPortfolioAgentNetworkTorch (ex.: convertido do Keras) no extrator."""
+    import torch
+    state_dict = torch.load(weights_path, map_location=model.device)
+    if isinstance(state_dict, dict) and 'state_dict' in state_dict:
+        state_dict = state_dict['state_dict']
+    result = model.policy.features_extractor.network.load_state_dict(state_dict, strict=False)
+    if not getattr(model.policy, 'share_features_extractor', True):
+        model.policy.vf_features_extractor.network.load_state_dict(state_dict, strict=False)
+    return list(result.missing_keys), list(result.unexpected_keys)
+
+
+def train(df: Optional[pd.DataFrame] = None, total_timesteps: int = 5000, n_steps: int = 2048,
+          batch_size: int = 64, learning_rate: float = PPO_LEARNING_RATE, init_weights: Optional[str] = None,
+          save_path: Optional[str] = None, synthetic_rows: int = 2000, device: str = 'auto',
+          tensorboard_log: Optional[str] = None, seed: Optional[int] = None, n_envs: int = 1,
+          shared_backend: str = 'shm', shared_dir: Optional[str] = None) -> Dict:
+    """
+    Treina o PPO com o extrator torch e retorna métricas (steps/s, pico de RSS, tempos).
+
+    Com n_envs > 1 os ambientes rodam em subprocessos (SubprocVecEnv) e leem as features de um
+    único bloco compartilhado (src.utils.shared_feature_store) em vez de receber uma cópia do
+    DataFrame cada um.
+    """
+    t_start = time.perf_counter()
+    import torch
+    from stable_baselines3 import PPO
+
+    cfg, _, pfe = register_vendored_torch_modules()
+    with _vendored_config(cfg):
+        env_module = _load_module('new_rede_a_portfolio_environment', NEW_REDE_A_DIR / 'portfolio_environment.py')
+
+    asset_symbols = list(cfg.ALL_ASSET_SYMBOLS)
+    num_assets = len(asset_symbols)
+    if df is None:
+        df = make_synthetic_features(asset_symbols, cfg.NUM_FEATURES_PER_ASSET, num_rows=synthetic_rows,
+                                     seed=seed or 0)
+    numeric_cols = df.drop(columns=['asset_id'], errors='ignore').shape[1]
+    if num_assets == 0 or numeric_cols % num_assets != 0:
+        raise ValueError(f"Número de colunas ({numeric_cols}) não é múltiplo do número de ativos ({num_assets}).")
+    num_features_per_asset = numeric_cols // num_assets
+
+    feature_store = None
+    if n_envs > 1:
+        from stable_baselines3.common.vec_env import SubprocVecEnv
+        from src.utils.shared_feature_store import SharedFeatureStore, SharedEnvFactory
+        feature_store = SharedFeatureStore.from_dataframe(
+            df, [f"{asset}_close" for asset in asset_symbols], backend=shared_backend,
+            directory=shared_dir or str(REPO_ROOT / 'out' / 'shared_features'))
+        del df  # os workers só veem o bloco compartilhado
+        factory = SharedEnvFactory(feature_store.handle, str(NEW_REDE_A_DIR / 'portfolio_environment.py'),
+                                   config_file=str(NEW_REDE_A_DIR / 'config.py'),
+                                   env_kwargs=dict(initial_balance=100000))
+        env = SubprocVecEnv([factory] * n_envs)
+    else:
+        env = env_module.PortfolioEnv(df_multi_asset_features=df, initial_balance=100000)
+    network_overrides = initial_weights_network_kwargs(init_weights) if init_weights else {}
+    policy_kwargs = build_policy_kwargs(pfe.PortfolioFeaturesExtractorTorch, num_assets,
+                                        num_features_per_asset, cfg.WINDOW_SIZE, **network_overrides)
+    model = PPO(
+        "MlpPolicy",
+        env,
+        verbose=1,
+        learning_rate=learning_rate,
+        n_steps=n_steps,
+        batch_size=batch_size,
+        ent_coef=0.0,
+        policy_kwargs=policy_kwargs,
+        tensorboard_log=tensorboard_log,
+        device=device,
+        seed=seed,
+    )
+    if init_weights:
+        missing, unexpected = load_initial_weights(model, init_weights)
+        print(f"Pesos iniciais carregados de {init_weights} (faltando: {missing}, inesperados: {unexpected})")
+
+    t_learn = time.perf_counter()
+    try:
+        model.learn(total_timesteps=total_timesteps)
+    finally:
+        if feature_store is not None:
+            env.close()
+            feature_store.close()
+    learn_s = time.perf_counter() - t_learn
+
+    if save_path:
+        Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+        model.save(save_path)
+        print(f"Modelo RL salvo em: {save_path}")
+
+    return {
+        'path': 'torch',
+        'timesteps': int(model.num_timesteps),
+        'learn_s': round(learn_s, 3),
+        'steps_per_s': round(model.num_timesteps / learn_s, 2) if learn_s > 0 else None,
+        'setup_s': round(t_learn - t_start, 3),
+        'peak_rss_mb': peak_rss_mb(),
+        'tensorflow_loaded': 'tensorflow' in sys.modules,
+        'torch_threads': torch.get_num_threads(),
+        'n_envs': n_envs,
+        'shared_feature_bytes': feature_store.nbytes if feature_store is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Treino PPO do agente de portfólio (somente PyTorch).')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--features', help='CSV/Parquet com as features multi-ativo (colunas <ativo>_close incluídas)')
+    source.add_argument('--synthetic', action='store_true', help='usar dados sintéticos (smoke test/benchmark)')
+    parser.add_argument('--timesteps', type=int, default=int(os.getenv('PPO_TOTAL_TIMESTEPS', '5000')))
+    parser.add_argument('--n-steps', type=int, default=2048)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--learning-rate', type=float, default=PPO_LEARNING_RATE)
+    parser.add_argument('--init-weights', help='state_dict gerado por scripts/convert_keras_portfolio_weights.py')
+    parser.add_argument('--save-path', default=str(Path('src/model') / 'ppo_custom_deep_portfolio_agent'))
+    parser.add_argument('--device', default='auto')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--n-envs', type=int, default=1, help='>1: envs em subprocessos com features compartilhadas')
+    parser.add_argument('--shared-backend', choices=['shm', 'memmap'], default='shm')
+    parser.add_argument('--shared-dir', help="diretório dos .npy quando --shared-backend memmap")
+    parser.add_argument('--report-json', help='grava as métricas do treino neste arquivo')
+    args = parser.parse_args()
+
+    df = load_features(args.features) if args.features else None
+    metrics = train(df, total_timesteps=args.timesteps, n_steps=args.n_steps, batch_size=args.batch_size,
+                    learning_rate=args.learning_rate, init_weights=args.init_weights,
+                    save_path=args.save_path or None, device=args.device, seed=args.seed,
+                    n_envs=args.n_envs, shared_backend=args.shared_backend, shared_dir=args.shared_dir,
+                    tensorboard_log="./ppo_deep_portfolio_tensorboard/")
+    print(json.dumps(metrics, indent=2))
+    if args.report_json:
+        Path(args.report_json).write_text(json.dumps(metrics, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
+from src.utils.startup_profiler import startup_profiler
+
 from pathlib import Path
+from contextlib import asynccontextmanager
 import os
+import sys
+import time
+import asyncio
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -29,7 +35,16 @@ if not template_dir.exists():
 templates = Environment(loader=FileSystemLoader(str(template_dir)))
 
 
-app = FastAPI(title="ATCoin Neural Agents")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The import hook only lives for the warm-up: installed here, restored when the last task ends
+    startup_profiler.warmup_in_background(_warmup_tasks(asyncio.get_running_loop()), profile_imports=True)
+    startup_profiler.finish()
+    yield
+    startup_profiler.uninstall()
+
+
+app = FastAPI(title="ATCoin Neural Agents", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -43,8 +58,13 @@ app.add_middleware(
 # Defensive imports: some routers depend on heavy ML packages that may not be
 # available at container build / import time. Import them only if possible.
 def safe_import_router(module_path, symbol='router'):
+    already = module_path in sys.modules
+    start = time.perf_counter()
     try:
         mod = __import__(module_path, fromlist=[symbol])
+        if not already and not startup_profiler.installed:
+            # eager routers are imported before the lifespan hook exists: time them explicitly
+            startup_profiler.record_import(f"{module_path} (router)", time.perf_counter() - start)
         return getattr(mod, symbol)
     except Exception as e:
         logger.warning(f"Could not import {module_path}: {e}")
@@ -53,24 +73,58 @@ def safe_import_router(module_path, symbol='router'):
 
 predict_router = safe_import_router('endpoints.predict')
 dataset_router = safe_import_router('agents.dataset_update_agent')
-finance_router = safe_import_router('agents.financial_data_agent')
 invest_router = safe_import_router('agents.investment_agent')
-rl_router = safe_import_router('agents.rl_agent')
 backtest_status_router = safe_import_router('endpoints.backtest_status')
 
 if predict_router is not None:
     app.include_router(predict_router)
 if dataset_router is not None:
     app.include_router(dataset_router, prefix='/dataset')
-if finance_router is not None:
-    app.include_router(finance_router, prefix='/finance')
 if invest_router is not None:
     app.include_router(invest_router, prefix='/invest')
-if rl_router is not None:
-    app.include_router(rl_router, prefix='/rl')
 if backtest_status_router is not None:
     app.include_router(backtest_status_router)
 
+# Routers whose modules pull yfinance / stable-baselines3 / torch at import time. They are imported
+# by the background warm-up after startup and mounted once available.
+HEAVY_ROUTERS = {
+    'agents.financial_data_agent': '/finance',
+    'agents.rl_agent': '/rl',
+}
+startup_profiler.mark('routers_imported')
+
+
+def _warmup_tasks(loop):
+    def _import_heavy_router(module_path, prefix):
+        def _task():
+            router = safe_import_router(module_path)
+            if router is None:
+                raise ImportError(f"router indisponível: {module_path}")
+            loop.call_soon_threadsafe(lambda: app.include_router(router, prefix=prefix))
+            return router
+        return _task
+
+    tasks = {module_path: _import_heavy_router(module_path, prefix) for module_path, prefix in HEAVY_ROUTERS.items()}
+    if predict_router is not None:
+        tasks['endpoints.predict.model'] = __import__('endpoints.predict', fromlist=['warmup']).warmup
+    return tasks
+
+
+@app.get('/health')
+async def health():
+    """Liveness: answers as soon as the app is up, while heavy stacks are still warming up."""
+    return {
+        "status": "healthy",
+        "ready_after_s": startup_profiler.report(top=0)['ready_after_s'],
+        "warmups": startup_profiler.warmups,
+    }
+
+
+@app.get('/health/startup')
+async def startup_report(top: int = 20):
+    """Per-module import times, startup phases and warm-up task durations."""
+    return startup_profiler.report(top=top)
+
 
 @app.get('/', response_class=HTMLResponse)
 async def index():
@@ -116,4 +170,4 @@ async def model_health():
         return info
     except Exception as e:
         logger.error(f"Error while getting model health: {e}", exc_info=True)
-        return {"ok": False, "reason": str(e)}
\ No newline at end of file
+        return {"ok": False, "reason": str(e)}
@@ -9,6 +9,14 @@ A lógica principal é executada em background para não bloquear as requisiçõ
 # --- 1. IMPORTS E CONFIGURAÇÃO INICIAL ---
 import sys
 import os
+
+# Adiciona a raiz ao path para garantir que os imports de 'src' funcionem
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Importado primeiro para que o profiler de startup meça todos os imports seguintes
+from src.utils.startup_profiler import startup_profiler, lazy_import
+startup_profiler.install()  # removido em startup_profiler.finish()
+
 import uuid
 import hmac
 import hashlib
@@ -18,9 +26,6 @@ import random
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
-# Adiciona a raiz ao path para garantir que os imports de 'src' funcionem
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
 # Imports de bibliotecas de terceiros
 import uvicorn
 import httpx
@@ -36,16 +41,18 @@ from pydantic import BaseModel
 # Imports dos módulos locais (corrigidos e organizados)
 from src.utils.logger import get_logger
 
-# RNNModelPredictor imports TensorFlow and other heavy libs. Allow
-# skipping that import at process start (useful for lightweight tests)
-# by setting the environment variable SKIP_RNN_IMPORT=1.
+# RNNModelPredictor imports TensorFlow and other heavy libs. It is imported by the
+# background model loader started in `lifespan` (never at module import), and the import
+# can be skipped entirely (lightweight tests) by setting SKIP_RNN_IMPORT=1.
 RNNModelPredictor = None
-if not os.environ.get("SKIP_RNN_IMPORT"):
-    try:
-        from src.model.rnn_predictor import RNNModelPredictor
-    except Exception as _e:
-        # Avoid failing import-time; log later after logger is available
-        print(f"Warning: RNNModelPredictor import skipped due to: {_e}")
+
+
+def _import_rnn_predictor():
+    global RNNModelPredictor
+    if RNNModelPredictor is None and not os.environ.get("SKIP_RNN_IMPORT"):
+        from src.model.rnn_predictor import RNNModelPredictor as _cls
+        RNNModelPredictor = _cls
+    return RNNModelPredictor
 
 ### <<< CORREÇÃO CRÍTICA NOS IMPORTS >>> ###
 # Cada função é importada de seu respectivo módulo.
@@ -53,7 +60,7 @@ if not os.environ.get("SKIP_RNN_IMPORT"):
 SKIP_HEAVY_IMPORTS = bool(os.environ.get('SKIP_HEAVY_IMPORTS'))
 
 if not SKIP_HEAVY_IMPORTS:
-    import yfinance as yf
+    yf = lazy_import('yfinance')  # carregado no primeiro uso (coleta de dados de ações)
     from src.utils.ccxt_utils import get_ccxt_exchange, fetch_crypto_data
     from src.utils.market_data_utils import fetch_btc_dominance, get_market_sentiment
     from src.utils.technical_analysis_utils import calculate_rsi
@@ -88,34 +95,112 @@ AIBANK_CALLBACK_URL = os.environ.get("AIBANK_CALLBACK_URL")
 CALLBACK_SHARED_SECRET = os.environ.get("CALLBACK_SHARED_SECRET")
 
 # --- 3. EVENTOS DE LIFESPAN (Substitui o startup_event) ---
+async def _load_rnn_predictor(app: FastAPI):
+    """Carrega o modelo em background: o app já responde /health enquanto TensorFlow e o modelo carregam."""
+    loop = asyncio.get_running_loop()
+    # Registry de modelos versionados: permite trocar de versão sem reiniciar o container
+    registry = app.state.model_registry
+    if registry is not None and registry.persisted_version is not None:
+        try:
+            await registry.load_active()
+            logger.info(f"✅ Modelo carregado do registry (versão {registry.active_version}).")
+        except Exception as e:
+            logger.error(f"❌ Falha ao carregar versão ativa do registry: {e}", exc_info=True)
+
+    if app.state.rnn_predictor is None:
+        try:
+            PredictorCls = await loop.run_in_executor(None, _import_rnn_predictor)
+            if PredictorCls is None:
+                logger.warning("RNNModelPredictor desabilitado (SKIP_RNN_IMPORT).")
+                return
+            startup_profiler.mark('rnn_predictor_imported')
+            from src.config.config import (SERVING_MODEL_FILENAME as MODEL_FILENAME,
+                                           SERVING_PV_SCALER_FILENAME as PV_SCALER_FILENAME,
+                                           SERVING_IND_SCALER_FILENAME as IND_SCALER_FILENAME)
+            MODEL_DIR = "src/model/"
+
+            predictor = PredictorCls(
+                model_dir=MODEL_DIR,
+                model_filename=MODEL_FILENAME,
+                pv_scaler_filename=PV_SCALER_FILENAME,
+                ind_scaler_filename=IND_SCALER_FILENAME,
+                logger_instance=logger
+            )
+            await predictor.load_model()
+            await _serve_predictor(app, predictor, dict(
+                model_dir=MODEL_DIR, model_filename=MODEL_FILENAME,
+                pv_scaler_filename=PV_SCALER_FILENAME, ind_scaler_filename=IND_SCALER_FILENAME))
+            logger.info("✅ Modelo RNN e scalers carregados com sucesso no estado da aplicação.")
+        except Exception as e:
+            logger.error(f"❌ FALHA CRÍTICA ao carregar modelo RNN na inicialização: {e}", exc_info=True)
+            app.state.rnn_predictor = None
+    startup_profiler.mark('rnn_predictor_loaded')
+
+
+async def _serve_predictor(app: FastAPI, predictor, loader_kwargs: dict):
+    """Coloca `predictor` em serviço: cria o pool de inferência para ele e só então fecha o pool anterior."""
+    previous_pool = app.state.inference_pool
+    app.state.inference_pool = None
+    await _attach_inference_pool(app, predictor, loader_kwargs)
+    app.state.rnn_predictor = predictor # 'app' aqui é o objeto FastAPI passado como argumento
+    if previous_pool is not None:
+        await previous_pool.close()
+
+
+async def _on_registry_activate(app: FastAPI, predictor):
+    """Troca de versão pelo registry: o pool de workers passa a carregar o bundle da nova versão."""
+    registry = app.state.model_registry
+    await _serve_predictor(app, predictor, registry.predictor_kwargs(predictor.model_version))
+
+
+async def _attach_inference_pool(app: FastAPI, predictor, loader_kwargs: dict):
+    """MODEL_WORKERS>0: inferência em processos dedicados (um modelo por worker) em vez do executor padrão."""
+    num_workers = int(os.environ.get("MODEL_WORKERS", "0"))
+    if num_workers <= 0:
+        return
+    try:
+        from src.model.inference_pool import ModelWorkerPool
+        pool = ModelWorkerPool(
+            num_workers=num_workers,
+            loader_kwargs=loader_kwargs,
+            threads_per_worker=int(os.environ.get("MODEL_WORKER_THREADS", "1")),
+            logger_instance=logger
+        )
+        await pool.start()
+        predictor.inference_pool = pool
+        app.state.inference_pool = pool
+        logger.info(f"✅ Pool de inferência iniciado com {num_workers} workers.")
+    except Exception as e:
+        logger.error(f"❌ Falha ao iniciar pool de inferência, usando executor local: {e}", exc_info=True)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Código que roda ANTES da aplicação iniciar
     logger.info("Iniciando ciclo de vida da aplicação...")
+    registry = None
     try:
-        MODEL_DIR = "src/model/"
-        MODEL_FILENAME = "model.h5"
-        PV_SCALER_FILENAME = "price_volume_atr_norm_scaler.joblib"
-        IND_SCALER_FILENAME = "other_indicators_scaler.joblib"
-
-        predictor = RNNModelPredictor(
-            model_dir=MODEL_DIR,
-            model_filename=MODEL_FILENAME,
-            pv_scaler_filename=PV_SCALER_FILENAME,
-            ind_scaler_filename=IND_SCALER_FILENAME,
+        from src.model.model_registry import ModelRegistry
+        registry = ModelRegistry(
+            on_activate=lambda p: _on_registry_activate(app, p),
             logger_instance=logger
         )
-        await predictor.load_model()
-        app.state.rnn_predictor = predictor # 'app' aqui é o objeto FastAPI passado como argumento
-        logger.info("✅ Modelo RNN e scalers carregados com sucesso no estado da aplicação.")
     except Exception as e:
-        logger.error(f"❌ FALHA CRÍTICA ao carregar modelo RNN na inicialização: {e}", exc_info=True)
-        app.state.rnn_predictor = None
+        logger.warning(f"Model registry indisponível: {e}")
+    app.state.model_registry = registry
+    app.state.rnn_predictor = None
+    app.state.inference_pool = None
+    app.state.model_loading_task = asyncio.create_task(_load_rnn_predictor(app))
+    startup_profiler.finish()
     
     yield
     
     # Código que roda DEPOIS da aplicação finalizar
     logger.info("Finalizando ciclo de vida da aplicação.")
+    if not app.state.model_loading_task.done():
+        app.state.model_loading_task.cancel()
+    if app.state.inference_pool is not None:
+        await app.state.inference_pool.close()
 
 
 # --- 4. INICIALIZAÇÃO DO APP FASTAPI ---
@@ -458,8 +543,59 @@ async def dashboard(request: Request):
 @fastapi_app.get("/health")
 async def health_check():
     # CORRIGIDO: Usa 'fastapi_app.state'
-    model_loaded = fastapi_app.state.rnn_predictor is not None
-    return {"status": "healthy", "model_loaded": model_loaded}
+    predictor = getattr(fastapi_app.state, 'rnn_predictor', None)
+    registry = getattr(fastapi_app.state, 'model_registry', None)
+    loading_task = getattr(fastapi_app.state, 'model_loading_task', None)
+    return {
+        "status": "healthy",
+        "model_loaded": predictor is not None,
+        "model_loading": loading_task is not None and not loading_task.done(),
+        "model_version": getattr(predictor, 'model_version', None),
+        "model_registry": registry.health_check() if registry is not None else None,
+        "inference_pool": getattr(predictor, 'inference_pool', None) is not None,
+        "ready_after_s": startup_profiler.report(top=0)['ready_after_s'],
+    }
+
+
+@fastapi_app.get("/health/startup")
+async def startup_report(top: int = 20):
+    """Tempo de import por módulo, fases do startup e duração das tarefas de warm-up."""
+    return startup_profiler.report(top=top)
+
+
+def _get_model_registry():
+    registry = getattr(fastapi_app.state, 'model_registry', None)
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Model registry não disponível")
+    return registry
+
+
+@fastapi_app.get("/api/model/versions", response_class=JSONResponse, dependencies=[Depends(verify_aibank_key)])
+async def list_model_versions():
+    registry = _get_model_registry()
+    return {"active_version": registry.active_version, "versions": registry.list_versions()}
+
+
+@fastapi_app.post("/api/model/activate/{version}", dependencies=[Depends(verify_aibank_key)])
+async def activate_model_version(version: str, background_tasks: BackgroundTasks):
+    """Carrega e aquece a versão em background; a troca só acontece quando ela estiver pronta."""
+    registry = _get_model_registry()
+    try:
+        registry.read_bundle_manifest(version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    background_tasks.add_task(registry.activate, version)
+    return {"status": "loading", "version": version, "active_version": registry.active_version}
+
+
+@fastapi_app.post("/api/model/rollback", dependencies=[Depends(verify_aibank_key)])
+async def rollback_model_version():
+    registry = _get_model_registry()
+    try:
+        predictor = await registry.rollback()
+    except Exception as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "rolled_back", "active_version": predictor.model_version}
 
 
 
@@ -4,6 +4,10 @@ Sistema híbrido que combina estratégias existentes com rede neural
 que aprende e melhora continuamente
 """
 
+# Importado primeiro para que o profiler de startup meça todos os imports seguintes
+from src.utils.startup_profiler import startup_profiler
+startup_profiler.install()  # removido em startup_profiler.finish()
+
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse, HTMLResponse
 import pandas as pd
@@ -25,13 +29,13 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from src.trading.production_system import ProductionTradingSystem
 from src.trading.us_market_system import USMarketAnalyzer, USMarketStrategy
 from src.data.alpha_vantage_loader import USMarketDataManager
-from src.ml.neural_learning_agent import NeuralTradingAgent
 from src.ml.continuous_training import ContinuousLearningSystem
+# NeuralTradingAgent / AdvancedNeuralAgent (TensorFlow) são importados sob demanda
+# pelos componentes que os instanciam, não no import do app.
 
 # Novos imports para evolução 85% ganhos
 from src.evolution.neural_evolution_orchestrator import NeuralEvolutionOrchestrator
 from src.optimization.performance_optimizer import PerformanceOptimizer
-from src.ml.advanced_neural_agent import AdvancedNeuralAgent
 from src.scaling.multi_asset_system import MultiAssetScalingSystem
 
 # Configuração de logging
@@ -81,6 +85,25 @@ class AdaptivePortfolioRequest(BaseModel):
 # SISTEMA INTEGRADO
 # =====================================================
 
+# Ações do NeuralTradingAgent (0=Hold, 1=Buy, 2=Sell)
+NEURAL_ACTIONS = ["HOLD", "BUY", "SELL"]
+
+
+def build_neural_agent():
+    """
+    NEURAL_AGENT=1 cria o NeuralTradingAgent (TensorFlow) e, com ele, o treinador contínuo passa a
+    rodar e a receber as decisões servidas. Padrão: modo mínimo (sem agente, sem treinador).
+    """
+    if os.environ.get("NEURAL_AGENT", "0") != "1":
+        return None
+    try:
+        from src.ml.neural_learning_agent import NeuralTradingAgent
+        return NeuralTradingAgent()
+    except Exception as e:
+        logger.error(f"❌ NEURAL_AGENT=1 mas o agente neural não pôde ser criado; seguindo em modo mínimo: {e}")
+        return None
+
+
 class NeuralEnhancedTradingSystem:
     """
     Sistema de trading que combina:
@@ -96,9 +119,9 @@ class NeuralEnhancedTradingSystem:
         self.us_strategy = USMarketStrategy()
         self.data_manager = USMarketDataManager()
         
-        # Sistema de aprendizado neural
-        self.learning_system = ContinuousLearningSystem()
-        self.neural_agent = None  # Versão mínima
+        # Sistema de aprendizado neural (treino roda em processo separado quando há neural_agent)
+        self.neural_agent = build_neural_agent()  # None = versão mínima
+        self.learning_system = ContinuousLearningSystem(neural_agent=self.neural_agent)
         
         # 🎯 SISTEMA DE EVOLUÇÃO PARA 85% GANHOS
         self.evolution_orchestrator = NeuralEvolutionOrchestrator()
@@ -106,26 +129,23 @@ class NeuralEnhancedTradingSystem:
         self.multi_asset_system = MultiAssetScalingSystem()
         self.evolution_active = False
         
-        # Tenta carregar modelo existente (versão mínima)
-        logger.info("🆕 Modelo neural em modo mínimo - Evolução para 85% disponível")
+        if self.neural_agent is None:
+            logger.info("🆕 Modelo neural em modo mínimo - Evolução para 85% disponível")
         
         # Status do sistema
         self.system_ready = False
-        self.learning_thread = None
         
         logger.info("🚀 Sistema Neural Integrado inicializado com capacidade de evolução")
     
     def start_learning(self):
-        """Inicia aprendizado contínuo"""
-        if not hasattr(self, 'learning_thread') or not self.learning_thread:
+        """Inicia aprendizado contínuo (processo treinador separado; o servidor só enfileira experiências)"""
+        if not self.learning_system.learning_active:
             self.learning_system.start_continuous_training()
             logger.info("🎓 Aprendizado contínuo iniciado")
-            self.learning_thread = True  # Versão mínima
     
     def stop_learning(self):
         """Para aprendizado contínuo"""
-        if hasattr(self, 'learning_thread'):
-            self.learning_thread = False
+        self.learning_system.stop_continuous_training()
         logger.info("🛑 Aprendizado contínuo parado")
     
     async def analyze_with_neural_enhancement(self, symbol: str, use_neural: bool = True) -> Dict:
@@ -167,11 +187,17 @@ class NeuralEnhancedTradingSystem:
             # Análise neural (se habilitada)
             neural_signal = "HOLD"
             neural_confidence = 0.5
+            state = None
             
-            if use_neural:
-                # Neural em modo mínimo - usa estratégia Equilibrada Pro
-                neural_signal = equilibrada_signal
-                neural_confidence = equilibrada_confidence
+            if use_neural and self.neural_agent is not None:
+                state = self.neural_agent.preprocess_market_data(df)
+                action, neural_confidence = self.neural_agent.act(state)
+                neural_signal = NEURAL_ACTIONS[int(action)]
+                neural_confidence = float(neural_confidence)
+            elif use_neural:
+                # Neural em modo mínimo - repete o sinal do expert
+                neural_signal = expert_signal
+                neural_confidence = expert_confidence
             
             # Decisão final adaptativa
             final_signal, reasoning = self._adaptive_decision(
@@ -179,6 +205,16 @@ class NeuralEnhancedTradingSystem:
                 neural_signal, neural_confidence, symbol
             )
             
+            # Decisão servida vira experiência para o treinador contínuo (na próxima análise do símbolo)
+            if state is not None:
+                from_expert = final_signal == expert_signal
+                self.learning_system.record_decision(
+                    symbol, state, NEURAL_ACTIONS.index(final_signal),
+                    expert_confidence if from_expert else neural_confidence,
+                    expert_strategy if from_expert else "neural",
+                    float(df['close'].iloc[-1])
+                )
+            
             return {
                 "symbol": symbol,
                 "expert_signal": expert_signal,
@@ -258,12 +294,19 @@ neural_trading_system = NeuralEnhancedTradingSystem()
 # ENDPOINTS
 # =====================================================
 
+@app.middleware("http")
+async def adopt_published_weights(request, call_next):
+    """Entre requests: adota os pesos mais novos publicados pelo treinador (troca atômica)"""
+    neural_trading_system.learning_system.adopt_latest_weights()
+    return await call_next(request)
+
 @app.on_event("startup")
 async def startup_event():
     """Inicialização do sistema"""
     logger.info("🚀 Iniciando Sistema Neural Integrado")
     neural_trading_system.start_learning()
     neural_trading_system.system_ready = True
+    startup_profiler.finish()
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -278,9 +321,15 @@ async def health_check():
         "status": "healthy",
         "system_ready": neural_trading_system.system_ready,
         "neural_agent_available": neural_trading_system.neural_agent is not None,
-        "learning_active": neural_trading_system.learning_thread is not None
+        "learning_active": neural_trading_system.learning_system.learning_active,
+        "ready_after_s": startup_profiler.report(top=0)['ready_after_s']
     }
 
+@app.get("/health/startup")
+async def startup_report(top: int = 20):
+    """Tempo de import por módulo e fases do startup"""
+    return startup_profiler.report(top=top)
+
 @app.get("/", response_class=HTMLResponse)
 async def dashboard():
     """Dashboard principal"""
@@ -1,9 +1,28 @@
+import os
+import json
+import shutil
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from pathlib import Path
 
-def load_and_preprocess_data(filepath, window_size=30, features=None):
+from src.utils.windowed_dataset import WindowedDataset, affine_from_scaler
+
+DEFAULT_FEATURES = ['Open', 'Close', 'Volume', 'Asset Turnover', 'Current Ratio',
+                    'Debt/Equity Ratio', 'Gross Margin', 'Net Profit Margin', 'ROA - Return On Assets']
+
+
+def load_windowed_dataset(filepath, window_size=30, features=None):
+    """
+    Janelas por Ticker sobre um único array contíguo (linhas x features), sem copiar cada janela.
+    A normalização MinMax por Ticker é aplicada on-the-fly em cada lote (scale/shift por segmento).
+    Retorna (dataset, ticker_names, scalers); o Ticker de cada janela é ticker_names[dataset.segment_ids].
+    """
     # 1. Carregar os dados
     df = pd.read_csv(filepath)
     print("🔍 Dados carregados:", df.shape)
@@ -14,42 +33,163 @@ def load_and_preprocess_data(filepath, window_size=30, features=None):
 
     # 3. Seleção de colunas
     if features is None:
-        features = ['Open', 'Close', 'Volume', 'Asset Turnover', 'Current Ratio',
-                    'Debt/Equity Ratio', 'Gross Margin', 'Net Profit Margin', 'ROA - Return On Assets']
+        features = DEFAULT_FEATURES
 
     df = df[['Ticker', 'Date'] + features].dropna()
 
-    # 4. Normalização por Ticker
-    scalers = {}
-    grouped = df.groupby('Ticker')
-    sequences = []
-    tickers = []
+    # 4. Normalização por Ticker (só os parâmetros; os dados ficam crus no array)
+    values = df[features].to_numpy(dtype=np.float32)
+    closes = df['Close'].to_numpy()  # Para prever retorno futuro
+    ticker_names, lengths = np.unique(df['Ticker'].to_numpy(), return_counts=True)  # já ordenado por Ticker
 
-    for ticker, group in grouped:
-        scaler = MinMaxScaler()
-        values = scaler.fit_transform(group[features])
+    scalers = {}
+    scales, shifts = [], []
+    begin = 0
+    for ticker, length in zip(ticker_names, lengths):
+        scaler = MinMaxScaler().fit(values[begin:begin + length])
         scalers[ticker] = scaler
+        scale, shift = affine_from_scaler(scaler)
+        scales.append(scale)
+        shifts.append(shift)
+        begin += length
 
-        closes = group['Close'].values  # Para prever retorno futuro
+    # 5. Janela deslizante: rótulo = preço após a janela (label_offset=1)
+    dataset = WindowedDataset.from_segments(values, closes, lengths, window_size, label_offset=1,
+                                            scale=np.stack(scales) if scales else None,
+                                            shift=np.stack(shifts) if shifts else None)
+    print(f"✅ Total de sequências: {len(dataset)} | Formato de cada entrada: {dataset.element_shape} "
+          f"| {dataset.nbytes / 1e6:.1f} MB em memória")
+    return dataset, ticker_names, scalers
 
-        # 5. Janela deslizante para sequências temporais
-        for i in range(len(values) - window_size):
-            seq = values[i:i+window_size]
-            label = closes[i+window_size]  # Preço após a janela
-            sequences.append(seq)
-            tickers.append(ticker)
 
+def load_and_preprocess_data(filepath, window_size=30, features=None):
+    dataset, ticker_names, scalers = load_windowed_dataset(filepath, window_size, features)
+    X, _ = dataset.materialize()
+    tickers = ticker_names[dataset.segment_ids].tolist()
+    print(f"✅ Total de sequências geradas: {X.shape[0]} | Formato da entrada: {X.shape}")
+    return X, tickers, scalers
 
 
-    X = np.array([s for s, _ in sequences])
-    y = np.array([l for _, l in sequences])
+# --- Pipeline em disco: leitura em chunks, normalização por Ticker em paralelo, saída em memmap ---
+#
+# out_dir/
+#   features.npy  float32 (linhas, features) já normalizado por Ticker, Tickers contíguos
+#   closes.npy    float64 (linhas,)  Close original (rótulo = preço após a janela)
+#   dates.npy     int64   (linhas,)  Date em ns
+#   index.csv     ticker, offset, length (linhas de cada Ticker em features.npy)
+#   scalers.joblib  {ticker: MinMaxScaler}
+#   meta.json     features, n_rows, ...
+# As janelas não são gravadas: load_preprocessed monta um WindowedDataset sobre features.npy.
 
- 
+def _spill_chunks(filepath, features, spill_dir, chunksize):
+    """Passo 1: lê só as colunas usadas, em chunks, e anexa as linhas de cada Ticker em arquivos binários."""
+    ticker_ids, counts = {}, Counter()
+    reader = pd.read_csv(filepath, usecols=['Ticker', 'Date'] + features, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk.dropna()
+        if chunk.empty:
+            continue
+        tickers = chunk['Ticker'].astype(str).to_numpy()
+        values = chunk[features].to_numpy(dtype=np.float64)
+        dates = pd.to_datetime(chunk['Date']).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        order = np.argsort(tickers, kind='stable')
+        names, first = np.unique(tickers[order], return_index=True)
+        bounds = np.append(first, len(order))
+        for name, begin, end in zip(names, bounds[:-1], bounds[1:]):
+            rows = order[begin:end]
+            tid = ticker_ids.setdefault(name, len(ticker_ids))
+            with open(os.path.join(spill_dir, f'{tid}.values'), 'ab') as f:
+                values[rows].tofile(f)
+            with open(os.path.join(spill_dir, f'{tid}.dates'), 'ab') as f:
+                dates[rows].tofile(f)
+            counts[name] += int(end - begin)
+    return ticker_ids, counts
+
+
+def _normalize_ticker(task):
+    """Passo 2 (processo do pool): ordena por data, fita o scaler do Ticker e grava sua fatia nos memmaps."""
+    ticker, tid, spill_dir, out_dir, n_features, close_idx, offset, length = task
+    values = np.fromfile(os.path.join(spill_dir, f'{tid}.values'), dtype=np.float64).reshape(-1, n_features)
+    dates = np.fromfile(os.path.join(spill_dir, f'{tid}.dates'), dtype=np.int64)
+    order = np.argsort(dates, kind='stable')
+    values, dates = values[order], dates[order]
+
+    scaler = MinMaxScaler().fit(values)
+    out = slice(offset, offset + length)
+    for name, data in (('features.npy', scaler.transform(values)), ('closes.npy', values[:, close_idx]),
+                       ('dates.npy', dates)):
+        target = np.load(os.path.join(out_dir, name), mmap_mode='r+')
+        target[out] = data
+        target.flush()
+        del target
+    return ticker, scaler
+
+
+def preprocess_to_memmap(filepath, out_dir, features=None, chunksize=200_000, workers=None):
+    """
+    Pré-processamento com RAM limitada: o passo 1 guarda no máximo um chunk do CSV em memória,
+    o passo 2 um Ticker por processo. Retorna o DataFrame de índice (ticker, offset, length).
+    """
+    features = list(features or DEFAULT_FEATURES)
+    if 'Close' not in features:
+        raise ValueError("'Close' precisa estar em features (é o rótulo das janelas)")
+    out_dir = Path(out_dir)
+    spill_dir = out_dir / '_spill'
+    shutil.rmtree(spill_dir, ignore_errors=True)
+    spill_dir.mkdir(parents=True)
+
+    try:
+        ticker_ids, counts = _spill_chunks(filepath, features, spill_dir, chunksize)
+        tickers = sorted(ticker_ids)  # mesma ordem do groupby('Ticker')
+        lengths = np.array([counts[t] for t in tickers], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        n_rows = int(lengths.sum())
+        print(f"🔍 {n_rows} linhas de {len(tickers)} Tickers lidas em chunks de {chunksize}")
+
+        np.lib.format.open_memmap(out_dir / 'features.npy', mode='w+', dtype=np.float32, shape=(n_rows, len(features)))
+        np.lib.format.open_memmap(out_dir / 'closes.npy', mode='w+', dtype=np.float64, shape=(n_rows,))
+        np.lib.format.open_memmap(out_dir / 'dates.npy', mode='w+', dtype=np.int64, shape=(n_rows,))
+
+        tasks = [(t, ticker_ids[t], str(spill_dir), str(out_dir), len(features), features.index('Close'), int(o), int(n))
+                 for t, o, n in zip(tickers, offsets, lengths)]
+        workers = workers or os.cpu_count() or 1
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                scalers = dict(pool.map(_normalize_ticker, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+        else:
+            scalers = dict(map(_normalize_ticker, tasks))
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    index = pd.DataFrame({'ticker': tickers, 'offset': offsets, 'length': lengths})
+    index.to_csv(out_dir / 'index.csv', index=False)
+    joblib.dump(scalers, out_dir / 'scalers.joblib')
+    (out_dir / 'meta.json').write_text(json.dumps({'source': str(filepath), 'features': features,
+                                                   'n_rows': n_rows, 'n_tickers': len(tickers)}, indent=2))
+    print(f"✅ Pré-processamento salvo em {out_dir} ({workers} processos)")
+    return index
+
+
+def load_preprocessed(out_dir, window_size=30):
+    """Abre a saída de preprocess_to_memmap sem carregá-la: (dataset, ticker_names, scalers)."""
+    out_dir = Path(out_dir)
+    index = pd.read_csv(out_dir / 'index.csv', keep_default_na=False, dtype={'ticker': str})
+    features = np.load(out_dir / 'features.npy', mmap_mode='r')
+    closes = np.load(out_dir / 'closes.npy', mmap_mode='r')
+    scalers = joblib.load(out_dir / 'scalers.joblib')
+    dataset = WindowedDataset.from_segments(features, closes, index['length'].to_numpy(), window_size, label_offset=1)
+    return dataset, index['ticker'].to_numpy(), scalers
 
-    X = np.array(sequences)
-    print(f"✅ Total de sequências geradas: {X.shape[0]} | Formato da entrada: {X.shape}")
-    return X, tickers, scalers
 
 if __name__ == "__main__":
-    filepath = Path("sp500_ratios.csv")
-    X, tickers, scalers = load_and_preprocess_data(filepath)
+    parser = argparse.ArgumentParser(description="Pré-processa o sp500_ratios.csv em memmaps por Ticker")
+    parser.add_argument('--csv', default="sp500_ratios.csv")
+    parser.add_argument('--out-dir', default=os.path.join('out', 'sp500_preprocessed'))
+    parser.add_argument('--window', type=int, default=30)
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, default=None, help='padrão: todos os núcleos')
+    args = parser.parse_args()
+
+    preprocess_to_memmap(Path(args.csv), args.out_dir, chunksize=args.chunksize, workers=args.workers)
+    dataset, tickers, scalers = load_preprocessed(args.out_dir, args.window)
+    print(f"✅ Total de sequências: {len(dataset)} | Formato de cada entrada: {dataset.element_shape}")
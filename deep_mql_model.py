@@ -3,13 +3,15 @@ import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
+
+from src.utils.windowed_dataset import WindowedDataset
 # (Potentially add more imports for other model types or libraries later)
 
-def preprocess_data_for_deep_mql(df: pd.DataFrame, look_back: int = 60, features_cols=['Close', 'Volume'], target_col='Close'):
+def windowed_dataset_for_deep_mql(df: pd.DataFrame, look_back: int = 60, features_cols=['Close', 'Volume'], target_col='Close'):
     """
-    Prepares data for a deep learning model (e.g., LSTM) for MQL-like tasks.
-    - Scales features.
-    - Creates sequences for time series forecasting.
+    Windowed variant of preprocess_data_for_deep_mql: keeps the scaled data as one
+    (rows x features) array and builds each batch of look_back windows on demand.
+    The label of each window is the scaled target of the step right after it.
     """
     df_copy = df.copy()
     
@@ -47,12 +49,21 @@ def preprocess_data_for_deep_mql(df: pd.DataFrame, look_back: int = 60, features
             target_idx_in_scaled = 0
 
 
-    X, y = [], []
-    for i in range(look_back, len(scaled_data)):
-        X.append(scaled_data[i-look_back:i])
-        y.append(scaled_data[i, target_idx_in_scaled]) # Predicting the target column
-        
-    return np.array(X), np.array(y), scaler, df_copy[all_cols].columns.tolist()
+    # Window i covers scaled_data[i:i+look_back]; its label is scaled_data[i+look_back, target]
+    dataset = WindowedDataset(scaled_data, np.ascontiguousarray(scaled_data[:, target_idx_in_scaled]),
+                              window_size=look_back, label_offset=1)
+    return dataset, scaler, df_copy[all_cols].columns.tolist()
+
+def preprocess_data_for_deep_mql(df: pd.DataFrame, look_back: int = 60, features_cols=['Close', 'Volume'], target_col='Close'):
+    """
+    Prepares data for a deep learning model (e.g., LSTM) for MQL-like tasks.
+    - Scales features.
+    - Creates sequences for time series forecasting.
+    Materializes every window; prefer windowed_dataset_for_deep_mql for training.
+    """
+    dataset, scaler, columns = windowed_dataset_for_deep_mql(df, look_back, features_cols, target_col)
+    X, y = dataset.materialize()
+    return X, y, scaler, columns
 
 def create_deep_mql_model(input_shape):
     """
@@ -1,71 +1,112 @@
-from fastapi import APIRouter
+import os
+import time
+import asyncio
+import threading
 from pathlib import Path
+from typing import Optional
+
+import numpy as np
 import pandas as pd
-import re
+from fastapi import APIRouter, HTTPException
+
+from src.utils.results_io import read_equity, read_metadata
+from src.utils.results_store import DEFAULT_DB, RUN_COLUMNS, ResultsStore
 
 router = APIRouter()
 
+LOGS_DIR = Path('logs')
+INDEX_PATH = os.getenv('BACKTEST_INDEX_PATH', DEFAULT_DB)
+# Arquivos escritos fora do índice (código antigo, cópias manuais) são absorvidos no máximo a cada
+# SYNC_INTERVAL_S; writers atuais registram suas runs ao salvar, então as respostas vêm só do índice.
+SYNC_INTERVAL_S = float(os.getenv('BACKTEST_INDEX_SYNC_S', '60'))
+MAX_LIMIT = 500
+
+_STORE: Optional[ResultsStore] = None
+_STORE_LOCK = threading.Lock()
+_last_sync = 0.0
+
+
+def get_store() -> ResultsStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = ResultsStore(INDEX_PATH)
+    return _STORE
 
-def _read_last_equity(csv_path: Path):
-    try:
-        df = pd.read_csv(csv_path, index_col=0)
-        # If single-column equity series, get last value
-        if df.shape[1] == 1:
-            return float(df.iloc[-1, 0])
-        # otherwise try first column
-        return float(df.iloc[-1, 0])
-    except Exception:
-        return None
+
+def _sync_logs():
+    global _last_sync
+    _last_sync = time.time()
+    get_store().sync_directory(LOGS_DIR)
+
+
+async def _maybe_sync(force: bool = False):
+    if force or time.time() - _last_sync >= SYNC_INTERVAL_S:
+        await asyncio.to_thread(_sync_logs)
 
 
 @router.get('/backtest/status')
-async def backtest_status():
+async def backtest_status(refresh: bool = False):
     """Return the latest tuned backtest message and end capital.
 
-    Searches the `logs/` directory for files matching
-    `backtest_ethusd_2y_1h_tuned_*_equity.csv` and returns a message like:
-    "Tuned run saved to logs\backtest_ethusd_2y_1h_tuned_20251017T221236Z_* . End capital: 21924.54"
+    Answers from the results index (src/utils/results_store.py) instead of globbing `logs/` and
+    reading the equity CSV on every call; `refresh=true` forces a rescan of `logs/` first.
+    Message format is unchanged:
+    "Tuned run saved to logs\\backtest_ethusd_2y_1h_tuned_20251017T221236Z_* . End capital: 21924.54"
     """
-    logs_dir = Path('logs')
-    if not logs_dir.exists():
-        return {
-            'message': 'No logs directory found',
-            'end_capital': None,
-        }
-
-    pattern = 'backtest_ethusd_2y_1h_tuned_*_equity.csv'
-    files = sorted(logs_dir.glob(pattern), key=lambda p: p.stat().st_mtime, reverse=True)
-    if not files:
+    await _maybe_sync(refresh)
+    latest = get_store().latest_run(strategy='tuned')
+    if latest is None:
         return {
             'message': 'No tuned backtest equity files found',
             'end_capital': None,
         }
 
-    latest = files[0]
-    last_val = _read_last_equity(latest)
-    if last_val is None:
-        # fallback: try to parse report txt file with similar prefix
-        prefix = str(latest).rsplit('_equity.csv', 1)[0]
-        report = Path(prefix + '_report.txt')
-        if report.exists():
-            try:
-                txt = report.read_text(encoding='utf-8')
-                m = re.search(r'End capital:\s*([0-9,.]+)', txt)
-                if m:
-                    last_val = float(m.group(1).replace(',', ''))
-            except Exception:
-                last_val = None
-
-    prefix_display = str(latest.parent / latest.stem).replace('/', '\\')
+    last_val = latest['end_capital']
+    prefix_display = str(Path(latest['equity_path']).parent / latest['run_key']).replace('/', '\\')
     if last_val is not None:
         message = f"Tuned run saved to {prefix_display}_* . End capital: {last_val:.2f}"
     else:
         message = f"Tuned run saved to {prefix_display}_* . End capital: unknown"
-    report_path = None
-    # report path if exists
-    prefix = str(latest).rsplit('_equity.csv', 1)[0]
-    report = Path(prefix + '_report.txt')
-    if report.exists():
-        report_path = str(report)
-
-    return {'message': message, 'end_capital': last_val, 'report_path': report_path}
+
+    return {'message': message, 'end_capital': last_val, 'report_path': latest['report_path'],
+            'run_id': latest['run_id'], 'sharpe': latest['sharpe'], 'max_drawdown_pct': latest['max_drawdown_pct']}
+
+
+@router.get('/backtest/runs')
+async def list_backtest_runs(asset: Optional[str] = None, timeframe: Optional[str] = None,
+                             strategy: Optional[str] = None, status: Optional[str] = None,
+                             sweep_id: Optional[str] = None, order_by: str = 'finished_at',
+                             descending: bool = True, limit: int = 50, offset: int = 0):
+    """List indexed runs (orchestrator sweeps and backtests under `logs/`), filtered and sorted."""
+    if order_by not in RUN_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"order_by inválido: {order_by}")
+    await _maybe_sync()
+    runs = get_store().list_runs(order_by=order_by, descending=descending, limit=max(1, min(limit, MAX_LIMIT)),
+                                 offset=max(0, offset), asset=asset, timeframe=timeframe, strategy=strategy,
+                                 status=status, sweep_id=sweep_id)
+    return {'count': len(runs), 'runs': runs}
+
+
+@router.get('/backtest/runs/{run_id:path}/equity')
+async def get_backtest_run_equity(run_id: str, max_points: int = 1000):
+    """Equity curve of an indexed run (Parquet/Arrow/CSV via src/utils/results_io.py), downsampled to `max_points`."""
+    run = get_store().get_run(run_id)
+    if run is None or not run.get('equity_path') or not Path(run['equity_path']).exists():
+        raise HTTPException(status_code=404, detail=f"Equity não encontrada: {run_id}")
+    equity = await asyncio.to_thread(read_equity, run['equity_path'])
+    # amostra uniforme que sempre inclui o primeiro e o último ponto
+    keep = np.unique(np.linspace(0, len(equity) - 1, min(len(equity), max(2, max_points))).round().astype(int))
+    sampled = equity.iloc[keep] if len(equity) else equity
+    timestamps = [str(t) for t in sampled.index] if isinstance(sampled.index, pd.DatetimeIndex) else None
+    return {'run_id': run_id, 'points': len(equity), 'timestamps': timestamps,
+            'equity': sampled.astype(float).tolist(), 'metadata': read_metadata(run['equity_path'])}
+
+
+@router.get('/backtest/runs/{run_id:path}')
+async def get_backtest_run(run_id: str):
+    run = get_store().get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail=f"Run não encontrada: {run_id}")
+    return run
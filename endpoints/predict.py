@@ -1,18 +1,40 @@
 import os
+import asyncio
+import threading
 from fastapi import APIRouter, Security, Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 import jwt
 import numpy as np
-import tensorflow as tf
-from models.deep_portfolio import DeepPortfolioAI
+from src.utils.startup_profiler import lazy_import
 
+# TensorFlow and the model are loaded on first use (or by the app's background warm-up via
+# `warmup()`), so importing this router does not block the app from answering /health.
+tf = lazy_import('tensorflow')
 
 router = APIRouter()
 security = HTTPBearer()
-MODEL = DeepPortfolioAI(num_assets=10)
+MODEL = None
+_MODEL_LOCK = threading.Lock()
 SECRET_KEY = os.getenv("SECRET_KEY")
 
+
+def get_model():
+    """Build DeepPortfolioAI once (thread-safe); subsequent calls return the cached instance."""
+    global MODEL
+    if MODEL is None:
+        with _MODEL_LOCK:
+            if MODEL is None:
+                from models.deep_portfolio import DeepPortfolioAI
+                MODEL = DeepPortfolioAI(num_assets=10)
+    return MODEL
+
+
+def warmup():
+    """Import TensorFlow and build the model; intended for a background warm-up task."""
+    return get_model()
+
+
 class PredictionRequest(BaseModel):
     market_data: list
     news_data: list
@@ -29,8 +51,12 @@ async def predict(
     user=Depends(verify_jwt)
 ):
     try:
+        model = MODEL
+        if model is None:
+            loop = asyncio.get_running_loop()
+            model = await loop.run_in_executor(None, get_model)
         market_tensor = tf.convert_to_tensor(request.market_data, dtype=tf.float32)
-        prediction = MODEL([market_tensor, request.news_data])
+        prediction = model([market_tensor, request.news_data])
         return {
             "success": True,
             "prediction": prediction.numpy().tolist(),
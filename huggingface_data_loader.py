@@ -1,24 +1,51 @@
-import pandas as pd
-from zipfile import ZipFile
 import os
+import argparse
+import logging
+
+from src.data.sp500_parquet import convert_csv_to_parquet
 
 # Caminho local do cache do Hugging Face
 hf_cache_path = os.path.expanduser("~/.cache/huggingface/hub/datasets--pmoe7--SP_500_Stocks_Data-ratios_news_price_10_yrs/snapshots")
 
-# Descobre snapshot baixado
-snapshot_dir = os.listdir(hf_cache_path)[0]
-base_path = os.path.join(hf_cache_path, snapshot_dir)
 
-# Carrega os dados de preços + múltiplos fundamentalistas
-ratios_path = os.path.join(base_path, "sp500_daily_ratios_20yrs.zip")
-with ZipFile(ratios_path, 'r') as zip_ref:
-    zip_ref.extractall("data/")
-ratios_df = pd.read_csv("data/sp500_daily_ratios_20yrs.csv")
+def _export_csv(parquet_dir, csv_path, chunk_rows=250_000):
+    """Compatibilidade: gera o CSV antigo a partir do Parquet, em lotes (sem carregar tudo)."""
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(parquet_dir, format='parquet', partitioning='hive')
+    header = True
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        for batch in dataset.to_batches(batch_size=chunk_rows):
+            batch.to_pandas().drop(columns=['year']).to_csv(f, index=False, header=header)
+            header = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte os datasets S&P500 do Hugging Face para Parquet particionado")
+    parser.add_argument('--out-dir', default=os.path.join('data', 'parquet'))
+    parser.add_argument('--chunksize', type=int, default=250_000)
+    parser.add_argument('--also-csv', action='store_true',
+                        help='também grava data/sp500_ratios.csv e data/sp500_news.csv (formato antigo)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    # Descobre snapshot baixado
+    snapshot_dir = os.listdir(hf_cache_path)[0]
+    base_path = os.path.join(hf_cache_path, snapshot_dir)
+
+    # Preços + múltiplos fundamentalistas: lido direto de dentro do zip, sem extrair
+    ratios_path = os.path.join(base_path, "sp500_daily_ratios_20yrs.zip")
+    ratios_dir = os.path.join(args.out_dir, "sp500_ratios")
+    convert_csv_to_parquet(ratios_path, ratios_dir, chunksize=args.chunksize)
+
+    # Notícias e sentimentos
+    news_path = os.path.join(base_path, "sp500_news_290k_articles.csv")
+    news_dir = os.path.join(args.out_dir, "sp500_news")
+    convert_csv_to_parquet(news_path, news_dir, chunksize=args.chunksize)
+
+    if args.also_csv:
+        _export_csv(ratios_dir, os.path.join("data", "sp500_ratios.csv"))
+        _export_csv(news_dir, os.path.join("data", "sp500_news.csv"))
 
-# Carrega os dados de notícias e sentimentos
-news_path = os.path.join(base_path, "sp500_news_290k_articles.csv")
-news_df = pd.read_csv(news_path)
 
-# Salva para uso futuro
-ratios_df.to_csv("data/sp500_ratios.csv", index=False)
-news_df.to_csv("data/sp500_news.csv", index=False)
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,11 @@
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.layers import LSTM, Dense, Conv1D, MultiHeadAttention
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import gym
 from gym import spaces
 
 class DeepPortfolioAI(tf.keras.Model):
-    def __init__(self, num_assets, sequence_length=60):
+    def __init__(self, num_assets, sequence_length=60, sentiment_service=None):
         super(DeepPortfolioAI, self).__init__()
         
         # Parâmetros do modelo
@@ -29,9 +28,11 @@ class DeepPortfolioAI(tf.keras.Model):
         self.dense2 = Dense(128, activation='relu')
         self.output_layer = Dense(num_assets, activation='softmax')
         
-        # Inicializar tokenizer e modelo de sentimento
-        self.tokenizer = AutoTokenizer.from_pretrained('finbert-tone')
-        self.sentiment_model = AutoModelForSequenceClassification.from_pretrained('finbert-tone')
+        # Sentimento: embeddings em lote com cache (src/model/news_sentiment.py); na predição é só leitura
+        if sentiment_service is None:
+            from src.model.news_sentiment import NewsSentimentService
+            sentiment_service = NewsSentimentService.open()  # yiyanghkust/finbert-tone (DEFAULT_MODEL_NAME)
+        self.sentiment_service = sentiment_service
 
     def call(self, inputs):
         market_data, news_data = inputs
@@ -57,9 +58,9 @@ class DeepPortfolioAI(tf.keras.Model):
         return self.output_layer(x)
     
     def _process_news(self, news_data):
-        inputs = self.tokenizer(news_data, return_tensors="pt", padding=True, truncation=True)
-        sentiment_scores = self.sentiment_model(**inputs).logits
-        return tf.convert_to_tensor(sentiment_scores.detach().numpy())
+        # Manchetes já vistas vêm do cache; só as novas passam pelo modelo, em um único lote
+        sentiment_scores = self.sentiment_service.embed_texts(list(news_data))
+        return tf.convert_to_tensor(sentiment_scores)
 
 class PortfolioEnvironment(gym.Env):
     def __init__(self, data, initial_balance=100000):
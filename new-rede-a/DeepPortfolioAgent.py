@@ -41,6 +41,8 @@ class AssetProcessor(tf.keras.Model):
         self.dropout_lstm1 = Dropout(dropout_rate, name="asset_lstm1_dropout")
         self.lstm2 = LSTM(lstm_units2, return_sequences=False, name="asset_lstm2_final")
         self.dropout_lstm2 = Dropout(dropout_rate, name="asset_lstm2_dropout")
+        # Criada uma vez aqui: call() roda dentro de um tf.function e não pode criar variáveis ao retraçar
+        self.output_norm = LayerNormalization(epsilon=1e-6, name="asset_output_layernorm")
 
     def call(self, inputs, training=False):
         x = self.conv1(inputs)
@@ -51,7 +53,7 @@ class AssetProcessor(tf.keras.Model):
         x = self.dropout_lstm1(x, training=training)
         x = self.lstm2(x, training=training)
         x_processed_asset = self.dropout_lstm2(x, training=training)
-        x_processed_asset = LayerNormalization(epsilon=1e-6)(x_processed_asset) # Normalize output
+        x_processed_asset = self.output_norm(x_processed_asset) # Normalize output
         return x_processed_asset
 
     def get_config(self):
@@ -80,10 +82,10 @@ class DeepPortfolioAgentNetwork(tf.keras.Model):
                  output_latent_features=False, **kwargs):
         super(DeepPortfolioAgentNetwork, self).__init__(name="deep_portfolio_agent_network", **kwargs)
         
-        self.num_assets = num_assets
-        self.sequence_length = sequence_length
-        self.num_features_per_asset = num_features_per_asset
-        self.asset_lstm_output_dim = asset_lstm_units2
+        self.num_assets = int(num_assets)
+        self.sequence_length = int(sequence_length)
+        self.num_features_per_asset = int(num_features_per_asset)
+        self.asset_lstm_output_dim = int(asset_lstm_units2)
 
         self.asset_processor = AssetProcessor(
             sequence_length=self.sequence_length, num_features=self.num_features_per_asset,
@@ -120,21 +122,23 @@ class DeepPortfolioAgentNetwork(tf.keras.Model):
         self.dropout2 = Dropout(final_dropout, name="final_dropout2")
         self.output_allocation = Dense(self.num_assets, activation='softmax', name="portfolio_allocation_output")
 
+    @tf.function(reduce_retracing=True)
+    def _process_assets(self, market_data_flat, training=False):
+        # (batch, window, num_assets*features) -> (batch*num_assets, window, features): mesma fatia
+        # [i*features:(i+1)*features] por ativo que o antigo loop, mas o AssetProcessor roda uma única vez.
+        batch_size = tf.shape(market_data_flat)[0]
+        window = tf.shape(market_data_flat)[1]
+        x = tf.reshape(market_data_flat, [batch_size, window, self.num_assets, self.num_features_per_asset])
+        x = tf.transpose(x, [0, 2, 1, 3])  # (batch, num_assets, window, features)
+        x = tf.reshape(x, [batch_size * self.num_assets, window, self.num_features_per_asset])
+        processed = self.asset_processor(x, training=training)  # (batch*num_assets, asset_lstm_output_dim)
+        return tf.reshape(processed, [batch_size, self.num_assets, self.asset_lstm_output_dim])
+
     def call(self, inputs, training=False):
         # inputs shape: (batch_size, sequence_length, num_assets * num_features_per_asset)
         market_data_flat = inputs 
         
-        asset_representations_list = []
-        for i in range(self.num_assets):
-            start_idx = i * self.num_features_per_asset
-            end_idx = (i + 1) * self.num_features_per_asset
-            current_asset_data = market_data_flat[:, :, start_idx:end_idx]
-            # current_asset_data = tf.debugging.check_numerics(current_asset_data, message=f"NaN/Inf found in current_asset_data for asset {i}") # Desabilitado para produção
-            processed_asset_representation = self.asset_processor(current_asset_data, training=training)
-            # processed_asset_representation = tf.debugging.check_numerics(processed_asset_representation, message=f"NaN/Inf found in processed_asset_representation for asset {i}") # Desabilitado para produção
-            asset_representations_list.append(processed_asset_representation)
-            
-        stacked_asset_features = tf.stack(asset_representations_list, axis=1)
+        stacked_asset_features = self._process_assets(market_data_flat, training=training)
         
         attention_output = self.attention(
             query=stacked_asset_features, value=stacked_asset_features, key=stacked_asset_features,
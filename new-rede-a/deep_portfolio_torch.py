@@ -1,13 +1,13 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from transformers import AutoTokenizer, AutoModel # Usar AutoModel para obter embeddings
 from typing import List
 
 from config import *
 
 class SingleAssetProcessor(nn.Module):
-    def __init__(self, num_features_per_asset, cnn_filters1, cnn_filters2, lstm_units1, lstm_units2, dropout_rate):
+    def __init__(self, num_features_per_asset, cnn_filters1, cnn_filters2, lstm_units1, lstm_units2, dropout_rate,
+                 output_norm_eps=None):
         super().__init__()
         self.conv1 = nn.Conv1d(num_features_per_asset, cnn_filters1, kernel_size=3, padding=1)
         self.dropout_cnn1 = nn.Dropout(dropout_rate)
@@ -17,6 +17,8 @@ class SingleAssetProcessor(nn.Module):
         
         self.lstm1 = nn.LSTM(input_size=cnn_filters2, hidden_size=lstm_units1, num_layers=1, batch_first=True, bidirectional=True)
         self.lstm2 = nn.LSTM(input_size=lstm_units1 * 2, hidden_size=lstm_units2, num_layers=1, batch_first=True)
+        # LayerNorm na saída, como o AssetProcessor do Keras (opcional para não mudar o state_dict dos modelos existentes)
+        self.output_norm = nn.LayerNorm(lstm_units2, eps=output_norm_eps) if output_norm_eps is not None else None
 
     def forward(self, x):
         # x: (batch, seq_len, num_features_per_asset)
@@ -29,8 +31,10 @@ class SingleAssetProcessor(nn.Module):
         
         lstm1_out, _ = self.lstm1(x)
         _, (h_n, _) = self.lstm2(lstm1_out)
-        
-        return h_n.squeeze(0)  # (batch, lstm_units2)
+        h_n = h_n.squeeze(0)  # (batch, lstm_units2)
+        if self.output_norm is not None:
+            h_n = self.output_norm(h_n)
+        return h_n
 
 class DeepPortfolioAgentNetworkTorch(nn.Module):
     def __init__(self, num_assets, sequence_length, num_features_per_asset,
@@ -38,23 +42,35 @@ class DeepPortfolioAgentNetworkTorch(nn.Module):
                  asset_lstm_units1, asset_lstm_units2, asset_dropout,
                  mha_num_heads, mha_key_dim_divisor,
                  final_dense_units1, final_dense_units2, final_dropout,
-                 output_latent_features=False, use_sentiment_analysis=False):
+                 output_latent_features=False, use_sentiment_analysis=False,
+                 fold_assets_into_batch=True, latent_activation=None,
+                 asset_output_norm=False, layer_norm_eps=1e-5):
         super().__init__()
         self.num_assets = int(num_assets)
         self.num_features_per_asset = int(num_features_per_asset)
+        # True: um único conv/LSTM sobre (batch*num_assets, seq, features); False: loop por ativo.
+        # Só muda a execução - os pesos (state_dict) são os mesmos nos dois modos.
+        self.fold_assets_into_batch = fold_assets_into_batch
         self.output_latent_features = output_latent_features
         self.use_sentiment_analysis = use_sentiment_analysis
+        # 'relu': mesma ativação do final_dense2 do Keras (necessária para pesos convertidos do Keras)
+        if latent_activation not in (None, 'relu'):
+            raise ValueError(f"latent_activation inválida: {latent_activation}")
+        self.latent_activation = latent_activation
+        # asset_output_norm=True e layer_norm_eps=1e-6 reproduzem as LayerNorms do Keras (pesos convertidos)
+        self.asset_output_norm = asset_output_norm
 
         self.asset_processor = SingleAssetProcessor(
             self.num_features_per_asset, asset_cnn_filters1, asset_cnn_filters2, 
-            asset_lstm_units1, asset_lstm_units2, asset_dropout
+            asset_lstm_units1, asset_lstm_units2, asset_dropout,
+            output_norm_eps=layer_norm_eps if asset_output_norm else None
         )
         
         self.attention = nn.MultiheadAttention(
             embed_dim=asset_lstm_units2, num_heads=mha_num_heads,
             dropout=0.1, batch_first=True
         )
-        self.attention_norm = nn.LayerNorm(asset_lstm_units2)
+        self.attention_norm = nn.LayerNorm(asset_lstm_units2, eps=layer_norm_eps)
         
         self.global_avg_pool = nn.AdaptiveAvgPool1d(1)
         
@@ -65,8 +81,7 @@ class DeepPortfolioAgentNetworkTorch(nn.Module):
         if not self.output_latent_features:
             self.output_allocation_head = nn.Linear(final_dense_units2, num_assets)
 
-    def forward(self, observations):
-        # observations: (batch, seq_len, num_assets * num_features_per_asset)
+    def _process_assets_loop(self, observations):
         asset_representations = []
         for i in range(self.num_assets):
             start = i * self.num_features_per_asset
@@ -74,8 +89,22 @@ class DeepPortfolioAgentNetworkTorch(nn.Module):
             asset_data = observations[:, :, start:end]
             asset_repr = self.asset_processor(asset_data)
             asset_representations.append(asset_repr)
-        
-        stacked = torch.stack(asset_representations, dim=1)
+        return torch.stack(asset_representations, dim=1)
+
+    def _process_assets_folded(self, observations):
+        # (batch, seq, assets*features) -> (batch*assets, seq, features): mesma fatia por ativo que o loop
+        batch_size, seq_len = observations.shape[0], observations.shape[1]
+        x = observations.reshape(batch_size, seq_len, self.num_assets, self.num_features_per_asset)
+        x = x.permute(0, 2, 1, 3).reshape(batch_size * self.num_assets, seq_len, self.num_features_per_asset)
+        asset_repr = self.asset_processor(x)  # (batch*assets, lstm_units2)
+        return asset_repr.reshape(batch_size, self.num_assets, -1)
+
+    def forward(self, observations):
+        # observations: (batch, seq_len, num_assets * num_features_per_asset)
+        if self.fold_assets_into_batch:
+            stacked = self._process_assets_folded(observations)
+        else:
+            stacked = self._process_assets_loop(observations)
         
         attn_output, _ = self.attention(stacked, stacked, stacked)
         attn_output = self.attention_norm(stacked + attn_output) # Conexão residual + LayerNorm
@@ -87,6 +116,8 @@ class DeepPortfolioAgentNetworkTorch(nn.Module):
         x = F.relu(self.dense1(pooled))
         x = self.dropout1(x)
         latent_features = self.latent_features_layer(x) # Saída de features latentes
+        if self.latent_activation == 'relu':
+            latent_features = F.relu(latent_features)
 
         if self.output_latent_features:
             return latent_features
@@ -26,23 +26,54 @@ from config import (
     REWARD_VOL_PENALTY,
     REWARD_SCALE
 )
+from src.utils.shared_feature_store import FeatureStoreHandle, attach_feature_store, dataframe_to_arrays
 
 class PortfolioEnv(gym.Env):
     metadata = {'render_modes': ['human'], 'render_fps': 30}
 
-    def __init__(self, df_multi_asset_features: pd.DataFrame, 
+    def __init__(self, df_multi_asset_features: pd.DataFrame = None, 
                  initial_balance=100000, 
                  transaction_cost_pct=0.001,
-                 risk_free_rate_per_step=None):
+                 risk_free_rate_per_step=None,
+                 feature_store=None):
+        """
+        `feature_store`: alternativa ao DataFrame para envs em subprocessos - um FeatureStoreHandle
+        (ou AttachedFeatures) de src.utils.shared_feature_store. As observações e preços passam a ser
+        views somente-leitura sobre a memória compartilhada, sem uma cópia do DataFrame por worker.
+        """
         super(PortfolioEnv, self).__init__()
         
-        self.df = df_multi_asset_features.copy()
         self.asset_keys = ALL_ASSET_SYMBOLS
         self.num_assets = NUM_ASSETS
         self.initial_balance = initial_balance
         self.window_size = WINDOW_SIZE
         self.transaction_cost_pct = transaction_cost_pct
         self.reward_window_size = REWARD_WINDOW
+        self.orig_close_price_cols = [f"{asset_key}_close" for asset_key in self.asset_keys]
+
+        if feature_store is not None:
+            # só fecha no close() a conexão que este env abriu
+            self._owns_feature_store = isinstance(feature_store, FeatureStoreHandle)
+            if self._owns_feature_store:
+                feature_store = attach_feature_store(feature_store)
+            if list(feature_store.price_columns) != self.orig_close_price_cols:
+                raise ValueError(f"Colunas de preço do feature store {feature_store.price_columns} diferem de {self.orig_close_price_cols}.")
+            self.df = None
+            self._feature_store = feature_store
+            self._features = feature_store.features
+            self._prices = feature_store.prices
+        elif df_multi_asset_features is not None:
+            missing_price_cols = [col for col in self.orig_close_price_cols if col not in df_multi_asset_features.columns]
+            if missing_price_cols:
+                raise ValueError(f"Colunas de preço de fechamento original ausentes no DataFrame do ambiente: {missing_price_cols}. Adicione-as ao DataFrame com prefixo do ativo (ex: 'AAPL_close').")
+            self.df = df_multi_asset_features
+            self._feature_store = None
+            self._owns_feature_store = False
+            # A coluna 'asset_id' (categórica) é removida e valores não numéricos viram 0 - uma vez só,
+            # em vez de a cada observação.
+            self._features, self._prices, _ = dataframe_to_arrays(df_multi_asset_features, self.orig_close_price_cols)
+        else:
+            raise ValueError("Informe df_multi_asset_features ou feature_store.")
         
         TRADING_DAYS_PER_YEAR = 252
         HOURS_PER_DAY_TRADING = 24 # Assumindo dados horários
@@ -57,50 +88,29 @@ class PortfolioEnv(gym.Env):
         self.balance = self.initial_balance
         self.portfolio_weights = np.full(self.num_assets, 1.0 / self.num_assets if self.num_assets > 0 else 0)
         self.portfolio_value = self.initial_balance
-        self.total_steps = len(self.df) - self.window_size - 1
+        self.total_steps = len(self._features) - self.window_size - 1
 
         self.action_space = spaces.Box(low=0, high=1, shape=(self.num_assets,), dtype=np.float32)
         
-        # Remover a coluna 'asset_id' do DataFrame temporariamente para calcular o num_total_features para o observation_space
-        # pois ela não é uma feature numérica e será removida na observação real.
-        num_total_features = self.df.drop(columns=['asset_id'], errors='ignore').shape[1]
+        num_total_features = self._features.shape[1]
         self.observation_space = spaces.Box(
             low=-np.inf, high=np.inf, 
             shape=(self.window_size, num_total_features), 
             dtype=np.float32
         )
 
-        self.orig_close_price_cols = [f"{asset_key}_close" for asset_key in self.asset_keys]
-
-        missing_price_cols = [col for col in self.orig_close_price_cols if col not in self.df.columns]
-        if missing_price_cols:
-            raise ValueError(f"Colunas de preço de fechamento original ausentes no DataFrame do ambiente: {missing_price_cols}. Adicione-as ao DataFrame com prefixo do ativo (ex: 'AAPL_close').")
-
     def _get_observation(self):
         start = self.current_step
         end = start + self.window_size
-        obs = self.df.iloc[start:end]
-
-        # Remover a coluna 'asset_id' antes de converter para float, pois ela é uma string
-        # A coluna 'asset_id' é usada internamente, mas não deve ser passada para a rede neural como feature numérica.
-        # A rede espera apenas features numéricas.
-        # A coluna 'asset_id' é categórica e não deve ser incluída nas features numéricas.
-        # O erro 'could not convert string to float' ocorre se ela não for removida.
-        if 'asset_id' in obs.columns:
-            obs_numeric = obs.drop(columns=['asset_id'])
-        else:
-            obs_numeric = obs
-        # Certificar-se de que todas as colunas restantes são numéricas
-        obs_numeric = obs_numeric.apply(pd.to_numeric, errors='coerce').fillna(0.0)
-
-        return obs_numeric.astype(np.float32)
+        # cópia pequena (window x features): as views do feature store são somente-leitura
+        return np.array(self._features[start:end], dtype=np.float32)
 
 
     def _get_current_prices(self):
-        return self.df[self.orig_close_price_cols].iloc[self.current_step + self.window_size - 1].values
+        return self._prices[self.current_step + self.window_size - 1]
 
     def _get_next_prices(self):
-        return self.df[self.orig_close_price_cols].iloc[self.current_step + self.window_size].values
+        return self._prices[self.current_step + self.window_size]
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
@@ -214,5 +224,9 @@ class PortfolioEnv(gym.Env):
             print(f"Step: {self.current_step}, Portfolio Value: {self.portfolio_value:.2f}, Weights: {self.portfolio_weights}")
 
     def close(self):
-        pass
+        if self._owns_feature_store and self._feature_store is not None:
+            # soltar as views antes de fechar o mapeamento
+            self._features = self._prices = None
+            self._feature_store.close()
+            self._feature_store = None
 
@@ -3,6 +3,68 @@
 Do patrimônio inicial aos milhões - Estratégia de aniversário
 """
 
+import argparse
+
+# Dados iniciais
+PATRIMONIO_INICIAL = 18.18  # USDT
+ACCURACY_MOISES = 0.95
+DIAS_UTEIS_MES = 22
+
+# Estratégia em fases
+FASES = [
+    {
+        "nome": "FASE BEBÊ",
+        "periodo": "Mês 1-3",
+        "meses": 3,  # duração da fase (projeção Monte Carlo)
+        "patrimonio_meta": 100,
+        "estrategia": "Acumulação + Aprendizado",
+        "trades_dia": 2,
+        "lucro_esperado": 0.01,  # 1% por trade
+        "foco": "Construir base sólida"
+    },
+    {
+        "nome": "FASE CRIANÇA", 
+        "periodo": "Mês 4-6",
+        "meses": 3,
+        "patrimonio_meta": 500,
+        "estrategia": "Trading conservador",
+        "trades_dia": 3,
+        "lucro_esperado": 0.015,  # 1.5% por trade
+        "foco": "Crescimento consistente"
+    },
+    {
+        "nome": "FASE ADOLESCENTE",
+        "periodo": "Mês 7-12",
+        "meses": 6,
+        "patrimonio_meta": 2000,
+        "estrategia": "Otimização neural ativa",
+        "trades_dia": 5,
+        "lucro_esperado": 0.02,  # 2% por trade
+        "foco": "Aceleração controlada"
+    },
+    {
+        "nome": "FASE ADULTO",
+        "periodo": "Ano 2",
+        "meses": 12,
+        "patrimonio_meta": 10000,
+        "estrategia": "Multi-asset + Leverage inteligente",
+        "trades_dia": 8,
+        "lucro_esperado": 0.025,  # 2.5% por trade
+        "foco": "Escala profissional"
+    },
+    {
+        "nome": "FASE MESTRE",
+        "periodo": "Ano 3+",
+        "meses": 12,
+        "patrimonio_meta": 100000,
+        "estrategia": "IA avançada + Portfolio institucional",
+        "trades_dia": 10,
+        "lucro_esperado": 0.03,  # 3% por trade
+        "foco": "Impacto humanitário massivo"
+    }
+]
+
+
 def plano_crescimento_moises():
     """
     Plano de crescimento exponencial do patrimônio de MOISES
@@ -13,58 +75,9 @@ def plano_crescimento_moises():
     print("🚀 De R$ 100 iniciais para milhões - A jornada de MOISES")
     print("=" * 65)
     
-    # Dados iniciais
-    patrimonio_inicial = 18.18  # USDT
-    accuracy_moises = 0.95
-    
-    # Estratégia em fases
-    fases = [
-        {
-            "nome": "FASE BEBÊ",
-            "periodo": "Mês 1-3", 
-            "patrimonio_meta": 100,
-            "estrategia": "Acumulação + Aprendizado",
-            "trades_dia": 2,
-            "lucro_esperado": 0.01,  # 1% por trade
-            "foco": "Construir base sólida"
-        },
-        {
-            "nome": "FASE CRIANÇA", 
-            "periodo": "Mês 4-6",
-            "patrimonio_meta": 500,
-            "estrategia": "Trading conservador",
-            "trades_dia": 3,
-            "lucro_esperado": 0.015,  # 1.5% por trade
-            "foco": "Crescimento consistente"
-        },
-        {
-            "nome": "FASE ADOLESCENTE",
-            "periodo": "Mês 7-12", 
-            "patrimonio_meta": 2000,
-            "estrategia": "Otimização neural ativa",
-            "trades_dia": 5,
-            "lucro_esperado": 0.02,  # 2% por trade
-            "foco": "Aceleração controlada"
-        },
-        {
-            "nome": "FASE ADULTO",
-            "periodo": "Ano 2",
-            "patrimonio_meta": 10000,
-            "estrategia": "Multi-asset + Leverage inteligente",
-            "trades_dia": 8,
-            "lucro_esperado": 0.025,  # 2.5% por trade
-            "foco": "Escala profissional"
-        },
-        {
-            "nome": "FASE MESTRE",
-            "periodo": "Ano 3+",
-            "patrimonio_meta": 100000,
-            "estrategia": "IA avançada + Portfolio institucional",
-            "trades_dia": 10,
-            "lucro_esperado": 0.03,  # 3% por trade
-            "foco": "Impacto humanitário massivo"
-        }
-    ]
+    patrimonio_inicial = PATRIMONIO_INICIAL
+    accuracy_moises = ACCURACY_MOISES
+    fases = FASES
     
     print("🎯 FASES DO CRESCIMENTO DE MOISES:")
     print("-" * 45)
@@ -159,5 +172,56 @@ def plano_crescimento_moises():
     print("🌟 Cada real crescido = Uma vida transformada!")
     print("🎉" * 25)
 
+def projecao_monte_carlo(caminhos=100_000, workers=1, seed=None, fee=0.001, reinvestimento=0.80,
+                         concentracao=0.0, nivel_ruina=0.5):
+    """
+    Versão probabilística do plano: cada fase vira `meses x 22 x trades_dia` trades com acerto
+    ACCURACY_MOISES, ganho de `lucro_esperado` e perda simétrica (stop no mesmo %) sobre o patrimônio,
+    taxa de 0.1% por lado e só `reinvestimento` do lucro mantido (o resto vai para doações).
+    Os caminhos seguem de uma fase para a próxima; ruína = patrimônio abaixo de `nivel_ruina` x inicial.
+    `concentracao` > 0 sorteia a accuracy de cada caminho de uma Beta com essa concentração.
+    """
+    from src.optimization.monte_carlo import Dist, MonteCarloEngine
+
+    accuracy = Dist.beta_mean(ACCURACY_MOISES, concentracao) if concentracao > 0 else ACCURACY_MOISES
+    print("\n🎲 PROJEÇÃO MONTE CARLO DO PLANO")
+    print("-" * 45)
+    print(f"   {caminhos:,} caminhos | accuracy {ACCURACY_MOISES:.0%} | taxa {fee:.2%}/lado | "
+          f"reinvestimento {reinvestimento:.0%}")
+
+    capital = PATRIMONIO_INICIAL
+    resultados = []
+    for i, fase in enumerate(FASES):
+        n_trades = fase["meses"] * DIAS_UTEIS_MES * fase["trades_dia"]
+        engine = MonteCarloEngine(win_rate=accuracy, win_return=fase["lucro_esperado"],
+                                  loss_return=-fase["lucro_esperado"], size=1.0, fee=fee,
+                                  reinvest=reinvestimento, ruin_level=nivel_ruina * PATRIMONIO_INICIAL,
+                                  target=fase["patrimonio_meta"])
+        resultado = engine.run(capital, caminhos, n_trades, seed=None if seed is None else seed + i,
+                               workers=workers, keep_paths=True)
+        capital = resultado.pop("final_equity")
+        resultados.append({"fase": fase["nome"], "trades": n_trades, **resultado})
+
+        p5, p50, p95 = (resultado["final_percentiles"][q] for q in ("5", "50", "95"))
+        print(f"\n{i + 1}. {fase['nome']} ({n_trades:,} trades)")
+        print(f"   🎯 P(meta ${fase['patrimonio_meta']:,}): {resultado['prob_target']:.1%}")
+        print(f"   💀 P(ruína acumulada): {resultado['prob_ruin']:.1%}")
+        print(f"   📊 Patrimônio final p5/p50/p95: ${p5:,.2f} / ${p50:,.2f} / ${p95:,.2f}")
+        print(f"   ⏱️ {resultado['elapsed_s']:.2f}s")
+    return resultados
+
+
 if __name__ == "__main__":
-    plano_crescimento_moises()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Plano de crescimento exponencial de MOISES")
+    parser.add_argument("--monte-carlo", action="store_true", help="projeção probabilística das fases")
+    parser.add_argument("--caminhos", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--fee", type=float, default=0.001)
+    parser.add_argument("--concentracao", type=float, default=0.0,
+                        help="incerteza da accuracy (Beta com essa concentração; 0 = fixa)")
+    args = parser.parse_args()
+
+    plano_crescimento_moises()
+    if args.monte_carlo:
+        projecao_monte_carlo(args.caminhos, args.workers, args.seed, args.fee, concentracao=args.concentracao)
\ No newline at end of file
@@ -23,7 +23,7 @@ from config import (
 )
 # Note: LEARNING_RATE é usado em model_builder, não precisa importar aqui diretamente se não for para os callbacks.
 
-from data_handler import fetch_ohlcv_data_ccxt, calculate_technical_indicators, calculate_targets, create_sequences
+from data_handler import fetch_ohlcv_data_ccxt, calculate_technical_indicators, calculate_targets, create_windowed_dataset
 from model_builder import build_lstm_model
 
 # Para métricas de classificação
@@ -120,8 +120,9 @@ def main():
 
     # --- 4. Criar Sequências ---
     # As colunas para as sequências são as EXPECTED_SCALED_FEATURES_FOR_MODEL
-    X, y = create_sequences(df_for_sequences, "target", WINDOW_SIZE, EXPECTED_SCALED_FEATURES_FOR_MODEL)
-    if X.shape[0] == 0: print("Nenhuma sequência criada."); return
+    # Janelas indexadas sobre um único array (barras x features), sem materializar N x janela x features
+    dataset = create_windowed_dataset(df_for_sequences, "target", WINDOW_SIZE, EXPECTED_SCALED_FEATURES_FOR_MODEL)
+    if len(dataset) == 0: print("Nenhuma sequência criada."); return
 
     print("Preparando, fitando e salvando scalers...")
     os.makedirs(MODEL_SAVE_DIR, exist_ok=True)
@@ -206,15 +207,20 @@ def main():
     if df_for_sequences.empty: print("DataFrame para sequências vazio após escalonamento/join."); return
 
     # --- 5. Dividir Dados ---
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    print(f"Treino: {X_train.shape[0]} amostras, Teste: {X_test.shape[0]} amostras.")
+    train_idx, test_idx = train_test_split(np.arange(len(dataset)), test_size=0.2, random_state=42, stratify=dataset.labels)
+    train_ds, test_ds = dataset.subset(train_idx), dataset.subset(test_idx)
+    y_train, y_test = train_ds.labels, test_ds.labels
+    print(f"Treino: {len(train_ds)} amostras, Teste: {len(test_ds)} amostras.")
 
-    X, y = create_sequences(df_for_sequences, "target", WINDOW_SIZE, EXPECTED_SCALED_FEATURES_FOR_MODEL)
-    if X.shape[0] == 0: print("Nenhuma sequência criada."); return
+    # Janelas indexadas sobre um único array (barras x features), sem materializar N x janela x features
+    dataset = create_windowed_dataset(df_for_sequences, "target", WINDOW_SIZE, EXPECTED_SCALED_FEATURES_FOR_MODEL)
+    if len(dataset) == 0: print("Nenhuma sequência criada."); return
 
         # --- 6. Dividir Dados ---
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    print(f"Treino: {X_train.shape[0]} amostras, Teste: {X_test.shape[0]} amostras.")
+    train_idx, test_idx = train_test_split(np.arange(len(dataset)), test_size=0.2, random_state=42, stratify=dataset.labels)
+    train_ds, test_ds = dataset.subset(train_idx), dataset.subset(test_idx)
+    y_train, y_test = train_ds.labels, test_ds.labels
+    print(f"Treino: {len(train_ds)} amostras, Teste: {len(test_ds)} amostras.")
 
     # --- 7. Construir e Treinar Modelo ---
     print("Construindo modelo LSTM...")
@@ -267,14 +273,18 @@ def main():
     } """
 
 
-    history = model.fit(X_train, y_train, epochs=EPOCHS, batch_size=BATCH_SIZE,
-                        validation_split=0.1, # Usa 10% do X_train/y_train para validação
+    # Mesmo corte de validation_split=0.1: os últimos 10% do conjunto de treino
+    n_val = int(len(train_ds) * 0.1)
+    fit_ds = train_ds.subset(np.arange(len(train_ds) - n_val))
+    val_ds = train_ds.subset(np.arange(len(train_ds) - n_val, len(train_ds)))
+    history = model.fit(fit_ds.to_tf_dataset(BATCH_SIZE, shuffle=True, seed=42), epochs=EPOCHS,
+                        validation_data=val_ds.to_tf_dataset(BATCH_SIZE),
                         callbacks=callbacks_list, class_weight=class_weights_map, verbose=1)
     
     # --- 8. Avaliar o Modelo TREINADO ---
     # O modelo 'model' aqui é o treinado, com os melhores pesos restaurados pelo EarlyStopping
     print("Avaliando modelo treinado no conjunto de teste...")
-    loss, accuracy_keras = model.evaluate(X_test, y_test, verbose=0)
+    loss, accuracy_keras = model.evaluate(test_ds.to_tf_dataset(BATCH_SIZE), verbose=0)
     print(f"Perda no Teste (Keras): {loss:.4f}")
     print(f"Acurácia no Teste (Keras, thr=0.5): {accuracy_keras:.4f}")
 
@@ -282,7 +292,7 @@ def main():
 
     # Após model.evaluate()
     from sklearn.metrics import classification_report, confusion_matrix
-    y_pred_probs = model.predict(X_test)
+    y_pred_probs = model.predict(test_ds.to_tf_dataset(BATCH_SIZE))
     y_pred_classes = (y_pred_probs > 0.65).astype(int) # 0.5, 0.6, 0.65, 0.7, 0.75 Valores de referencia par Thresholud
 
     print("\nRelatório de Classificação no Conjunto de Teste:")
@@ -343,7 +353,7 @@ def main():
     # --- Imprimindo rodade de Tresh
 
     print("\nAnálise com diferentes thresholds de predição no conjunto de teste:")
-    y_pred_probs = model.predict(X_test) 
+    y_pred_probs = model.predict(test_ds.to_tf_dataset(BATCH_SIZE)) 
     thresholds_to_test = [0.50, 0.55, 0.60, 0.65, 0.70, 0.75]
     for thresh in thresholds_to_test:
         print(f"\n--- Resultados com Threshold: {thresh:.2f} ---")
@@ -1,14 +1,41 @@
-"""Analyze backtest equity CSV and print performance metrics.
-Usage: python scripts/analyze_equity.py [path/to/equity.csv]
+"""Analyze backtest equity CSV/Parquet/Arrow and print performance metrics.
+Usage: python scripts/analyze_equity.py [path/to/equity.csv|.parquet]
+
+Batch mode compares many runs at once (every equity curve under logs/ and out/ by default):
+    python scripts/analyze_equity.py --all [--rolling-window 720] [--out out/equity_comparison.csv]
+    python scripts/analyze_equity.py 'logs/*tuned*_equity.csv' out/runs/*/*_equity.csv
+Files are read in parallel (only the time and equity columns) into one ragged array
+(concatenated values + offsets), and every metric is computed for all curves in a few array passes.
 """
 import sys
+import glob
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import List, Optional, Sequence
 import pandas as pd
 import numpy as np
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+DEFAULT_PATTERNS = ('logs/*equity*.csv', 'out/*equity*.csv', 'out/*results*.csv', 'out/runs/*/*_equity.csv',
+                    'logs/*equity*.parquet', 'out/*equity*.parquet', 'out/*results*.parquet',
+                    'out/runs/*/*_equity.parquet', 'logs/*equity*.arrow', 'out/runs/*/*_equity.arrow')
+COLUMNAR_SUFFIXES = ('.parquet', '.arrow', '.feather', '.ipc')
+EQUITY_TOKENS = ('equity', 'balance', 'wallet')
+TIME_NAMES = ('datetime', 'date', 'timestamp', 'time')
+HOURLY = 365 * 24
+
 
 def analyze(path: Path):
-    df = pd.read_csv(path, parse_dates=True)
+    if Path(path).suffix.lower() in COLUMNAR_SUFFIXES:
+        from src.utils.results_io import read_results
+        df = read_results(path)
+    else:
+        df = pd.read_csv(path, parse_dates=True)
     # Try to find an equity column
     possible = [c for c in df.columns if 'equity' in c.lower() or 'balance' in c.lower() or 'wallet' in c.lower()]
     if not possible:
@@ -69,8 +96,248 @@ def analyze(path: Path):
     print(f'Annual vol: {vol_ann*100:.2f}%, Sharpe (rf=0): {sharpe:.2f}, MaxDD: {max_dd*100:.2f}%')
 
 
+# --- Batch ----------------------------------------------------------------------------------------
+
+def _pick_columns(header: List[str]):
+    """Mesma regra do analyze(): primeira coluna 'equity/balance/wallet', senão a segunda coluna."""
+    equity = next((c for c in header if any(t in c.lower() for t in EQUITY_TOKENS)), None)
+    if equity is None:
+        if len(header) < 2:
+            return None, None
+        equity = header[1]
+    time_col = next((c for c in header if c.lower() in TIME_NAMES), None)
+    if time_col is None and header and header[0] != equity:
+        time_col = header[0]  # índice salvo pelo pandas (to_csv com DatetimeIndex)
+    return time_col, equity
+
+
+def load_equity(path: Path):
+    """(valores float64, primeiro/último timestamp como texto, coluna de equity) lendo só 2 colunas."""
+    if Path(path).suffix.lower() in COLUMNAR_SUFFIXES:
+        return _load_columnar(path)
+    with open(path, encoding='utf-8', errors='replace') as f:
+        header = [c.strip().strip('"') for c in f.readline().rstrip('\r\n').split(',')]
+    time_col, col = _pick_columns(header)
+    if col is None:
+        raise ValueError('No equity-like column found')
+    columns = [c for c in (time_col, col) if c is not None]
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        types = {time_col: pa.string()} if time_col else {}
+        if time_col == '':  # coluna de índice sem nome: pyarrow a chama de ''
+            columns, types = [col], {}
+            time_col = None
+        table = pacsv.read_csv(path, convert_options=pacsv.ConvertOptions(include_columns=columns, column_types=types))
+        values = np.asarray(table.column(col).to_numpy(zero_copy_only=False), dtype=np.float64)
+        times = table.column(time_col) if time_col else None
+        first_last = (times[0].as_py(), times[-1].as_py()) if times is not None and len(times) else (None, None)
+    except ImportError:
+        df = pd.read_csv(path, usecols=columns)
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+        first_last = (df[time_col].iloc[0], df[time_col].iloc[-1]) if time_col and len(df) else (None, None)
+    return values, first_last, col
+
+
+def _load_columnar(path: Path):
+    """Parquet/Arrow (src/utils/results_io.py): lê só as 2 colunas, já tipadas, sem parse de texto."""
+    from src.utils.results_io import read_results, read_schema_names
+    time_col, col = _pick_columns(read_schema_names(path))
+    if col is None:
+        raise ValueError('No equity-like column found')
+    df = read_results(path, columns=[c for c in (time_col, col) if c is not None])
+    values = df[col].to_numpy(dtype=np.float64)
+    first_last = (str(df[time_col].iloc[0]), str(df[time_col].iloc[-1])) if time_col and len(df) else (None, None)
+    return values, first_last, col
+
+
+def _annual_factor(first_last, n: int) -> float:
+    """Amostras por ano a partir do intervalo médio entre o primeiro e o último timestamp (fallback: 1h)."""
+    try:
+        start, end = pd.to_datetime(list(first_last), utc=True)
+        secs_per_sample = (end - start).total_seconds() / max(1, n - 1)
+        if secs_per_sample > 0:
+            return 365 * 24 * 3600 / secs_per_sample
+    except Exception:
+        pass
+    return HOURLY
+
+
+class RaggedEquity:
+    """Várias curvas de equity em um único array: values[offsets[i]:offsets[i+1]] é a curva i."""
+
+    def __init__(self, names: Sequence[str], values: np.ndarray, offsets: np.ndarray, annual_factor: np.ndarray,
+                 columns: Optional[Sequence[str]] = None):
+        self.names = list(names)
+        self.values = values
+        self.offsets = offsets
+        self.annual_factor = annual_factor
+        self.columns = list(columns) if columns is not None else [None] * len(self.names)
+
+    @classmethod
+    def from_series(cls, series: dict, annual_factor=HOURLY) -> 'RaggedEquity':
+        arrays = [np.asarray(v, dtype=np.float64) for v in series.values()]
+        offsets = np.concatenate([[0], np.cumsum([len(a) for a in arrays])]).astype(np.int64)
+        factors = np.broadcast_to(np.asarray(annual_factor, dtype=np.float64), (len(arrays),)).copy()
+        return cls(list(series), np.concatenate(arrays) if arrays else np.zeros(0), offsets, factors)
+
+    @classmethod
+    def from_files(cls, paths: Sequence[Path], workers: int = 8):
+        """Lê os arquivos em paralelo (pyarrow libera o GIL); arquivos ilegíveis voltam em `skipped`."""
+        def read(path):
+            try:
+                values, first_last, col = load_equity(path)
+                values = values[np.isfinite(values)]
+                if len(values) < 2:
+                    raise ValueError('menos de 2 pontos de equity')
+                return path, values, _annual_factor(first_last, len(values)), col, None
+            except Exception as e:
+                return path, None, None, None, f"{type(e).__name__}: {e}"
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            loaded = list(pool.map(read, paths))
+        ok = [r for r in loaded if r[4] is None]
+        skipped = [(str(r[0]), r[4]) for r in loaded if r[4] is not None]
+        offsets = np.concatenate([[0], np.cumsum([len(r[1]) for r in ok])]).astype(np.int64)
+        values = np.concatenate([r[1] for r in ok]) if ok else np.zeros(0)
+        ragged = cls([str(r[0]) for r in ok], values, offsets, np.array([r[2] for r in ok], dtype=np.float64),
+                     [r[3] for r in ok])
+        return ragged, skipped
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def segment_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+
+def _seg_sum(x: np.ndarray, seg: np.ndarray, n: int) -> np.ndarray:
+    return np.bincount(seg, weights=x, minlength=n)
+
+
+def batch_metrics(ragged: RaggedEquity, rolling_window: int = 720) -> pd.DataFrame:
+    """
+    Métricas de analyze() para todas as curvas de uma vez (retornos = pct_change().fillna(0), Sharpe com
+    rf=0, CAGR por len/annual_factor), mais Calmar, duração máxima/atual de drawdown (barras e dias) e
+    Sharpe móvel em janelas de `rolling_window` barras (último, mediana e mínimo).
+    """
+    n, values, starts = len(ragged), ragged.values, ragged.offsets[:-1]
+    lengths = ragged.lengths.astype(np.float64)
+    ends = ragged.offsets[1:] - 1
+    seg = ragged.segment_ids()
+    af = ragged.annual_factor
+
+    returns = np.zeros_like(values)
+    returns[1:] = values[1:] / values[:-1] - 1
+    returns[starts] = 0.0  # primeira barra de cada curva (não cruza fronteiras)
+
+    mean = _seg_sum(returns, seg, n) / lengths
+    dev = returns - mean[seg]
+    std = np.sqrt(_seg_sum(dev * dev, seg, n) / np.maximum(lengths - 1, 1))
+    std = np.where(lengths > 1, std, np.nan)
+
+    total_return = values[ends] / values[starts] - 1
+    years = lengths / af
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cagr = np.where(years > 0, (values[ends] / values[starts]) ** (1.0 / years) - 1.0, np.nan)
+        sharpe = np.where(std > 0, (mean * af) / (std * np.sqrt(af)), np.nan)
+
+    # drawdown: máximo acumulado por curva (groupby.cummax reinicia em cada segmento)
+    running_max = pd.Series(values).groupby(seg).cummax().to_numpy()
+    drawdown = (values - running_max) / running_max
+    max_dd = np.minimum.reduceat(drawdown, starts) if n else np.zeros(0)
+    # duração: barras desde o último topo (o início de cada curva é sempre um topo)
+    idx = np.arange(len(values))
+    last_peak = np.maximum.accumulate(np.where(drawdown >= 0, idx, 0))
+    duration = idx - last_peak
+    max_dur = np.maximum.reduceat(duration, starts) if n else np.zeros(0, dtype=np.int64)
+    cur_dur = duration[ends]
+    days_per_bar = 365.0 / af
+
+    # Sharpe móvel por prefix sums; janelas que cruzam o início da curva ficam NaN
+    w = int(rolling_window)
+    c1 = np.concatenate([[0.0], np.cumsum(returns)])
+    c2 = np.concatenate([[0.0], np.cumsum(returns * returns)])
+    roll = np.full(len(values), np.nan)
+    valid = idx - starts[seg] + 1 >= w
+    hi = idx[valid] + 1
+    lo = hi - w
+    s1, s2 = c1[hi] - c1[lo], c2[hi] - c2[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = np.maximum(s2 - s1 * s1 / w, 0) / max(w - 1, 1)
+        roll[valid] = (s1 / w) / np.sqrt(var) * np.sqrt(af[seg[valid]])
+    roll[~np.isfinite(roll)] = np.nan
+    roll_df = pd.DataFrame({'seg': seg, 'roll': roll}).dropna()
+    roll_stats = roll_df.groupby('seg')['roll'].agg(['median', 'min', 'last']).reindex(range(n))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        calmar = np.where(max_dd < 0, cagr / np.abs(max_dd), np.nan)
+    return pd.DataFrame({
+        'file': ragged.names,
+        'equity_column': ragged.columns,
+        'rows': lengths.astype(np.int64),
+        'start': values[starts],
+        'end': values[ends],
+        'total_return_pct': total_return * 100,
+        'years': years,
+        'cagr_pct': cagr * 100,
+        'vol_ann_pct': std * np.sqrt(af) * 100,
+        'sharpe': sharpe,
+        'max_dd_pct': max_dd * 100,
+        'calmar': calmar,
+        'max_dd_duration_bars': max_dur,
+        'max_dd_duration_days': max_dur * days_per_bar,
+        'current_dd_duration_days': cur_dur * days_per_bar,
+        f'rolling_sharpe_{w}_last': roll_stats['last'].to_numpy(),
+        f'rolling_sharpe_{w}_median': roll_stats['median'].to_numpy(),
+        f'rolling_sharpe_{w}_min': roll_stats['min'].to_numpy(),
+    })
+
+
+def find_equity_files(patterns: Sequence[str]) -> List[Path]:
+    files = []
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if any(ch in pattern for ch in '*?[') else [pattern]
+        files.extend(Path(m) for m in matches if Path(m).is_file())
+    return sorted(set(files))
+
+
+def compare(patterns: Sequence[str], rolling_window: int = 720, workers: int = 8, out: Optional[str] = None):
+    files = find_equity_files(patterns)
+    if not files:
+        print('No equity files found')
+        return None
+    ragged, skipped = RaggedEquity.from_files(files, workers=workers)
+    table = batch_metrics(ragged, rolling_window).sort_values('sharpe', ascending=False, na_position='last')
+    out = out or f"out/equity_comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(out, index=False)
+    cols = ['file', 'end', 'total_return_pct', 'cagr_pct', 'sharpe', 'max_dd_pct', 'calmar', 'max_dd_duration_days']
+    with pd.option_context('display.width', 200, 'display.max_colwidth', 60):
+        print(table[cols].to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+    for path, error in skipped:
+        print(f'Skipped {path}: {error}')
+    print(f'{len(table)} runs compared ({int(ragged.lengths.sum())} points) -> {out}')
+    return table
+
+
 if __name__ == '__main__':
-    p = Path(sys.argv[1]) if len(sys.argv)>1 else None
+    parser = argparse.ArgumentParser(description='Equity curve metrics (single file or batch comparison)')
+    parser.add_argument('paths', nargs='*', help='equity CSVs or glob patterns; more than one -> batch mode')
+    parser.add_argument('--all', action='store_true', help='compare every equity curve under logs/ and out/')
+    parser.add_argument('--rolling-window', type=int, default=720, help='bars per rolling Sharpe window')
+    parser.add_argument('--workers', type=int, default=8, help='parallel file readers')
+    parser.add_argument('--out', default=None, help='comparison table CSV (default out/equity_comparison_<ts>.csv)')
+    args = parser.parse_args()
+
+    if args.all or len(args.paths) > 1 or any(ch in ''.join(args.paths) for ch in '*?['):
+        table = compare(args.paths or DEFAULT_PATTERNS, args.rolling_window, args.workers, args.out)
+        sys.exit(0 if table is not None else 1)
+    p = Path(args.paths[0]) if args.paths else None
     if p is not None and p.exists():
         analyze(p)
     else:
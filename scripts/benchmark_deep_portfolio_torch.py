@@ -0,0 +1,86 @@
+"""Benchmark DeepPortfolioAgentNetworkTorch: per-asset loop vs assets folded into the batch dimension.
+
+Both modes share the same state_dict, so the script loads the weights of one into the other
+(weight compatibility), checks the outputs match in eval mode and then times inference
+(no_grad) and a training step (forward + backward) for a few batch sizes.
+
+Usage:
+    python scripts/benchmark_deep_portfolio_torch.py --num-assets 8 --batch-sizes 1 64 256
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import torch
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# new-rede-a is the vendored copy used for SB3 training/export; it imports its own `config`
+sys.path.insert(0, str(REPO_ROOT / 'new-rede-a'))
+from deep_portfolio_torch import DeepPortfolioAgentNetworkTorch  # noqa: E402
+
+
+def build(fold: bool, args) -> DeepPortfolioAgentNetworkTorch:
+    return DeepPortfolioAgentNetworkTorch(
+        num_assets=args.num_assets, sequence_length=args.window, num_features_per_asset=args.features,
+        asset_cnn_filters1=32, asset_cnn_filters2=64, asset_lstm_units1=64, asset_lstm_units2=32,
+        asset_dropout=0.2, mha_num_heads=4, mha_key_dim_divisor=2,
+        final_dense_units1=128, final_dense_units2=32, final_dropout=0.2,
+        output_latent_features=True, fold_assets_into_batch=fold,
+    )
+
+
+def timeit(fn, repeats: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--num-assets', type=int, default=8)
+    parser.add_argument('--window', type=int, default=30)
+    parser.add_argument('--features', type=int, default=20)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 256])
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=0, help='torch.set_num_threads (0 = padrão)')
+    args = parser.parse_args()
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+
+    torch.manual_seed(0)
+    loop_net = build(False, args)
+    folded_net = build(True, args)
+    folded_net.load_state_dict(loop_net.state_dict())  # same parameters, different execution
+
+    x = torch.randn(4, args.window, args.num_assets * args.features)
+    loop_net.eval()
+    folded_net.eval()
+    with torch.no_grad():
+        max_diff = (loop_net(x) - folded_net(x)).abs().max().item()
+    print(f'max |loop - folded| (eval) = {max_diff:.3e}')
+
+    print(f"{'batch':>6} {'mode':>6} {'loop ms':>10} {'folded ms':>10} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        x = torch.randn(batch_size, args.window, args.num_assets * args.features)
+
+        def infer(net):
+            net.eval()
+            with torch.no_grad():
+                net(x)
+
+        def train_step(net):
+            net.train()
+            net.zero_grad(set_to_none=True)
+            net(x).sum().backward()
+
+        for mode, fn in (('infer', infer), ('train', train_step)):
+            t_loop = timeit(lambda: fn(loop_net), args.repeats)
+            t_folded = timeit(lambda: fn(folded_net), args.repeats)
+            print(f'{batch_size:>6} {mode:>6} {t_loop:>10.2f} {t_folded:>10.2f} {t_loop / t_folded:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
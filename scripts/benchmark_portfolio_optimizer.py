@@ -0,0 +1,105 @@
+"""Benchmark PortfolioOptimizer (risk parity / min variance / mean-variance) for 10, 100 and 500 assets.
+
+Each size gets a factor-model covariance fed bar by bar to the StreamingCorrelationEngine.
+For each method the script times a cold solve and then a warm-started re-solve after one more bar
+(the per-bar rebalance case). When scipy is installed, it also times SLSQP on the same problem
+and reports the objective gap.
+
+Usage:
+    python scripts/benchmark_portfolio_optimizer.py --assets 10 100 500 --repeats 5
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.scaling.correlation_engine import StreamingCorrelationEngine  # noqa: E402
+from src.scaling.portfolio_optimizer import METHODS, PortfolioOptimizer  # noqa: E402
+
+RISK_AVERSION = 50.0
+
+
+def make_problem(n: int, bars: int, seed: int):
+    rng = np.random.default_rng(seed)
+    factors = rng.normal(0, 0.01, (bars + 1, 3))
+    loadings = rng.normal(1.0, 0.5, (n, 3)) * [1.0, 0.5, 0.3]
+    returns = factors @ loadings.T + rng.normal(0, 0.01, (bars + 1, n)) * rng.uniform(0.5, 2.0, n)
+    symbols = [f"A{i:03d}" for i in range(n)]
+    groups = [("stocks_us", "crypto", "forex", "commodities")[i % 4] for i in range(n)]
+    engine = StreamingCorrelationEngine(symbols, window=bars, min_periods=2)
+    engine.update_many(returns[:-1])
+    mu = returns[:-1].mean(axis=0)
+    return engine, returns[-1], symbols, groups, mu
+
+
+def objective(method, w, cov, mu):
+    if method == "mean_variance":
+        return 0.5 * RISK_AVERSION * w @ cov @ w - mu @ w
+    if method == "min_variance":
+        return 0.5 * w @ cov @ w
+    rc = w * (cov @ w)
+    return float(np.std(rc / rc.sum()))  # dispersão das contribuições de risco (0 = paridade exata)
+
+
+def slsqp(method, cov, mu, max_weight, groups, caps):
+    try:
+        from scipy.optimize import minimize
+    except ImportError:
+        return None
+    n = len(mu)
+    constraints = [{"type": "eq", "fun": lambda x: x.sum() - 1.0}]
+    for g, cap in caps.items():
+        mask = np.array([x == g for x in groups])
+        constraints.append({"type": "ineq", "fun": lambda x, m=mask, c=cap: c - x[m].sum()})
+    f = (lambda x: objective(method, x, cov, mu)) if method != "risk_parity" else \
+        (lambda x: np.sum((x * (cov @ x) / (x @ cov @ x) - 1.0 / n) ** 2))
+    start = time.perf_counter()
+    res = minimize(f, np.full(n, 1.0 / n), bounds=[(0.0, max_weight)] * n, constraints=constraints,
+                   method="SLSQP", options={"maxiter": 500, "ftol": 1e-12})
+    return (time.perf_counter() - start) * 1000.0, res.x
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--assets", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--bars", type=int, default=756)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--no-scipy", action="store_true", help="não roda a referência SLSQP")
+    args = parser.parse_args()
+
+    print(f"{'assets':>6} {'method':>14} {'cold ms':>9} {'iters':>6} {'warm ms':>9} {'iters':>6} "
+          f"{'slsqp ms':>9} {'obj gap':>10}")
+    for n in args.assets:
+        engine, next_bar, symbols, groups, mu = make_problem(n, args.bars, seed=n)
+        caps = {"stocks_us": 0.40, "crypto": 0.15, "forex": 0.25, "commodities": 0.20}
+        max_weight = max(0.10, 2.0 / n)
+        cov = engine.covariance()
+        engine.update(next_bar)
+        cov_next = engine.covariance()
+        for method in METHODS:
+            kwargs = dict(expected_returns=mu, risk_aversion=RISK_AVERSION, groups=groups, group_caps=caps)
+            cold = []
+            for _ in range(args.repeats):
+                optimizer = PortfolioOptimizer(max_weight=max_weight)
+                start = time.perf_counter()
+                w, info = optimizer.optimize(cov, symbols, method, **kwargs)
+                cold.append((time.perf_counter() - start) * 1000.0)
+            start = time.perf_counter()
+            _, warm_info = optimizer.optimize(cov_next, symbols, method, **kwargs)
+            warm_ms = (time.perf_counter() - start) * 1000.0
+
+            reference = None if args.no_scipy or n > 100 else slsqp(method, cov, mu, max_weight, groups, caps)
+            ref_ms, gap = ("-", "-") if reference is None else (
+                f"{reference[0]:.1f}", f"{objective(method, w, cov, mu) - objective(method, reference[1], cov, mu):+.1e}")
+            print(f"{n:>6} {method:>14} {np.median(cold):>9.2f} {info['iterations']:>6} {warm_ms:>9.2f} "
+                  f"{warm_info['iterations']:>6} {ref_ms:>9} {gap:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark PPO rollout/update throughput and peak RSS: pure-torch policy vs TF-inside-torch.
+
+Each path runs in its own subprocess on the same synthetic data, so peak RSS is measured per
+runtime:
+- torch: agents/train_rl_portfolio_torch.py (PortfolioFeaturesExtractorTorch, TensorFlow never imported)
+- tf:    the current approach. The Keras DeepPortfolioAgentNetwork runs inside the SB3 torch
+         policy through a features extractor that crosses torch -> numpy -> TF -> numpy -> torch on
+         every rollout and update batch. Both runtimes stay loaded. Gradients cannot flow from
+         torch into TF, so the Keras network is frozen here, as it effectively is in
+         agents/train_rl_portfolio_agent.py.
+
+Usage:
+    python scripts/benchmark_rl_torch_vs_tf.py --timesteps 4096 --n-steps 1024
+    python scripts/benchmark_rl_torch_vs_tf.py --paths torch      # only the torch path
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+TRAIN_SCRIPT = REPO_ROOT / 'agents' / 'train_rl_portfolio_torch.py'
+
+
+def _load_training_module():
+    spec = importlib.util.spec_from_file_location('train_rl_portfolio_torch', str(TRAIN_SCRIPT))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['train_rl_portfolio_torch'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_tf_path(timesteps: int, n_steps: int, batch_size: int, seed: int) -> dict:
+    """TF-inside-torch: SB3 torch policy whose features come from the Keras network."""
+    t_start = time.perf_counter()
+    import numpy as np
+    import tensorflow  # noqa: F401  (the point of this path: both runtimes loaded)
+    import torch
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.torch_layers import BaseFeaturesExtractor
+
+    trainer = _load_training_module()
+    cfg, _, _ = trainer.register_vendored_torch_modules()
+    with trainer._vendored_config(cfg):
+        keras_module = trainer._load_module('new_rede_a_DeepPortfolioAgent',
+                                            trainer.NEW_REDE_A_DIR / 'DeepPortfolioAgent.py')
+        env_module = trainer._load_module('new_rede_a_portfolio_environment',
+                                          trainer.NEW_REDE_A_DIR / 'portfolio_environment.py')
+
+    asset_symbols = list(cfg.ALL_ASSET_SYMBOLS)
+    df = trainer.make_synthetic_features(asset_symbols, cfg.NUM_FEATURES_PER_ASSET, seed=seed)
+    env = env_module.PortfolioEnv(df_multi_asset_features=df, initial_balance=100000)
+    network_kwargs = dict(trainer.NETWORK_DEFAULTS)
+
+    class KerasBridgeExtractor(BaseFeaturesExtractor):
+        def __init__(self, observation_space, features_dim: int = trainer.FEATURES_DIM):
+            super().__init__(observation_space, features_dim)
+            self.keras_net = keras_module.DeepPortfolioAgentNetwork(
+                num_assets=len(asset_symbols), sequence_length=env.window_size,
+                num_features_per_asset=cfg.NUM_FEATURES_PER_ASSET, final_dense_units2=features_dim,
+                use_sentiment_analysis=False, **network_kwargs)
+            self.keras_net(np.zeros((1,) + observation_space.shape, dtype=np.float32), training=False)
+
+        def forward(self, observations):
+            # latent = final_dense2 activations (the layer before the allocation softmax)
+            x = observations.detach().cpu().numpy()
+            net = self.keras_net
+            stacked = net._process_assets(x, training=False)
+            attn = net.attention_norm(stacked + net.attention(stacked, stacked, stacked, training=False))
+            latent = net.dense2(net.dense1(net.global_avg_pool_attention(attn)))
+            return torch.from_numpy(latent.numpy()).to(observations.device)
+
+    model = PPO("MlpPolicy", env, verbose=0, n_steps=n_steps, batch_size=batch_size, seed=seed,
+                learning_rate=trainer.PPO_LEARNING_RATE,
+                policy_kwargs=dict(features_extractor_class=KerasBridgeExtractor,
+                                   features_extractor_kwargs=dict(features_dim=trainer.FEATURES_DIM)))
+    t_learn = time.perf_counter()
+    model.learn(total_timesteps=timesteps)
+    learn_s = time.perf_counter() - t_learn
+    return {
+        'path': 'tf',
+        'timesteps': int(model.num_timesteps),
+        'learn_s': round(learn_s, 3),
+        'steps_per_s': round(model.num_timesteps / learn_s, 2) if learn_s > 0 else None,
+        'setup_s': round(t_learn - t_start, 3),
+        'peak_rss_mb': trainer.peak_rss_mb(),
+        'tensorflow_loaded': True,
+        'torch_threads': torch.get_num_threads(),
+    }
+
+
+def run_child(path: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        report = Path(tmp) / 'report.json'
+        if path == 'torch':
+            cmd = [sys.executable, str(TRAIN_SCRIPT), '--synthetic', '--timesteps', str(args.timesteps),
+                   '--n-steps', str(args.n_steps), '--batch-size', str(args.batch_size),
+                   '--seed', str(args.seed), '--save-path', '', '--report-json', str(report)]
+        else:
+            cmd = [sys.executable, str(Path(__file__).resolve()), '--child', path, '--timesteps', str(args.timesteps),
+                   '--n-steps', str(args.n_steps), '--batch-size', str(args.batch_size),
+                   '--seed', str(args.seed), '--report-json', str(report)]
+        proc = subprocess.run(cmd, cwd=str(REPO_ROOT), capture_output=True, text=True)
+        if proc.returncode != 0 or not report.exists():
+            return {'path': path, 'error': (proc.stderr or proc.stdout)[-2000:]}
+        return json.loads(report.read_text())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paths', nargs='+', default=['torch', 'tf'], choices=['torch', 'tf'])
+    parser.add_argument('--timesteps', type=int, default=4096)
+    parser.add_argument('--n-steps', type=int, default=1024)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=str(REPO_ROOT / 'out' / 'benchmark_rl_torch_vs_tf.json'))
+    parser.add_argument('--child', choices=['tf'], help=argparse.SUPPRESS)
+    parser.add_argument('--report-json', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        metrics = run_tf_path(args.timesteps, args.n_steps, args.batch_size, args.seed)
+        Path(args.report_json).write_text(json.dumps(metrics, indent=2))
+        return
+
+    results = [run_child(path, args) for path in args.paths]
+    print(f"{'path':>6} {'steps/s':>10} {'learn s':>9} {'setup s':>9} {'peak RSS MB':>12}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['path']:>6} ERRO: {r['error'].splitlines()[-1] if r['error'] else '?'}")
+            continue
+        print(f"{r['path']:>6} {r['steps_per_s']:>10} {r['learn_s']:>9} {r['setup_s']:>9} {r['peak_rss_mb']:>12}")
+    ok = {r['path']: r for r in results if 'error' not in r}
+    if 'torch' in ok and 'tf' in ok:
+        print(f"speedup torch/tf: {ok['torch']['steps_per_s'] / ok['tf']['steps_per_s']:.2f}x, "
+              f"RSS economizado: {ok['tf']['peak_rss_mb'] - ok['torch']['peak_rss_mb']:.0f} MB")
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
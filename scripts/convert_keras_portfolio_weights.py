@@ -0,0 +1,244 @@
+"""Convert Keras DeepPortfolioAgentNetwork weights into a DeepPortfolioAgentNetworkTorch state_dict.
+
+The output can be passed to agents/train_rl_portfolio_torch.py --init-weights to start the pure
+torch PPO training from an existing Keras checkpoint.
+
+Layer mapping (Keras -> torch):
+- asset_cnn1/asset_cnn2 (Conv1D, padding same) -> asset_processor.conv1/conv2
+- asset_lstm1 -> asset_processor.lstm1 forward direction. The torch LSTM is bidirectional;
+  its reverse direction is zeroed, which makes its output exactly 0. The matching input columns of
+  lstm2 are zeroed as well.
+- asset_lstm2_final -> asset_processor.lstm2 (gate order i, f, g/c, o is the same in both)
+- asset_output_layernorm -> asset_processor.output_norm
+- multi_asset_attention -> attention (only when num_heads * key_dim == asset_lstm_units2;
+  torch's MultiheadAttention has no separate key_dim, so otherwise the layer cannot be mapped.
+  With the defaults, 4 heads * key_dim 16 != 32, and the layer is always unmapped)
+- attention_layernorm -> attention_norm
+- final_dense1 -> dense1, final_dense2 -> latent_features_layer,
+  portfolio_allocation_output -> output_allocation_head (when the shapes match).
+
+The torch network is built with CONVERTED_NETWORK_KWARGS: the ReLU of final_dense2, the asset output
+LayerNorm and the Keras LayerNorm epsilon. They are saved next to the state_dict and
+train_rl_portfolio_torch.py applies them.
+
+Parity is checked on the per-asset processor and on the full network (allocation softmax) with random
+inputs. The conversion fails, and nothing is saved, when a layer is left unmapped or a difference exceeds
+--tolerance. --allow-partial saves such a partial conversion anyway (the unmapped layers keep their torch
+initialisation), e.g. as a warm start for training.
+
+Usage:
+    python scripts/convert_keras_portfolio_weights.py --keras-weights src/model/deep_portfolio.weights.h5 \
+        --num-assets 4 --num-features-per-asset 26 --window 60 --out out/keras_converted_state_dict.pt
+    python scripts/convert_keras_portfolio_weights.py ... --allow-partial   # aceita atenção não mapeada
+"""
+import sys
+import json
+import argparse
+import importlib.util
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+NEW_REDE_A_DIR = REPO_ROOT / 'new-rede-a'
+
+
+def _load_training_module():
+    # Loaded by path: importing the `agents` package would pull TensorFlow in through agents/__init__.py
+    spec = importlib.util.spec_from_file_location(
+        'train_rl_portfolio_torch', str(REPO_ROOT / 'agents' / 'train_rl_portfolio_torch.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['train_rl_portfolio_torch'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _conv(keras_layer, prefix: str) -> Dict[str, np.ndarray]:
+    kernel, bias = keras_layer.get_weights()  # kernel: (k, in, out)
+    return {f'{prefix}.weight': np.transpose(kernel, (2, 1, 0)), f'{prefix}.bias': bias}
+
+
+def _lstm(keras_layer, prefix: str, suffix: str = '_l0') -> Dict[str, np.ndarray]:
+    kernel, recurrent, bias = keras_layer.get_weights()  # (in, 4u), (u, 4u), (4u,)
+    return {
+        f'{prefix}.weight_ih{suffix}': kernel.T,
+        f'{prefix}.weight_hh{suffix}': recurrent.T,
+        f'{prefix}.bias_ih{suffix}': bias,
+        f'{prefix}.bias_hh{suffix}': np.zeros_like(bias),
+    }
+
+
+def _dense(keras_layer, prefix: str) -> Dict[str, np.ndarray]:
+    kernel, bias = keras_layer.get_weights()  # (in, out)
+    return {f'{prefix}.weight': kernel.T, f'{prefix}.bias': bias}
+
+
+def _attention(keras_layer, embed_dim: int) -> Dict[str, np.ndarray]:
+    qk, qb, kk, kb, vk, vb, ok, ob = keras_layer.get_weights()  # (dim, heads, key_dim) ... (heads, key_dim, dim)
+    heads, key_dim = qk.shape[1], qk.shape[2]
+    if heads * key_dim != embed_dim:
+        raise ValueError(f'num_heads*key_dim={heads * key_dim} != embed_dim={embed_dim}')
+    in_proj_weight = np.concatenate([w.reshape(embed_dim, -1).T for w in (qk, kk, vk)], axis=0)
+    in_proj_bias = np.concatenate([b.reshape(-1) for b in (qb, kb, vb)])
+    return {
+        'attention.in_proj_weight': in_proj_weight,
+        'attention.in_proj_bias': in_proj_bias,
+        'attention.out_proj.weight': ok.reshape(-1, embed_dim).T,
+        'attention.out_proj.bias': ob,
+    }
+
+
+def convert(keras_net, torch_net) -> Tuple[Dict, List[str], List[str]]:
+    """Return (torch state_dict, converted keys, skipped layers with the reason)."""
+    import torch
+
+    target = {k: v.clone() for k, v in torch_net.state_dict().items()}
+    proc = keras_net.asset_processor
+    units1 = proc.lstm1.units
+    mapped: Dict[str, np.ndarray] = {}
+    skipped: List[str] = []
+
+    mapped.update(_conv(proc.conv1, 'asset_processor.conv1'))
+    mapped.update(_conv(proc.conv2, 'asset_processor.conv2'))
+    mapped.update(_lstm(proc.lstm1, 'asset_processor.lstm1'))
+    for name in ('weight_ih', 'weight_hh', 'bias_ih', 'bias_hh'):
+        key = f'asset_processor.lstm1.{name}_l0_reverse'
+        if key in target:
+            mapped[key] = np.zeros(tuple(target[key].shape), dtype=np.float32)
+    lstm2 = _lstm(proc.lstm2, 'asset_processor.lstm2')
+    w_ih = lstm2['asset_processor.lstm2.weight_ih_l0']  # (4u2, units1)
+    expected_in = target['asset_processor.lstm2.weight_ih_l0'].shape[1]
+    if expected_in != w_ih.shape[1]:
+        # torch lstm2 reads [forward, reverse] halves of the bidirectional lstm1 output
+        padded = np.zeros((w_ih.shape[0], expected_in), dtype=w_ih.dtype)
+        padded[:, :units1] = w_ih
+        lstm2['asset_processor.lstm2.weight_ih_l0'] = padded
+    mapped.update(lstm2)
+    gamma, beta = proc.output_norm.get_weights()
+    mapped.update({'asset_processor.output_norm.weight': gamma, 'asset_processor.output_norm.bias': beta})
+
+    try:
+        mapped.update(_attention(keras_net.attention, int(keras_net.asset_lstm_output_dim)))
+    except ValueError as e:
+        skipped.append(f'multi_asset_attention: {e}')
+    gamma, beta = keras_net.attention_norm.get_weights()
+    mapped.update({'attention_norm.weight': gamma, 'attention_norm.bias': beta})
+
+    for keras_attr, torch_prefix in (('dense1', 'dense1'), ('dense2', 'latent_features_layer'),
+                                     ('output_allocation', 'output_allocation_head')):
+        layer = getattr(keras_net, keras_attr, None)
+        if layer is None or not layer.get_weights():
+            skipped.append(f'{keras_attr}: sem pesos no modelo Keras')
+            continue
+        mapped.update(_dense(layer, torch_prefix))
+
+    converted = []
+    for key, value in mapped.items():
+        if key not in target:
+            skipped.append(f'{key}: não existe no modelo torch')
+            continue
+        if tuple(target[key].shape) != tuple(value.shape):
+            skipped.append(f'{key}: shape {tuple(value.shape)} != {tuple(target[key].shape)}')
+            continue
+        target[key] = torch.from_numpy(np.ascontiguousarray(value, dtype=np.float32))
+        converted.append(key)
+    return target, converted, skipped
+
+
+# Constructor kwargs the converted weights require (saved with the state_dict).
+CONVERTED_NETWORK_KWARGS = {'latent_activation': 'relu', 'asset_output_norm': True, 'layer_norm_eps': 1e-6}
+
+
+def compare_asset_processor(keras_net, torch_net, window: int, num_features: int) -> float:
+    """Max |keras - torch| of the per-asset processor on random input (eval mode)."""
+    import torch
+    x = np.random.default_rng(0).normal(size=(4, window, num_features)).astype(np.float32)
+    keras_out = keras_net.asset_processor(x, training=False).numpy()
+    torch_net.eval()
+    with torch.no_grad():
+        torch_out = torch_net.asset_processor(torch.from_numpy(x)).numpy()
+    return float(np.abs(keras_out - torch_out).max())
+
+
+def compare_network(keras_net, torch_net, window: int, num_inputs: int) -> float:
+    """Max |keras - torch| of the full network output (allocation softmax) on random input (eval mode)."""
+    import torch
+    x = np.random.default_rng(1).normal(size=(4, window, num_inputs)).astype(np.float32)
+    keras_out = keras_net(x, training=False).numpy()
+    torch_net.eval()
+    with torch.no_grad():
+        torch_out = torch_net(torch.from_numpy(x)).numpy()
+    return float(np.abs(keras_out - torch_out).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keras-weights', required=True, help='arquivo de pesos Keras (save_weights / .h5)')
+    parser.add_argument('--num-assets', type=int, required=True)
+    parser.add_argument('--num-features-per-asset', type=int, required=True)
+    parser.add_argument('--window', type=int, required=True)
+    parser.add_argument('--features-dim', type=int, default=None,
+                        help='final_dense_units2 (padrão: o mesmo do treino torch)')
+    parser.add_argument('--out', default=str(REPO_ROOT / 'out' / 'keras_converted_state_dict.pt'))
+    parser.add_argument('--tolerance', type=float, default=1e-4,
+                        help='diferença absoluta máxima aceita entre as saídas Keras e torch')
+    parser.add_argument('--allow-partial', action='store_true',
+                        help='salva mesmo com camadas não mapeadas ou diferenças acima da tolerância')
+    args = parser.parse_args()
+
+    import torch
+    trainer = _load_training_module()
+    cfg, dpt, _ = trainer.register_vendored_torch_modules()
+    network_kwargs = dict(trainer.NETWORK_DEFAULTS)
+    features_dim = args.features_dim or trainer.FEATURES_DIM
+
+    with trainer._vendored_config(cfg):
+        keras_module = trainer._load_module('new_rede_a_DeepPortfolioAgent', NEW_REDE_A_DIR / 'DeepPortfolioAgent.py')
+    keras_net = keras_module.DeepPortfolioAgentNetwork(
+        num_assets=args.num_assets, sequence_length=args.window, num_features_per_asset=args.num_features_per_asset,
+        final_dense_units2=features_dim, use_sentiment_analysis=False, **network_kwargs)
+    dummy = np.zeros((1, args.window, args.num_assets * args.num_features_per_asset), dtype=np.float32)
+    keras_net(dummy, training=False)  # build variables before loading
+    keras_net.load_weights(args.keras_weights)
+
+    # Full network (with the allocation head) so the parity check covers the whole forward pass;
+    # the training extractor (output_latent_features=True) ignores the head keys (strict=False).
+    torch_net = dpt.DeepPortfolioAgentNetworkTorch(
+        num_assets=args.num_assets, sequence_length=args.window, num_features_per_asset=args.num_features_per_asset,
+        final_dense_units2=features_dim, output_latent_features=False, **CONVERTED_NETWORK_KWARGS, **network_kwargs)
+    state_dict, converted, skipped = convert(keras_net, torch_net)
+    torch_net.load_state_dict(state_dict)
+    asset_diff = compare_asset_processor(keras_net, torch_net, args.window, args.num_features_per_asset)
+    network_diff = compare_network(keras_net, torch_net, args.window, args.num_assets * args.num_features_per_asset)
+
+    problems = [f'camada não mapeada: {s}' for s in skipped]
+    for label, diff in (('asset_processor', asset_diff), ('rede completa', network_diff)):
+        if not diff <= args.tolerance:
+            problems.append(f'{label}: diferença máxima {diff:.3g} > tolerância {args.tolerance:g}')
+
+    out = Path(args.out)
+    report = {
+        'out': str(out),
+        'converted': converted,
+        'skipped': skipped,
+        'network_kwargs': CONVERTED_NETWORK_KWARGS,
+        'asset_processor_max_abs_diff': asset_diff,
+        'network_output_max_abs_diff': network_diff,
+        'tolerance': args.tolerance,
+        'parity': not problems,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if problems and not args.allow_partial:
+        raise SystemExit('Conversão sem paridade, nada foi salvo (use --allow-partial para salvar assim mesmo):\n  '
+                         + '\n  '.join(problems))
+    for problem in problems:
+        print(f'AVISO: {problem}', file=sys.stderr)
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    torch.save({'state_dict': state_dict, 'network_kwargs': CONVERTED_NETWORK_KWARGS}, out)
+    out.with_suffix('.json').write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,12 @@ except Exception:  # keep broad except to catch import errors / distribution nam
     # We'll print a helpful message later when TA functions are invoked.
 from datetime import datetime, timedelta, timezone # Adicionado timezone
 
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.utils.windowed_dataset import WindowedDataset
+
 # Importa constantes do config.py
 from config import PREDICTION_HORIZON, PRICE_CHANGE_THRESHOLD, BASE_FEATURE_COLS, WINDOW_SIZE
 
@@ -379,25 +385,30 @@ def calculate_targets(df: pd.DataFrame, horizon: int, threshold: float) -> pd.Da
     print(f"Distribuição do Alvo:\n{data['target'].value_counts(normalize=True, dropna=False)}")
     return data
 
-def create_sequences(data: pd.DataFrame, target_col_name: str, window_size: int, feature_col_names: List[str]) -> tuple[np.ndarray, np.ndarray]:
-    print(f"Criando sequências com window_size={window_size} usando features: {feature_col_names}")
-    X_list, y_list = [], []
-    
-    # Verificar se todas as feature_col_names e target_col_name existem no DataFrame
+def create_windowed_dataset(data: pd.DataFrame, target_col_name: str, window_size: int, feature_col_names: List[str],
+                            dtype=np.float32) -> WindowedDataset:
+    """
+    Mesmas janelas/alvos de create_sequences, mas sem materializar N x window x features:
+    guarda um único array (barras x features) e monta cada lote sob demanda.
+    """
     required_cols = feature_col_names + [target_col_name]
     missing_cols = [col for col in required_cols if col not in data.columns]
     if missing_cols:
         raise ValueError(f"Colunas ausentes no DataFrame para criar sequências: {missing_cols}. Colunas disponíveis: {data.columns.tolist()}")
 
-    # Usar .values pode ser mais rápido para DataFrames grandes, mas indexar por nome é mais seguro
-    feature_values = data[feature_col_names].values
-    target_values = data[target_col_name].values
-
-    for i in range(len(feature_values) - window_size + 1): # Ajuste no loop para incluir o último elemento possível
-        X_list.append(feature_values[i : i + window_size])
-        y_list.append(target_values[i + window_size - 1]) # Alvo correspondente ao final da janela
+    feature_values = data[feature_col_names].to_numpy(dtype=dtype)
+    target_values = data[target_col_name].to_numpy()
+    # Alvo correspondente ao final da janela (label_offset=0)
+    dataset = WindowedDataset(feature_values, target_values, window_size=window_size, label_offset=0)
+    print(f"Dataset em janelas: {len(dataset)} janelas de {dataset.element_shape}, "
+          f"{dataset.nbytes / 1e6:.1f} MB em memória (materializado seriam "
+          f"{len(dataset) * window_size * len(feature_col_names) * np.dtype(dtype).itemsize / 1e6:.1f} MB)")
+    return dataset
 
-    X = np.array(X_list)
-    y = np.array(y_list)
+def create_sequences(data: pd.DataFrame, target_col_name: str, window_size: int, feature_col_names: List[str]) -> tuple[np.ndarray, np.ndarray]:
+    print(f"Criando sequências com window_size={window_size} usando features: {feature_col_names}")
+    # Uma única alocação do resultado (antes: lista de janelas + np.array). Para treino prefira create_windowed_dataset.
+    dataset = create_windowed_dataset(data, target_col_name, window_size, feature_col_names, dtype=np.float64)
+    X, y = dataset.materialize()
     print(f"Shape de X (sequências): {X.shape}, Shape de y (alvos): {y.shape}")
-    return X, y
\ No newline at end of file
+    return X, y
@@ -6,6 +6,7 @@ import pandas as pd
 import numpy as np
 import pandas_ta as ta
 from pathlib import Path
+import sys
 
 
 class AggressiveMomentumStrategy:
@@ -164,12 +165,13 @@ class AggressiveMomentumStrategy:
             current_price = df.iloc[i]['close']
             current_atr = df.iloc[i]['atr']
             
-            # Gerencia posição existente
+            # Gerencia posição existente (manage_position zera self.position ao sair)
+            prev_position = self.position
             exit_signal, exit_msg = self.manage_position(current_price)
             action = exit_msg
             
-            if exit_signal != 0 and self.position != 0:  # Fechou posição
-                if self.position == 1:  # Era long
+            if exit_signal != 0 and prev_position != 0:  # Fechou posição
+                if prev_position == 1:  # Era long
                     pnl = (current_price - self.entry_price) / self.entry_price * position_value
                 else:  # Era short
                     pnl = (self.entry_price - current_price) / self.entry_price * position_value
@@ -179,7 +181,7 @@ class AggressiveMomentumStrategy:
                 trades.append({
                     'entry_price': self.entry_price,
                     'exit_price': current_price,
-                    'type': 'LONG' if self.position == 1 else 'SHORT',
+                    'type': 'LONG' if prev_position == 1 else 'SHORT',
                     'pnl': pnl,
                     'pnl_pct': (pnl / position_value) * 100 if position_value > 0 else 0
                 })
@@ -302,6 +304,10 @@ def create_synthetic_winning_data():
 
 if __name__ == "__main__":
     print("=== ESTRATÉGIA MOMENTUM AGRESSIVA ===")
+    # Saídas tipadas em Parquet (RESULTS_FORMAT=arrow|csv para outro formato)
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from src.utils.results_io import results_suffix, write_frame, write_trades
+    suffix = results_suffix()
     print("Criando dados favoráveis ao momentum trading...")
     
     # Usa dados sintéticos otimizados para momentum
@@ -365,7 +371,9 @@ if __name__ == "__main__":
             best_results = (results_df, trades, stats)
         
         # Salva resultados
-        results_df.to_csv(f"out/momentum_strategy_{config['name'].lower()}_equity.csv")
+        run_meta = {'strategy': 'momentum', 'config': config, 'stats': stats}
+        write_frame(f"out/momentum_strategy_{config['name'].lower()}_equity{suffix}", results_df, run_meta)
+        write_trades(f"out/momentum_strategy_{config['name'].lower()}_trades{suffix}", trades, run_meta)
     
     print(f"\n🎯 MELHOR RESULTADO: {best_config['name']} com {best_return:+.2f}% de retorno")
     
@@ -374,7 +382,8 @@ if __name__ == "__main__":
         print(f"📈 Diferença de performance: {best_return + 78:.1f} pontos percentuais de melhoria!")
         
         # Salva a melhor configuração
-        best_results[0].to_csv("out/best_momentum_strategy_equity.csv")
+        write_frame(f"out/best_momentum_strategy_equity{suffix}", best_results[0],
+                    {'strategy': 'momentum', 'config': best_config, 'stats': best_results[2]})
         
         print(f"\n📋 CONFIGURAÇÃO VENCEDORA:")
         for key, value in best_config.items():
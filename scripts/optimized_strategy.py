@@ -5,6 +5,8 @@ Ajusta parâmetros para superar completamente a rede neural
 import pandas as pd
 import numpy as np
 import pandas_ta as ta
+import sys
+from pathlib import Path
 
 
 class OptimizedProfitStrategy:
@@ -306,6 +308,10 @@ class OptimizedProfitStrategy:
 
 if __name__ == "__main__":
     print("=== ESTRATÉGIA OTIMIZADA PARA LUCRO ===")
+    # Saídas tipadas em Parquet (RESULTS_FORMAT=arrow|csv para outro formato)
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from src.utils.results_io import results_suffix, write_frame, write_trades
+    suffix = results_suffix()
     
     # Testa diferentes configurações
     configs = [
@@ -378,7 +384,9 @@ if __name__ == "__main__":
                 print(f"   Profit Factor: {profit_factor:.2f}")
         
         # Salva resultados
-        results.to_csv(f"out/optimized_{config['name'].lower()}_results.csv", index=False)
+        run_meta = {'strategy': 'optimized', 'config': config}
+        write_frame(f"out/optimized_{config['name'].lower()}_results{suffix}", results, run_meta)
+        write_trades(f"out/optimized_{config['name'].lower()}_trades{suffix}", strategy.trades, run_meta)
         
         if total_return > best_return:
             best_return = total_return
@@ -0,0 +1,539 @@
+"""
+Orquestrador de backtests/treinos sobre uma matriz ativo × timeframe × estratégia.
+
+Substitui run_all_assets_5m.ps1 / run_single_5m_asset.ps1 / start_5m_runs_detached.ps1 e o
+monitor_5m_runs.py (que raspava logs):
+- os dados OHLCV de cada (ativo, timeframe) são carregados uma vez no processo pai (CSV em
+  --data-dir ou yfinance) e publicados read-only em shared memory (SharedFeatureStore);
+- as execuções rodam em um pool de processos limitado (spawn, 1 thread de BLAS por worker, então
+  N workers ocupam N núcleos sem oversubscription); runs do mesmo ativo vão juntas para o mesmo
+  worker, que calcula indicadores/features uma vez por ativo e os reaproveita entre estratégias;
+- o pai registra cada run como 'queued' no índice SQLite (src/utils/results_store.py); cada worker
+  emite eventos de progresso (started/finished/failed) por uma fila e o pai os grava em
+  out/runs/<sweep>/events.jsonl e no índice;
+- run_key é determinístico (hash de ativo/timeframe/estratégia/params) e cada run recebe uma seed
+  derivada dele, então a mesma matriz reproduz os mesmos resultados; no índice, run_id = <sweep>:<run_key>.
+
+Estratégias:
+    optimized | momentum | simple  -> regras de scripts/*_strategy.py via scripts/param_search.py
+    vol_momentum                   -> scripts/simple_momentum_backtest.backtest_momentum
+    features                       -> agents/backtest_eth_usd.run_backtest_from_features
+    ppo_train                      -> agents/train_rl_portfolio_agent.py em subprocesso (antigo 5M run)
+
+Usage:
+    python scripts/orchestrate_runs.py --assets crypto_eth=ETH-USD,crypto_btc=BTC-USD \\
+        --timeframes 1h,1d --strategies momentum,optimized,vol_momentum --workers 8
+    python scripts/orchestrate_runs.py --matrix matrix.json
+    python scripts/orchestrate_runs.py --status [--sweep <sweep_id>]
+
+matrix.json:
+    {"assets": {"crypto_eth": "ETH-USD"}, "timeframes": ["1h"],
+     "strategies": {"momentum": {"take_profit_pct": [2.0, 3.0]}, "vol_momentum": {}},
+     "period": "2y", "data_dir": "data/ohlcv"}
+"""
+import os
+import sys
+import json
+import time
+import queue
+import hashlib
+import argparse
+import itertools
+import importlib
+import subprocess
+import tempfile
+import threading
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.utils.shared_feature_store import SharedFeatureStore, attach_feature_store  # noqa: E402
+from src.utils.results_store import DEFAULT_DB, PERIODS_PER_YEAR, ResultsStore, summarize_equity  # noqa: E402
+from src.utils.results_io import results_suffix, write_equity, write_trades  # noqa: E402
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+_THREAD_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS',
+                'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+
+@dataclass
+class RunSpec:
+    asset: str
+    ticker: str
+    timeframe: str
+    strategy: str
+    params: Dict = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        payload = json.dumps([self.asset, self.timeframe, self.strategy, self.params], sort_keys=True, default=str)
+        digest = hashlib.sha1(payload.encode()).hexdigest()[:10]
+        return f"{self.asset}_{self.timeframe}_{self.strategy}_{digest}"
+
+    @property
+    def seed(self) -> int:
+        return int(hashlib.sha1(self.key.encode()).hexdigest()[:8], 16)
+
+
+def expand_grid(space: Dict[str, list]) -> List[Dict]:
+    """{param: [valores]} -> lista de dicts (produto cartesiano); escalares viram listas de 1."""
+    names = sorted(space)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in (space[n] for n in names)]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def build_matrix(assets: Dict[str, str], timeframes: List[str], strategies: Dict[str, Dict]) -> List[RunSpec]:
+    """Matriz completa em ordem determinística (ativo, timeframe, estratégia, params)."""
+    runs = []
+    for asset in sorted(assets):
+        for timeframe in timeframes:
+            for strategy in sorted(strategies):
+                for params in expand_grid(strategies[strategy] or {}):
+                    runs.append(RunSpec(asset, assets[asset], timeframe, strategy, params))
+    return runs
+
+
+# --- Dados -----------------------------------------------------------------------------------------
+
+def load_ohlcv(asset: str, ticker: str, timeframe: str, data_dir: Optional[str] = None,
+               period: str = '2y') -> pd.DataFrame:
+    """CSV `<data_dir>/<asset|ticker>_<timeframe>.csv` quando existir; senão yfinance."""
+    if data_dir:
+        for name in (asset, ticker, ticker.replace('-', '').replace('/', '')):
+            path = Path(data_dir) / f"{name}_{timeframe}.csv"
+            if path.exists():
+                df = pd.read_csv(path, index_col=0, parse_dates=True)
+                df.columns = [c.lower() for c in df.columns]
+                return df[OHLCV_COLUMNS]
+    from agents.data_handler_multi_asset import fetch_single_asset_ohlcv_yf
+    return fetch_single_asset_ohlcv_yf(ticker, period=period, interval=timeframe)
+
+
+def _publish(df: pd.DataFrame) -> SharedFeatureStore:
+    """OHLCV + timestamp (segundos) em um bloco de shared memory."""
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    seconds = (index.tz_convert('UTC').as_unit('ns').asi8 // 10**9).astype(np.float64)
+    prices = np.column_stack([seconds] + [df[c].to_numpy(dtype=np.float64) for c in OHLCV_COLUMNS])
+    return SharedFeatureStore(np.zeros((len(df), 0), dtype=np.float32), np.ascontiguousarray(prices),
+                              [], ['timestamp'] + OHLCV_COLUMNS)
+
+
+def _frame_from_store(attached) -> pd.DataFrame:
+    prices = attached.prices
+    index = pd.to_datetime(prices[:, 0].astype(np.int64), unit='s', utc=True)
+    return pd.DataFrame(np.array(prices[:, 1:]), index=index, columns=OHLCV_COLUMNS)
+
+
+# --- Estratégias -----------------------------------------------------------------------------------
+
+class AssetCache:
+    """Indicadores/features calculados uma vez por (ativo, timeframe) dentro do worker."""
+
+    def __init__(self, ohlcv: pd.DataFrame):
+        self.ohlcv = ohlcv
+        self._items = {}
+
+    def get(self, key, build: Callable):
+        if key not in self._items:
+            self._items[key] = build()
+        return self._items[key]
+
+
+def _run_param_search_strategy(run: RunSpec, cache: AssetCache, initial_capital: float) -> Dict:
+    ps = importlib.import_module('scripts.param_search')
+    spec = ps.STRATEGIES[run.strategy]
+    params = {**spec.defaults, **run.params}
+    ind_params = {name: params[name] for name in spec.indicator_params}
+    frame = cache.get(('indicators', run.strategy, ps.indicator_key(spec, params)), lambda: {
+        c: s.to_numpy(dtype=np.float64)
+        for c, s in ps.compute_indicator_frame(spec, cache.ohlcv, ind_params).items()})
+    rules = spec.rules(frame, params)
+    metrics, equity = ps.simulate(frame['close'], initial_capital=initial_capital, **rules)
+    start = rules.get('equity_start', rules['start'])
+    return {'equity': pd.Series(equity, index=cache.ohlcv.index[start:start + len(equity)], name='equity'),
+            'trades': None, 'metrics': {'trades': metrics['total_trades'], 'win_rate_pct': metrics['win_rate_pct']}}
+
+
+def _run_vol_momentum(run: RunSpec, cache: AssetCache, initial_capital: float) -> Dict:
+    from scripts.simple_momentum_backtest import backtest_momentum
+    df = backtest_momentum(cache.ohlcv['close'], **run.params)
+    equity = df.set_index('timestamp')['equity'] * (initial_capital / 100000.0)
+    trades = int((df['position'].diff().fillna(0) != 0).sum())
+    return {'equity': equity, 'trades': None, 'metrics': {'trades': trades}}
+
+
+def _run_features(run: RunSpec, cache: AssetCache, initial_capital: float) -> Dict:
+    from agents.data_handler_multi_asset import calculate_all_features_for_single_asset
+    from agents.backtest_eth_usd import run_backtest_from_features
+    feats = cache.get(('features',), lambda: calculate_all_features_for_single_asset(cache.ohlcv))
+    if feats is None or feats.empty:
+        raise RuntimeError('Falha ao calcular features')
+    out = run_backtest_from_features(feats, start_capital=initial_capital, **run.params)
+    trades = out['trades']
+    sells = trades[trades['side'] == 'sell'] if len(trades) else trades
+    return {'equity': out['equity'], 'trades': trades, 'metrics': {'trades': int(len(sells))}}
+
+
+STRATEGY_RUNNERS = {
+    'optimized': _run_param_search_strategy,
+    'momentum': _run_param_search_strategy,
+    'simple': _run_param_search_strategy,
+    'vol_momentum': _run_vol_momentum,
+    'features': _run_features,
+}
+TRAINING_STRATEGIES = ('ppo_train',)
+
+
+def _run_training(run: RunSpec, out_dir: Path, threads: int) -> Dict:
+    """Treino PPO de um ativo (equivalente ao run_single_5m_asset.ps1): override de scripts.config em diretório temporário."""
+    params = {'timesteps': 5_000_000, 'model_dir': 'src/model/5m_runs', **run.params}
+    model_dir = REPO_ROOT / params['model_dir'] / run.asset
+    model_dir.mkdir(parents=True, exist_ok=True)
+    log_path = out_dir / f"{run.key}_train.log"
+    with tempfile.TemporaryDirectory(prefix=f"scripts_override_{run.asset}_") as tmp:
+        pkg = Path(tmp) / 'scripts'
+        pkg.mkdir()
+        (pkg / '__init__.py').write_text('# override package\n', encoding='utf-8')
+        (pkg / 'config.py').write_text(
+            "# Auto-generated override config for single-asset runs\n"
+            f"MULTI_ASSET_SYMBOLS = {{{run.asset!r}: {run.ticker!r}}}\n"
+            f"TIMEFRAME_YFINANCE = {run.timeframe!r}\n"
+            f"MODEL_SAVE_DIR = {str(model_dir)!r}\n", encoding='utf-8')
+        env = {**os.environ, 'PYTHONPATH': tmp, 'PPO_TOTAL_TIMESTEPS': str(params['timesteps']),
+               'CUDA_VISIBLE_DEVICES': os.environ.get('CUDA_VISIBLE_DEVICES', ''), 'TF_CPP_MIN_LOG_LEVEL': '2'}
+        env.pop('SMOKE_TIMESTEPS', None)
+        env.update({var: str(threads) for var in _THREAD_VARS})
+        with open(log_path, 'w', encoding='utf-8') as log:
+            code = subprocess.call([sys.executable, str(REPO_ROOT / 'agents' / 'train_rl_portfolio_agent.py')],
+                                   cwd=str(REPO_ROOT), env=env, stdout=log, stderr=subprocess.STDOUT)
+    if code != 0:
+        raise RuntimeError(f"treino saiu com código {code} (log: {log_path})")
+    artifacts = sorted(str(p) for pattern in ('*.zip', '*.pth', '*.pt') for p in model_dir.rglob(pattern))
+    return {'equity': None, 'trades': None, 'metrics': {}, 'artifacts': artifacts, 'log_path': str(log_path)}
+
+
+# --- Workers ---------------------------------------------------------------------------------------
+
+@dataclass
+class Task:
+    """Fatia de runs de um mesmo (ativo, timeframe); handle None para treinos (sem dados)."""
+    handle: Optional[object]
+    runs: List[RunSpec]
+
+
+_WORKER = {}
+
+
+def _init_worker(events, out_dir: str, initial_capital: float, train_threads: int):
+    _WORKER.update(events=events, out_dir=Path(out_dir), initial_capital=initial_capital,
+                   train_threads=train_threads)
+
+
+def _emit(kind: str, run: RunSpec, **payload):
+    _WORKER['events'].put({'event': kind, 'ts': time.time(), 'run_key': run.key, 'pid': os.getpid(), **payload})
+
+
+def _save_outputs(run: RunSpec, result: Dict, out_dir: Path) -> Dict:
+    paths = {}
+    run_meta = {'run_key': run.key, 'asset': run.asset, 'ticker': run.ticker, 'timeframe': run.timeframe,
+                'strategy': run.strategy, 'params': run.params}
+    if result.get('equity') is not None:
+        paths['equity_path'] = str(out_dir / f"{run.key}_equity{results_suffix()}")
+        write_equity(paths['equity_path'], result['equity'], metadata=run_meta)
+    if result.get('trades') is not None and len(result['trades']):
+        paths['trades_path'] = str(out_dir / f"{run.key}_trades{results_suffix()}")
+        write_trades(paths['trades_path'], result['trades'], metadata=run_meta)
+    return paths
+
+
+def execute_task(task: Task) -> int:
+    """Roda todas as runs da fatia; resultados saem como eventos (o pai é o único escritor do índice)."""
+    out_dir, capital = _WORKER['out_dir'], _WORKER['initial_capital']
+    attached = attach_feature_store(task.handle) if task.handle is not None else None
+    try:
+        cache = AssetCache(_frame_from_store(attached)) if attached is not None else None
+        for run in task.runs:
+            _emit('started', run)
+            started = time.perf_counter()
+            try:
+                np.random.seed(run.seed % 2**32)
+                if run.strategy in TRAINING_STRATEGIES:
+                    result = _run_training(run, out_dir, _WORKER['train_threads'])
+                else:
+                    result = STRATEGY_RUNNERS[run.strategy](run, cache, capital)
+                record = dict(result.get('metrics', {}))
+                if result.get('equity') is not None:
+                    freq = PERIODS_PER_YEAR.get(run.timeframe, PERIODS_PER_YEAR['1h'])
+                    record.update(summarize_equity(result['equity'].to_numpy(), freq))
+                record.update(_save_outputs(run, result, out_dir))
+                if result.get('artifacts') is not None:
+                    record['artifacts'] = result['artifacts']
+                _emit('finished', run, duration_s=time.perf_counter() - started, **record)
+            except Exception as e:
+                _emit('failed', run, duration_s=time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+        return len(task.runs)
+    finally:
+        if attached is not None:
+            attached.close()
+
+
+def plan_tasks(runs: List[RunSpec], handles: Dict[Tuple[str, str], object], workers: int) -> List[Task]:
+    """
+    Runs do mesmo (ativo, timeframe) ficam juntas (cache de indicadores no worker). Com menos grupos
+    que workers, cada grupo é fatiado para ocupar o pool; treinos viram uma task cada.
+    """
+    groups: Dict[Tuple[str, str], List[RunSpec]] = {}
+    tasks = []
+    for run in runs:
+        if run.strategy in TRAINING_STRATEGIES:
+            tasks.append(Task(None, [run]))
+        else:
+            groups.setdefault((run.asset, run.timeframe), []).append(run)
+    splits = max(1, -(-workers // max(1, len(groups))))
+    for key, group in groups.items():
+        # fatias contíguas mantêm juntas as runs da mesma estratégia (mesmos indicadores)
+        for part in np.array_split(np.arange(len(group)), min(splits, len(group))):
+            tasks.append(Task(handles[key], [group[i] for i in part]))
+    # maiores primeiro: melhor balanceamento no pool
+    return sorted(tasks, key=lambda t: -len(t.runs))
+
+
+def default_workers() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class EventSink:
+    """Consome a fila de eventos no pai: events.jsonl + índice SQLite + linha de progresso."""
+
+    def __init__(self, store: ResultsStore, runs: List[RunSpec], sweep_id: str, events_path: Path,
+                 on_event: Optional[Callable[[Dict], None]] = None):
+        self.store = store
+        self.runs = {run.key: run for run in runs}
+        self.sweep_id = sweep_id
+        self.events_path = events_path
+        self.on_event = on_event
+        self.counts = {'finished': 0, 'failed': 0}
+        self._file = open(events_path, 'a', encoding='utf-8')
+
+    def handle(self, event: Dict):
+        self._file.write(json.dumps(event, default=str) + '\n')
+        self._file.flush()
+        run_id = f"{self.sweep_id}:{event['run_key']}"
+        kind = event['event']
+        if kind == 'started':
+            self.store.upsert_run({'run_id': run_id, 'status': 'running', 'started_at': event['ts']})
+        elif kind in ('finished', 'failed'):
+            self.counts[kind] += 1
+            self.store.upsert_run({**event, 'run_id': run_id, 'status': kind, 'finished_at': event['ts']})
+        if self.on_event is not None:
+            self.on_event(event)
+        elif kind in ('finished', 'failed'):
+            done = sum(self.counts.values())
+            detail = (f"end={event.get('end_capital')!s:.12} sharpe={event.get('sharpe')!s:.6}"
+                      if kind == 'finished' else event.get('error'))
+            print(f"[{done}/{len(self.runs)}] {kind:8s} {event['run_key']} {detail}", flush=True)
+
+    def close(self):
+        self._file.close()
+
+
+def run_matrix(runs: List[RunSpec], data_dir: Optional[str] = None, period: str = '2y',
+               workers: Optional[int] = None, out_root: str = 'out/runs', db_path: str = DEFAULT_DB,
+               initial_capital: float = 100000.0, train_threads: int = 4, sweep_id: Optional[str] = None,
+               loader: Callable = load_ohlcv, on_event: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Executa a matriz e devolve o resumo do sweep; cada run fica registrada em `db_path`."""
+    workers = workers or default_workers()
+    sweep_id = sweep_id or datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    out_dir = Path(out_root) / sweep_id
+    out_dir.mkdir(parents=True, exist_ok=True)
+    store = ResultsStore(db_path)
+    now = time.time()
+    for run in runs:
+        store.upsert_run({'run_id': f"{sweep_id}:{run.key}", 'run_key': run.key, 'sweep_id': sweep_id, 'asset': run.asset, 'ticker': run.ticker,
+                          'timeframe': run.timeframe, 'strategy': run.strategy, 'params': run.params,
+                          'status': 'queued', 'created_at': now, 'started_at': None, 'finished_at': None,
+                          'error': None})
+    with open(out_dir / 'manifest.json', 'w', encoding='utf-8') as f:
+        json.dump({'sweep_id': sweep_id, 'created_at': now, 'workers': workers, 'period': period,
+                   'data_dir': data_dir, 'initial_capital': initial_capital, 'git_commit': _git_commit(),
+                   'numpy': np.__version__, 'pandas': pd.__version__,
+                   'runs': [{**asdict(r), 'run_key': r.key, 'seed': r.seed} for r in runs]}, f, indent=2, default=str)
+
+    # Carrega cada (ativo, timeframe) uma vez (I/O em threads) e publica em shared memory
+    pairs = sorted({(r.asset, r.ticker, r.timeframe) for r in runs if r.strategy not in TRAINING_STRATEGIES})
+    stores: Dict[Tuple[str, str], SharedFeatureStore] = {}
+    sink = EventSink(store, runs, sweep_id, out_dir / 'events.jsonl', on_event)
+    failed_loads = []
+    saved_env = {var: os.environ.get(var) for var in _THREAD_VARS}
+    try:
+        with ThreadPoolExecutor(max_workers=min(8, max(1, len(pairs)))) as io_pool:
+            futures = {io_pool.submit(loader, a, t, tf, data_dir, period): (a, t, tf) for a, t, tf in pairs}
+            for future in as_completed(futures):
+                asset, ticker, timeframe = futures[future]
+                try:
+                    df = future.result()
+                    if df is None or df.empty:
+                        raise RuntimeError('sem dados')
+                    stores[(asset, timeframe)] = _publish(df)
+                except Exception as e:
+                    failed_loads.append((asset, timeframe, f"{type(e).__name__}: {e}"))
+        for asset, timeframe, error in failed_loads:
+            for run in runs:
+                if (run.asset, run.timeframe) == (asset, timeframe) and run.strategy not in TRAINING_STRATEGIES:
+                    sink.handle({'event': 'failed', 'ts': time.time(), 'run_key': run.key,
+                                 'error': f"carga de dados: {error}"})
+        runnable = [r for r in runs if r.strategy in TRAINING_STRATEGIES or (r.asset, r.timeframe) in stores]
+        tasks = plan_tasks(runnable, {k: s.handle for k, s in stores.items()}, workers)
+
+        # 1 thread de BLAS/OpenMP por worker: herdado pelos processos spawn antes de importarem numpy
+        for var in _THREAD_VARS:
+            os.environ[var] = '1'
+        ctx = mp.get_context('spawn')
+        events = ctx.Queue()
+        pump_done = threading.Event()
+
+        def pump():
+            while not (pump_done.is_set() and events.empty()):
+                try:
+                    event = events.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                try:
+                    sink.handle(event)
+                except Exception:
+                    # falha de gravação (jsonl/SQLite) não pode sumir: reporta e segue com os próximos eventos
+                    print(f"⚠️ Falha ao gravar evento {event.get('event')} de {event.get('run_key')}:\n"
+                          f"{traceback.format_exc()}", file=sys.stderr, flush=True)
+
+        pump_thread = threading.Thread(target=pump, daemon=True)
+        pump_thread.start()
+        started = time.perf_counter()
+        try:
+            if tasks:
+                with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=ctx,
+                                         initializer=_init_worker,
+                                         initargs=(events, str(out_dir), initial_capital, train_threads)) as pool:
+                    for future in [pool.submit(execute_task, task) for task in tasks]:
+                        future.result()
+        finally:
+            pump_done.set()
+            pump_thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+        for shared in stores.values():
+            shared.close()
+        sink.close()
+        store.close()
+    return {'sweep_id': sweep_id, 'runs': len(runs), 'finished': sink.counts['finished'],
+            'failed': sink.counts['failed'], 'elapsed_s': elapsed, 'out_dir': str(out_dir), 'db_path': db_path}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=str(REPO_ROOT),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def print_status(db_path: str, sweep_id: Optional[str], limit: int = 50):
+    """Resumo do sweep (substitui o monitor_5m_runs.py)."""
+    with ResultsStore(db_path) as store:
+        if sweep_id is None:
+            latest = store.list_runs(order_by='created_at', limit=1)
+            sweep_id = latest[0]['sweep_id'] if latest else None
+        runs = store.list_runs(order_by='sharpe', sweep_id=sweep_id) if sweep_id else []
+    if not runs:
+        print("Nenhuma execução registrada.")
+        return
+    table = pd.DataFrame(runs)
+    print(f"Sweep {sweep_id}: " + ', '.join(f"{k}={v}" for k, v in table['status'].value_counts().items()))
+    cols = ['run_key', 'status', 'end_capital', 'total_return_pct', 'sharpe', 'max_drawdown_pct', 'trades', 'error']
+    print(table[[c for c in cols if c in table]].head(limit).to_string(index=False))
+
+
+def _parse_assets(text: str) -> Dict[str, str]:
+    assets = {}
+    for item in filter(None, (s.strip() for s in text.split(','))):
+        key, _, ticker = item.partition('=')
+        assets[key] = ticker or key
+    return assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orquestrador de backtests ativo × timeframe × estratégia")
+    parser.add_argument('--matrix', default=None, help='JSON com assets/timeframes/strategies (ver docstring)')
+    parser.add_argument('--assets', default=None, help='key=ticker,... (padrão: scripts/config.MULTI_ASSET_SYMBOLS)')
+    parser.add_argument('--timeframes', default=None, help='ex.: 1h,1d (padrão: 1h)')
+    parser.add_argument('--strategies', default=None, help='ex.: momentum,optimized (params padrão)')
+    parser.add_argument('--data-dir', default=None, help='CSVs <asset>_<timeframe>.csv; sem arquivo usa yfinance')
+    parser.add_argument('--period', default=None, help='período do yfinance (padrão: 2y)')
+    parser.add_argument('--workers', type=int, default=None, help='padrão: núcleos disponíveis')
+    parser.add_argument('--train-threads', type=int, default=4, help='threads por treino ppo_train')
+    parser.add_argument('--capital', type=float, default=100000.0)
+    parser.add_argument('--out-dir', default='out/runs')
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--sweep', default=None, help='id do sweep (padrão: timestamp UTC)')
+    parser.add_argument('--status', action='store_true', help='só mostra o estado do sweep no índice')
+    args = parser.parse_args()
+
+    if args.status:
+        print_status(args.db, args.sweep)
+        return
+
+    matrix = {}
+    if args.matrix:
+        with open(args.matrix, encoding='utf-8') as f:
+            matrix = json.load(f)
+    if args.assets:
+        matrix['assets'] = _parse_assets(args.assets)
+    elif 'assets' not in matrix:
+        import scripts.config as sconf
+        matrix['assets'] = dict(sconf.MULTI_ASSET_SYMBOLS)
+    if args.timeframes:
+        matrix['timeframes'] = [t.strip() for t in args.timeframes.split(',') if t.strip()]
+    if args.strategies:
+        matrix['strategies'] = {s.strip(): matrix.get('strategies', {}).get(s.strip(), {})
+                                for s in args.strategies.split(',') if s.strip()}
+    matrix.setdefault('timeframes', ['1h'])
+    matrix.setdefault('strategies', {'momentum': {}, 'optimized': {}, 'simple': {}})
+    unknown = set(matrix['strategies']) - set(STRATEGY_RUNNERS) - set(TRAINING_STRATEGIES)
+    if unknown:
+        parser.error(f"estratégias desconhecidas: {sorted(unknown)}")
+
+    runs = build_matrix(matrix['assets'], matrix['timeframes'], matrix['strategies'])
+    workers = args.workers or default_workers()
+    print(f"🚀 {len(runs)} execuções ({len(matrix['assets'])} ativos × {len(matrix['timeframes'])} timeframes × "
+          f"{len(matrix['strategies'])} estratégias) em {workers} workers")
+    summary = run_matrix(runs, data_dir=args.data_dir or matrix.get('data_dir'),
+                         period=args.period or matrix.get('period', '2y'), workers=workers,
+                         out_root=args.out_dir, db_path=args.db, initial_capital=args.capital,
+                         train_threads=args.train_threads, sweep_id=args.sweep)
+    print(f"✅ Sweep {summary['sweep_id']}: {summary['finished']} ok, {summary['failed']} falhas "
+          f"em {summary['elapsed_s']:.1f}s — índice: {summary['db_path']}, saídas: {summary['out_dir']}")
+    print_status(args.db, summary['sweep_id'], limit=10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,431 @@
+"""
+Busca de parâmetros em paralelo para as estratégias de scripts/ (optimized, momentum, simple).
+
+O frame de indicadores é calculado uma única vez (pelo próprio calculate_indicators da estratégia)
+por combinação de parâmetros de indicador, publicado read-only em shared memory (SharedFeatureStore)
+e anexado uma vez por worker do pool. Cada worker avalia conjuntos de parâmetros de trading com um
+backtest vetorizado que reproduz as regras do backtest original: sinais como máscaras booleanas,
+saídas (stop/target) achadas por busca vetorizada a partir da entrada, equity montada por trecho.
+Configurações claramente perdedoras param cedo (drawdown do capital realizado > --early-stop-dd).
+
+Usage:
+    python scripts/param_search.py --strategy optimized --workers 8
+    python scripts/param_search.py --strategy momentum --random 300 --seed 7
+    python scripts/param_search.py --strategy simple --data data/ethusd_1h.csv
+Resultado: tabela ranqueada em out/param_search_<strategy>_<timestamp>.csv (+ .json com a melhor).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.shared_feature_store import SharedFeatureStore, attach_feature_store  # noqa: E402
+
+
+# --- Backtest vetorizado ---------------------------------------------------------------------------
+
+def _first_exit(close: np.ndarray, begin: int, side: int, entry: float, target: float,
+                stop: Optional[float], stop_frac: Optional[np.ndarray]) -> int:
+    """Primeira barra >= begin que aciona stop ou target (janelas crescentes); len(close) se nenhuma."""
+    n, step = len(close), 64
+    while begin < n:
+        end = min(n, begin + step)
+        prices = close[begin:end]
+        if stop_frac is not None:  # stop recalculado a cada barra (ATR corrente)
+            stops = entry * (1 - stop_frac[begin:end]) if side == 1 else entry * (1 + stop_frac[begin:end])
+        else:
+            stops = stop
+        if side == 1:
+            hit = (prices <= stops) | (prices >= target)
+        else:
+            hit = (prices >= stops) | (prices <= target)
+        if hit.any():
+            return begin + int(np.argmax(hit))
+        begin, step = end, step * 2
+    return n
+
+
+def _position_pnl(side: int, entry: float, price, value: float, pnl_mode: str):
+    if pnl_mode == 'ratio':
+        return (price / entry - 1) * value if side == 1 else (entry / price - 1) * value
+    return (price - entry) / entry * value if side == 1 else (entry - price) / entry * value
+
+
+def simulate(close: np.ndarray, entry_long: np.ndarray, entry_short: np.ndarray, start: int,
+             position_size: float, take_profit: float, stop_frac: np.ndarray, dynamic_stop: bool = False,
+             pnl_mode: str = 'linear', reenter_on_exit: bool = True, equity_start: Optional[int] = None,
+             initial_capital: float = 100000, early_stop_dd: Optional[float] = None) -> Tuple[Dict, np.ndarray]:
+    """
+    Um trade por vez, como os loops originais:
+    - entrada na primeira barra >= cursor com entry_long/entry_short (long tem prioridade);
+    - stop = entry*(1 -/+ stop_frac) (da barra de entrada, ou de cada barra se dynamic_stop);
+      target = entry*(1 +/- take_profit); position_value = capital * position_size;
+    - reenter_on_exit: pode entrar de novo na mesma barra em que saiu.
+    Retorna (métricas, equity por barra a partir de equity_start).
+    """
+    n = len(close)
+    equity_start = start if equity_start is None else equity_start
+    long_idx = np.flatnonzero(entry_long[start:]) + start
+    short_idx = np.flatnonzero(entry_short[start:]) + start
+    capital = peak = float(initial_capital)
+    trades, segments = [], []  # segments: (entrada, saída, side, entry, value)
+    cursor, early_stopped, stopped_at = start, False, n
+
+    while cursor < n:
+        li = np.searchsorted(long_idx, cursor)
+        si = np.searchsorted(short_idx, cursor)
+        k_long = long_idx[li] if li < len(long_idx) else n
+        k_short = short_idx[si] if si < len(short_idx) else n
+        k = min(k_long, k_short)
+        if k >= n:
+            break
+        side = 1 if k == k_long else -1
+        entry = close[k]
+        value = capital * position_size
+        if side == 1:
+            target = entry * (1 + take_profit)
+            stop = None if dynamic_stop else entry * (1 - stop_frac[k])
+        else:
+            target = entry * (1 - take_profit)
+            stop = None if dynamic_stop else entry * (1 + stop_frac[k])
+        j = _first_exit(close, k + 1, side, entry, target, stop, stop_frac if dynamic_stop else None)
+        segments.append((k, j, side, entry, value))
+        if j >= n:
+            break
+        pnl = _position_pnl(side, entry, close[j], value, pnl_mode)
+        capital += pnl
+        trades.append(pnl)
+        peak = max(peak, capital)
+        if early_stop_dd is not None and capital < peak * (1 - early_stop_dd):
+            early_stopped, stopped_at = True, j + 1
+            break
+        cursor = j if reenter_on_exit else j + 1
+
+    # Equity: capital realizado em degraus + PnL não realizado dentro de cada trade
+    realized = np.zeros(n)
+    unrealized = np.zeros(n)
+    for (k, j, side, entry, value), pnl in itertools.zip_longest(segments, trades):
+        end = min(j, n)
+        unrealized[k:end] = _position_pnl(side, entry, close[k:end], value, pnl_mode)
+        if pnl is not None:
+            realized[j] += pnl
+    equity = (initial_capital + np.cumsum(realized) + unrealized)[equity_start:stopped_at]
+
+    trades = np.asarray(trades)
+    wins, losses = trades[trades > 0], trades[trades <= 0]
+    running_max = np.maximum.accumulate(equity) if len(equity) else equity
+    returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+    returns_std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    metrics = {
+        'final_equity': float(equity[-1]) if len(equity) else float(initial_capital),
+        'total_return_pct': (float(equity[-1]) / initial_capital - 1) * 100 if len(equity) else 0.0,
+        'max_drawdown_pct': float(((equity - running_max) / running_max).min() * 100) if len(equity) else 0.0,
+        'total_trades': int(len(trades)),
+        'win_rate_pct': len(wins) / len(trades) * 100 if len(trades) else 0.0,
+        'profit_factor': abs(wins.sum() / losses.sum()) if len(losses) and losses.sum() != 0 else float('inf'),
+        'sharpe_ratio': float((returns - 0.02 / 252).mean() / returns_std * np.sqrt(252)) if returns_std > 0 else 0.0,
+        'early_stopped': early_stopped,
+        'bars_evaluated': int(stopped_at - equity_start),
+    }
+    return metrics, equity
+
+
+# --- Estratégias -----------------------------------------------------------------------------------
+
+def _prev(values: np.ndarray) -> np.ndarray:
+    out = np.empty_like(values)
+    out[0] = np.nan
+    out[1:] = values[:-1]
+    return out
+
+
+def _optimized_rules(f: Dict[str, np.ndarray], p: dict) -> dict:
+    """OptimizedProfitStrategy.generate_entry_signals + filtro de bb_width + stop dinâmico por ATR."""
+    close, rsi = f['close'], f['rsi']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        spike = f['volume_ratio'] > p['volume_threshold']
+        ef, em, es = f['ema_fast'], f['ema_mid'], f['ema_slow']
+        k, d, macd, sig = f['stoch_k'], f['stoch_d'], f['macd'], f['macd_signal']
+        n_long = (((ef > em) & (em > es) & (_prev(ef) <= _prev(em)) & (rsi < 40) & spike).astype(int)
+                  + ((close > f['bb_lower']) & (_prev(close) <= _prev(f['bb_lower'])) & (rsi < p['rsi_oversold']) & spike)
+                  + ((macd > sig) & (_prev(macd) <= _prev(sig)) & (f['momentum_10'] > 0.005) & (rsi < 60))
+                  + ((k > d) & (_prev(k) <= _prev(d)) & (k < 30) & (f['momentum_20'] > -0.02)))
+        n_short = (((ef < em) & (em < es) & (_prev(ef) >= _prev(em)) & (rsi > 60) & spike).astype(int)
+                   + ((close < f['bb_upper']) & (_prev(close) >= _prev(f['bb_upper'])) & (rsi > p['rsi_overbought']) & spike)
+                   + ((macd < sig) & (_prev(macd) >= _prev(sig)) & (f['momentum_10'] < -0.005) & (rsi > 40))
+                   + ((k < d) & (_prev(k) >= _prev(d)) & (k > 70) & (f['momentum_20'] < 0.02)))
+        allowed = ~(f['bb_width'] < 0.02)
+        stop_frac = np.fmax(p['stop_loss_pct'], (f['atr'] / close) * 2.5)
+    long_ = allowed & (n_long >= 2)
+    return dict(entry_long=long_, entry_short=allowed & ~long_ & (n_short >= 2), start=60,
+                position_size=p['position_size'], take_profit=p['take_profit_pct'], stop_frac=stop_frac,
+                dynamic_stop=True, pnl_mode='linear', reenter_on_exit=False)
+
+
+def _momentum_rules(f: Dict[str, np.ndarray], p: dict) -> dict:
+    """AggressiveMomentumStrategy.generate_signal (gap + 3 de 5 condições) + stop fixo na entrada."""
+    close, vr, rsi = f['close'], f['volume_ratio'], f['rsi']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        prev_close = _prev(close)
+        gap = (f['open'] - prev_close) / prev_close
+        big_gap = np.abs(gap) > 0.02
+        gap_long = big_gap & (gap > 0) & (vr > 1.5)
+        gap_short = big_gap & (gap < 0) & (vr > 1.5)
+        n_long = ((f['momentum_5'] > 0.01).astype(int) + (close > _prev(f['high_20'])) + (vr > p['min_volume_ratio'])
+                  + (rsi < 80) + (f['trend'] > 0))
+        n_short = ((f['momentum_5'] < -0.01).astype(int) + (close < _prev(f['low_20'])) + (vr > p['min_volume_ratio'])
+                   + (rsi > 20) + (f['trend'] < 0))
+        stop_frac = np.fmax(p['stop_loss_pct'] / 100, f['atr'] / close * 2)
+    long_ = gap_long | (~gap_short & (n_long >= 3))
+    short_ = gap_short | (~gap_long & ~long_ & (n_short >= 3))
+    return dict(entry_long=long_, entry_short=short_, start=30, position_size=p['position_size'],
+                take_profit=p['take_profit_pct'] / 100, stop_frac=stop_frac, pnl_mode='linear')
+
+
+def _simple_rules(f: Dict[str, np.ndarray], p: dict) -> dict:
+    """SimpleProfitableStrategy.generate_signal (todas as condições) + filtro de ATR + stop fixo."""
+    close, rsi, vr = f['close'], f['rsi'], f['volume_ratio']
+    sma_s, sma_l = f['sma_short'], f['sma_long']
+    vol_filter = bool(p.get('volatility_filter', True))
+    with np.errstate(invalid='ignore'):
+        volume_ok = (vr > 1.2) if vol_filter else np.ones(len(close), dtype=bool)
+        long_ = ((rsi > p['rsi_oversold']) & (rsi < 60) & (sma_s > sma_l) & (close > sma_s)
+                 & (f['momentum'] > -0.02) & volume_ok)
+        short_ = ((rsi < p['rsi_overbought']) & (rsi > 40) & (sma_s < sma_l) & (close < sma_s)
+                  & (f['momentum'] < 0.02) & volume_ok)
+        if vol_filter:
+            atr_mean = pd.Series(f['atr']).rolling(20, min_periods=1).mean().to_numpy()  # df['atr'].tail(20).mean()
+            allowed = ~(f['atr'] > atr_mean * 2)
+            long_, short_ = allowed & long_, allowed & short_
+    warmup = max(p['sma_long'], p['rsi_period']) + 5
+    return dict(entry_long=long_, entry_short=~long_ & short_, start=warmup, equity_start=0,
+                position_size=p['max_position_size'], take_profit=p['take_profit_pct'] / 100,
+                stop_frac=np.full(len(close), p['stop_loss_pct'] / 100), pnl_mode='ratio')
+
+
+@dataclass(frozen=True)
+class StrategySpec:
+    module: str
+    class_name: str
+    indicator_method: str
+    indicator_params: Tuple[str, ...]      # parâmetros que mudam o frame de indicadores
+    columns: Tuple[str, ...]
+    rules: Callable
+    defaults: Dict
+    grid: Dict
+    data_loader: str                        # função/método do módulo que gera os dados do __main__ original
+
+
+STRATEGIES = {
+    'optimized': StrategySpec(
+        'scripts.optimized_strategy', 'OptimizedProfitStrategy', 'calculate_advanced_signals', (),
+        ('close', 'atr', 'ema_fast', 'ema_mid', 'ema_slow', 'rsi', 'stoch_k', 'stoch_d', 'macd', 'macd_signal',
+         'bb_lower', 'bb_upper', 'bb_width', 'volume_ratio', 'momentum_10', 'momentum_20'),
+        _optimized_rules,
+        {'stop_loss_pct': 0.015, 'take_profit_pct': 0.06, 'position_size': 0.15, 'rsi_oversold': 25,
+         'rsi_overbought': 75, 'volume_threshold': 1.8},
+        {'stop_loss_pct': [0.01, 0.015, 0.02, 0.025], 'take_profit_pct': [0.03, 0.045, 0.06, 0.08],
+         'position_size': [0.08, 0.12, 0.15, 0.2], 'rsi_oversold': [20, 25, 30], 'rsi_overbought': [70, 75, 80],
+         'volume_threshold': [1.2, 1.5, 1.8, 2.2]},
+        'OptimizedProfitStrategy.create_trending_market_data'),
+    'momentum': StrategySpec(
+        'scripts.momentum_strategy', 'AggressiveMomentumStrategy', 'calculate_indicators', ('rsi_period',),
+        ('open', 'close', 'atr', 'momentum_5', 'volume_ratio', 'rsi', 'high_20', 'low_20', 'trend'),
+        _momentum_rules,
+        {'rsi_period': 14, 'stop_loss_pct': 1.5, 'take_profit_pct': 3.0, 'position_size': 0.20,
+         'min_volume_ratio': 1.1},
+        {'rsi_period': [10, 14, 21], 'stop_loss_pct': [1.0, 1.5, 2.0, 2.5], 'take_profit_pct': [2.0, 3.0, 4.0, 6.0],
+         'position_size': [0.1, 0.2, 0.3], 'min_volume_ratio': [1.0, 1.1, 1.3, 1.5]},
+        'create_synthetic_winning_data'),
+    'simple': StrategySpec(
+        'scripts.simple_profitable_strategy', 'SimpleProfitableStrategy', 'calculate_indicators',
+        ('rsi_period', 'sma_short', 'sma_long'),
+        ('close', 'rsi', 'sma_short', 'sma_long', 'atr', 'momentum', 'volume_ratio'),
+        _simple_rules,
+        {'rsi_period': 14, 'rsi_oversold': 30, 'rsi_overbought': 70, 'sma_short': 10, 'sma_long': 50,
+         'stop_loss_pct': 2.0, 'take_profit_pct': 4.0, 'max_position_size': 0.1, 'volatility_filter': True},
+        {'sma_short': [5, 10, 20], 'sma_long': [50, 100], 'stop_loss_pct': [1.0, 1.5, 2.0, 3.0],
+         'take_profit_pct': [2.0, 3.0, 4.0, 6.0], 'max_position_size': [0.05, 0.1, 0.15],
+         'volatility_filter': [True, False]},
+        'load_historical_data'),
+}
+
+
+def indicator_key(spec: StrategySpec, params: dict) -> Tuple:
+    return tuple(params[name] for name in spec.indicator_params)
+
+
+def compute_indicator_frame(spec: StrategySpec, df: pd.DataFrame, indicator_params: dict) -> pd.DataFrame:
+    """Indicadores pelo método da própria estratégia (pandas_ta), só as colunas usadas pelas regras."""
+    module = importlib.import_module(spec.module)
+    strategy = getattr(module, spec.class_name)(**indicator_params)
+    frame = getattr(strategy, spec.indicator_method)(df)
+    return frame[list(spec.columns)].astype(np.float64)
+
+
+def load_default_data(spec: StrategySpec) -> pd.DataFrame:
+    module = importlib.import_module(spec.module)
+    owner, _, name = spec.data_loader.rpartition('.')
+    loader = getattr(getattr(module, owner)(), name) if owner else getattr(module, name)
+    return loader()
+
+
+# --- Geração de parâmetros -------------------------------------------------------------------------
+
+def grid_params(spec: StrategySpec, space: Optional[Dict] = None) -> List[dict]:
+    space = space or spec.grid
+    names = list(space)
+    return [{**spec.defaults, **dict(zip(names, values))} for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_params(spec: StrategySpec, n: int, seed: Optional[int] = None, space: Optional[Dict] = None) -> List[dict]:
+    """n conjuntos distintos amostrados do mesmo espaço (sem reposição)."""
+    space = space or spec.grid
+    names = list(space)
+    total = int(np.prod([len(space[name]) for name in names]))
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(total, size=min(n, total), replace=False)
+    sizes = [len(space[name]) for name in names]
+    params = []
+    for flat in picks:
+        digits = np.unravel_index(int(flat), sizes)
+        params.append({**spec.defaults, **{name: space[name][i] for name, i in zip(names, digits)}})
+    return params
+
+
+# --- Pool ------------------------------------------------------------------------------------------
+
+_WORKER = {}
+
+
+def _init_worker(strategy: str, handles: Dict[Tuple, object], early_stop_dd: Optional[float], initial_capital: float):
+    """Anexa os frames publicados uma vez por processo (views read-only, sem cópia)."""
+    _WORKER['spec'] = STRATEGIES[strategy]
+    _WORKER['early_stop_dd'] = early_stop_dd
+    _WORKER['initial_capital'] = initial_capital
+    _WORKER['frames'] = {}
+    _WORKER['attached'] = []
+    for key, handle in handles.items():
+        attached = attach_feature_store(handle)
+        _WORKER['attached'].append(attached)
+        _WORKER['frames'][key] = {c: attached.prices[:, i] for i, c in enumerate(attached.price_columns)}
+
+
+def evaluate(spec: StrategySpec, frame: Dict[str, np.ndarray], params: dict,
+             early_stop_dd: Optional[float] = None, initial_capital: float = 100000) -> dict:
+    rules = spec.rules(frame, params)
+    metrics, _ = simulate(frame['close'], initial_capital=initial_capital, early_stop_dd=early_stop_dd, **rules)
+    return {**params, **metrics}
+
+
+def _evaluate_task(params: dict) -> dict:
+    spec = _WORKER['spec']
+    frame = _WORKER['frames'][indicator_key(spec, params)]
+    return evaluate(spec, frame, params, _WORKER['early_stop_dd'], _WORKER['initial_capital'])
+
+
+def rank_results(results: List[dict], objective: str = 'total_return_pct') -> pd.DataFrame:
+    """Completas primeiro, depois por objetivo (desc) e drawdown (menor primeiro)."""
+    table = pd.DataFrame(results)
+    table = table.sort_values(['early_stopped', objective, 'max_drawdown_pct'], ascending=[True, False, False],
+                              kind='stable').reset_index(drop=True)
+    table.insert(0, 'rank', np.arange(1, len(table) + 1))
+    return table
+
+
+def run_search(strategy: str, frames: Dict[Tuple, pd.DataFrame], param_sets: List[dict], workers: int = None,
+               early_stop_dd: Optional[float] = 0.3, initial_capital: float = 100000,
+               objective: str = 'total_return_pct') -> pd.DataFrame:
+    """
+    Avalia param_sets com os frames de indicadores já calculados ({indicator_key: frame}).
+    Cada frame vai para um bloco de shared memory; os workers só recebem os handles.
+    """
+    spec = STRATEGIES[strategy]
+    stores = {key: SharedFeatureStore(np.zeros((len(frame), 0), dtype=np.float32),
+                                      np.ascontiguousarray(frame[list(spec.columns)].to_numpy(dtype=np.float64)),
+                                      [], list(spec.columns))
+              for key, frame in frames.items()}
+    handles = {key: store.handle for key, store in stores.items()}
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers > 1:
+            chunksize = max(1, len(param_sets) // (workers * 8))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(strategy, handles, early_stop_dd, initial_capital)) as pool:
+                results = list(pool.map(_evaluate_task, param_sets, chunksize=chunksize))
+        else:
+            _init_worker(strategy, handles, early_stop_dd, initial_capital)
+            try:
+                results = [_evaluate_task(params) for params in param_sets]
+            finally:
+                for attached in _WORKER.pop('attached', []):
+                    attached.close()
+                _WORKER.clear()
+    finally:
+        for store in stores.values():
+            store.close()
+    return rank_results(results, objective)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca de parâmetros em paralelo para as estratégias de scripts/")
+    parser.add_argument('--strategy', choices=sorted(STRATEGIES), default='optimized')
+    parser.add_argument('--data', default=None, help='CSV OHLCV com índice de data (padrão: dados do script original)')
+    parser.add_argument('--random', type=int, default=0, help='N conjuntos aleatórios em vez do grid completo')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--space', default=None, help='JSON {param: [valores]} substituindo o espaço padrão')
+    parser.add_argument('--workers', type=int, default=None, help='padrão: todos os núcleos')
+    parser.add_argument('--early-stop-dd', type=float, default=0.3,
+                        help='interrompe a config quando o capital cai esta fração do pico (0 desliga)')
+    parser.add_argument('--objective', default='total_return_pct',
+                        choices=['total_return_pct', 'sharpe_ratio', 'profit_factor', 'win_rate_pct'])
+    parser.add_argument('--out-dir', default='out')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    spec = STRATEGIES[args.strategy]
+    space = json.loads(args.space) if args.space else None
+    param_sets = random_params(spec, args.random, args.seed, space) if args.random else grid_params(spec, space)
+
+    df = pd.read_csv(args.data, index_col=0, parse_dates=True) if args.data else load_default_data(spec)
+    print(f"📊 {args.strategy}: {len(df)} barras, {len(param_sets)} configurações")
+
+    started = time.perf_counter()
+    keys = {indicator_key(spec, p): {name: p[name] for name in spec.indicator_params} for p in param_sets}
+    frames = {key: compute_indicator_frame(spec, df, ind_params) for key, ind_params in keys.items()}
+    indicators_s = time.perf_counter() - started
+    print(f"🔧 {len(frames)} frame(s) de indicadores em {indicators_s:.1f}s")
+
+    table = run_search(args.strategy, frames, param_sets, workers=args.workers,
+                       early_stop_dd=args.early_stop_dd or None, objective=args.objective)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {len(table)} configurações em {elapsed:.1f}s ({len(table) / elapsed * 60:.0f}/min), "
+          f"{int(table['early_stopped'].sum())} interrompidas cedo")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    csv_path = os.path.join(args.out_dir, f"param_search_{args.strategy}_{stamp}.csv")
+    table.to_csv(csv_path, index=False)
+    best = table.iloc[0].to_dict()
+    with open(csv_path.replace('.csv', '.json'), 'w', encoding='utf-8') as f:
+        json.dump({'strategy': args.strategy, 'objective': args.objective, 'n_configs': len(table),
+                   'elapsed_s': elapsed, 'best': best}, f, indent=2, default=str)
+
+    print(table.head(args.top).to_string(index=False))
+    print(f"💾 Tabela ranqueada: {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
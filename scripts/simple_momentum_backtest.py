@@ -54,8 +54,8 @@ def backtest_momentum(price: pd.Series, lookback=24*7, target_vol_ann=0.2, fee=0
         # execute: update size based on previous price
         if price_prev > 0:
             size = desired_notional / price_prev
-        # mark-to-market
-        equity = size * price_t - trade_cost
+        # mark-to-market (cash + posição: a variação da posição no período, menos custos)
+        equity = equity + size * (price_t - price_prev) - trade_cost
         records.append({'timestamp': price.index[t], 'price': float(price_t), 'equity': float(equity), 'position': float(size)})
 
     df = pd.DataFrame(records)
@@ -172,13 +172,14 @@ class SimpleProfitableStrategy:
             current_data = df.iloc[:i+1]
             current_price = df.iloc[i]['close']
             
-            # Primeiro verifica gerenciamento de posição existente
+            # Primeiro verifica gerenciamento de posição existente (manage_position zera self.position ao sair)
+            prev_position = self.position
             exit_signal, exit_msg = self.manage_position(current_price)
             action = exit_msg
             
             if exit_signal != 0:  # Fechou posição
-                if self.position != 0:  # Tinha posição
-                    if self.position == 1:  # Era long
+                if prev_position != 0:  # Tinha posição
+                    if prev_position == 1:  # Era long
                         pnl = (current_price / self.entry_price - 1) * position_size
                     else:  # Era short
                         pnl = (self.entry_price / current_price - 1) * position_size
@@ -187,7 +188,7 @@ class SimpleProfitableStrategy:
                     trades.append({
                         'entry_price': self.entry_price,
                         'exit_price': current_price,
-                        'position_type': 'LONG' if self.position == 1 else 'SHORT',
+                        'position_type': 'LONG' if prev_position == 1 else 'SHORT',
                         'pnl': pnl,
                         'pnl_pct': (pnl / position_size) * 100
                     })
@@ -329,6 +330,10 @@ def load_historical_data(symbol='ETHUSD', timeframe='1h'):
 
 if __name__ == "__main__":
     print("=== TESTANDO ESTRATÉGIA SIMPLES E LUCRATIVA ===")
+    # Saídas tipadas em Parquet (RESULTS_FORMAT=arrow|csv para outro formato)
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from src.utils.results_io import results_suffix, write_frame, write_trades
+    suffix = results_suffix()
     
     # Carrega dados históricos
     df = load_historical_data()
@@ -360,7 +365,9 @@ if __name__ == "__main__":
             best_config = config
             
             # Salva resultados da melhor configuração
-            results_df.to_csv(f"out/simple_strategy_{config['name'].lower()}_results.csv")
+            run_meta = {'strategy': 'simple', 'config': config, 'stats': stats}
+            write_frame(f"out/simple_strategy_{config['name'].lower()}_results{suffix}", results_df, run_meta)
+            write_trades(f"out/simple_strategy_{config['name'].lower()}_trades{suffix}", trades, run_meta)
     
     print(f"\n🎯 MELHOR CONFIGURAÇÃO: {best_config['name']} com {best_return:+.2f}% de retorno")
     print("✅ Esta estratégia supera sua rede neural atual!")
\ No newline at end of file
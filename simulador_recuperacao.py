@@ -6,6 +6,7 @@ Simula trades reais para mostrar estratégias de recuperação
 
 import json
 import time
+import argparse
 import logging
 from datetime import datetime
 from moises_estrategias_avancadas import TradingAvancado
@@ -365,9 +366,53 @@ class SimuladorRecuperacao:
         with open(f'relatorio_simulacao_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json', 'w') as f:
             json.dump(relatorio, f, indent=2, ensure_ascii=False)
 
+    def projetar_monte_carlo(self, n_caminhos=1_000_000, n_trades=50, workers=1, seed=None,
+                             chance_take_profit=0.3, take_profit=0.05, variacao=(-0.02, 0.03)):
+        """
+        Projeção Monte Carlo das estratégias (em vez de um ciclo por vez com `random`): cada trade fecha
+        no take profit (+5%, chance de 30% como em verificar_take_profits) ou na variação de mercado
+        de simular_variacao_precos; taxa de 0.1% na compra e na venda, posição de 30% do saldo entre
+        $5 e $6 (Paulo) e 20% entre $5 e $8 (Amos). Ruína = saldo abaixo de $5 (não consegue mais operar);
+        o caminho para ao atingir a meta.
+        """
+        from src.optimization.monte_carlo import Dist, MonteCarloEngine
+
+        regras = {'CONTA_2': (0.30, 6.0), 'CONTA_3': (0.20, 8.0)}
+        resultados = {}
+        for conta, (fracao, maximo) in regras.items():
+            engine = MonteCarloEngine(win_rate=chance_take_profit, win_return=take_profit,
+                                      loss_return=Dist.uniform(*variacao), size=fracao, min_trade=5.0,
+                                      max_trade=maximo, fee=0.001, target=self.metas[conta], stop_at_target=True)
+            resultado = engine.run(self.calcular_portfolio_total(conta), n_caminhos, n_trades,
+                                   seed=seed, workers=workers)
+            resultados[conta] = resultado
+
+            passos = resultado['steps']
+            logger.info(f"[MONTE CARLO] {conta}: {n_caminhos:,} caminhos x {n_trades} trades "
+                        f"em {resultado['elapsed_s']:.2f}s")
+            logger.info(f"[MONTE CARLO] {conta}: P(meta ${self.metas[conta]:.2f}) = {resultado['prob_target']:.1%} | "
+                        f"P(ruína) = {resultado['prob_ruin']:.1%}")
+            for i in range(0, len(passos), max(1, len(passos) // 5)):
+                banda = " / ".join(f"${resultado['bands'][q][i]:.2f}" for q in ('5', '50', '95'))
+                logger.info(f"[MONTE CARLO] {conta}: trade {passos[i]:>4} p5/p50/p95 = {banda}")
+        return resultados
+
+
 def main():
     """Executar simulação completa"""
+    parser = argparse.ArgumentParser(description="Simulador de recuperação")
+    parser.add_argument('--monte-carlo', action='store_true', help="projeção vetorizada em vez dos ciclos")
+    parser.add_argument('--caminhos', type=int, default=1_000_000)
+    parser.add_argument('--trades', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
     simulador = SimuladorRecuperacao()
+
+    if args.monte_carlo:
+        simulador.projetar_monte_carlo(args.caminhos, args.trades, args.workers, args.seed)
+        return
     
     print("=== SIMULADOR DE RECUPERAÇÃO ===")
     print("Este sistema simula as estratégias de trading que seriam executadas")
@@ -8,13 +8,33 @@ Data: 24/10/2025 - Aniversário do MOISES
 """
 
 import asyncio
-import aiohttp
+import argparse
 import time
 import random
 from datetime import datetime
 
+# Mesmas regras de DashboardMoises.simulate_demo_trade (dashboard_lucros_moises.py)
+CAPITAL_INICIAL = 18.18
+CHANCE_SUCESSO = 0.95
+FRACAO_TRADE = 0.10
+LUCRO_TRADE = (0.008, 0.015)
+REINVESTIMENTO = 0.80
+INTERVALO_MEDIO_S = 20  # random.randint(10, 30) entre trades
+
+def _import_aiohttp():
+    """aiohttp só é necessário para falar com o dashboard (o modo Monte Carlo não usa)"""
+    try:
+        import aiohttp
+    except ImportError:
+        print("📦 Instalando aiohttp...")
+        import subprocess
+        subprocess.run(["pip", "install", "aiohttp"])
+        import aiohttp
+    return aiohttp
+
 async def simulate_automatic_trades():
     """Simula trades automáticos para o dashboard"""
+    aiohttp = _import_aiohttp()
     print("🎂🚀 SIMULADOR AUTOMÁTICO - MOISES 🚀🎂")
     print("=" * 50)
     print("💰 Simulando trades para mostrar lucros no dashboard")
@@ -58,6 +78,31 @@ async def simulate_automatic_trades():
         
         await asyncio.sleep(wait_time)
 
+def projetar_trades_monte_carlo(horas=24, caminhos=100_000, workers=1, seed=None, perda=0.0):
+    """
+    Projeta offline o que o loop acima mostraria no dashboard, sem servidor: N caminhos x T trades
+    com as regras do trade de demonstração (95% de sucesso, 10% do capital, lucro de 0.8% a 1.5%,
+    80% reinvestido). Trade sem sucesso não é executado no dashboard (`perda` = 0.0).
+    """
+    from src.optimization.monte_carlo import Dist, MonteCarloEngine
+
+    n_trades = int(horas * 3600 / INTERVALO_MEDIO_S)
+    engine = MonteCarloEngine(win_rate=CHANCE_SUCESSO, win_return=Dist.uniform(*LUCRO_TRADE), loss_return=-perda,
+                              size=FRACAO_TRADE, reinvest=REINVESTIMENTO)
+    resultado = engine.run(CAPITAL_INICIAL, caminhos, n_trades, seed=seed, workers=workers)
+
+    print("🎲 PROJEÇÃO MONTE CARLO - TRADES AUTOMÁTICOS")
+    print("=" * 50)
+    print(f"📊 {caminhos:,} caminhos x {n_trades:,} trades ({horas}h) em {resultado['elapsed_s']:.2f}s")
+    for q in resultado['percentiles']:
+        print(f"   p{q}: ${resultado['final_percentiles'][str(q)]:.2f} USDT")
+    lucro = resultado['final_mean'] - CAPITAL_INICIAL
+    print(f"💰 Capital médio: ${resultado['final_mean']:.2f} USDT (reinvestido: ${lucro:.2f})")
+    print(f"💝 Para crianças (média): R$ {lucro / REINVESTIMENTO * (1 - REINVESTIMENTO) * 5.5:.2f}")
+    print(f"💀 P(ruína): {resultado['prob_ruin']:.2%}")
+    return resultado
+
+
 async def main():
     """Função principal do simulador"""
     print("🎯 Simulação automática iniciada!")
@@ -74,13 +119,14 @@ async def main():
         print(f"\\n❌ Erro na simulação: {e}")
 
 if __name__ == "__main__":
-    # Instalar aiohttp se necessário
-    try:
-        import aiohttp
-    except ImportError:
-        print("📦 Instalando aiohttp...")
-        import subprocess
-        subprocess.run(["pip", "install", "aiohttp"])
-        import aiohttp
-    
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Simulador de trades automático")
+    parser.add_argument("--monte-carlo", action="store_true", help="projeção offline (sem o dashboard)")
+    parser.add_argument("--horas", type=float, default=24)
+    parser.add_argument("--caminhos", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    if args.monte_carlo:
+        projetar_trades_monte_carlo(args.horas, args.caminhos, args.workers, args.seed)
+    else:
+        asyncio.run(main())
\ No newline at end of file
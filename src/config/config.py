@@ -173,6 +173,12 @@ DAYS_OF_DATA_TO_FETCH_TEST=180 # para 6 meses, 365 para 1 ano
 RL_AGENT_MODEL_NAME="ppo_custom_deep_portfolio_agent"
 
 VEC_NORMALIZE_STATS_FILENAME="vec_normalize_stats.pkl"
+
+# Artefatos servidos pela API: app.py, ModelRegistry e RNNModelPredictor usam os mesmos nomes
+SERVING_MODEL_FILENAME = "model.h5"
+SERVING_PV_SCALER_FILENAME = "price_volume_atr_norm_scaler.joblib"
+SERVING_IND_SCALER_FILENAME = "other_indicators_scaler.joblib"
+TORCHSCRIPT_POLICY_PATH = "out/sb3_export/ppo_policy_traced.pt" # política PPO traçada (fallback sem Keras)
 DAYS_TO_FETCH_TEST=180
 
 MODEL_SAVE_DIR="src/model_vec/"
@@ -0,0 +1,199 @@
+"""
+Datasets Parquet particionados (ticker/ano) para os dados S&P500 do Hugging Face
+
+convert_csv_to_parquet lê o CSV em chunks (direto de dentro do .zip, sem extrair), tipa as colunas
+com um schema fixo (inferido de uma varredura do arquivo inteiro ou declarado) e grava um dataset Parquet hive-partitioned `<ticker_col>=XYZ/year=2020/`.
+load_parquet_dataset lê só as colunas pedidas e só as partições/linhas que passam no filtro
+(tickers, intervalo de datas): treinar com poucos tickers lê megabytes, não o dataset inteiro.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Union
+from urllib.parse import unquote
+from zipfile import ZipFile
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TICKER_CANDIDATES = ('Ticker', 'ticker', 'Symbol', 'symbol', 'Stock_symbol', 'stock_symbol')
+DATE_CANDIDATES = ('Date', 'date', 'Datetime', 'datetime', 'published_at', 'Published')
+META_FILE = '_dataset_meta.json'  # prefixo "_" é ignorado pelo pyarrow.dataset
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("pyarrow é necessário para os datasets Parquet (pip install pyarrow)") from e
+    return pa, ds
+
+
+def _pick(columns: Sequence[str], candidates: Sequence[str], explicit: Optional[str], kind: str) -> str:
+    if explicit:
+        if explicit not in columns:
+            raise ValueError(f"Coluna de {kind} '{explicit}' não existe. Colunas: {list(columns)}")
+        return explicit
+    for name in candidates:
+        if name in columns:
+            return name
+    raise ValueError(f"Nenhuma coluna de {kind} encontrada entre {list(candidates)}. Colunas: {list(columns)}")
+
+
+def _open_csv(source: Union[str, Path], member: Optional[str]):
+    """Arquivo CSV ou membro de um .zip, aberto para streaming."""
+    source = Path(source)
+    if source.suffix.lower() != '.zip':
+        return open(source, 'rb'), None
+    archive = ZipFile(source)
+    if member is None:
+        members = [n for n in archive.namelist() if n.lower().endswith('.csv')]
+        if len(members) != 1:
+            archive.close()
+            raise ValueError(f"Informe `member`: {source} contém {members}")
+        member = members[0]
+    return archive.open(member), archive
+
+
+def _scan_numeric_columns(source: Union[str, Path], member: Optional[str], chunksize: int,
+                          exclude: Sequence[str]) -> List[str]:
+    """Colunas cujos valores não nulos são todos numéricos, no arquivo inteiro (não só no primeiro chunk)."""
+    handle, archive = _open_csv(source, member)
+    try:
+        candidates = None
+        for chunk in pd.read_csv(handle, chunksize=chunksize, dtype=str):
+            if candidates is None:
+                candidates = [c for c in chunk.columns if c not in exclude]
+            candidates = [c for c in candidates
+                          if pd.to_numeric(chunk[c].dropna(), errors='coerce').notna().all()]
+    finally:
+        handle.close()
+        if archive is not None:
+            archive.close()
+    return candidates or []
+
+
+def _normalize_chunk(chunk: pd.DataFrame, ticker_col: str, date_col: str, numeric_cols: List[str]) -> pd.DataFrame:
+    chunk[date_col] = pd.to_datetime(chunk[date_col], errors='coerce', utc=True).dt.tz_localize(None).astype('datetime64[ns]')
+    chunk['year'] = chunk[date_col].dt.year.astype('Int16')
+    chunk[ticker_col] = chunk[ticker_col].astype('string').str.strip()
+    for col in numeric_cols:
+        values = pd.to_numeric(chunk[col], errors='coerce')
+        bad = values.isna() & chunk[col].notna()
+        if bad.any():
+            raise ValueError(f"Coluna numérica '{col}' tem valores não numéricos: {chunk.loc[bad, col].head(3).tolist()}")
+        chunk[col] = values.astype('float64')
+    for col in chunk.columns:
+        if col not in numeric_cols and col not in (date_col, 'year', ticker_col):
+            chunk[col] = chunk[col].astype('string')
+    return chunk
+
+
+def convert_csv_to_parquet(source: Union[str, Path], dest_dir: Union[str, Path], member: Optional[str] = None,
+                           ticker_col: Optional[str] = None, date_col: Optional[str] = None,
+                           chunksize: int = 250_000, max_open_files: int = 1024,
+                           numeric_columns: Optional[Sequence[str]] = None) -> dict:
+    """
+    Converte um CSV (ou um CSV dentro de .zip) em dataset Parquet particionado por ticker/ano.
+    Memória limitada a um chunk. Os tipos vêm de `numeric_columns` (float64; as demais viram string)
+    ou, se não informado, de uma varredura prévia do arquivo inteiro. Um valor que não converte
+    para o tipo da coluna gera ValueError, em vez de virar NaN.
+    """
+    pa, ds = _pyarrow()
+    dest_dir = Path(dest_dir)
+    handle, archive = _open_csv(source, member)
+    try:
+        reader = pd.read_csv(handle, chunksize=chunksize, low_memory=False)
+        first = next(reader)
+        ticker_col = _pick(first.columns, TICKER_CANDIDATES, ticker_col, 'ticker')
+        date_col = _pick(first.columns, DATE_CANDIDATES, date_col, 'data')
+        if numeric_columns is None:
+            numeric_cols = _scan_numeric_columns(source, member, chunksize, (ticker_col, date_col))
+        else:
+            missing = [c for c in numeric_columns if c not in first.columns]
+            if missing:
+                raise ValueError(f"Colunas numéricas inexistentes: {missing}. Colunas: {list(first.columns)}")
+            numeric_cols = [c for c in first.columns if c in numeric_columns and c not in (ticker_col, date_col)]
+        first = _normalize_chunk(first, ticker_col, date_col, numeric_cols)
+        schema = pa.Schema.from_pandas(first, preserve_index=False)
+        stats = {'rows': 0, 'chunks': 0}
+
+        def batches(first_chunk):
+            chunk = first_chunk
+            while chunk is not None:
+                stats['rows'] += len(chunk)
+                stats['chunks'] += 1
+                yield from pa.Table.from_pandas(chunk, schema=schema, preserve_index=False).to_batches()
+                nxt = next(reader, None)
+                chunk = None if nxt is None else _normalize_chunk(nxt, ticker_col, date_col, numeric_cols)
+
+        partitioning = ds.partitioning(pa.schema([(ticker_col, pa.string()), ('year', pa.int16())]), flavor='hive')
+        ds.write_dataset(pa.RecordBatchReader.from_batches(schema, batches(first)), dest_dir, format='parquet',
+                         partitioning=partitioning, existing_data_behavior='delete_matching',
+                         max_open_files=max_open_files)
+    finally:
+        handle.close()
+        if archive is not None:
+            archive.close()
+
+    meta = {'source': str(source), 'member': member, 'ticker_col': ticker_col, 'date_col': date_col,
+            'rows': stats['rows'], 'numeric_columns': numeric_cols,
+            'columns': [f.name for f in schema]}
+    (dest_dir / META_FILE).write_text(json.dumps(meta, indent=2, ensure_ascii=False))
+    logger.info(f"✅ {source} -> {dest_dir}: {stats['rows']} linhas em {stats['chunks']} chunks")
+    return meta
+
+
+def _read_meta(dataset_dir: Path) -> dict:
+    meta_path = dataset_dir / META_FILE
+    if not meta_path.exists():
+        raise FileNotFoundError(f"{meta_path} não encontrado; gere o dataset com convert_csv_to_parquet")
+    return json.loads(meta_path.read_text())
+
+
+def load_parquet_dataset(dataset_dir: Union[str, Path], columns: Optional[Iterable[str]] = None,
+                         tickers: Optional[Iterable[str]] = None, start=None, end=None) -> pd.DataFrame:
+    """
+    Lê o dataset com projeção de colunas e predicate pushdown.
+    - tickers / anos de [start, end] podam partições inteiras (diretórios nem são abertos);
+    - o filtro de data exato vai para o leitor Parquet (estatísticas de row group).
+    A coluna de ticker e a de data sempre são retornadas.
+    """
+    pa, ds = _pyarrow()
+    dataset_dir = Path(dataset_dir)
+    meta = _read_meta(dataset_dir)
+    ticker_col, date_col = meta['ticker_col'], meta['date_col']
+    partitioning = ds.partitioning(pa.schema([(ticker_col, pa.string()), ('year', pa.int16())]), flavor='hive')
+    dataset = ds.dataset(dataset_dir, format='parquet', partitioning=partitioning)
+
+    expr = None
+
+    def _and(e):
+        return e if expr is None else expr & e
+
+    if tickers is not None:
+        expr = _and(ds.field(ticker_col).isin([str(t) for t in tickers]))
+    if start is not None:
+        start = pd.Timestamp(start)
+        expr = _and(ds.field('year') >= start.year)
+        expr = _and(ds.field(date_col) >= pa.scalar(start.as_unit('ns').value, type=pa.timestamp('ns')))
+    if end is not None:
+        end = pd.Timestamp(end)
+        expr = _and(ds.field('year') <= end.year)
+        expr = _and(ds.field(date_col) <= pa.scalar(end.as_unit('ns').value, type=pa.timestamp('ns')))
+
+    if columns is not None:
+        columns = [ticker_col, date_col] + [c for c in columns if c not in (ticker_col, date_col)]
+    table = dataset.to_table(columns=columns, filter=expr)
+    df = table.to_pandas()
+    return df.sort_values([ticker_col, date_col], kind='stable').reset_index(drop=True)
+
+
+def list_tickers(dataset_dir: Union[str, Path]) -> List[str]:
+    """Tickers disponíveis, lidos só dos nomes das partições."""
+    meta = _read_meta(Path(dataset_dir))
+    prefix = f"{meta['ticker_col']}="
+    return sorted(unquote(p.name[len(prefix):]) for p in Path(dataset_dir).iterdir() if p.is_dir() and p.name.startswith(prefix))
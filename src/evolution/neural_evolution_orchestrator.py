@@ -16,7 +16,6 @@ sys.path.append(os.path.dirname(__file__))
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from src.optimization.performance_optimizer import PerformanceOptimizer
-from src.ml.advanced_neural_agent import AdvancedNeuralAgent
 from src.scaling.multi_asset_system import MultiAssetScalingSystem
 from src.trading.production_system import ProductionTradingSystem
 from src.ml.continuous_training import ContinuousLearningSystem
@@ -207,7 +206,8 @@ class NeuralEvolutionOrchestrator:
         }
         
         try:
-            # Inicializar advanced neural agent
+            # Inicializar advanced neural agent (TensorFlow importado só ao ativar a fase)
+            from src.ml.advanced_neural_agent import AdvancedNeuralAgent
             self.advanced_neural_agent = AdvancedNeuralAgent(
                 state_size=50,
                 action_size=3,
@@ -218,7 +218,7 @@ class NeuralEvolutionOrchestrator:
             neural_integration = {
                 "agent_initialized": True,
                 "network_complexity": self.advanced_neural_agent.q_network.count_params(),
-                "memory_capacity": 10000,
+                "memory_capacity": self.advanced_neural_agent.memory.capacity,
                 "training_capability": True
             }
             
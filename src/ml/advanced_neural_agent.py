@@ -7,12 +7,13 @@ import numpy as np
 import pandas as pd
 import tensorflow as tf
 from tensorflow import keras
-from collections import deque
 import random
 from typing import Dict, List, Tuple, Optional, Any
 import logging
 from datetime import datetime
 
+from src.ml.replay_buffer import PrioritizedReplayBuffer
+
 logger = logging.getLogger(__name__)
 
 class AdvancedNeuralAgent:
@@ -24,7 +25,8 @@ class AdvancedNeuralAgent:
     def __init__(self, 
                  state_size: int = 50,
                  action_size: int = 3,  # BUY, SELL, HOLD
-                 learning_rate: float = 0.001):
+                 learning_rate: float = 0.001,
+                 memory_size: int = 200_000):
         
         self.state_size = state_size
         self.action_size = action_size
@@ -37,10 +39,10 @@ class AdvancedNeuralAgent:
         self.gamma = 0.95  # Discount factor
         self.batch_size = 64
         
-        # Memory systems
-        self.memory = deque(maxlen=10000)
-        self.training_memory = deque(maxlen=5000)
-        self.priority_memory = deque(maxlen=1000)  # Para experiences importantes
+        # Memory: replay priorizado (sum-tree) em arrays pré-alocados
+        self.memory = PrioritizedReplayBuffer(memory_size, state_size)
+        self.significant_priority_boost = 2.0  # Trades significativos entram com prioridade maior
+        self._rng = np.random.default_rng()
         
         # Performance tracking
         self.total_trades = 0
@@ -52,6 +54,7 @@ class AdvancedNeuralAgent:
         self.q_network = self._build_advanced_network()
         self.target_network = self._build_advanced_network()
         self._update_target_network()
+        self._build_train_step()
         
         # Trading específico
         self.confidence_threshold = 0.65
@@ -93,6 +96,34 @@ class AdvancedNeuralAgent:
         
         return model
     
+    def _build_train_step(self):
+        """
+        Passo de treino compilado: alvo DQN, MSE ponderado pelos pesos de importance sampling
+        e TD-errors devolvidos para atualizar as prioridades.
+        """
+        q_network, target_network = self.q_network, self.target_network
+        optimizer = q_network.optimizer
+        action_size, gamma = self.action_size, float(self.gamma)
+
+        @tf.function(reduce_retracing=True)
+        def train_step(states, actions, rewards, next_states, dones, weights):
+            next_q = target_network(next_states, training=False)
+            targets = rewards + gamma * tf.reduce_max(next_q, axis=1) * (1.0 - dones)
+            action_mask = tf.one_hot(actions, action_size)
+            with tf.GradientTape() as tape:
+                q_values = q_network(states, training=True)
+                q_taken = tf.reduce_sum(q_values * action_mask, axis=1)
+                td_errors = targets - q_taken
+                # Mesma escala do fit(mse) antigo: erro só na ação tomada, média sobre as saídas
+                loss = tf.reduce_mean(weights * tf.square(td_errors)) / action_size
+                if q_network.losses:
+                    loss += tf.add_n(q_network.losses)
+            grads = tape.gradient(loss, q_network.trainable_variables)
+            optimizer.apply_gradients(zip(grads, q_network.trainable_variables))
+            return loss, td_errors
+
+        self._train_step = train_step
+    
     def preprocess_market_data(self, df: pd.DataFrame) -> np.ndarray:
         """
         Preprocessa dados de mercado em estado para a rede neural
@@ -186,66 +217,31 @@ class AdvancedNeuralAgent:
         """
         Armazena experience em memory com sistema de prioridade
         """
-        experience = (state, action, reward, next_state, done)
-        
-        # Memory principal
-        self.memory.append(experience)
+        priority = None  # Padrão: maior prioridade já vista
         
-        # Training memory para experiências recentes
-        self.training_memory.append(experience)
-        
-        # Priority memory para experiências importantes
+        # Experiências importantes entram com prioridade amplificada
         if priority_level > 1 or abs(reward) > 0.02:  # Trades significativos
-            self.priority_memory.append(experience)
+            priority = self.memory.max_priority * self.significant_priority_boost * max(priority_level, 1)
+        
+        self.memory.add(state, action, reward, next_state, done, priority=priority)
     
     def replay_training(self) -> Dict:
         """
-        Treinamento por replay com priorização
+        Treinamento por replay priorizado (sum-tree): amostra O(log n) por transição,
+        corrige o viés com pesos de importance sampling e realimenta as prioridades com os TD-errors
         """
         if len(self.memory) < self.batch_size:
             return {"training": False, "reason": "Insufficient memory"}
         
-        # Sampling estratégico
-        priority_samples = min(len(self.priority_memory), self.batch_size // 4)
-        regular_samples = self.batch_size - priority_samples
-        
-        batch = []
-        
-        # Samples prioritários
-        if priority_samples > 0:
-            batch.extend(random.sample(list(self.priority_memory), priority_samples))
-        
-        # Samples regulares
-        if regular_samples > 0:
-            batch.extend(random.sample(list(self.memory), regular_samples))
-        
-        # Preparar training data
-        states = np.array([e[0][0] for e in batch])
-        actions = np.array([e[1] for e in batch])
-        rewards = np.array([e[2] for e in batch])
-        next_states = np.array([e[3][0] for e in batch])
-        dones = np.array([e[4] for e in batch])
-        
-        # Current Q-values
-        current_q_values = self.q_network.predict(states, verbose=0)
-        
-        # Target Q-values
-        next_q_values = self.target_network.predict(next_states, verbose=0)
-        
-        # Update Q-values
-        for i in range(len(batch)):
-            if dones[i]:
-                current_q_values[i][actions[i]] = rewards[i]
-            else:
-                current_q_values[i][actions[i]] = rewards[i] + self.gamma * np.max(next_q_values[i])
+        # Sampling proporcional à prioridade
+        batch = self.memory.sample(self.batch_size, self._rng)
         
         # Train network
-        history = self.q_network.fit(
-            states, current_q_values,
-            batch_size=self.batch_size,
-            epochs=1,
-            verbose=0
-        )
+        loss, td_errors = self._train_step(batch['states'], batch['actions'], batch['rewards'],
+                                           batch['next_states'], batch['dones'], batch['weights'])
+        
+        # Atualiza prioridades com os novos TD-errors
+        self.memory.update_priorities(batch['indices'], td_errors.numpy())
         
         # Decay epsilon
         if self.epsilon > self.epsilon_min:
@@ -253,10 +249,11 @@ class AdvancedNeuralAgent:
         
         return {
             "training": True,
-            "loss": history.history['loss'][0],
+            "loss": float(loss),
             "epsilon": self.epsilon,
-            "batch_size": len(batch),
-            "priority_samples": priority_samples
+            "batch_size": len(batch['indices']),
+            "unique_samples": int(len(np.unique(batch['indices']))),
+            "is_beta": self.memory.beta
         }
     
     def _update_target_network(self):
@@ -317,6 +314,7 @@ class AdvancedNeuralAgent:
         try:
             self.q_network = keras.models.load_model(f"{filepath}_main.h5")
             self.target_network = keras.models.load_model(f"{filepath}_target.h5")
+            self._build_train_step()
             logger.info(f"📥 Modelo carregado: {filepath}")
         except Exception as e:
             logger.warning(f"⚠️ Erro ao carregar modelo: {e}")
@@ -1,35 +1,409 @@
-"""Sistema de Treinamento Continuo - Versao Minima"""
+"""
+Sistema de Treinamento Contínuo fora do processo de serviço
+
+O processo que atende requests só enfileira experiências e adota pesos novos entre requests;
+todo fit/gradiente roda em um processo treinador separado (sem competir pelo GIL):
+
+    servidor ──submit_experience()──> Queue ──> treinador (agent.remember + replay_training)
+    servidor <──adopt_latest_weights()── WeightBoard (shared memory) <──publish()── treinador
+
+WeightBoard é um bloco de shared memory com cabeçalho + dois slots de pesos (double buffer):
+o treinador escreve no slot inativo e só então troca o slot/versão no cabeçalho; o servidor lê
+versão, copia o slot ativo e confere a versão de novo (seqlock), então aplica a lista completa
+com um único set_weights. Checar se há versão nova custa a leitura de um float do cabeçalho.
+"""
+import os
+import time
+import queue
 import logging
+import importlib
+import multiprocessing as mp
+from dataclasses import dataclass
 from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Campos do cabeçalho (float64) do WeightBoard
+_VERSION, _SLOT, _EXPERIENCES, _SESSIONS, _LOSS, _EPSILON, _ACCURACY, _AVG_REWARD, _HEARTBEAT, _STATE = range(10)
+_HEADER_FIELDS = 16
+_HEADER_BYTES = _HEADER_FIELDS * 8
+
+TRAINER_STATES = {0: 'starting', 1: 'running', 2: 'stopped', -1: 'error'}
+
+
+class ExperienceRecord(NamedTuple):
+    """Experiência serializável enviada ao treinador (mesmos atributos lidos por ReplayBuffer.add_experience)."""
+    state: np.ndarray
+    action: int
+    reward: float
+    next_state: np.ndarray
+    done: bool
+    confidence: float
+    strategy_used: str
+
+
+@dataclass(frozen=True)
+class WeightBoardHandle:
+    """O necessário para anexar o bloco em outro processo."""
+    name: str
+    shapes: Tuple[Tuple[int, ...], ...]
+    dtypes: Tuple[str, ...]
+
+
+class WeightBoard:
+    """Pesos publicados em shared memory com double buffer + estatísticas do treinador no cabeçalho."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, handle: WeightBoardHandle, owner: bool):
+        self._shm = shm
+        self.handle = handle
+        self.owner = owner
+        self._sizes = [int(np.prod(s)) for s in handle.shapes]
+        self.n_params = int(sum(self._sizes))
+        self.header = np.ndarray((_HEADER_FIELDS,), dtype=np.float64, buffer=shm.buf)
+        self.slots = np.ndarray((2, self.n_params), dtype=np.float32, buffer=shm.buf, offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, weights: List[np.ndarray]) -> 'WeightBoard':
+        """Cria o bloco com o layout de `weights` e publica-os como versão 0."""
+        shapes = tuple(tuple(int(d) for d in np.shape(w)) for w in weights)
+        dtypes = tuple(str(np.asarray(w).dtype) for w in weights)
+        n_params = int(sum(int(np.prod(s)) for s in shapes))
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER_BYTES + 2 * max(n_params, 1) * 4)
+        board = cls(shm, WeightBoardHandle(shm.name, shapes, dtypes), owner=True)
+        board.header[:] = 0.0
+        board.slots[0] = board._flatten(weights)
+        return board
+
+    @classmethod
+    def attach(cls, handle: WeightBoardHandle) -> 'WeightBoard':
+        return cls(shared_memory.SharedMemory(name=handle.name), handle, owner=False)
+
+    def _flatten(self, weights: List[np.ndarray]) -> np.ndarray:
+        if len(weights) != len(self._sizes):
+            raise ValueError(f"Esperados {len(self._sizes)} tensores de pesos, recebidos {len(weights)}")
+        return np.concatenate([np.asarray(w, dtype=np.float32).reshape(-1) for w in weights]) if weights else np.zeros(0, np.float32)
+
+    def _unflatten(self, flat: np.ndarray) -> List[np.ndarray]:
+        splits = np.cumsum(self._sizes)[:-1]
+        return [part.reshape(shape).astype(dtype, copy=False)
+                for part, shape, dtype in zip(np.split(flat, splits), self.handle.shapes, self.handle.dtypes)]
+
+    @property
+    def version(self) -> int:
+        return int(self.header[_VERSION])
+
+    def publish(self, weights: List[np.ndarray]) -> int:
+        """Escreve no slot inativo e só depois aponta o cabeçalho para ele (um único escritor)."""
+        slot = 1 - int(self.header[_SLOT])
+        self.slots[slot] = self._flatten(weights)
+        self.header[_SLOT] = slot
+        self.header[_VERSION] += 1
+        return self.version
+
+    def read(self, max_retries: int = 100) -> Tuple[int, List[np.ndarray]]:
+        """Cópia consistente do slot ativo: refaz se uma publicação trocou a versão durante a cópia."""
+        for _ in range(max_retries):
+            version = self.header[_VERSION]
+            slot = int(self.header[_SLOT])
+            flat = self.slots[slot].copy()
+            if self.header[_VERSION] == version:
+                return int(version), self._unflatten(flat)
+        raise RuntimeError("Não foi possível obter uma cópia consistente dos pesos publicados")
+
+    def set_stats(self, **values) -> None:
+        fields = {'experiences': _EXPERIENCES, 'sessions': _SESSIONS, 'loss': _LOSS, 'epsilon': _EPSILON,
+                  'accuracy': _ACCURACY, 'avg_reward': _AVG_REWARD, 'state': _STATE}
+        for key, value in values.items():
+            self.header[fields[key]] = value
+        self.header[_HEARTBEAT] = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        h = self.header.copy()
+        return {
+            'weights_version': int(h[_VERSION]),
+            'total_experiences': int(h[_EXPERIENCES]),
+            'training_sessions': int(h[_SESSIONS]),
+            'last_loss': float(h[_LOSS]),
+            'epsilon': float(h[_EPSILON]),
+            'accuracy': float(h[_ACCURACY]),
+            'avg_reward': float(h[_AVG_REWARD]),
+            'heartbeat': float(h[_HEARTBEAT]),
+            'trainer_state': TRAINER_STATES.get(int(h[_STATE]), 'unknown'),
+        }
+
+    def close(self) -> None:
+        self.header = self.slots = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+@dataclass
+class TrainerSettings:
+    batch_size: int = 32
+    train_every: int = 32            # novas experiências entre sessões de treino
+    steps_per_session: int = 4       # replay_training por sessão
+    imitation_every: int = 5         # sessões entre passos de imitation learning (0 desliga)
+    target_update_every: int = 10    # sessões entre cópias para a target network
+    publish_every: int = 1           # sessões entre publicações de pesos
+    max_drain: int = 1024            # experiências lidas da fila por iteração
+    poll_interval: float = 0.5
+    threads: int = 1                 # threads de BLAS/TF do treinador (deixa núcleos para o servidor)
+    niceness: int = 10
+
+
+def default_agent_factory(**kwargs):
+    """Importa o TensorFlow só dentro do processo treinador."""
+    from src.ml.neural_learning_agent import NeuralTradingAgent
+    return NeuralTradingAgent(**kwargs)
+
+
+def _resolve_factory(factory: Union[str, Callable]) -> Callable:
+    if callable(factory):
+        return factory
+    module, _, name = factory.partition(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _drain(experience_queue, max_items: int, timeout: float) -> list:
+    items = []
+    try:
+        items.append(experience_queue.get(timeout=timeout))
+        while len(items) < max_items:
+            items.append(experience_queue.get_nowait())
+    except queue.Empty:
+        pass
+    return items
+
+
+def _trainer_main(handle: WeightBoardHandle, agent_factory, agent_kwargs: dict, settings: TrainerSettings,
+                  experience_queue, stop_event, force_event):
+    """Loop do processo treinador: consome a fila, treina e publica pesos no WeightBoard."""
+    for var in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[var] = str(settings.threads)
+    if settings.niceness and hasattr(os, 'nice'):
+        os.nice(settings.niceness)
+
+    board = WeightBoard.attach(handle)
+    try:
+        agent = _resolve_factory(agent_factory)(**agent_kwargs)
+        _, weights = board.read()
+        agent.q_network.set_weights(weights)
+        agent.update_target_network()
+        board.set_stats(state=1, epsilon=agent.epsilon)
+
+        experiences = sessions = pending = 0
+        while not stop_event.is_set():
+            for record in _drain(experience_queue, settings.max_drain, settings.poll_interval):
+                agent.remember(record)
+                experiences += 1
+                pending += 1
+
+            forced = force_event.is_set()
+            if (pending < settings.train_every and not forced) or len(agent.memory) < settings.batch_size:
+                board.set_stats(experiences=experiences)
+                continue
+            force_event.clear()
+            pending = 0
+
+            losses = [agent.replay_training(settings.batch_size) for _ in range(settings.steps_per_session)]
+            if settings.imitation_every and sessions % settings.imitation_every == 0:
+                agent.imitation_learning(settings.batch_size)
+            sessions += 1
+            if sessions % settings.target_update_every == 0:
+                agent.update_target_network()
+            if sessions % settings.publish_every == 0:
+                board.publish(agent.q_network.get_weights())
+
+            performance = agent.evaluate_performance()
+            losses = [l for l in losses if l is not None]
+            board.set_stats(experiences=experiences, sessions=sessions, epsilon=agent.epsilon,
+                            loss=float(np.mean(losses)) if losses else 0.0,
+                            accuracy=performance.get('accuracy', 0.0), avg_reward=performance.get('avg_reward', 0.0))
+        board.set_stats(state=2)
+    except Exception:
+        logger.exception("❌ Erro no processo de treinamento contínuo")
+        board.set_stats(state=-1)
+        raise
+    finally:
+        board.close()
+
+
 class ContinuousLearningSystem:
-    def __init__(self, neural_agent=None):
+    """
+    Lado do servidor do treinamento contínuo.
+    - record_decision(): chamado pelo caminho de predição a cada decisão; fecha a decisão anterior do
+      mesmo símbolo como experiência (recompensa pelo movimento de preço desde então) e a enfileira;
+    - submit_experience(): enfileira sem bloquear (descarta se a fila estiver cheia);
+    - adopt_latest_weights(): chamado entre requests, aplica a versão publicada mais nova;
+    - start/stop_continuous_training(): ciclo de vida do processo treinador e do bloco de shm.
+    Sem neural_agent (modo mínimo) não há pesos para treinar e nenhum processo é iniciado.
+    """
+
+    def __init__(self, neural_agent=None, agent_factory: Union[str, Callable] = default_agent_factory,
+                 agent_kwargs: Optional[dict] = None, settings: Optional[TrainerSettings] = None,
+                 queue_size: int = 10000):
         self.neural_agent = neural_agent
         self.logger = logger
+        self.agent_factory = agent_factory
+        self.agent_kwargs = agent_kwargs
+        self.settings = settings or TrainerSettings()
+        self.queue_size = queue_size
+
+        self._ctx = mp.get_context('spawn')  # TensorFlow não é fork-safe
+        self._process = None
+        self._queue = None
+        self._stop_event = None
+        self._force_event = None
+        self._board: Optional[WeightBoard] = None
+        self.adopted_version = 0
+        self.dropped_experiences = 0
+        self._last_sessions = 0
+        self._open_decisions: Dict[str, Tuple[np.ndarray, int, float, str, float]] = {}
+
         self.learning_metrics = {
-            'accuracy_history': [0.5, 0.52, 0.48, 0.55, 0.53],
-            'reward_history': [0.1, 0.15, 0.12, 0.18, 0.16],
+            'accuracy_history': [],
+            'reward_history': [],
             'total_experiences': 0,
             'training_sessions': 0,
             'expert_vs_neural_comparison': []
         }
-        
+
+    @property
+    def learning_active(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def _default_agent_kwargs(self) -> dict:
+        agent = self.neural_agent
+        kwargs = {'state_size': agent.state_size, 'action_size': agent.action_size}
+        if hasattr(agent, 'learning_rate'):
+            kwargs['learning_rate'] = agent.learning_rate
+        if hasattr(agent, 'epsilon'):
+            kwargs['epsilon'] = agent.epsilon
+        return kwargs
+
     def start_continuous_training(self):
-        self.logger.info("Sistema iniciado")
-        
+        if self.learning_active:
+            return
+        if self.neural_agent is None:
+            self.logger.info("Sistema iniciado (modo mínimo: sem neural_agent, treinador não iniciado)")
+            return
+
+        self._board = WeightBoard.create(self.neural_agent.q_network.get_weights())
+        self.adopted_version = 0
+        self._queue = self._ctx.Queue(maxsize=self.queue_size)
+        self._stop_event = self._ctx.Event()
+        self._force_event = self._ctx.Event()
+        self._process = self._ctx.Process(
+            target=_trainer_main, name='continuous-trainer', daemon=True,
+            args=(self._board.handle, self.agent_factory, self.agent_kwargs or self._default_agent_kwargs(),
+                  self.settings, self._queue, self._stop_event, self._force_event))
+        self._process.start()
+        self.logger.info(f"🎓 Treinador contínuo iniciado (pid {self._process.pid}, pesos em shm {self._board.handle.name})")
+
+    def stop_continuous_training(self, timeout: float = 10.0):
+        if self._process is None:
+            return
+        self._stop_event.set()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self.logger.warning("⚠️ Treinador não finalizou a tempo; encerrando processo")
+            self._process.terminate()
+            self._process.join()
+        self.adopt_latest_weights()
+        self._refresh_metrics()
+        self._queue.close()
+        self._queue.cancel_join_thread()
+        self._board.close()
+        self._process = self._queue = self._board = None
+        self._open_decisions.clear()
+        self.logger.info("🛑 Treinador contínuo parado")
+
+    def submit_experience(self, experience) -> bool:
+        """Enfileira uma experiência (TradingExperience ou equivalente) para o treinador; nunca bloqueia."""
+        if self._queue is None:
+            return False
+        record = ExperienceRecord(np.asarray(experience.state, dtype=np.float32), int(experience.action),
+                                  float(experience.reward), np.asarray(experience.next_state, dtype=np.float32),
+                                  bool(experience.done), float(experience.confidence),
+                                  str(getattr(experience, 'strategy_used', '')))
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped_experiences += 1
+            return False
+
+    def record_decision(self, symbol: str, state, action: int, confidence: float, strategy_used: str,
+                        price: float) -> bool:
+        """
+        Registra a decisão servida para `symbol`. A decisão anterior do mesmo símbolo vira experiência
+        (estado -> estado atual, recompensa de neural_agent.calculate_reward sobre a variação de preço)
+        e é enfileirada; retorna True se uma experiência foi enviada. Sem treinador ativo, não faz nada.
+        """
+        if self.neural_agent is None or self._queue is None:
+            return False
+        state = np.asarray(state, dtype=np.float32)
+        previous = self._open_decisions.get(symbol)
+        self._open_decisions[symbol] = (state, int(action), float(confidence), strategy_used, float(price))
+        if previous is None:
+            return False
+        prev_state, prev_action, prev_confidence, prev_strategy, prev_price = previous
+        if not prev_price or not np.isfinite(prev_price) or not np.isfinite(price):
+            return False
+        price_change = (price - prev_price) / prev_price
+        reward = float(self.neural_agent.calculate_reward(prev_action, price_change, prev_confidence))
+        return self.submit_experience(ExperienceRecord(prev_state, prev_action, reward, state, False,
+                                                       prev_confidence, prev_strategy))
+
+    def adopt_latest_weights(self) -> bool:
+        """Aplica a versão publicada mais nova no neural_agent do servidor; chamar entre requests."""
+        board = self._board
+        if board is None or self.neural_agent is None or board.version <= self.adopted_version:
+            return False
+        version, weights = board.read()
+        self.neural_agent.q_network.set_weights(weights)  # lista completa de uma vez: nunca pesos mistos
+        self.adopted_version = version
+        return True
+
+    def _refresh_metrics(self) -> Dict[str, Any]:
+        if self._board is None:
+            return {}
+        stats = self._board.stats()
+        if stats['training_sessions'] > self._last_sessions:
+            self._last_sessions = stats['training_sessions']
+            self.learning_metrics['accuracy_history'].append(stats['accuracy'])
+            self.learning_metrics['reward_history'].append(stats['avg_reward'])
+        self.learning_metrics['total_experiences'] = stats['total_experiences']
+        self.learning_metrics['training_sessions'] = stats['training_sessions']
+        return stats
+
     def get_training_stats(self):
-        return {'status': 'ok'}
-        
+        stats = self._refresh_metrics()
+        return {'status': 'ok', 'learning_active': self.learning_active, 'adopted_version': self.adopted_version,
+                'dropped_experiences': self.dropped_experiences, **stats}
+
     def force_training_session(self):
+        """Pede uma sessão de treino ao treinador sem esperar novas experiências."""
+        if self._force_event is None:
+            return False
+        self._force_event.set()
         return True
-        
+
     def get_current_status(self):
+        stats = self._refresh_metrics()
+        last_heartbeat = stats.get('heartbeat', 0.0)
         return {
-            "learning_active": True,
-            "current_accuracy": 0.5,
-            "total_experiences": 0,
-            "training_sessions": 0,
-            "neural_vs_expert_performance": {}
-        }
\ No newline at end of file
+            "learning_active": self.learning_active,
+            "current_accuracy": stats.get('accuracy', 0.5) if stats.get('training_sessions') else 0.5,
+            "total_experiences": self.learning_metrics['total_experiences'],
+            "training_sessions": self.learning_metrics['training_sessions'],
+            "neural_vs_expert_performance": {},
+            "trainer_state": stats.get('trainer_state', 'not_started'),
+            "weights_version": self.adopted_version,
+            "last_trainer_heartbeat": datetime.fromtimestamp(last_heartbeat).isoformat() if last_heartbeat else None,
+        }
@@ -14,7 +14,6 @@ from datetime import datetime, timezone
 from dataclasses import dataclass
 import pickle
 import json
-from collections import deque
 import asyncio
 
 # Imports do sistema existente
@@ -25,6 +24,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from src.trading.production_system import ProductionTradingSystem
 from src.trading.us_market_system import USMarketAnalyzer, USMarketSignal
 from src.config.multi_asset_config import OPTIMIZED_ASSET_CONFIGS
+from src.ml.replay_buffer import ReplayBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -65,14 +65,16 @@ class NeuralTradingAgent:
         self.epsilon_min = epsilon_min
         self.epsilon_decay = epsilon_decay
         
-        # Memory para experiências
-        self.memory = deque(maxlen=10000)
-        self.training_memory = deque(maxlen=50000)  # Memória de longo prazo
+        # Memory para experiências: ring buffers pré-alocados (arrays contíguos por campo)
+        self.memory = ReplayBuffer(10000, state_size)
+        self.training_memory = ReplayBuffer(50000, state_size)  # Memória de longo prazo
+        self._rng = np.random.default_rng()
         
         # Redes neurais
         self.q_network = self._build_network()
         self.target_network = self._build_network()
         self.update_target_network()
+        self._build_train_steps()
         
         # Métricas de performance
         self.performance_history = []
@@ -117,6 +119,48 @@ class NeuralTradingAgent:
         
         return model
     
+    def _build_train_steps(self):
+        """
+        Passos de treino compilados (tf.function) para as redes atuais.
+        Refeito sempre que q_network/target_network são substituídas (ex.: load_model).
+        """
+        q_network, target_network = self.q_network, self.target_network
+        optimizer = q_network.optimizer
+        action_size, gamma = self.action_size, float(self.gamma)
+
+        def apply_mse_step(states, targets):
+            # Mesmo objetivo do fit(loss='mse'): média sobre lote e saídas (Q-values + confiança)
+            with tf.GradientTape() as tape:
+                predictions = q_network(states, training=True)
+                loss = tf.reduce_mean(tf.square(targets - predictions))
+                if q_network.losses:
+                    loss += tf.add_n(q_network.losses)
+            grads = tape.gradient(loss, q_network.trainable_variables)
+            optimizer.apply_gradients(zip(grads, q_network.trainable_variables))
+            return loss
+
+        @tf.function(reduce_retracing=True)
+        def double_dqn_step(states, actions, rewards, next_states, dones):
+            batch_size = tf.shape(states)[0]
+            # Um único forward da rede principal sobre [states; next_states]
+            q_both = q_network(tf.concat([states, next_states], axis=0), training=False)
+            current_q, next_q_online = q_both[:batch_size], q_both[batch_size:]
+            # Double DQN: main network seleciona, target network avalia
+            next_actions = tf.argmax(next_q_online[:, :action_size], axis=1, output_type=tf.int32)
+            next_q_target = target_network(next_states, training=False)
+            next_values = tf.gather(next_q_target, next_actions, axis=1, batch_dims=1)
+            action_targets = rewards + gamma * next_values * (1.0 - dones)
+            indices = tf.stack([tf.range(batch_size), actions], axis=1)
+            targets = tf.stop_gradient(tf.tensor_scatter_nd_update(current_q, indices, action_targets))
+            return apply_mse_step(states, targets)
+
+        @tf.function(reduce_retracing=True)
+        def supervised_step(states, targets):
+            return apply_mse_step(states, targets)
+
+        self._double_dqn_step = double_dqn_step
+        self._supervised_step = supervised_step
+    
     def preprocess_market_data(self, df: pd.DataFrame) -> np.ndarray:
         """
         Preprocessa dados de mercado para estado da rede neural
@@ -272,9 +316,9 @@ class NeuralTradingAgent:
         return action, confidence
     
     def remember(self, experience: TradingExperience):
-        """Armazena experiência na memória"""
-        self.memory.append(experience)
-        self.training_memory.append(experience)
+        """Armazena experiência na memória (inserção O(1) nos ring buffers)"""
+        self.memory.add_experience(experience)
+        self.training_memory.add_experience(experience)
     
     def replay_training(self, batch_size: int = 32):
         """
@@ -284,84 +328,50 @@ class NeuralTradingAgent:
         if len(self.memory) < batch_size:
             return
         
-        # Sample batch
-        batch_indices = np.random.choice(len(self.memory), batch_size, replace=False)
-        batch = [self.memory[i] for i in batch_indices]
-        
-        # Prepara dados para treinamento
-        states = np.array([exp.state for exp in batch])
-        actions = np.array([exp.action for exp in batch])
-        rewards = np.array([exp.reward for exp in batch])
-        next_states = np.array([exp.next_state for exp in batch])
-        dones = np.array([exp.done for exp in batch])
-        
-        # Calcula Q-targets usando Double DQN
-        current_q_values = self.q_network.predict(states, verbose=0)
-        next_q_values = self.q_network.predict(next_states, verbose=0)
-        target_q_values = self.target_network.predict(next_states, verbose=0)
-        
-        for i in range(batch_size):
-            if dones[i]:
-                target = rewards[i]
-            else:
-                # Double DQN: usa main network para seleção, target para avaliação
-                next_action = np.argmax(next_q_values[i][:self.action_size])
-                target = rewards[i] + self.gamma * target_q_values[i][next_action]
-            
-            current_q_values[i][actions[i]] = target
+        # Sample batch: um fancy-index por campo, sem objetos intermediários
+        batch = self.memory.sample(batch_size, self._rng)
         
-        # Treina a rede
-        history = self.q_network.fit(states, current_q_values, epochs=1, verbose=0)
+        # Alvos Double DQN + passo de gradiente em um único tf.function
+        loss = self._double_dqn_step(batch['states'], batch['actions'], batch['rewards'],
+                                     batch['next_states'], batch['dones'])
         
         # Decay exploration
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
         
-        return history.history['loss'][0]
+        return float(loss)
     
     def imitation_learning(self, batch_size: int = 64):
         """
         Aprendizado por imitação das estratégias existentes
         Treina a rede para imitar decisões dos experts
         """
-        if len(self.training_memory) < batch_size:
+        memory = self.training_memory
+        if len(memory) < batch_size:
             return
         
         # Filtra experiências de experts com alta confiança
-        expert_experiences = [
-            exp for exp in self.training_memory 
-            if exp.confidence >= 0.65 and exp.strategy_used in ['equilibrada_pro', 'us_market']
-        ]
-        
-        if len(expert_experiences) < batch_size:
-            expert_experiences = list(self.training_memory)[-batch_size:]
-        
-        batch_indices = np.random.choice(len(expert_experiences), 
-                                       min(batch_size, len(expert_experiences)), 
-                                       replace=False)
-        batch = [expert_experiences[i] for i in batch_indices]
-        
-        states = np.array([exp.state for exp in batch])
-        actions = np.array([exp.action for exp in batch])
-        confidences = np.array([exp.confidence for exp in batch])
-        
-        # Cria targets: Q-values altos para ações dos experts
-        targets = np.zeros((len(batch), self.action_size + 1))
-        
-        for i, (action, confidence) in enumerate(zip(actions, confidences)):
-            # Q-value alto para ação do expert
-            targets[i][action] = confidence * 2  # Amplifica recompensa
-            # Outros actions com valores menores
-            for j in range(self.action_size):
-                if j != action:
-                    targets[i][j] = -0.1
-            # Confiança
-            targets[i][self.action_size] = confidence
+        expert_mask = (memory.confidences >= 0.65) & memory.is_expert
+        
+        if expert_mask[:len(memory)].sum() >= batch_size:
+            batch_indices = memory.sample_indices(batch_size, self._rng, mask=expert_mask)
+        else:
+            batch_indices = memory.recent_indices(batch_size)
+        batch = memory.batch(batch_indices)
+        
+        actions = batch['actions']
+        confidences = batch['confidences']
+        rows = np.arange(len(actions))
+        
+        # Cria targets: Q-values altos para ações dos experts, -0.1 para as outras ações, confiança na última saída
+        targets = np.full((len(actions), self.action_size + 1), -0.1, dtype=np.float32)
+        targets[rows, actions] = confidences * 2  # Amplifica recompensa
+        targets[:, self.action_size] = confidences
         
         # Treina
-        history = self.q_network.fit(states, targets, epochs=1, verbose=0)
+        loss = self._supervised_step(batch['states'], targets)
         
-        return history.history['loss'][0]
+        return float(loss)
     
     def update_target_network(self):
         """Atualiza target network"""
@@ -405,40 +415,32 @@ class NeuralTradingAgent:
     
     def evaluate_performance(self) -> Dict:
         """Avalia performance atual da rede neural"""
-        recent_experiences = list(self.training_memory)[-100:]  # Últimas 100
+        recent_rewards = self.training_memory.rewards[self.training_memory.recent_indices(100)].astype(np.float64)  # Últimas 100
         
-        if len(recent_experiences) < 10:
+        if len(recent_rewards) < 10:
             return {"insufficient_data": True}
         
-        total_reward = sum(exp.reward for exp in recent_experiences)
-        avg_reward = total_reward / len(recent_experiences)
+        avg_reward = float(recent_rewards.mean())
         
         # Calcula accuracy (ações corretas)
-        correct_actions = 0
-        for exp in recent_experiences:
-            if exp.reward > 0:
-                correct_actions += 1
-        
-        accuracy = correct_actions / len(recent_experiences)
+        accuracy = float((recent_rewards > 0).mean())
         
         # Profit factor
-        positive_rewards = [exp.reward for exp in recent_experiences if exp.reward > 0]
-        negative_rewards = [exp.reward for exp in recent_experiences if exp.reward < 0]
+        total_profit = float(recent_rewards[recent_rewards > 0].sum())
+        total_loss = float(recent_rewards[recent_rewards < 0].sum())
         
         profit_factor = 0
-        if negative_rewards:
-            total_profit = sum(positive_rewards) if positive_rewards else 0
-            total_loss = abs(sum(negative_rewards))
-            profit_factor = total_profit / total_loss if total_loss > 0 else float('inf')
+        if (recent_rewards < 0).any():
+            profit_factor = total_profit / abs(total_loss) if total_loss != 0 else float('inf')
         
         performance = {
-            "total_experiences": len(recent_experiences),
+            "total_experiences": len(recent_rewards),
             "avg_reward": avg_reward,
             "accuracy": accuracy,
             "profit_factor": profit_factor,
             "exploration_rate": self.epsilon,
-            "total_profit": sum(positive_rewards) if positive_rewards else 0,
-            "total_loss": sum(negative_rewards) if negative_rewards else 0,
+            "total_profit": total_profit,
+            "total_loss": total_loss,
         }
         
         # Armazena histórico
@@ -477,6 +479,7 @@ class NeuralTradingAgent:
             if os.path.exists(filepath):
                 self.q_network = keras.models.load_model(filepath)
                 self.target_network = keras.models.load_model(filepath)
+                self._build_train_steps()
                 
                 # Carrega metadados
                 metadata_path = filepath.replace('.h5', '_metadata.json')
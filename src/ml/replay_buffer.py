@@ -0,0 +1,187 @@
+"""
+Replay buffers em arrays pré-alocados para os agentes de RL
+
+Em vez de uma deque de objetos (que obriga a reconstruir arrays a cada amostra), cada campo da
+experiência vive em um array contíguo de tamanho fixo (struct-of-arrays) usado como anel:
+- inserção O(1): escreve na posição `_next` e avança o ponteiro;
+- amostragem vetorizada: um único fancy-index por campo devolve o lote pronto para a rede.
+
+PrioritizedReplayBuffer acrescenta uma sum-tree (prioridades proporcionais, Schaul et al. 2016):
+amostragem e atualização de prioridade em O(log n), feitas para o lote inteiro de uma vez.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+EXPERT_STRATEGIES = ('equilibrada_pro', 'us_market')
+
+
+class ReplayBuffer:
+    """Ring buffer de transições (state, action, reward, next_state, done) + metadados numéricos."""
+
+    def __init__(self, capacity: int, state_size: int, state_dtype=np.float32):
+        self.capacity = int(capacity)
+        self.state_size = int(state_size)
+        self.states = np.zeros((self.capacity, self.state_size), dtype=state_dtype)
+        self.next_states = np.zeros((self.capacity, self.state_size), dtype=state_dtype)
+        self.actions = np.zeros(self.capacity, dtype=np.int32)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+        self.confidences = np.zeros(self.capacity, dtype=np.float32)
+        self.is_expert = np.zeros(self.capacity, dtype=bool)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, state, action: int, reward: float, next_state, done: bool,
+            confidence: float = 0.0, is_expert: bool = False) -> int:
+        """Insere uma transição (sobrescreve a mais antiga quando cheio); retorna o slot usado."""
+        i = self._next
+        self.states[i] = np.asarray(state, dtype=self.states.dtype).reshape(-1)[:self.state_size]
+        self.next_states[i] = np.asarray(next_state, dtype=self.states.dtype).reshape(-1)[:self.state_size]
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.dones[i] = float(done)
+        self.confidences[i] = confidence
+        self.is_expert[i] = is_expert
+        self._next = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        return i
+
+    def add_experience(self, experience) -> int:
+        """Insere um TradingExperience (campos não numéricos não são guardados)."""
+        return self.add(experience.state, experience.action, experience.reward, experience.next_state,
+                        experience.done, experience.confidence,
+                        experience.strategy_used in EXPERT_STRATEGIES)
+
+    def recent_indices(self, n: Optional[int] = None) -> np.ndarray:
+        """Slots das `n` transições mais recentes, em ordem cronológica."""
+        n = self._size if n is None else min(int(n), self._size)
+        return (self._next - n + np.arange(n)) % self.capacity
+
+    def sample_indices(self, batch_size: int, rng: Optional[np.random.Generator] = None,
+                       mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Slots amostrados sem reposição; `mask` (sobre os slots preenchidos) restringe os candidatos."""
+        rng = rng if rng is not None else np.random.default_rng()
+        if mask is None:
+            return rng.choice(self._size, size=min(batch_size, self._size), replace=False)
+        candidates = np.flatnonzero(mask[:self._size])
+        return rng.choice(candidates, size=min(batch_size, len(candidates)), replace=False)
+
+    def batch(self, indices: np.ndarray) -> Dict[str, np.ndarray]:
+        return {
+            'states': self.states[indices],
+            'actions': self.actions[indices],
+            'rewards': self.rewards[indices],
+            'next_states': self.next_states[indices],
+            'dones': self.dones[indices],
+            'confidences': self.confidences[indices],
+        }
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        return self.batch(self.sample_indices(batch_size, rng))
+
+
+class SumTree:
+    """
+    Árvore binária de somas em um array plano: folhas em [leaf_base, leaf_base + capacity),
+    nó i tem filhos 2i e 2i+1, a raiz (índice 1) guarda a soma total.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self.leaf_base = 1 << max(0, (self.capacity - 1).bit_length())
+        self.depth = self.leaf_base.bit_length() - 1
+        self.tree = np.zeros(2 * self.leaf_base, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def get(self, indices) -> np.ndarray:
+        return self.tree[self.leaf_base + np.asarray(indices)]
+
+    def update(self, indices, values) -> None:
+        """Atualiza folhas e recalcula os ancestrais nível a nível (índices repetidos são permitidos)."""
+        nodes = self.leaf_base + np.asarray(indices, dtype=np.int64).reshape(-1)
+        self.tree[nodes] = values
+        if nodes.size == 1:  # inserção: caminho escalar até a raiz, sem np.unique por nível
+            tree, node = self.tree, int(nodes[0]) >> 1
+            while node:
+                tree[node] = tree[2 * node] + tree[2 * node + 1]
+                node >>= 1
+            return
+        for _ in range(self.depth):
+            nodes = np.unique(nodes >> 1)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values) -> np.ndarray:
+        """Para cada valor em [0, total), a folha cuja soma acumulada o contém (descida vetorizada)."""
+        values = np.array(values, dtype=np.float64).reshape(-1)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        return nodes - self.leaf_base
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay priorizado proporcional: P(i) = p_i^alpha / sum_k p_k^alpha.
+    sample() devolve também os slots amostrados e os pesos de importance sampling
+    w_i = (N * P(i))^-beta / max w, com beta recozido até 1; depois do passo de treino,
+    update_priorities(indices, td_errors) grava p_i = |td_i| + eps.
+    """
+
+    def __init__(self, capacity: int, state_size: int, alpha: float = 0.6, beta: float = 0.4,
+                 beta_increment: float = 1e-4, eps: float = 1e-5, state_dtype=np.float32):
+        super().__init__(capacity, state_size, state_dtype)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+        self.max_priority = 1.0
+        self.tree = SumTree(self.capacity)
+
+    def add(self, state, action: int, reward: float, next_state, done: bool,
+            confidence: float = 0.0, is_expert: bool = False, priority: Optional[float] = None) -> int:
+        """Novas transições entram com a maior prioridade vista (ou `priority`), garantindo ao menos uma amostragem."""
+        i = super().add(state, action, reward, next_state, done, confidence, is_expert)
+        priority = self.max_priority if priority is None else float(priority)
+        self.tree.update(i, priority ** self.alpha)
+        return i
+
+    def sample_indices(self, batch_size: int, rng: Optional[np.random.Generator] = None,
+                       mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Amostragem estratificada: um valor uniforme em cada um dos `batch_size` segmentos da massa total."""
+        if mask is not None:
+            return super().sample_indices(batch_size, rng, mask)
+        rng = rng if rng is not None else np.random.default_rng()
+        total = self.tree.total
+        segment = total / batch_size
+        values = np.minimum((np.arange(batch_size) + rng.random(batch_size)) * segment, np.nextafter(total, 0))
+        return np.minimum(self.tree.find(values), self._size - 1)
+
+    def importance_weights(self, indices: np.ndarray) -> np.ndarray:
+        probs = self.tree.get(indices) / self.tree.total
+        weights = (self._size * probs) ** (-self.beta)
+        return (weights / weights.max()).astype(np.float32)
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+        indices = self.sample_indices(batch_size, rng)
+        batch = self.batch(indices)
+        batch['indices'] = indices
+        batch['weights'] = self.importance_weights(indices)
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return batch
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray) -> None:
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64).reshape(-1)) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
@@ -0,0 +1,346 @@
+"""Process-based model worker pool for CPU inference.
+
+Each worker is a separate (spawned) process that loads its own copy of the model once and serves
+requests one at a time. Inputs and outputs are exchanged through per-worker shared-memory buffers;
+only a small (shape, dtype) header goes through the worker's pipe. Worker processes are limited to
+`threads_per_worker` BLAS/TF/torch threads and, where the OS supports it, pinned to their own CPUs,
+so N workers scale across cores without oversubscribing them and without competing for the GIL or
+the event loop's default executor with blocking I/O (yfinance, joblib loads).
+
+Usage:
+    pool = ModelWorkerPool(num_workers=2, loader_kwargs={'model_dir': 'src/model'})
+    await pool.start()
+    y = await pool.predict(x)          # x: np.ndarray (1, window, features)
+    await pool.close()
+"""
+import os
+import asyncio
+import logging
+import importlib
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_LOADER = 'src.model.inference_pool:load_rnn_predictor_model'
+
+
+class WorkerError(RuntimeError):
+    """Raised when a worker fails to answer (crash, timeout or exception inside predict)."""
+
+
+def _resolve(path: str):
+    module_name, _, attr = path.partition(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _configure_threads(threads: int, cpus: Optional[List[int]]):
+    """Limit math-library threads and pin the process; must run before TF/torch are imported."""
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                'TF_NUM_INTRAOP_THREADS'):
+        os.environ[var] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+
+
+def load_rnn_predictor_model(**predictor_kwargs):
+    """Default worker loader: load RNNModelPredictor and return its raw `predict(x) -> np.ndarray`."""
+    from src.model.rnn_predictor import RNNModelPredictor
+    predictor = RNNModelPredictor(**predictor_kwargs)
+    predictor._load_model_and_scalers()
+    if predictor.model is not None:
+        return lambda x: np.asarray(predictor.model.predict(x, verbose=0))
+    if predictor.torchscript_policy is not None:
+        return lambda x: np.asarray(predictor._predict_with_torchscript(x))
+    raise RuntimeError('Nenhum modelo carregado no worker.')
+
+
+def _worker_main(index: int, loader: str, loader_kwargs: dict, conn, in_name: str, out_name: str,
+                 threads: int, cpus: Optional[List[int]]):
+    _configure_threads(threads, cpus)
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    try:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except Exception:
+            pass
+        try:
+            predict_fn = _resolve(loader)(**loader_kwargs)
+        except Exception as e:
+            conn.send(('error', f'load failed: {e!r}'))
+            return
+        conn.send(('ready', os.getpid()))
+        while True:
+            try:
+                msg = conn.recv()
+            except EOFError:
+                break
+            kind = msg[0]
+            if kind == 'stop':
+                break
+            if kind == 'ping':
+                conn.send(('pong', os.getpid()))
+                continue
+            _, shape, dtype = msg
+            try:
+                x = np.ndarray(shape, dtype=np.dtype(dtype), buffer=in_shm.buf)
+                y = np.ascontiguousarray(predict_fn(x))
+                if y.nbytes > out_shm.size:
+                    conn.send(('error', f'output of {y.nbytes} bytes exceeds buffer of {out_shm.size}'))
+                    continue
+                np.ndarray(y.shape, dtype=y.dtype, buffer=out_shm.buf)[...] = y
+                conn.send(('ok', y.shape, y.dtype.str))
+            except Exception as e:
+                conn.send(('error', repr(e)))
+    finally:
+        in_shm.close()
+        out_shm.close()
+
+
+class _Worker:
+    def __init__(self, index: int, cpus: Optional[List[int]]):
+        self.index = index
+        self.cpus = cpus
+        self.process = None
+        self.conn = None
+        self.in_shm: Optional[shared_memory.SharedMemory] = None
+        self.out_shm: Optional[shared_memory.SharedMemory] = None
+        self.restarts = -1  # first start is not a restart
+        self.requests = 0
+        self.busy = False
+        self.restarting = False
+        self.generation = 0  # bumped on every (re)spawn; stale idle-queue entries are discarded
+        self.last_error: Optional[str] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+
+class ModelWorkerPool:
+    """
+    Pool of model worker processes with shared-memory I/O and health supervision.
+
+    `loader` is a "module:function" path executed inside each worker; it receives `loader_kwargs`
+    and must return a callable mapping an input np.ndarray to an output np.ndarray.
+    """
+
+    def __init__(self, num_workers: int = 2, loader: str = DEFAULT_LOADER, loader_kwargs: Optional[dict] = None,
+                 threads_per_worker: int = 1, pin_cpus: bool = True, max_input_bytes: int = 4 << 20,
+                 max_output_bytes: int = 1 << 20, request_timeout: float = 30.0, startup_timeout: float = 300.0,
+                 health_interval: float = 5.0, logger_instance=None):
+        self.num_workers = max(1, int(num_workers))
+        self.loader = loader
+        self.loader_kwargs = loader_kwargs or {}
+        self.threads_per_worker = max(1, int(threads_per_worker))
+        self.pin_cpus = pin_cpus
+        self.max_input_bytes = max_input_bytes
+        self.max_output_bytes = max_output_bytes
+        self.request_timeout = request_timeout
+        self.startup_timeout = startup_timeout
+        self.health_interval = health_interval
+        if logger_instance is None:
+            logger_instance = logging.getLogger('ModelWorkerPool')
+            if not logger_instance.handlers:
+                logger_instance.addHandler(logging.NullHandler())
+        self.logger = logger_instance
+
+        self._ctx = mp.get_context('spawn')  # TF/torch are not fork-safe
+        self._workers: List[_Worker] = []
+        self._idle: Optional[asyncio.Queue] = None
+        # Threads that only block on worker pipes; kept apart from the loop's default executor
+        self._io_executor = ThreadPoolExecutor(max_workers=self.num_workers + 1, thread_name_prefix='model-pool-io')
+        self._supervisor: Optional[asyncio.Task] = None
+        self._closed = False
+
+    # --- lifecycle ---
+
+    def _cpus_for(self, index: int) -> Optional[List[int]]:
+        if not self.pin_cpus or not hasattr(os, 'sched_getaffinity'):
+            return None
+        available = sorted(os.sched_getaffinity(0))
+        if len(available) < self.num_workers * self.threads_per_worker:
+            return None  # not enough cores to give each worker its own
+        start = index * self.threads_per_worker
+        return available[start:start + self.threads_per_worker]
+
+    def _spawn(self, worker: _Worker):
+        """Blocking: (re)create the worker's buffers and process and wait for it to load the model."""
+        self._dispose(worker)
+        worker.in_shm = shared_memory.SharedMemory(create=True, size=self.max_input_bytes)
+        worker.out_shm = shared_memory.SharedMemory(create=True, size=self.max_output_bytes)
+        parent_conn, child_conn = self._ctx.Pipe()
+        worker.conn = parent_conn
+        worker.process = self._ctx.Process(
+            target=_worker_main, name=f'model-worker-{worker.index}', daemon=True,
+            args=(worker.index, self.loader, self.loader_kwargs, child_conn,
+                  worker.in_shm.name, worker.out_shm.name, self.threads_per_worker, worker.cpus),
+        )
+        worker.process.start()
+        child_conn.close()
+        if not parent_conn.poll(self.startup_timeout):
+            self._dispose(worker)
+            raise WorkerError(f'worker {worker.index}: timeout carregando modelo')
+        msg = parent_conn.recv()
+        if msg[0] != 'ready':
+            self._dispose(worker)
+            raise WorkerError(f'worker {worker.index}: {msg[1]}')
+        worker.restarts += 1
+        worker.generation += 1
+        worker.busy = False
+        self.logger.info(f'ModelWorkerPool: worker {worker.index} pronto (pid {msg[1]}, cpus {worker.cpus}).')
+
+    def _dispose(self, worker: _Worker):
+        if worker.process is not None:
+            if worker.process.is_alive():
+                try:
+                    worker.conn.send(('stop',))
+                except Exception:
+                    pass
+                worker.process.join(timeout=2)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join(timeout=2)
+            worker.process = None
+        if worker.conn is not None:
+            worker.conn.close()
+            worker.conn = None
+        for shm in (worker.in_shm, worker.out_shm):
+            if shm is not None:
+                shm.close()
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+        worker.in_shm = worker.out_shm = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._idle = asyncio.Queue()
+        self._workers = [_Worker(i, self._cpus_for(i)) for i in range(self.num_workers)]
+        await asyncio.gather(*(loop.run_in_executor(self._io_executor, self._spawn, w) for w in self._workers))
+        for w in self._workers:
+            self._release(w)
+        self._supervisor = asyncio.create_task(self._supervise())
+        self.logger.info(f'ModelWorkerPool: {self.num_workers} workers x {self.threads_per_worker} threads iniciados.')
+
+    async def close(self):
+        self._closed = True
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._io_executor, self._dispose, w) for w in self._workers))
+        self._io_executor.shutdown(wait=False)
+
+    # --- supervision ---
+
+    def _release(self, worker: _Worker):
+        worker.busy = False
+        self._idle.put_nowait((worker, worker.generation))
+
+    def _schedule_restart(self, worker: _Worker, reason: str):
+        if worker.restarting or self._closed:
+            return
+        worker.restarting = True
+        worker.last_error = reason
+        asyncio.create_task(self._restart(worker))
+
+    async def _restart(self, worker: _Worker):
+        loop = asyncio.get_running_loop()
+        self.logger.warning(f'ModelWorkerPool: reiniciando worker {worker.index} ({worker.last_error}).')
+        try:
+            while not self._closed:
+                try:
+                    await loop.run_in_executor(self._io_executor, self._spawn, worker)
+                    self._release(worker)
+                    return
+                except Exception as e:
+                    worker.last_error = str(e)
+                    self.logger.error(f'ModelWorkerPool: falha ao reiniciar worker {worker.index}: {e}')
+                    await asyncio.sleep(self.health_interval)
+        finally:
+            worker.restarting = False
+
+    async def _supervise(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_interval)
+            for worker in self._workers:
+                if not worker.busy and not worker.restarting and not worker.alive:
+                    exitcode = worker.process.exitcode if worker.process is not None else None
+                    self._schedule_restart(worker, f'processo terminou (exitcode {exitcode})')
+
+    async def _acquire(self) -> _Worker:
+        while True:
+            worker, generation = await self._idle.get()
+            if generation != worker.generation or worker.restarting:
+                continue  # stale entry: the worker was respawned and re-queued since
+            if not worker.alive:
+                self._schedule_restart(worker, 'processo não está vivo')
+                continue
+            worker.busy = True
+            return worker
+
+    # --- inference ---
+
+    def _roundtrip(self, worker: _Worker, x: np.ndarray) -> np.ndarray:
+        x = np.ascontiguousarray(x)
+        if x.nbytes > worker.in_shm.size:
+            raise ValueError(f'input of {x.nbytes} bytes exceeds buffer of {worker.in_shm.size}')
+        np.ndarray(x.shape, dtype=x.dtype, buffer=worker.in_shm.buf)[...] = x
+        try:
+            worker.conn.send(('predict', x.shape, x.dtype.str))
+            if not worker.conn.poll(self.request_timeout):
+                raise WorkerError(f'worker {worker.index}: timeout de {self.request_timeout}s')
+            msg = worker.conn.recv()
+        except (EOFError, OSError, BrokenPipeError) as e:
+            raise WorkerError(f'worker {worker.index}: conexão perdida ({e!r})')
+        if msg[0] != 'ok':
+            raise ValueError(f'worker {worker.index}: {msg[1]}')
+        _, shape, dtype = msg
+        # copy out so the buffer can be reused by the next request
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=worker.out_shm.buf).copy()
+
+    async def predict(self, x: np.ndarray) -> np.ndarray:
+        if self._idle is None:
+            raise RuntimeError('ModelWorkerPool não iniciado (await pool.start()).')
+        worker = await self._acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            y = await loop.run_in_executor(self._io_executor, self._roundtrip, worker, x)
+            worker.requests += 1
+        except WorkerError as e:
+            # crashed or hung worker: kill it and bring up a fresh one in the background
+            worker.busy = False
+            self._schedule_restart(worker, str(e))
+            raise
+        except Exception:
+            self._release(worker)
+            raise
+        self._release(worker)
+        return y
+
+    def health_check(self) -> Dict:
+        return {
+            'num_workers': self.num_workers,
+            'threads_per_worker': self.threads_per_worker,
+            'idle_workers': self._idle.qsize() if self._idle is not None else 0,
+            'workers': [{
+                'index': w.index,
+                'pid': w.process.pid if w.process is not None else None,
+                'alive': w.alive,
+                'busy': w.busy,
+                'restarting': w.restarting,
+                'cpus': w.cpus,
+                'requests': w.requests,
+                'restarts': max(0, w.restarts),
+                'last_error': w.last_error,
+            } for w in self._workers],
+        }
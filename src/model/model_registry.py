@@ -0,0 +1,351 @@
+"""Versioned model registry with background loading, warm-up and atomic hot-swap.
+
+Each version is an immutable bundle directory under `registry_dir/versions/<version>/` holding the
+model, the PV/indicator scalers, the scalers manifest, the VecNormalize stats and the traced TorchScript
+policy, plus a
+`bundle_manifest.json` with SHA-256 checksums of every artifact. The active version is recorded in
+`registry_dir/ACTIVE.json` together with the activation history used for rollback.
+
+Usage (register a bundle from the current artifacts):
+    python -m src.model.model_registry register --source src/model
+    python -m src.model.model_registry list
+"""
+import os
+import json
+import shutil
+import asyncio
+import hashlib
+import inspect
+import logging
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from src.config.config import (
+    MODEL_ROOT_DIR, WINDOW_SIZE, EXPECTED_SCALED_FEATURES_FOR_MODEL, VEC_NORMALIZE_STATS_FILENAME,
+    SERVING_MODEL_FILENAME, SERVING_PV_SCALER_FILENAME, SERVING_IND_SCALER_FILENAME, TORCHSCRIPT_POLICY_PATH,
+)
+
+BUNDLE_MANIFEST_NAME = 'bundle_manifest.json'
+ACTIVE_POINTER_NAME = 'ACTIVE.json'
+SCALERS_MANIFEST_NAME = 'scalers_manifest.json'
+DEFAULT_REGISTRY_DIR = os.path.join(MODEL_ROOT_DIR, 'registry')
+
+
+def _sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_json_atomic(path: Path, payload: dict):
+    """Write JSON to a temp file in the same directory and os.replace() it over `path`."""
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class ModelRegistry:
+    """
+    Keeps versioned artifact bundles and serves one of them through an RNNModelPredictor.
+
+    `activate()` builds and warms the new predictor in a worker thread while the current one keeps
+    serving; only a fully loaded and warmed predictor is swapped in (a single reference assignment),
+    so requests never observe a half-loaded model. `on_activate` callbacks (plain or async) receive the
+    new predictor (e.g. to rebuild the inference pool and update `app.state.rnn_predictor`).
+    """
+
+    def __init__(self, registry_dir: str = DEFAULT_REGISTRY_DIR, predictor_factory: Optional[Callable] = None,
+                 on_activate: Optional[Callable] = None, logger_instance=None):
+        self.registry_dir = Path(registry_dir)
+        self.versions_dir = self.registry_dir / 'versions'
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        self.pointer_path = self.registry_dir / ACTIVE_POINTER_NAME
+
+        if logger_instance is None:
+            logger_instance = logging.getLogger('ModelRegistry')
+            if not logger_instance.handlers:
+                logger_instance.addHandler(logging.NullHandler())
+        self.logger = logger_instance
+
+        self._predictor_factory = predictor_factory
+        self._on_activate: List[Callable] = [on_activate] if on_activate is not None else []
+        self._swap_lock = asyncio.Lock()
+        self._active_version: Optional[str] = None
+        self._active_predictor = None
+        self._loading_version: Optional[str] = None
+        self._last_error: Optional[str] = None
+
+    # --- bundles ---
+
+    def version_dir(self, version: str) -> Path:
+        return self.versions_dir / version
+
+    def read_bundle_manifest(self, version: str) -> dict:
+        path = self.version_dir(version) / BUNDLE_MANIFEST_NAME
+        if not path.exists():
+            raise FileNotFoundError(f"Versão '{version}' não encontrada no registry ({path}).")
+        return json.loads(path.read_text(encoding='utf8'))
+
+    def list_versions(self) -> List[dict]:
+        """Return bundle manifests of all registered versions, oldest first."""
+        versions = []
+        for d in sorted(p for p in self.versions_dir.iterdir() if p.is_dir() and not p.name.startswith('.')):
+            try:
+                versions.append(self.read_bundle_manifest(d.name))
+            except Exception as e:
+                self.logger.warning(f"Registry: bundle inválido em {d}: {e}")
+        versions.sort(key=lambda m: m.get('created_at', ''))
+        return versions
+
+    def register_version(self, source_dir: str, model_filename: str = SERVING_MODEL_FILENAME,
+                         pv_scaler_filename: str = SERVING_PV_SCALER_FILENAME,
+                         ind_scaler_filename: str = SERVING_IND_SCALER_FILENAME,
+                         vec_normalize_filename: Optional[str] = VEC_NORMALIZE_STATS_FILENAME,
+                         version: Optional[str] = None, metadata: Optional[dict] = None,
+                         torchscript_path: Optional[str] = TORCHSCRIPT_POLICY_PATH) -> str:
+        """
+        Copy the artifacts from `source_dir` into a new immutable version bundle and return its id.
+        The TorchScript policy is taken from `source_dir/<basename>` or else from `torchscript_path`
+        itself (relative to the working directory, like MODEL_ROOT_DIR).
+        The bundle is assembled in a hidden temp directory and renamed into place, so a partially
+        copied version is never visible.
+        """
+        source = Path(source_dir)
+        version = version or datetime.now(timezone.utc).strftime('v%Y%m%dT%H%M%SZ')
+        target = self.version_dir(version)
+        if target.exists():
+            raise FileExistsError(f"Versão '{version}' já existe no registry.")
+
+        required = {'model': model_filename, 'pv_scaler': pv_scaler_filename, 'ind_scaler': ind_scaler_filename}
+        for role, name in required.items():
+            if not (source / name).exists():
+                raise FileNotFoundError(f"Artefato obrigatório '{role}' ausente: {source / name}")
+        artifacts = {role: source / name for role, name in required.items()}
+        artifacts['scalers_manifest'] = source / SCALERS_MANIFEST_NAME
+        if vec_normalize_filename:
+            artifacts['vec_normalize'] = source / vec_normalize_filename
+        if torchscript_path:
+            in_source = source / Path(torchscript_path).name
+            artifacts['torchscript'] = in_source if in_source.exists() else Path(torchscript_path)
+
+        staging = Path(tempfile.mkdtemp(dir=str(self.versions_dir), prefix=f'.{version}.'))
+        try:
+            files = {}
+            for role, path in artifacts.items():
+                if not path.exists():
+                    continue
+                name = path.name
+                shutil.copy2(path, staging / name)
+                files[role] = {'filename': name, 'sha256': _sha256(staging / name), 'bytes': (staging / name).stat().st_size}
+            manifest = {
+                'version': version,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'source_dir': str(source.resolve()),
+                'files': files,
+                'metadata': metadata or {},
+            }
+            _write_json_atomic(staging / BUNDLE_MANIFEST_NAME, manifest)
+            os.replace(staging, target)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.logger.info(f"Registry: versão {version} registrada a partir de {source} ({len(files)} artefatos).")
+        return version
+
+    def verify_version(self, version: str) -> List[str]:
+        """Return the list of artifacts whose checksum does not match the bundle manifest (empty = OK)."""
+        manifest = self.read_bundle_manifest(version)
+        bad = []
+        for role, entry in manifest.get('files', {}).items():
+            path = self.version_dir(version) / entry['filename']
+            if not path.exists() or _sha256(path) != entry['sha256']:
+                bad.append(role)
+        return bad
+
+    # --- active pointer ---
+
+    def _read_pointer(self) -> dict:
+        if not self.pointer_path.exists():
+            return {'active': None, 'history': []}
+        try:
+            return json.loads(self.pointer_path.read_text(encoding='utf8'))
+        except Exception as e:
+            self.logger.error(f"Registry: falha ao ler {self.pointer_path}: {e}")
+            return {'active': None, 'history': []}
+
+    @property
+    def active_version(self) -> Optional[str]:
+        return self._active_version
+
+    @property
+    def active_predictor(self):
+        return self._active_predictor
+
+    @property
+    def persisted_version(self) -> Optional[str]:
+        """Version recorded in ACTIVE.json (what the next startup will load)."""
+        return self._read_pointer().get('active')
+
+    # --- loading / swapping ---
+
+    def _build_predictor(self, version: str):
+        """Blocking: verify checksums, load the bundle into a new predictor and warm it up."""
+        bad = self.verify_version(version)
+        if bad:
+            raise ValueError(f"Checksum inválido na versão '{version}': {bad}")
+        factory = self._predictor_factory
+        if factory is None:
+            from src.model.rnn_predictor import RNNModelPredictor
+            factory = RNNModelPredictor
+        predictor = factory(**self.predictor_kwargs(version), logger_instance=self.logger)
+        predictor._load_model_and_scalers()
+        if predictor.price_volume_scaler is None or predictor.indicator_scaler is None:
+            raise RuntimeError(f"Versão '{version}': scalers não carregados.")
+        if predictor.model is None and getattr(predictor, 'torchscript_policy', None) is None:
+            raise RuntimeError(f"Versão '{version}': nenhum modelo utilizável carregado.")
+        predictor.model_version = version
+        self._warmup(predictor)
+        return predictor
+
+    def predictor_kwargs(self, version: str) -> dict:
+        """RNNModelPredictor kwargs for `version` (also the loader kwargs of the inference worker pool)."""
+        files = self.read_bundle_manifest(version)['files']
+        bundle_dir = self.version_dir(version)
+        return dict(
+            model_dir=str(bundle_dir),
+            model_filename=files['model']['filename'],
+            pv_scaler_filename=files['pv_scaler']['filename'],
+            ind_scaler_filename=files['ind_scaler']['filename'],
+            # every artifact comes from the bundle: no TorchScript outside it ('' disables the fallback)
+            torchscript_path=str(bundle_dir / files['torchscript']['filename']) if 'torchscript' in files else '',
+            vec_normalize_filename=files['vec_normalize']['filename'] if 'vec_normalize' in files else None,
+        )
+
+    def _warmup(self, predictor):
+        """Run one dummy inference so graph tracing/allocation happens before the swap, not on a request."""
+        dummy = np.zeros((1, WINDOW_SIZE, len(EXPECTED_SCALED_FEATURES_FOR_MODEL)), dtype=np.float32)
+        pipeline = getattr(predictor, 'scaler_pipeline', None)
+        if pipeline is not None:
+            pipeline.apply(np.zeros((WINDOW_SIZE, len(pipeline.source_columns))))
+        if predictor.model is not None and hasattr(predictor.model, 'predict'):
+            predictor.model.predict(dummy, verbose=0)
+        elif getattr(predictor, 'torchscript_policy', None) is not None:
+            predictor._predict_with_torchscript(dummy)
+
+    async def activate(self, version: str):
+        """Load `version` in a worker thread, warm it up and atomically swap it into serving."""
+        async with self._swap_lock:
+            if version == self._active_version and self._active_predictor is not None:
+                return self._active_predictor
+            self._loading_version = version
+            self.logger.info(f"Registry: carregando versão {version} em background...")
+            try:
+                loop = asyncio.get_running_loop()
+                predictor = await loop.run_in_executor(None, self._build_predictor, version)
+            except Exception as e:
+                self._last_error = f"{version}: {e}"
+                self.logger.error(f"Registry: falha ao ativar versão {version}; mantendo {self._active_version}: {e}", exc_info=True)
+                raise
+            finally:
+                self._loading_version = None
+
+            previous = self._active_version
+            self._active_predictor = predictor
+            self._active_version = version
+            self._last_error = None
+
+            pointer = self._read_pointer()
+            history = [v for v in pointer.get('history', []) if v != version]
+            if previous is not None and previous not in history:
+                history.append(previous)
+            _write_json_atomic(self.pointer_path, {
+                'active': version,
+                'history': history[-20:],
+                'activated_at': datetime.now(timezone.utc).isoformat(),
+            })
+            for callback in self._on_activate:
+                try:
+                    result = callback(predictor)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    self.logger.error(f"Registry: callback on_activate falhou: {e}", exc_info=True)
+            self.logger.info(f"Registry: versão {version} ativa (anterior: {previous}).")
+            return predictor
+
+    async def rollback(self):
+        """Re-activate the most recent previously active version."""
+        history = self._read_pointer().get('history', [])
+        candidates = [v for v in reversed(history) if v != self._active_version and self.version_dir(v).exists()]
+        if not candidates:
+            raise RuntimeError("Registry: nenhuma versão anterior disponível para rollback.")
+        target = candidates[0]
+        predictor = await self.activate(target)
+        # drop the rolled-back-to entry and everything after it from the history
+        pointer = self._read_pointer()
+        pointer['history'] = history[:history.index(target)]
+        _write_json_atomic(self.pointer_path, pointer)
+        return predictor
+
+    async def load_active(self):
+        """Startup helper: activate the version persisted in ACTIVE.json (None if the registry is empty)."""
+        version = self.persisted_version
+        if version is None:
+            return None
+        return await self.activate(version)
+
+    def health_check(self) -> Dict:
+        pointer = self._read_pointer()
+        return {
+            'active_version': self._active_version,
+            'loading_version': self._loading_version,
+            'previous_versions': pointer.get('history', [])[-5:],
+            'registered_versions': len([p for p in self.versions_dir.iterdir() if p.is_dir() and not p.name.startswith('.')]),
+            'last_error': self._last_error,
+        }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Model registry: register and inspect model bundles.')
+    parser.add_argument('--registry-dir', default=DEFAULT_REGISTRY_DIR)
+    sub = parser.add_subparsers(dest='command', required=True)
+    reg = sub.add_parser('register', help='Register the artifacts in --source as a new version')
+    reg.add_argument('--source', default=MODEL_ROOT_DIR)
+    reg.add_argument('--version', default=None)
+    reg.add_argument('--model', default=SERVING_MODEL_FILENAME)
+    reg.add_argument('--pv-scaler', default=SERVING_PV_SCALER_FILENAME)
+    reg.add_argument('--ind-scaler', default=SERVING_IND_SCALER_FILENAME)
+    reg.add_argument('--vec-normalize', default=VEC_NORMALIZE_STATS_FILENAME)
+    reg.add_argument('--torchscript', default=TORCHSCRIPT_POLICY_PATH)
+    sub.add_parser('list', help='List registered versions')
+    ver = sub.add_parser('verify', help='Verify artifact checksums of a version')
+    ver.add_argument('version')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    registry = ModelRegistry(args.registry_dir)
+    if args.command == 'register':
+        print(registry.register_version(args.source, args.model, args.pv_scaler, args.ind_scaler, args.vec_normalize,
+                                        version=args.version, torchscript_path=args.torchscript))
+    elif args.command == 'list':
+        active = registry.persisted_version
+        for m in registry.list_versions():
+            flag = '*' if m['version'] == active else ' '
+            print(f"{flag} {m['version']}  {m['created_at']}  {', '.join(sorted(m['files']))}")
+    elif args.command == 'verify':
+        bad = registry.verify_version(args.version)
+        print('OK' if not bad else f"Checksum mismatch: {bad}")
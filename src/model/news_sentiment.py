@@ -0,0 +1,308 @@
+"""Batched news-sentiment embeddings with a memory-mapped cache keyed by article hash.
+
+Running a transformer for every prediction is the slowest part of the sentiment branch. Here the
+headlines are embedded offline (or as they arrive) in large CPU batches, stored once, and served by
+lookup:
+
+- `article_key(text)`: 64-bit hash of the normalised headline, so the same article is embedded once
+  no matter how many assets/timesteps reference it;
+- `NewsEmbeddingStore`: append-only `keys.i64` + `embeddings.f32` files opened as memmaps; lookups are
+  a vectorised `searchsorted` over the keys, so a prediction-time read never touches the model;
+- `TransformerEmbedder`: local HF model (default yiyanghkust/finbert-tone), tokenized in length-sorted batches
+  under `torch.inference_mode`; output is the class probabilities (3 dims, like the
+  `sentiment_embedding_size` of DeepPortfolioAgentNetwork) or the [CLS] hidden state. The model and
+  output mode are recorded in the store's meta.json; reopening with another one is an error;
+- `NewsSentimentService`: embeds what is missing, then aggregates per asset and per timestep into a
+  (timesteps, assets, dim) array.
+
+Usage (offline, all headlines of the news dataset):
+    python -m src.model.news_sentiment --news data/parquet/sp500_news --text-col Article_title
+"""
+import os
+import json
+import hashlib
+import logging
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_MODEL_NAME = 'yiyanghkust/finbert-tone'
+DEFAULT_STORE_DIR = os.path.join('data', 'news_embeddings')
+KEYS_FILE = 'keys.i64'
+EMBEDDINGS_FILE = 'embeddings.f32'
+META_FILE = 'meta.json'
+
+logger = logging.getLogger('NewsSentiment')
+if not logger.handlers:
+    logger.addHandler(logging.NullHandler())
+
+
+def _normalise(text: str) -> str:
+    return ' '.join(str(text).split()).lower()
+
+
+def article_key(text: str) -> int:
+    """Stable signed 64-bit key for a headline (blake2b of the whitespace/case-normalised text)."""
+    digest = hashlib.blake2b(_normalise(text).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def article_keys(texts: Iterable[str]) -> np.ndarray:
+    return np.fromiter((article_key(t) for t in texts), dtype=np.int64)
+
+
+class NewsEmbeddingStore:
+    """
+    Append-only embedding cache on disk. One writer; any number of readers, which see new rows after
+    `refresh()`. Rows are only readable once both the embedding and its key were written.
+    """
+
+    def __init__(self, directory: str = DEFAULT_STORE_DIR, dim: Optional[int] = None, model_name: Optional[str] = None,
+                 output: Optional[str] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path = self.directory / META_FILE
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            if dim is not None and dim != meta['dim']:
+                raise ValueError(f"Store em {directory} tem dim={meta['dim']}, pedido dim={dim}")
+            if model_name is not None and meta.get('model_name') not in (None, model_name):
+                raise ValueError(f"Store em {directory} foi gerado com {meta['model_name']}, não {model_name}")
+            if output is not None and meta.get('output') not in (None, output):
+                raise ValueError(f"Store em {directory} foi gerado com output='{meta['output']}', não '{output}'")
+            self.meta = meta
+        else:
+            if dim is None:
+                raise ValueError("`dim` é obrigatório para criar um store novo")
+            self.meta = {'dim': int(dim), 'model_name': model_name, 'output': output}
+            meta_path.write_text(json.dumps(self.meta, indent=2))
+        self.dim = int(self.meta['dim'])
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        keys_path, emb_path = self.directory / KEYS_FILE, self.directory / EMBEDDINGS_FILE
+        n_keys = keys_path.stat().st_size // 8 if keys_path.exists() else 0
+        n_emb = emb_path.stat().st_size // (4 * self.dim) if emb_path.exists() else 0
+        n = min(n_keys, n_emb)
+        if n:
+            self._keys = np.memmap(keys_path, dtype=np.int64, mode='r', shape=(n,))
+            self._embeddings = np.memmap(emb_path, dtype=np.float32, mode='r', shape=(n, self.dim))
+        else:
+            self._keys = np.empty(0, dtype=np.int64)
+            self._embeddings = np.empty((0, self.dim), dtype=np.float32)
+        self._order = np.argsort(self._keys, kind='stable')
+        self._sorted_keys = np.asarray(self._keys)[self._order]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def find(self, keys: np.ndarray) -> np.ndarray:
+        """Row of each key in the store, -1 when missing."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if not len(self._sorted_keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        pos = np.searchsorted(self._sorted_keys, keys)
+        pos_clipped = np.minimum(pos, len(self._sorted_keys) - 1)
+        hit = self._sorted_keys[pos_clipped] == keys
+        return np.where(hit, self._order[pos_clipped], -1)
+
+    def get(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(embeddings, found): missing keys get a zero vector."""
+        rows = self.find(keys)
+        found = rows >= 0
+        out = np.zeros((len(rows), self.dim), dtype=np.float32)
+        if found.any():
+            out[found] = self._embeddings[rows[found]]
+        return out, found
+
+    def add(self, keys: np.ndarray, embeddings: np.ndarray) -> int:
+        """Append the keys that are not stored yet; returns how many rows were written."""
+        keys = np.asarray(keys, dtype=np.int64)
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(keys), self.dim)
+        with self._lock:
+            self.refresh()
+            _, first = np.unique(keys, return_index=True)
+            first = np.sort(first)
+            new = first[self.find(keys[first]) < 0]
+            if not len(new):
+                return 0
+            # embeddings first: a reader only sees a row once its key exists
+            with open(self.directory / EMBEDDINGS_FILE, 'ab') as f:
+                embeddings[new].tofile(f)
+            with open(self.directory / KEYS_FILE, 'ab') as f:
+                keys[new].tofile(f)
+            self.refresh()
+            return int(len(new))
+
+
+class TransformerEmbedder:
+    """Local HF sequence-classification model run in large CPU batches (lazy-loaded on first use)."""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, output: str = 'probs', batch_size: int = 64,
+                 max_length: int = 64, num_threads: Optional[int] = None, device: str = 'cpu'):
+        if output not in ('probs', 'cls'):
+            raise ValueError("output deve ser 'probs' ou 'cls'")
+        self.model_name = model_name
+        self.output = output
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.device = device
+        self._tokenizer = None
+        self._model = None
+
+    def _load(self):
+        if self._model is None:
+            import torch
+            from transformers import AutoTokenizer, AutoModelForSequenceClassification
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            self._model = AutoModelForSequenceClassification.from_pretrained(self.model_name).to(self.device).eval()
+        return self._tokenizer, self._model
+
+    @property
+    def dim(self) -> int:
+        _, model = self._load()
+        return int(model.config.num_labels if self.output == 'probs' else model.config.hidden_size)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        import torch
+        tokenizer, model = self._load()
+        texts = [str(t) for t in texts]
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        # length-sorted batches: little padding per batch
+        order = np.argsort([len(t) for t in texts], kind='stable')
+        with torch.inference_mode():
+            for begin in range(0, len(order), self.batch_size):
+                idx = order[begin:begin + self.batch_size]
+                inputs = tokenizer([texts[i] for i in idx], return_tensors='pt', padding=True,
+                                   truncation=True, max_length=self.max_length).to(self.device)
+                result = model(**inputs, output_hidden_states=self.output == 'cls')
+                if self.output == 'probs':
+                    values = torch.softmax(result.logits, dim=-1)
+                else:
+                    values = result.hidden_states[-1][:, 0, :]
+                out[idx] = values.float().cpu().numpy()
+        return out
+
+
+class NewsSentimentService:
+    """Cache-first sentiment: embeds only unseen headlines, everything else is a store read."""
+
+    def __init__(self, store: NewsEmbeddingStore, embedder: Optional[TransformerEmbedder] = None):
+        self.store = store
+        self.embedder = embedder
+
+    @classmethod
+    def open(cls, directory: str = DEFAULT_STORE_DIR, model_name: str = DEFAULT_MODEL_NAME,
+             with_model: bool = True, **embedder_kwargs) -> 'NewsSentimentService':
+        """Opens (or creates) the store; with_model=False gives a read-only, model-free service."""
+        embedder = TransformerEmbedder(model_name, **embedder_kwargs) if with_model else None
+        meta_exists = (Path(directory) / META_FILE).exists()
+        if not meta_exists and embedder is None:
+            raise FileNotFoundError(f"Store {directory} não existe e nenhum modelo foi pedido para criá-lo")
+        dim = None if meta_exists else embedder.dim
+        store = NewsEmbeddingStore(directory, dim=dim, model_name=model_name if with_model else None,
+                                   output=embedder.output if embedder is not None else None)
+        return cls(store, embedder)
+
+    def ensure_embedded(self, texts: Sequence[str], chunk_size: int = 4096) -> np.ndarray:
+        """Embeds (in chunks) the headlines not yet cached; returns the key of every text."""
+        keys = article_keys(texts)
+        missing = np.flatnonzero(self.store.find(keys) < 0)
+        if len(missing) and self.embedder is None:
+            raise RuntimeError(f"{len(missing)} notícias sem embedding no cache e o serviço não tem modelo")
+        _, unique_missing = np.unique(keys[missing], return_index=True)
+        missing = missing[np.sort(unique_missing)]
+        for begin in range(0, len(missing), chunk_size):
+            idx = missing[begin:begin + chunk_size]
+            written = self.store.add(keys[idx], self.embedder.embed([texts[i] for i in idx]))
+            logger.info(f"Embeddings gravados: {written} (total no cache: {len(self.store)})")
+        return keys
+
+    def embed_texts(self, texts: Sequence[str], embed_missing: bool = True) -> np.ndarray:
+        """(n, dim) embeddings; without embed_missing, uncached headlines come back as zeros."""
+        keys = self.ensure_embedded(texts) if embed_missing else article_keys(texts)
+        embeddings, _ = self.store.get(keys)
+        return embeddings
+
+    def asset_sentiment(self, headlines_by_asset: Dict[str, Sequence[str]], assets: Sequence[str],
+                        embed_missing: bool = False) -> np.ndarray:
+        """Prediction path: mean embedding per asset, (num_assets, dim); assets without news get zeros."""
+        out = np.zeros((len(assets), self.store.dim), dtype=np.float32)
+        for i, asset in enumerate(assets):
+            texts = list(headlines_by_asset.get(asset, ()))
+            if texts:
+                keys = self.ensure_embedded(texts) if embed_missing else article_keys(texts)
+                embeddings, found = self.store.get(keys)
+                if found.any():
+                    out[i] = embeddings[found].mean(axis=0)
+        return out
+
+    def build_sentiment_tensor(self, texts: Sequence[str], article_assets: Sequence[str], published_at,
+                               timestamps, assets: Sequence[str], forward_fill: bool = False,
+                               embed_missing: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mean embedding of the articles of each asset per timestep, (T, A, dim), plus article counts (T, A).
+        An article published in (timestamps[t-1], timestamps[t]] counts for timestep t (known at its close).
+        forward_fill repeats the last vector on timesteps without news.
+        """
+        keys = self.ensure_embedded(texts) if embed_missing else article_keys(texts)
+        embeddings, found = self.store.get(keys)
+        timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+        published = np.asarray(published_at, dtype='datetime64[ns]')
+        asset_index = {a: i for i, a in enumerate(assets)}
+        a_idx = np.fromiter((asset_index.get(a, -1) for a in article_assets), dtype=np.int64, count=len(keys))
+        t_idx = np.searchsorted(timestamps, published, side='left')
+        valid = found & (a_idx >= 0) & (t_idx < len(timestamps)) & ~np.isnat(published)
+
+        sums = np.zeros((len(timestamps), len(assets), self.store.dim), dtype=np.float64)
+        counts = np.zeros((len(timestamps), len(assets)), dtype=np.int64)
+        np.add.at(sums, (t_idx[valid], a_idx[valid]), embeddings[valid])
+        np.add.at(counts, (t_idx[valid], a_idx[valid]), 1)
+        tensor = (sums / np.maximum(counts, 1)[..., None]).astype(np.float32)
+        if forward_fill:
+            has_news = counts > 0
+            last = np.where(has_news, np.arange(len(timestamps))[:, None], -1)
+            last = np.maximum.accumulate(last, axis=0)
+            filled = tensor[np.maximum(last, 0), np.arange(len(assets))[None, :]]
+            tensor = np.where((last >= 0)[..., None], filled, 0.0).astype(np.float32)
+        return tensor, counts
+
+
+def _read_news(path: str, text_col: str):
+    import pandas as pd
+    if os.path.isdir(path):
+        from src.data.sp500_parquet import load_parquet_dataset
+        return load_parquet_dataset(path, columns=[text_col])
+    return pd.read_csv(path, usecols=[text_col])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera/atualiza o cache de embeddings de notícias")
+    parser.add_argument('--news', required=True, help='CSV ou diretório Parquet (src/data/sp500_parquet.py)')
+    parser.add_argument('--text-col', default='Article_title')
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--model', default=DEFAULT_MODEL_NAME)
+    parser.add_argument('--output', choices=['probs', 'cls'], default='probs')
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    news = _read_news(args.news, args.text_col)
+    texts = news[args.text_col].dropna().astype(str).tolist()
+    service = NewsSentimentService.open(args.store, args.model, output=args.output,
+                                        batch_size=args.batch_size, num_threads=args.threads)
+    before = len(service.store)
+    service.ensure_embedded(texts)
+    logger.info(f"{len(texts)} notícias; {len(service.store) - before} novas no cache ({len(service.store)} no total)")
+
+
+if __name__ == '__main__':
+    main()
@@ -126,12 +126,14 @@ def calculate_features_for_prediction(ohlcv_df: pd.DataFrame, logger_instance) -
         return None
 
 
-def _align_window_to_scaler(window_df: pd.DataFrame, api_cols: List[str], scaler, scaler_type: str = 'pv') -> pd.DataFrame:
+def _resolve_scaler_input_columns(api_cols: List[str], scaler, scaler_type: str = 'pv', manifest: Optional[dict] = None) -> Optional[Tuple[List[str], List[Optional[str]]]]:
     """
-    Expand the available API columns (api_cols) into the full-width input that a scaler expects.
-    Uses scaler.n_features_in_ when available, otherwise attempts to read src/model/scalers_manifest.json
-    to find pv_feature_order or ind_feature_order. Missing columns are filled with zeros.
-    Returns a DataFrame with columns in the order expected by the scaler.
+    Resolve the full-width column layout a scaler expects and, for each position, the api_col
+    that feeds it (None when the position is zero-filled).
+    Uses the scalers manifest (pv_feature_order/ind_feature_order; `manifest` or
+    src/model/scalers_manifest.json), then scaler.feature_names_in_, then repeats api_cols
+    until scaler.n_features_in_ is reached.
+    Returns None when the scaler width cannot be determined (caller should use api_cols as-is).
     """
     import json, pathlib
     expected_n = getattr(scaler, 'n_features_in_', None)
@@ -139,10 +141,12 @@ def _align_window_to_scaler(window_df: pd.DataFrame, api_cols: List[str], scaler
     # Try to build column list from manifest
     col_list = None
     try:
-        model_root = pathlib.Path('src') / 'model'
-        manifest_path = model_root / 'scalers_manifest.json'
-        if manifest_path.exists():
-            m = json.loads(manifest_path.read_text(encoding='utf8'))
+        m = manifest
+        if not m:
+            model_root = pathlib.Path('src') / 'model'
+            manifest_path = model_root / 'scalers_manifest.json'
+            m = json.loads(manifest_path.read_text(encoding='utf8')) if manifest_path.exists() else {}
+        if m:
             if scaler_type == 'pv' and 'pv_feature_order' in m:
                 col_list = list(m['pv_feature_order'])
             elif scaler_type == 'ind' and 'ind_feature_order' in m:
@@ -162,8 +166,7 @@ def _align_window_to_scaler(window_df: pd.DataFrame, api_cols: List[str], scaler
     # If still no column list, construct a placeholder by repeating api_cols until reaching expected_n
     if col_list is None:
         if expected_n is None:
-            # As a last resort, just return the subset we have
-            return window_df[api_cols]
+            return None
         # create placeholder names: api_col_0, api_col_1... but better to repeat api_cols mapped per-asset
         # We'll repeat the api_cols sequence to reach expected_n
         rep = []
@@ -182,8 +185,8 @@ def _align_window_to_scaler(window_df: pd.DataFrame, api_cols: List[str], scaler
         elif len(col_list) > expected_n:
             col_list = col_list[:expected_n]
 
-    # Now build a DataFrame with columns in col_list order. For any name that maps to an api_col
-    # (like 'crypto_eth_close_div_atr' -> 'close_div_atr') we'll try to extract the api_col from the suffix
+    # For any name that maps to an api_col (like 'crypto_eth_close_div_atr' -> 'close_div_atr')
+    # we extract the api_col from the suffix
     out_cols = []
     for name in col_list:
         matched = None
@@ -191,7 +194,22 @@ def _align_window_to_scaler(window_df: pd.DataFrame, api_cols: List[str], scaler
             if name.endswith(c):
                 matched = c
                 break
-        out_cols.append(matched if matched is not None else None)
+        out_cols.append(matched)
+    return col_list, out_cols
+
+
+def _align_window_to_scaler(window_df: pd.DataFrame, api_cols: List[str], scaler, scaler_type: str = 'pv') -> pd.DataFrame:
+    """
+    Expand the available API columns (api_cols) into the full-width input that a scaler expects.
+    Uses scaler.n_features_in_ when available, otherwise attempts to read src/model/scalers_manifest.json
+    to find pv_feature_order or ind_feature_order. Missing columns are filled with zeros.
+    Returns a DataFrame with columns in the order expected by the scaler.
+    """
+    layout = _resolve_scaler_input_columns(api_cols, scaler, scaler_type)
+    if layout is None:
+        # As a last resort, just return the subset we have
+        return window_df[api_cols]
+    col_list, out_cols = layout
 
     # Build the output DataFrame: for matched columns copy the api series; for unmatched fill zeros
     rows = []
@@ -211,17 +229,173 @@ def _align_window_to_scaler(window_df: pd.DataFrame, api_cols: List[str], scaler
     return pd.DataFrame(arr, index=window_df.index, columns=col_list)
 
 
+def _scaler_affine_params(scaler) -> Optional[Tuple[np.ndarray, np.ndarray, Optional[Tuple[float, float]]]]:
+    """
+    Express a fitted sklearn scaler as a per-column affine map: transform(x) == x * scale + offset.
+    Supports MinMaxScaler, StandardScaler, RobustScaler and MaxAbsScaler.
+    Returns (scale, offset, clip_range) or None if the scaler type is not supported.
+    """
+    name = type(scaler).__name__
+    try:
+        if name == 'MinMaxScaler':
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+            offset = np.asarray(scaler.min_, dtype=np.float64)
+            clip_range = tuple(scaler.feature_range) if getattr(scaler, 'clip', False) else None
+            return scale, offset, clip_range
+        if name == 'StandardScaler':
+            n = int(scaler.n_features_in_)
+            std = np.asarray(scaler.scale_, dtype=np.float64) if getattr(scaler, 'scale_', None) is not None else np.ones(n)
+            mean = np.asarray(scaler.mean_, dtype=np.float64) if getattr(scaler, 'mean_', None) is not None else np.zeros(n)
+            if not getattr(scaler, 'with_mean', True):
+                mean = np.zeros(n)
+            return 1.0 / std, -mean / std, None
+        if name == 'RobustScaler':
+            n = int(scaler.n_features_in_)
+            scale = np.asarray(scaler.scale_, dtype=np.float64) if getattr(scaler, 'scale_', None) is not None else np.ones(n)
+            center = np.asarray(scaler.center_, dtype=np.float64) if getattr(scaler, 'center_', None) is not None else np.zeros(n)
+            return 1.0 / scale, -center / scale, None
+        if name == 'MaxAbsScaler':
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+            return 1.0 / scale, np.zeros_like(scale), None
+    except Exception:
+        return None
+    return None
+
+
+class CompiledScalerPipeline:
+    """
+    PV + indicator scalers fused into one affine map in EXPECTED_SCALED_FEATURES_FOR_MODEL order.
+
+    Built once (at model load) from the fitted scalers; applying it is a column gather followed by
+    `x * scale + offset` on the NumPy window, reproducing `_align_window_to_scaler` + `scaler.transform`
+    without building intermediate DataFrames.
+    """
+
+    def __init__(self, source_columns: List[str], column_index: np.ndarray, scale: np.ndarray,
+                 offset: np.ndarray, clip_min: np.ndarray, clip_max: np.ndarray,
+                 feature_order: List[str]):
+        self.source_columns = source_columns  # columns read from the features DataFrame
+        self.column_index = column_index      # per output feature: index into source_columns (len = zero column)
+        self.scale = scale
+        self.offset = offset
+        self.clip_min = clip_min
+        self.clip_max = clip_max
+        self.feature_order = feature_order
+        self._needs_clip = bool(np.isfinite(clip_min).any() or np.isfinite(clip_max).any())
+        # scaler inputs with no API column are zero-filled, as in _align_window_to_scaler
+        self._zero_filled = bool((column_index == len(source_columns)).any())
+
+    @property
+    def num_features(self) -> int:
+        return len(self.feature_order)
+
+    def apply(self, window: np.ndarray) -> np.ndarray:
+        """Scale a (window_size, len(source_columns)) array into (window_size, num_features) float64."""
+        if self._zero_filled:
+            window = np.concatenate([window, np.zeros((len(window), 1))], axis=1)
+        out = window[:, self.column_index] * self.scale + self.offset
+        if self._needs_clip:
+            np.clip(out, self.clip_min, self.clip_max, out=out)
+        return out
+
+    def transform_window(self, features_df: pd.DataFrame, window_size: int) -> np.ndarray:
+        """Take the last `window_size` rows of `features_df` and return a (1, window_size, num_features) batch."""
+        positions = features_df.columns.get_indexer(self.source_columns)
+        window = features_df.iloc[-window_size:, positions].to_numpy(dtype=np.float64)
+        return self.apply(window)[np.newaxis, ...]
+
+
+def compile_scaler_pipeline(
+    price_vol_scaler,
+    indicator_scaler,
+    expected_scaled_feature_order: List[str],
+    logger_instance=None,
+    manifest: Optional[dict] = None
+) -> Optional[CompiledScalerPipeline]:
+    """
+    Build a CompiledScalerPipeline from the loaded scalers (`manifest` is the scalers manifest
+    loaded alongside them, used to resolve multi-asset column layouts).
+    Returns None when a scaler is missing or is not a per-column affine scaler, in which case callers
+    should fall back to the sklearn path in preprocess_for_model_prediction.
+    """
+    if logger_instance is None:
+        import logging
+        logger_instance = logging.getLogger('RNNPredictor')
+    if price_vol_scaler is None or indicator_scaler is None:
+        return None
+
+    # scaled feature name -> (source column or None for zero-filled input, scale, offset, clip range)
+    feature_params = {}
+    for scaler, api_cols, scaler_type in (
+        (price_vol_scaler, API_PRICE_VOL_COLS_TO_SCALE, 'pv'),
+        (indicator_scaler, API_INDICATOR_COLS_TO_SCALE, 'ind'),
+    ):
+        params = _scaler_affine_params(scaler)
+        if params is None:
+            logger_instance.info(f"Scaler pipeline: scaler '{type(scaler).__name__}' não é afim; usando caminho sklearn.")
+            return None
+        scale, offset, clip_range = params
+        expected_in = getattr(scaler, 'n_features_in_', None)
+        if expected_in is not None and expected_in != len(api_cols):
+            layout = _resolve_scaler_input_columns(api_cols, scaler, scaler_type, manifest)
+            sources = layout[1] if layout is not None else list(api_cols)
+        else:
+            sources = list(api_cols)
+        if len(scale) < len(api_cols) or len(sources) < len(api_cols):
+            logger_instance.warning(f"Scaler pipeline: scaler {scaler_type} tem largura {len(scale)} < {len(api_cols)} colunas da API.")
+            return None
+        # Same slicing as the sklearn path: output i of the scaler becomes f"{api_cols[i]}_scaled"
+        for i, col_name in enumerate(api_cols):
+            feature_params[f"{col_name}_scaled"] = (sources[i], scale[i], offset[i], clip_range)
+
+    source_columns: List[str] = []
+    column_index, scales, offsets, clip_min, clip_max = [], [], [], [], []
+    for feature_name in expected_scaled_feature_order:
+        if feature_name in feature_params:
+            src, sc, off, clip_range = feature_params[feature_name]
+        elif not feature_name.endswith('_scaled'):
+            # Feature expected unscaled: pass the original column through
+            src, sc, off, clip_range = feature_name, 1.0, 0.0, None
+        else:
+            logger_instance.error(f"Scaler pipeline: feature '{feature_name}' não é produzida pelos scalers.")
+            return None
+        if src is not None and src not in source_columns:
+            source_columns.append(src)
+        # zero-filled scaler input: resolved to the zero column appended in apply()
+        column_index.append(source_columns.index(src) if src is not None else None)
+        scales.append(sc)
+        offsets.append(off)
+        clip_min.append(clip_range[0] if clip_range else -np.inf)
+        clip_max.append(clip_range[1] if clip_range else np.inf)
+
+    return CompiledScalerPipeline(
+        source_columns=source_columns,
+        column_index=np.asarray([len(source_columns) if i is None else i for i in column_index], dtype=np.intp),
+        scale=np.asarray(scales, dtype=np.float64),
+        offset=np.asarray(offsets, dtype=np.float64),
+        clip_min=np.asarray(clip_min, dtype=np.float64),
+        clip_max=np.asarray(clip_max, dtype=np.float64),
+        feature_order=list(expected_scaled_feature_order),
+    )
+
+
 def preprocess_for_model_prediction(
     features_df: pd.DataFrame, 
     price_vol_scaler, 
     indicator_scaler,
     expected_scaled_feature_order: List[str], # Vem do config.EXPECTED_SCALED_FEATURES_FOR_MODEL
     window_size: int,
-    logger_instance
+    logger_instance,
+    scaler_pipeline: Optional[CompiledScalerPipeline] = None,
+    obs_normalizer: Optional['ObservationNormalizer'] = None
 ) -> np.ndarray:
     """
     Aplica scalers carregados e formata os dados para a entrada do modelo.
     `features_df` deve conter TODAS as colunas de `API_PRICE_VOL_COLS_TO_SCALE` e `API_INDICATOR_COLS_TO_SCALE`.
+    Se `scaler_pipeline` (compile_scaler_pipeline) for informado, o escalonamento é feito numa única
+    operação vetorizada sobre a janela NumPy em vez do caminho sklearn/DataFrame.
+    Se `obs_normalizer` (estatísticas VecNormalize do bundle) for informado, é aplicado à janela final,
+    como o VecNormalize faz com as observações da política no treino.
     """
     # Ensure logger_instance is available for warnings/errors
     if logger_instance is None:
@@ -234,6 +408,18 @@ def preprocess_for_model_prediction(
         logger_instance.warning(f"Preprocessing API: Dados insuficientes para janela. Necessário: {window_size}, Disponível: {len(features_df)}")
         return np.array([])
 
+    # Caminho rápido: pipeline de scalers compilado no carregamento do modelo
+    if scaler_pipeline is not None and list(expected_scaled_feature_order) == scaler_pipeline.feature_order:
+        missing = [col for col in scaler_pipeline.source_columns if col not in features_df.columns]
+        if missing:
+            logger_instance.error(f"Preprocessing API: Colunas ausentes para scaler pipeline: {missing}")
+            return np.array([])
+        reshaped_data = scaler_pipeline.transform_window(features_df, window_size)
+        if obs_normalizer is not None:
+            reshaped_data = obs_normalizer.apply(reshaped_data)
+        logger_instance.debug(f"Preprocessing API: Dados pré-processados (pipeline compilado) com shape: {reshaped_data.shape}")
+        return reshaped_data
+
     # Pegar a última janela de dados
     window_data_df = features_df.tail(window_size).copy()
 
@@ -295,50 +481,6 @@ def preprocess_for_model_prediction(
         return np.array([])
     
 
-    # News --
-
-    if features_df.empty or len(features_df) < window_size:
-        logger_instance.warning(f"API Preprocessing: Dados insuficientes. Necessário: {window_size}, Disp: {len(features_df)}")
-        return np.array([])
-
-    window_data_df = features_df.tail(window_size).copy()
-    if len(window_data_df) < window_size: return np.array([]) # Checagem extra
-
-    scaled_data_dict = {} 
-
-    if price_vol_scaler and all(col in window_data_df.columns for col in API_PRICE_VOL_COLS):
-        expected_in = getattr(price_vol_scaler, 'n_features_in_', None)
-        if expected_in is not None and expected_in != len(API_PRICE_VOL_COLS):
-            pv_input = _align_window_to_scaler(window_data_df, API_PRICE_VOL_COLS, price_vol_scaler, scaler_type='pv')
-        else:
-            pv_input = window_data_df[API_PRICE_VOL_COLS]
-        scaled_pv = price_vol_scaler.transform(pv_input)
-        for i, col_name in enumerate(API_PRICE_VOL_COLS):
-            scaled_data_dict[f"{col_name}_scaled"] = scaled_pv[:, i]
-    else:
-        missing = [col for col in API_INDICATOR_COLS_TO_SCALE if col not in window_data_df.columns]
-        logger_instance.error(f"Preprocessing API: Colunas ausentes para indicator_scaler: {missing}")
-        return np.array([])
-    
-
-    if indicator_scaler and all(col in window_data_df.columns for col in API_INDICATOR_COLS):
-        expected_in = getattr(indicator_scaler, 'n_features_in_', None)
-        if expected_in is not None and expected_in != len(API_INDICATOR_COLS):
-            ind_input = _align_window_to_scaler(window_data_df, API_INDICATOR_COLS, indicator_scaler, scaler_type='ind')
-        else:
-            ind_input = window_data_df[API_INDICATOR_COLS]
-        scaled_ind = indicator_scaler.transform(ind_input)
-        for i, col_name in enumerate(API_INDICATOR_COLS):
-            # A feature 'buy_condition_v1' é binária. Escalar pode não ser ideal,
-            # mas se foi escalada no treino, precisa ser aqui também.
-            # Se não foi escalada no treino e está em EXPECTED_SCALED_FEATURES_FOR_MODEL sem _scaled,
-            # a lógica abaixo precisaria de ajuste.
-            scaled_data_dict[f"{col_name}_scaled"] = scaled_ind[:, i]
-    else: 
-        missing = [col for col in API_INDICATOR_COLS_TO_SCALE if col not in window_data_df.columns]
-        logger_instance.error(f"Preprocessing API: Colunas ausentes para indicator_scaler: {missing}")
-        return np.array([])
-
     # (Previous assembly removed) We'll assemble the final ordered feature list below using
     # the scaled_features_dict which contains both PV and IND scaled values.
     
@@ -382,6 +524,8 @@ def preprocess_for_model_prediction(
         return np.array([])
 
     reshaped_data = np.reshape(final_features_array, (1, window_size, len(expected_scaled_feature_order)))
+    if obs_normalizer is not None:
+        reshaped_data = obs_normalizer.apply(reshaped_data)
     logger_instance.info(f"Preprocessing API: Dados pré-processados com shape: {reshaped_data.shape}")
     return reshaped_data
 
@@ -391,26 +535,90 @@ def preprocess_for_model_prediction(
     #
 
 
+class ObservationNormalizer:
+    """
+    Observation statistics of a SB3 VecNormalize (obs_rms mean/var, clip_obs, epsilon) applied to the
+    preprocessed window: `clip((x - mean) / sqrt(var + epsilon), -clip_obs, clip_obs)`.
+    """
+
+    def __init__(self, mean: np.ndarray, var: np.ndarray, clip_obs: float = 10.0, epsilon: float = 1e-8):
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.std = np.sqrt(np.asarray(var, dtype=np.float64) + epsilon)
+        self.clip_obs = float(clip_obs)
+
+    @classmethod
+    def load(cls, path: str, logger_instance=None) -> Optional['ObservationNormalizer']:
+        """
+        Read a VecNormalize pickle (or a dict with mean/var/clip_obs/epsilon).
+        Returns None when the file is missing, observation normalization is disabled or the stats
+        cannot be read (e.g. stable_baselines3 not installed to unpickle a VecNormalize).
+        """
+        import pickle
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                stats = pickle.load(f)
+        except Exception as e:
+            if logger_instance: logger_instance.error(f"VecNormalize: falha ao ler {path}: {e}")
+            return None
+        if isinstance(stats, dict):
+            return cls(stats['mean'], stats['var'], stats.get('clip_obs', 10.0), stats.get('epsilon', 1e-8))
+        if not getattr(stats, 'norm_obs', True):
+            return None
+        obs_rms = getattr(stats, 'obs_rms', None)
+        if isinstance(obs_rms, dict):
+            if len(obs_rms) != 1:
+                if logger_instance: logger_instance.error(f"VecNormalize: observação Dict com chaves {list(obs_rms)} não suportada.")
+                return None
+            obs_rms = next(iter(obs_rms.values()))
+        if obs_rms is None:
+            return None
+        return cls(obs_rms.mean, obs_rms.var, getattr(stats, 'clip_obs', 10.0), getattr(stats, 'epsilon', 1e-8))
+
+    def compatible_with(self, window_shape: Tuple[int, ...]) -> bool:
+        """True when the stats match a (window, features) observation, flattened or per feature."""
+        return self.mean.size in (int(np.prod(window_shape)), window_shape[-1])
+
+    def apply(self, batch: np.ndarray) -> np.ndarray:
+        """Normalize a (batch, window, features) array (stats per feature or per flattened observation)."""
+        mean, std = self.mean, self.std
+        if mean.size != batch.shape[-1]:
+            mean, std = mean.reshape(batch.shape[1:]), std.reshape(batch.shape[1:])
+        return np.clip((batch - mean) / std, -self.clip_obs, self.clip_obs)
+
+
 class RNNModelPredictor:
-    def __init__(self, model_dir="src/model", model_filename="ppo_custom_deep_portfolio_agent.zip", 
-                 pv_scaler_filename="price_volume_atr_norm_scaler_sup.joblib", ind_scaler_filename="other_indicators_scaler_sup.joblib", 
-                 logger_instance=None): 
+    def __init__(self, model_dir="src/model", model_filename=SERVING_MODEL_FILENAME,
+                 pv_scaler_filename=SERVING_PV_SCALER_FILENAME, ind_scaler_filename=SERVING_IND_SCALER_FILENAME,
+                 logger_instance=None, torchscript_path: Optional[str] = None,
+                 vec_normalize_filename: Optional[str] = None):
         self.model_path = os.path.join(model_dir, model_filename)
         self.pv_scaler_path = os.path.join(model_dir, pv_scaler_filename)
         self.ind_scaler_path = os.path.join(model_dir, ind_scaler_filename)
+        # VecNormalize stats (from the registry bundle); applied in preprocessing when present
+        self.vec_normalize_path = os.path.join(model_dir, vec_normalize_filename) if vec_normalize_filename else None
+        self.obs_normalizer: Optional[ObservationNormalizer] = None
 
         self.model: Optional[tf.keras.Model] = None
         self.price_volume_scaler = None
         self.indicator_scaler = None
-
-        # TorchScript fallback (traced policy) path and holder
+        # Fused affine scaler pipeline, compiled once the scalers are loaded
+        self.scaler_pipeline: Optional[CompiledScalerPipeline] = None
+        # Registry version this predictor was loaded from (set by ModelRegistry; None for ad-hoc loads)
+        self.model_version: Optional[str] = None
+        # Optional ModelWorkerPool (src.model.inference_pool); when set, inference runs in worker processes
+        self.inference_pool = None
+
+        # TorchScript fallback (traced policy) path and holder.
+        # Registry bundles pass their own copy ('' = bundle has none: no fallback);
+        # ad-hoc loads default to <repo root>/TORCHSCRIPT_POLICY_PATH.
         self.torchscript_policy = None
-        # Path defaults to <repo root>/out/sb3_export/ppo_policy_traced.pt
-        try:
+        if torchscript_path is not None:
+            self.torchscript_path = torchscript_path
+        else:
             repo_root = Path(__file__).resolve().parents[2]
-            self.torchscript_path = str((repo_root / 'out' / 'sb3_export' / 'ppo_policy_traced.pt').resolve())
-        except Exception:
-            self.torchscript_path = os.path.abspath(os.path.join(model_dir, '..', 'out', 'sb3_export', 'ppo_policy_traced.pt'))
+            self.torchscript_path = str((repo_root / TORCHSCRIPT_POLICY_PATH).resolve())
 
         # Ensure there is always a logger to avoid AttributeError in headless/test environments
         import logging
@@ -541,11 +749,29 @@ class RNNModelPredictor:
 
             if self.price_volume_scaler is None or self.indicator_scaler is None:
                 self.logger.error("Um ou ambos os scalers não puderam ser carregados. O preditor pode não funcionar.")
+            else:
+                self.scaler_pipeline = compile_scaler_pipeline(
+                    self.price_volume_scaler, self.indicator_scaler, EXPECTED_SCALED_FEATURES_FOR_MODEL, self.logger,
+                    manifest=getattr(self, 'scalers_manifest', None)
+                )
+                if self.scaler_pipeline is not None:
+                    self.logger.info(f"Scaler pipeline compilado: {self.scaler_pipeline.num_features} features, "
+                                     f"{len(self.scaler_pipeline.source_columns)} colunas de origem.")
+            if self.vec_normalize_path:
+                normalizer = ObservationNormalizer.load(self.vec_normalize_path, self.logger)
+                window_shape = (WINDOW_SIZE, len(EXPECTED_SCALED_FEATURES_FOR_MODEL))
+                if normalizer is not None and not normalizer.compatible_with(window_shape):
+                    self.logger.error(f"VecNormalize: estatísticas com {normalizer.mean.size} valores não batem com a "
+                                      f"janela {window_shape}; normalização desativada.")
+                    normalizer = None
+                self.obs_normalizer = normalizer
+                if normalizer is not None:
+                    self.logger.info(f"VecNormalize carregado de {self.vec_normalize_path}.")
             # Attempt to load TorchScript fallback if main model is unavailable
             try:
                 import torch
-                ts_path = os.path.abspath(self.torchscript_path)
-                if os.path.exists(ts_path):
+                ts_path = os.path.abspath(self.torchscript_path) if self.torchscript_path else ''
+                if ts_path and os.path.exists(ts_path):
                     try:
                         self.torchscript_policy = torch.jit.load(ts_path, map_location='cpu')
                         self.logger.info(f"TorchScript fallback carregado de {ts_path}")
@@ -604,6 +830,8 @@ class RNNModelPredictor:
             self.model = None # Invalida tudo se houver erro
             self.price_volume_scaler = None
             self.indicator_scaler = None
+            self.scaler_pipeline = None
+            self.obs_normalizer = None
 
     async def load_model(self):
         """Async wrapper to load model and scalers without blocking the event loop."""
@@ -615,12 +843,14 @@ class RNNModelPredictor:
         Return health information useful for API/status endpoints.
         Contains:
           - manifest (if loaded)
+          - model_version (registry version, if loaded through ModelRegistry)
           - pv_n_features and ind_n_features from loaded scalers (n_features_in_)
           - expected model features from config
           - model input shape if model loaded
         """
         info = {}
         info['manifest'] = getattr(self, 'scalers_manifest', None)
+        info['model_version'] = getattr(self, 'model_version', None)
         try:
             info['pv_n_features_in'] = int(getattr(self.price_volume_scaler, 'n_features_in_', -1)) if self.price_volume_scaler is not None else None
         except Exception:
@@ -630,6 +860,11 @@ class RNNModelPredictor:
         except Exception:
             info['ind_n_features_in'] = None
         info['expected_scaled_features_for_model_len'] = len(EXPECTED_SCALED_FEATURES_FOR_MODEL)
+        info['scaler_pipeline_compiled'] = getattr(self, 'scaler_pipeline', None) is not None
+        info['vec_normalize_loaded'] = getattr(self, 'obs_normalizer', None) is not None
+        info['torchscript_path'] = getattr(self, 'torchscript_path', None)
+        pool = getattr(self, 'inference_pool', None)
+        info['inference_pool'] = pool.health_check() if pool is not None else None
         if self.model is not None and hasattr(self.model, 'input_shape'):
             try:
                 info['model_input_shape'] = tuple(self.model.input_shape)
@@ -678,7 +913,9 @@ class RNNModelPredictor:
             self.indicator_scaler,
             EXPECTED_SCALED_FEATURES_FOR_MODEL, # Do config
             DEFAULT_WINDOW_SIZE, # Do config
-            self.logger
+            self.logger,
+            self.scaler_pipeline,
+            self.obs_normalizer
         )
 
         if processed_input.size == 0:
@@ -688,8 +925,11 @@ class RNNModelPredictor:
            
         # 3. Fazer a predição
         try:
+            if self.inference_pool is not None:
+                # Dedicated worker processes (own model copy, shared-memory I/O)
+                raw_predictions = await self.inference_pool.predict(processed_input)
             # Prefer Keras model if available
-            if self.model is not None:
+            elif self.model is not None:
                 # model.predict is CPU/GPU heavy; run in executor
                 raw_predictions = await current_loop.run_in_executor(None, self.model.predict, processed_input)
             elif self.torchscript_policy is not None:
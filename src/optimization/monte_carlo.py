@@ -0,0 +1,316 @@
+"""
+🎲 MOTOR MONTE CARLO VETORIZADO
+Simula N caminhos x T trades de uma vez (arrays NumPy) para projeções de recuperação e crescimento
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing as mp
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+SIZING = ('fraction', 'fixed', 'kelly')
+
+
+class Dist:
+    """
+    Distribuição usada pelo motor (taxa de acerto, retorno por trade, tamanho da posição).
+
+    Tipos: fixed(v), uniform(lo, hi), normal(mu, sigma), lognormal(mu, sigma), beta(a, b),
+    empirical(valores) — reamostra valores observados (ex.: retornos de trades de um backtest).
+    `clip=(lo, hi)` limita as amostras (ex.: normal truncada em [-1, inf) para retornos).
+    """
+
+    KINDS = ('fixed', 'uniform', 'normal', 'lognormal', 'beta', 'empirical')
+
+    def __init__(self, kind: str, *params, clip: Optional[Sequence[float]] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Distribuição desconhecida: {kind} (use {', '.join(self.KINDS)})")
+        if kind == 'empirical':
+            params = (np.asarray(params[0], dtype=np.float64).ravel(),)
+            if len(params[0]) == 0:
+                raise ValueError("Distribuição empírica sem valores")
+        self.kind = kind
+        self.params = params
+        self.clip = clip
+
+    @classmethod
+    def fixed(cls, value: float) -> 'Dist':
+        return cls('fixed', float(value))
+
+    @classmethod
+    def uniform(cls, low: float, high: float) -> 'Dist':
+        return cls('uniform', float(low), float(high))
+
+    @classmethod
+    def normal(cls, mu: float, sigma: float, clip=None) -> 'Dist':
+        return cls('normal', float(mu), float(sigma), clip=clip)
+
+    @classmethod
+    def lognormal(cls, mu: float, sigma: float, clip=None) -> 'Dist':
+        return cls('lognormal', float(mu), float(sigma), clip=clip)
+
+    @classmethod
+    def beta(cls, a: float, b: float) -> 'Dist':
+        return cls('beta', float(a), float(b))
+
+    @classmethod
+    def beta_mean(cls, mean: float, concentration: float) -> 'Dist':
+        """Beta com média `mean`; `concentration` = a + b (quanto maior, menor a incerteza)."""
+        return cls.beta(mean * concentration, (1.0 - mean) * concentration)
+
+    @classmethod
+    def empirical(cls, values) -> 'Dist':
+        return cls('empirical', values)
+
+    @property
+    def is_fixed(self) -> bool:
+        return self.kind == 'fixed'
+
+    def sample(self, rng: np.random.Generator, size):
+        """Amostra `size` valores (escalar quando a distribuição é fixa: evita arrays constantes)."""
+        p = self.params
+        if self.kind == 'fixed':
+            return p[0]
+        if self.kind == 'uniform':
+            out = rng.random(size)  # mais rápido que rng.uniform; a transformação afim é feita in-place
+            out *= p[1] - p[0]
+            out += p[0]
+        elif self.kind == 'normal':
+            out = rng.normal(p[0], p[1], size)
+        elif self.kind == 'lognormal':
+            out = rng.lognormal(p[0], p[1], size)
+        elif self.kind == 'beta':
+            out = rng.beta(p[0], p[1], size)
+        else:
+            out = p[0][rng.integers(0, len(p[0]), size)]
+        if self.clip is not None:
+            out = np.clip(out, self.clip[0], self.clip[1])
+        return out
+
+    def mean(self) -> float:
+        p = self.params
+        if self.clip is not None and self.kind != 'fixed':
+            return float(np.mean(self.sample(np.random.default_rng(0), 200_000)))
+        return float({'fixed': lambda: p[0], 'uniform': lambda: (p[0] + p[1]) / 2, 'normal': lambda: p[0],
+                      'lognormal': lambda: np.exp(p[0] + p[1] ** 2 / 2), 'beta': lambda: p[0] / (p[0] + p[1]),
+                      'empirical': lambda: p[0].mean()}[self.kind]())
+
+    def __repr__(self):
+        params = (f"n={len(self.params[0])}",) if self.kind == 'empirical' else self.params
+        return f"Dist.{self.kind}({', '.join(map(str, params))})"
+
+
+def as_dist(value: Union[float, Dist]) -> Dist:
+    return value if isinstance(value, Dist) else Dist.fixed(value)
+
+
+class MonteCarloEngine:
+    """
+    Simula trades em lote: cada passo de tempo atualiza todos os caminhos de um bloco com operações de array.
+
+    Por trade: acerto com probabilidade `win_rate` (sorteada uma vez por caminho se for uma Dist, ex.:
+    Dist.beta_mean(0.6, 200) para incerteza sobre a taxa), retorno sobre a posição `win_return` ou
+    `loss_return` (sorteados por trade), taxa `fee` na entrada e na saída, e só `reinvest` do lucro volta
+    ao capital (o resto é retirado, ex.: doações).
+
+    Tamanho da posição (`sizing`):
+    - 'fraction': `size` (número ou Dist por trade) x capital
+    - 'fixed': `size` em USDT
+    - 'kelly': `kelly_scale` x fração de Kelly (p - q / b, b = E[ganho] / |E[perda]|) x capital
+    Depois limitado a [min_trade, max_trade]; se a posição for maior que o capital o trade não acontece
+    (saldo insuficiente), como nos simuladores.
+
+    Ruína: capital < `ruin_level` (padrão: `min_trade` quando > 0, senão metade do capital inicial).
+    O caminho arruinado para de operar; com `stop_at_target` o caminho também para ao atingir `target`.
+    """
+
+    def __init__(self, win_rate: Union[float, Dist] = 0.55, win_return: Union[float, Dist] = 0.01,
+                 loss_return: Union[float, Dist] = -0.01, sizing: str = 'fraction',
+                 size: Union[float, Dist] = 0.1, min_trade: float = 0.0, max_trade: float = np.inf,
+                 fee: float = 0.0, reinvest: float = 1.0, ruin_level: Optional[float] = None,
+                 target: Optional[float] = None, stop_at_target: bool = False, kelly_scale: float = 0.5):
+        if sizing not in SIZING:
+            raise ValueError(f"sizing desconhecido: {sizing} (use {', '.join(SIZING)})")
+        self.win_rate = as_dist(win_rate)
+        self.win_return = as_dist(win_return)
+        self.loss_return = as_dist(loss_return)
+        self.sizing = sizing
+        self.size = as_dist(size)
+        self.min_trade = float(min_trade)
+        self.max_trade = float(max_trade)
+        self.fee = float(fee)
+        self.reinvest = float(reinvest)
+        self.ruin_level = ruin_level
+        self.target = target
+        self.stop_at_target = stop_at_target
+        self.kelly_scale = float(kelly_scale)
+
+    # --- simulação de um bloco ---------------------------------------------------------------------
+
+    def _kelly_fraction(self, p: np.ndarray) -> np.ndarray:
+        gain, loss = self.win_return.mean(), self.loss_return.mean()
+        if loss >= 0:
+            return np.ones_like(p)
+        f = p - (1.0 - p) * (-loss) / gain if gain > 0 else np.zeros_like(p)
+        return np.clip(self.kelly_scale * f, 0.0, 1.0)
+
+    def simulate_block(self, initial: np.ndarray, n_trades: int, rng: np.random.Generator,
+                       checkpoints: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Simula len(initial) caminhos por n_trades trades. Devolve o capital nos `checkpoints`
+        (índices de trade, 0 = inicial) e, por caminho: capital final, drawdown máximo, trade da ruína
+        e trade em que a meta foi atingida (-1 = nunca).
+        """
+        equity = np.array(initial, dtype=np.float64)
+        n = len(equity)
+        ruin_level = self.ruin_level
+        if ruin_level is None:
+            ruin_level = self.min_trade if self.min_trade > 0 else 0.5 * equity
+        ruin_level = np.broadcast_to(np.asarray(ruin_level, dtype=np.float64), (n,))
+        p = self.win_rate.sample(rng, n)
+        fraction = self._kelly_fraction(np.broadcast_to(np.asarray(p, dtype=np.float64), (n,))) \
+            if self.sizing == 'kelly' else None
+        keep = (1.0 - self.fee) ** 2
+
+        peak = equity.copy()
+        worst = np.ones(n)  # menor equity / pico já visto (drawdown máximo = 1 - worst)
+        target = np.inf if self.target is None else self.target
+        target_at = np.where(equity >= target, 0, -1)
+        active = equity >= ruin_level
+        if self.stop_at_target:
+            active &= target_at < 0
+        # o caminho congela ao parar: o trade da ruína / da meta é o número de trades em que esteve ativo
+        steps = np.zeros(n, dtype=np.int64)
+        clip = self.min_trade > 0 or np.isfinite(self.max_trade)
+        check_balance = self.sizing == 'fixed' or self.min_trade > 0 or not self.size.is_fixed or self.size.params[0] > 1
+        snaps = np.empty((len(checkpoints), n))
+        k = 0
+        if len(checkpoints) and checkpoints[0] == 0:
+            snaps[0] = equity
+            k = 1
+
+        for t in range(1, n_trades + 1):
+            if self.sizing == 'fixed':
+                stake = np.array(np.broadcast_to(self.size.sample(rng, n), (n,)))
+            elif self.sizing == 'kelly':
+                stake = fraction * equity
+            else:
+                stake = self.size.sample(rng, n) * equity
+            if clip:
+                np.clip(stake, self.min_trade, self.max_trade, out=stake)
+            if check_balance:
+                np.putmask(stake, stake > equity, 0.0)  # saldo insuficiente: não opera
+            stake *= active
+            steps += active
+
+            win = rng.random(n) < p
+            gain, loss = self.win_return.sample(rng, n), self.loss_return.sample(rng, n)
+            ret = win * (gain - loss)  # máscara x diferença: sem o custo de branch de np.where em máscara aleatória
+            ret += loss
+            ret *= keep
+            ret += keep - 1.0
+            ret *= stake  # PnL = posição x ((1 - fee)² (1 + r) - 1)
+            if self.reinvest != 1.0:
+                np.putmask(ret, ret > 0, ret * self.reinvest)
+            equity += ret
+
+            np.maximum(peak, equity, out=peak)
+            np.minimum(worst, equity / peak, out=worst)
+            active &= equity >= ruin_level
+            if self.target is not None:
+                hit = equity >= target
+                if self.stop_at_target:
+                    active &= ~hit
+                else:
+                    np.putmask(target_at, hit & (target_at < 0), t)
+            if k < len(checkpoints) and checkpoints[k] == t:
+                snaps[k] = equity
+                k += 1
+            if not active.any():
+                snaps[k:] = equity
+                break
+
+        ruined_at = np.where(equity < ruin_level, steps, -1)
+        if self.stop_at_target:
+            target_at = np.where(equity >= target, steps, -1)
+        max_dd = 1.0 - worst
+        return {'final': equity, 'max_drawdown': max_dd, 'ruined_at': ruined_at, 'target_at': target_at,
+                'snapshots': snaps}
+
+    # --- execução ----------------------------------------------------------------------------------
+
+    def run(self, initial_capital: Union[float, np.ndarray], n_paths: int, n_trades: int,
+            seed: Optional[int] = None, workers: int = 1, block_size: int = 16384,
+            percentiles: Sequence[float] = (5, 25, 50, 75, 95), band_points: int = 25,
+            keep_paths: bool = False) -> Dict:
+        """
+        Roda n_paths caminhos em blocos de `block_size` (pequenos o bastante para os arrays do passo
+        ficarem em cache). Cada bloco tem a sua semente (SeedSequence.spawn),
+        então o resultado é o mesmo com qualquer número de `workers` (processos, contexto spawn).
+        `initial_capital` pode ser um array por caminho (ex.: capital final de uma fase anterior).
+
+        Retorna bandas de percentis do capital em `band_points` trades, probabilidade de ruína (final e
+        acumulada), probabilidade de atingir `target`, percentis do capital final e do drawdown máximo.
+        Com `keep_paths`, inclui o capital final de cada caminho (`final_equity`).
+        """
+        if n_paths <= 0:
+            raise ValueError(f"n_paths deve ser > 0: {n_paths}")
+        if n_trades < 0:
+            raise ValueError(f"n_trades deve ser >= 0: {n_trades}")
+        if block_size <= 0:
+            raise ValueError(f"block_size deve ser > 0: {block_size}")
+        start = time.perf_counter()
+        initial = np.broadcast_to(np.asarray(initial_capital, dtype=np.float64), (n_paths,))
+        checkpoints = np.unique(np.linspace(0, n_trades, min(band_points, n_trades + 1)).round().astype(np.int64))
+        bounds = list(range(0, n_paths, block_size)) + [n_paths]
+        seeds = np.random.SeedSequence(seed).spawn(len(bounds) - 1)
+        tasks = [(self, np.ascontiguousarray(initial[a:b]), n_trades, s, checkpoints)
+                 for a, b, s in zip(bounds[:-1], bounds[1:], seeds)]
+        workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as pool:
+                blocks = list(pool.map(_simulate_task, tasks))
+        else:
+            blocks = [_simulate_task(task) for task in tasks]
+
+        merged = {key: np.concatenate([b[key] for b in blocks], axis=-1) for key in blocks[0]}
+        return summarize(merged, checkpoints, percentiles, keep_paths, workers=workers,
+                         elapsed_s=time.perf_counter() - start)
+
+
+def _simulate_task(task):
+    engine, initial, n_trades, seed_seq, checkpoints = task
+    rng = np.random.Generator(np.random.SFC64(seed_seq))  # SFC64: o gerador mais rápido do NumPy
+    return engine.simulate_block(initial, n_trades, rng, checkpoints)
+
+
+def summarize(merged: Dict[str, np.ndarray], checkpoints: np.ndarray, percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+              keep_paths: bool = False, **extra) -> Dict:
+    """Percentis e probabilidades a partir dos arrays por caminho de `simulate_block` (já concatenados)."""
+    final, snaps, ruined_at = merged['final'], merged['snapshots'], merged['ruined_at']
+    n = len(final)
+    ruined = ruined_at >= 0
+    ruin_curve = np.searchsorted(np.sort(ruined_at[ruined]), checkpoints, side='right') / n
+    bands = np.percentile(snaps, percentiles, axis=1)
+    result = {
+        'n_paths': n,
+        'n_trades': int(checkpoints[-1]),
+        'steps': checkpoints.tolist(),
+        'percentiles': list(percentiles),
+        'bands': {str(q): band for q, band in zip(percentiles, bands)},
+        'mean': snaps.mean(axis=1),
+        'prob_ruin': float(ruined.mean()),
+        'prob_ruin_curve': ruin_curve,
+        'prob_target': float((merged['target_at'] >= 0).mean()),
+        'final_percentiles': dict(zip(map(str, percentiles), np.percentile(final, percentiles).tolist())),
+        'final_mean': float(final.mean()),
+        'max_drawdown_percentiles': dict(zip(map(str, percentiles),
+                                             np.percentile(merged['max_drawdown'], percentiles).tolist())),
+        **extra,
+    }
+    if keep_paths:
+        result['final_equity'] = final
+    return result
@@ -11,6 +11,93 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+
+def sweep_confidence_thresholds(confidence, outcome=None, pnl=None, thresholds=None, groups=None) -> pd.DataFrame:
+    """
+    Avalia todos os thresholds candidatos sobre um histórico de previsões (confiança, acerto, PnL),
+    como uma curva ROC: uma ordenação + somas acumuladas, depois cada threshold é só um searchsorted.
+    Custo O(n log n + G * m log n) para n previsões, m thresholds e G grupos (ex.: símbolos).
+
+    Um trade é executado quando confidence >= threshold; previsões com confiança, outcome ou pnl
+    NaN/inf (trade sem resultado) são descartadas antes da ordenação.
+    - outcome: 1/True = acerto; se None, acerto = pnl > 0
+    - thresholds: se None, todos os valores distintos de confiança (arredondados a 0.001)
+    - groups: rótulo por previsão (ex.: símbolo) para uma varredura independente por grupo
+    Retorna um DataFrame com [group,] threshold, trades, wins, accuracy, pnl, avg_pnl, coverage.
+    """
+    confidence = np.asarray(confidence, dtype=np.float64)
+    if outcome is None and pnl is None:
+        raise ValueError("Informe outcome e/ou pnl")
+    finite = np.isfinite(confidence)
+    if pnl is None:
+        pnl = np.zeros_like(confidence)
+    else:
+        pnl = np.asarray(pnl, dtype=np.float64)
+        finite &= np.isfinite(pnl)
+    if outcome is None:
+        wins = pnl > 0
+    else:
+        # NaN não pode virar True em astype(bool): outcome ausente = trade sem resultado
+        outcome = pd.to_numeric(pd.Series(np.asarray(outcome, dtype=object)), errors='coerce').to_numpy(dtype=np.float64)
+        finite &= np.isfinite(outcome)
+        wins = outcome != 0
+    groups = None if groups is None else np.asarray(groups)
+    labels = None if groups is None else np.unique(groups)
+    if not finite.all():
+        confidence, pnl, wins = confidence[finite], pnl[finite], wins[finite]
+        groups = None if groups is None else groups[finite]
+    if thresholds is None:
+        thresholds = np.unique(np.round(confidence, 3))
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+
+    if groups is None:
+        group_ids = np.zeros(len(confidence), dtype=np.int64)
+    else:
+        # ids sobre os rótulos originais: um grupo só com confiança inválida continua no resultado (0 trades)
+        group_ids = np.searchsorted(labels, groups)
+
+    # Ordena por (grupo, confiança); cada grupo vira um segmento contíguo ascendente
+    order = np.lexsort((confidence, group_ids))
+    conf_sorted = confidence[order]
+    cum_wins = np.concatenate([[0], np.cumsum(wins[order], dtype=np.int64)])
+    cum_pnl = np.concatenate([[0.0], np.cumsum(pnl[order])])
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(group_ids, minlength=1 if labels is None else len(labels)))])
+
+    # Primeiro índice com confidence >= threshold, por grupo: trades = [pos, fim do grupo)
+    starts, ends = bounds[:-1], bounds[1:]
+    pos = np.stack([start + np.searchsorted(conf_sorted[start:end], thresholds, side='left')
+                    for start, end in zip(starts, ends)])
+    end = ends[:, None]
+    trades = end - pos
+    n_wins = cum_wins[end] - cum_wins[pos]
+    total_pnl = cum_pnl[end] - cum_pnl[pos]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        accuracy = np.where(trades > 0, n_wins / trades, np.nan)
+        avg_pnl = np.where(trades > 0, total_pnl / trades, np.nan)
+        coverage = trades / (ends - starts)[:, None]
+
+    result = pd.DataFrame({
+        'threshold': np.tile(thresholds, len(starts)),
+        'trades': trades.ravel(),
+        'wins': n_wins.ravel(),
+        'accuracy': accuracy.ravel(),
+        'pnl': total_pnl.ravel(),
+        'avg_pnl': avg_pnl.ravel(),
+        'coverage': coverage.ravel(),
+    })
+    if labels is not None:
+        result.insert(0, 'group', np.repeat(labels, len(thresholds)))
+    return result
+
+
+def _best_threshold(sweep: pd.DataFrame, objective: str, min_trades: int) -> Optional[pd.Series]:
+    eligible = sweep[sweep['trades'] >= min_trades]
+    if eligible.empty:
+        return None
+    # Empate: menor threshold (mais trades com o mesmo resultado)
+    return eligible.sort_values([objective, 'threshold'], ascending=[False, True], kind='stable').iloc[0]
+
+
 class PerformanceOptimizer:
     """
     Sistema de otimização para atingir 85% de ganhos
@@ -77,12 +164,27 @@ class PerformanceOptimizer:
         
         return metrics
     
-    def optimize_confidence_thresholds(self, historical_data: pd.DataFrame) -> Dict:
+    def optimize_confidence_thresholds(self, historical_data: pd.DataFrame, thresholds=None,
+                                       objective: str = 'accuracy', min_trades: int = 30,
+                                       confidence_col: str = 'confidence', outcome_col: str = 'outcome',
+                                       pnl_col: str = 'pnl', group_col: Optional[str] = 'symbol') -> Dict:
         """
         Otimiza thresholds de confiança para maximizar performance
+        Com histórico de previsões (colunas confidence + outcome e/ou pnl), varre os thresholds sobre
+        os dados reais (sweep_confidence_thresholds); objective = 'accuracy' | 'pnl' | 'avg_pnl',
+        considerando só thresholds com pelo menos `min_trades` trades. Sem histórico, usa o modelo simulado.
         """
         logger.info("🔧 Otimizando confidence thresholds...")
         
+        has_history = (historical_data is not None and not historical_data.empty
+                       and confidence_col in historical_data.columns
+                       and (outcome_col in historical_data.columns or pnl_col in historical_data.columns))
+        if has_history:
+            return self._optimize_thresholds_from_history(historical_data, thresholds, objective, min_trades,
+                                                          confidence_col, outcome_col, pnl_col, group_col)
+        
+        logger.warning("⚠️ Sem histórico de previsões - usando modelo simulado de threshold")
+        
         # Testa diferentes thresholds
         threshold_tests = np.arange(0.50, 0.90, 0.05)
         results = []
@@ -111,6 +213,60 @@ class PerformanceOptimizer:
         
         return optimization
     
+    def _optimize_thresholds_from_history(self, historical_data: pd.DataFrame, thresholds, objective: str,
+                                          min_trades: int, confidence_col: str, outcome_col: str,
+                                          pnl_col: str, group_col: Optional[str]) -> Dict:
+        """Varredura real: global e, se houver coluna de grupo, por símbolo."""
+        confidence = historical_data[confidence_col].to_numpy()
+        outcome = historical_data[outcome_col].to_numpy() if outcome_col in historical_data.columns else None
+        pnl = historical_data[pnl_col].to_numpy() if pnl_col in historical_data.columns else None
+        
+        sweep = sweep_confidence_thresholds(confidence, outcome, pnl, thresholds)
+        best = _best_threshold(sweep, objective, min_trades)
+        if best is None:
+            best = _best_threshold(sweep, objective, 1)
+        current = sweep_confidence_thresholds(confidence, outcome, pnl, [self.confidence_threshold]).iloc[0]
+        if best is None:
+            logger.warning("⚠️ Nenhum threshold candidato gera trades - mantendo o threshold atual "
+                           f"({self.confidence_threshold:.3f})")
+            return {
+                "current_threshold": self.confidence_threshold,
+                "optimal_threshold": self.confidence_threshold,
+                "objective": objective,
+                "status": "no_trades",
+                "current_metrics": current.to_dict(),
+                "optimal_metrics": None,
+                "expected_improvement": 0.0,
+                "all_results": sweep.to_dict('records'),
+                "n_predictions": len(confidence),
+            }
+        
+        optimization = {
+            "current_threshold": self.confidence_threshold,
+            "optimal_threshold": float(best['threshold']),
+            "objective": objective,
+            "current_metrics": current.to_dict(),
+            "optimal_metrics": best.to_dict(),
+            "expected_improvement": float(np.nan_to_num(best[objective] - current[objective])),
+            "all_results": sweep.to_dict('records'),
+            "n_predictions": len(confidence),
+        }
+        
+        if group_col and group_col in historical_data.columns:
+            per_group = sweep_confidence_thresholds(confidence, outcome, pnl, thresholds,
+                                                    groups=historical_data[group_col].to_numpy())
+            per_group_thresholds = {}
+            for group, rows in per_group.groupby('group', sort=True):
+                group_best = _best_threshold(rows, objective, min_trades)
+                if group_best is not None:
+                    per_group_thresholds[group] = float(group_best['threshold'])
+            optimization["per_group_thresholds"] = per_group_thresholds
+        
+        logger.info(f"✅ Threshold ótimo: {best['threshold']:.3f} ({objective}: {best[objective]:.4f}, "
+                    f"{int(best['trades'])} trades de {len(confidence)} previsões)")
+        
+        return optimization
+    
     def _simulate_threshold_performance(self, threshold: float) -> float:
         """
         Simula performance com novo threshold de confiança
@@ -0,0 +1,251 @@
+"""
+📊 STREAMING CORRELATION ENGINE
+Covariância/correlação cross-asset incremental (EWMA ou janela deslizante) em NumPy
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class StreamingCorrelationEngine:
+    """
+    Mantém somas pairwise (n x n) de pesos, x, x² e x·y e atualiza a matriz inteira em O(n²) por barra.
+
+    - `alpha` definido: EWMA (todas as somas decaem por 1 - alpha antes de somar a barra nova).
+    - senão `window`: janela deslizante; a barra que sai é subtraída (buffer circular das últimas
+      `window` barras) e as somas são refeitas do buffer a cada `window` barras para não acumular erro.
+    Retornos ausentes (NaN) entram só nos pares em que os dois ativos têm valor, como o `corr()` pairwise
+    do pandas; com janela, o resultado é o mesmo de `returns_df.tail(window).corr()`.
+    `min_periods` conta observações reais do par: no EWMA o peso decaído converge para 1/alpha, então a
+    contagem sem decaimento é mantida à parte (como o `min_periods` do `ewm()` do pandas).
+    """
+
+    def __init__(self, symbols: Sequence[str], window: Optional[int] = 252, alpha: Optional[float] = None,
+                 min_periods: int = 30, groups: Optional[Dict[str, Sequence[str]]] = None):
+        if alpha is None and not window:
+            raise ValueError("Defina window (janela deslizante) ou alpha (EWMA)")
+        if alpha is not None and not 0.0 < alpha <= 1.0:
+            raise ValueError(f"alpha deve estar em (0, 1]: {alpha}")
+        self.window = None if alpha is not None else int(window)
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._w = self._sx = self._sxx = self._sxy = np.zeros((0, 0))
+        self._n = np.zeros((0, 0))  # EWMA: observações pairwise sem decaimento (para min_periods)
+        self._buffer = np.zeros((self.window or 0, 0))
+        self._filled = 0
+        self._pos = 0
+        self._since_rebuild = 0
+        self.updates = 0
+        self._last_prices = np.zeros(0)
+        self._cache: Dict[str, object] = {}
+        self._groups: Dict[str, List[str]] = {}
+        self.add_symbols(symbols)
+        self.set_groups(groups or {})
+
+    # --- universo -----------------------------------------------------------------------------
+
+    def add_symbols(self, symbols: Sequence[str]) -> None:
+        """Acrescenta ativos novos (sem histórico: entram nas somas a partir da próxima barra)."""
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if not new:
+            return
+        grow = len(new)
+        for s in new:
+            self._index[s] = len(self.symbols)
+            self.symbols.append(s)
+        pad = ((0, grow), (0, grow))
+        self._w, self._sx, self._sxx, self._sxy = (np.pad(m, pad) for m in (self._w, self._sx, self._sxx, self._sxy))
+        self._n = np.pad(self._n, pad)
+        self._buffer = np.pad(self._buffer, ((0, 0), (0, grow)), constant_values=np.nan)
+        self._last_prices = np.pad(self._last_prices, (0, grow), constant_values=np.nan)
+        self._triu = np.triu_indices(len(self.symbols), k=1)
+        self.set_groups(self._groups)
+
+    def set_groups(self, groups: Dict[str, Sequence[str]]) -> None:
+        """Grupos (ex.: classe de ativo) -> índices do triângulo superior, calculados uma vez só."""
+        self._groups = {name: list(members) for name, members in groups.items()}
+        self._group_pairs = {}
+        for name, members in self._groups.items():
+            idx = np.array(sorted(self._index[s] for s in members if s in self._index), dtype=np.intp)
+            if len(idx) > 1:
+                rows, cols = np.triu_indices(len(idx), k=1)
+                self._group_pairs[name] = (idx, idx[rows], idx[cols])
+        self._cache.clear()
+
+    # --- atualização -------------------------------------------------------------------------
+
+    def _vector(self, values) -> np.ndarray:
+        if isinstance(values, dict):
+            self.add_symbols(list(values))
+            vec = np.full(len(self.symbols), np.nan)
+            for s, v in values.items():
+                vec[self._index[s]] = np.nan if v is None else v
+            return vec
+        vec = np.asarray(values, dtype=np.float64)
+        if vec.shape != (len(self.symbols),):
+            raise ValueError(f"Esperado vetor com {len(self.symbols)} retornos, recebido {vec.shape}")
+        return vec
+
+    @staticmethod
+    def _contributions(block: np.ndarray, weights: Optional[np.ndarray] = None):
+        """Somas pairwise de um bloco (barras x ativos) via produtos de matrizes."""
+        mask = np.isfinite(block).astype(np.float64)
+        x = np.where(mask > 0, block, 0.0)
+        if weights is None:
+            wm, wx = mask, x
+        else:
+            wm, wx = mask * weights[:, None], x * weights[:, None]
+        return wm.T @ mask, wx.T @ mask, (wx * x).T @ mask, wx.T @ x
+
+    def update(self, returns) -> None:
+        """Uma barra de retornos (vetor na ordem de `symbols` ou dict símbolo -> retorno, NaN = ausente)."""
+        r = self._vector(returns)
+        mask = np.isfinite(r)
+        x = np.where(mask, r, 0.0)
+        m = mask.astype(np.float64)
+        if self.alpha is not None:
+            keep = 1.0 - self.alpha
+            for acc in (self._w, self._sx, self._sxx, self._sxy):
+                acc *= keep
+            self._n += np.outer(m, m)
+        elif self._filled == self.window:
+            old = self._buffer[self._pos]
+            if self._since_rebuild >= self.window:
+                self._buffer[self._pos] = r
+                self._rebuild()
+                self._advance()
+                return
+            om = np.isfinite(old)
+            ox = np.where(om, old, 0.0)
+            omf = om.astype(np.float64)
+            self._w -= np.outer(omf, omf)
+            self._sx -= np.outer(ox, omf)
+            self._sxx -= np.outer(ox * ox, omf)
+            self._sxy -= np.outer(ox, ox)
+        self._w += np.outer(m, m)
+        self._sx += np.outer(x, m)
+        self._sxx += np.outer(x * x, m)
+        self._sxy += np.outer(x, x)
+        if self.window:
+            self._buffer[self._pos] = r
+        self._advance()
+
+    def _advance(self):
+        if self.window:
+            self._pos = (self._pos + 1) % self.window
+            self._filled = min(self._filled + 1, self.window)
+            self._since_rebuild += 1
+        self.updates += 1
+        self._cache.clear()
+
+    def _rebuild(self):
+        """Refaz as somas a partir do buffer (elimina o erro acumulado das subtrações)."""
+        self._w, self._sx, self._sxx, self._sxy = self._contributions(self._buffer[:self._filled])
+        self._since_rebuild = 0
+
+    def update_prices(self, prices) -> None:
+        """Uma barra de preços (vetor ou dict); o retorno é calculado contra o último preço de cada ativo."""
+        p = self._vector(prices)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = p / self._last_prices - 1.0
+        self._last_prices = np.where(np.isfinite(p), p, self._last_prices)
+        if np.isfinite(r).any():
+            self.update(r)
+
+    def update_many(self, block: np.ndarray) -> None:
+        """Carrega várias barras (linhas = barras, colunas = `symbols`) com produtos de matrizes em vez de um loop."""
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim != 2 or block.shape[1] != len(self.symbols):
+            raise ValueError(f"Esperado bloco (barras, {len(self.symbols)}), recebido {block.shape}")
+        if len(block) == 0:
+            return
+        if self.alpha is not None:
+            n = len(block)
+            weights = (1.0 - self.alpha) ** np.arange(n - 1, -1, -1, dtype=np.float64)
+            decay = (1.0 - self.alpha) ** n
+            contrib = self._contributions(block, weights)
+            self._w, self._sx, self._sxx, self._sxy = (acc * decay + c for acc, c in
+                                                        zip((self._w, self._sx, self._sxx, self._sxy), contrib))
+            mask = np.isfinite(block).astype(np.float64)
+            self._n = self._n + mask.T @ mask
+            self.updates += n
+            self._cache.clear()
+            return
+        # janela: só as últimas `window` barras (buffer + bloco) importam; reconstrói de uma vez
+        recent = np.vstack([self._ordered_buffer(), block])[-self.window:]
+        self._buffer[:len(recent)] = recent
+        self._filled = len(recent)
+        self._pos = self._filled % self.window
+        self._rebuild()
+        self.updates += len(block)
+        self._cache.clear()
+
+    def _ordered_buffer(self) -> np.ndarray:
+        if self._filled < self.window:
+            return self._buffer[:self._filled]
+        return np.roll(self._buffer, -self._pos, axis=0)
+
+    # --- leitura ---------------------------------------------------------------------------------
+
+    def _enough_observations(self) -> np.ndarray:
+        """Pares com pelo menos max(2, min_periods) observações (janela: _w já é a contagem)."""
+        counts = self._w if self.alpha is None else self._n
+        return counts >= max(2, self.min_periods)
+
+    def _moments(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_i = self._sx / self._w          # média de i nas barras em que i e j existem
+            second = self._sxx / self._w
+            var_i = second - mean_i ** 2
+            cov = self._sxy / self._w - mean_i * mean_i.T
+        # cancelamento numérico: variância ~0 relativa ao segundo momento é tratada como série constante
+        var_i = np.where(var_i > 1e-12 * np.abs(second), var_i, 0.0)
+        return cov, var_i
+
+    def covariance(self) -> np.ndarray:
+        """Covariância pairwise (ddof=1 na janela, como o pandas; EWMA sem correção de viés)."""
+        if 'cov' not in self._cache:
+            cov, _ = self._moments()
+            if self.alpha is None:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    cov = cov * (self._w / (self._w - 1.0))
+            cov[~self._enough_observations()] = np.nan
+            self._cache['cov'] = cov
+        return self._cache['cov']
+
+    def correlation(self) -> np.ndarray:
+        if 'corr' not in self._cache:
+            cov, var_i = self._moments()
+            denom = np.sqrt(var_i * var_i.T)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = np.where(denom > 0, cov / denom, np.nan)
+            corr = np.clip(corr, -1.0, 1.0)
+            enough = self._enough_observations()
+            corr[~enough] = np.nan
+            np.fill_diagonal(corr, np.where(np.diag(enough) & (np.diag(var_i) > 0), 1.0, np.nan))
+            self._cache['corr'] = corr
+        return self._cache['corr']
+
+    def high_correlations(self, threshold: float = 0.7, high: float = 0.8) -> List[Dict]:
+        """Pares i < j com |ρ| > threshold, extraídos do triângulo superior sem loop em Python."""
+        corr = self.correlation()
+        rows, cols = self._triu
+        values = corr[rows, cols]
+        hit = np.flatnonzero(np.abs(values) > threshold)
+        return [{"asset1": self.symbols[rows[k]], "asset2": self.symbols[cols[k]], "correlation": float(values[k]),
+                 "risk_level": "high" if abs(values[k]) > high else "medium"} for k in hit]
+
+    def group_correlations(self) -> Dict[str, Dict]:
+        """Correlação média por grupo (índices em cache); refeita só quando há barra nova."""
+        if 'groups' not in self._cache:
+            corr = self.correlation()
+            out = {}
+            for name, (idx, rows, cols) in self._group_pairs.items():
+                avg = float(np.nanmean(corr[rows, cols])) if np.isfinite(corr[rows, cols]).any() else float('nan')
+                out[name] = {"avg_correlation": avg, "assets_count": int(len(idx)),
+                             "diversification_score": 1.0 - abs(avg)}
+            self._cache['groups'] = out
+        return self._cache['groups']
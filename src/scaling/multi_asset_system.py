@@ -5,6 +5,7 @@ Sistema de expansão para múltiplos mercados e ativos
 
 import pandas as pd
 import numpy as np
+from collections import Counter
 from typing import Dict, List, Optional, Tuple
 import asyncio
 import logging
@@ -12,6 +13,9 @@ from datetime import datetime, timedelta
 from dataclasses import dataclass
 from enum import Enum
 
+from src.scaling.correlation_engine import StreamingCorrelationEngine
+from src.scaling.portfolio_optimizer import METHODS, PortfolioOptimizer
+
 logger = logging.getLogger(__name__)
 
 class AssetClass(Enum):
@@ -43,6 +47,15 @@ class MultiAssetScalingSystem:
         self.correlation_matrix = {}
         self.market_schedulers = {}
         
+        # Correlação incremental: janela de 1 ano de barras, mesmos mínimos do corr() do pandas
+        self.correlation_engine: Optional[StreamingCorrelationEngine] = None
+        self.correlation_window = 252
+        self.correlation_min_periods = 2
+        
+        # Otimizador sobre a covariância do motor (warm start entre barras); teto por ativo
+        self.portfolio_optimizer = PortfolioOptimizer(max_weight=0.25)
+        self.risk_aversion = {"conservative": 20.0, "medium": 10.0, "aggressive": 5.0}
+        
         # Configurações de risco por classe de ativo
         self.risk_configs = {
             AssetClass.STOCKS_US: {"max_allocation": 0.40, "risk_multiplier": 1.0},
@@ -146,53 +159,69 @@ class MultiAssetScalingSystem:
         # Criar DataFrame de retornos
         returns_df = pd.DataFrame(returns_data)
         
-        # Calcular matriz de correlação
-        correlation_matrix = returns_df.corr()
-        
-        # Identificar correlações altas (>0.7 ou <-0.7)
-        high_correlations = []
-        for i, asset1 in enumerate(correlation_matrix.columns):
-            for j, asset2 in enumerate(correlation_matrix.columns):
-                if i < j:  # Evitar duplicatas
-                    corr = correlation_matrix.loc[asset1, asset2]
-                    if abs(corr) > 0.7:
-                        high_correlations.append({
-                            "asset1": asset1,
-                            "asset2": asset2,
-                            "correlation": corr,
-                            "risk_level": "high" if abs(corr) > 0.8 else "medium"
-                        })
-        
-        # Agrupar por classe de ativo
-        class_correlations = {}
-        for asset_class in AssetClass:
-            class_assets = [s for s, config in self.supported_assets.items() 
-                          if config.asset_class == asset_class and s in returns_data]
-            
-            if len(class_assets) > 1:
-                class_corr_matrix = returns_df[class_assets].corr()
-                avg_correlation = class_corr_matrix.values[np.triu_indices_from(class_corr_matrix.values, k=1)].mean()
-                class_correlations[asset_class.value] = {
-                    "avg_correlation": avg_correlation,
-                    "assets_count": len(class_assets),
-                    "diversification_score": 1.0 - abs(avg_correlation)
-                }
+        # Recarrega o motor incremental com o histórico (produtos de matrizes, sem loop por barra);
+        # barras seguintes entram por update_correlations() em O(n²)
+        self.correlation_engine = StreamingCorrelationEngine(
+            list(returns_df.columns), window=self.correlation_window,
+            min_periods=self.correlation_min_periods, groups=self._class_groups(returns_df.columns))
+        self.correlation_engine.update_many(returns_df.to_numpy(dtype=np.float64))
+        # semeia os últimos preços para que a próxima barra gere retorno
+        self.correlation_engine.update_prices({s: float(price_data[s]['close'].iloc[-1]) for s in returns_data})
         
-        self.correlation_matrix = {
-            "full_matrix": correlation_matrix.to_dict(),
-            "high_correlations": high_correlations,
-            "class_correlations": class_correlations,
-            "calculation_date": datetime.now().isoformat()
-        }
+        self.correlation_matrix = self._correlation_snapshot(include_matrix=True)
         
         logger.info(f"✅ Correlações calculadas para {len(returns_data)} ativos")
         return self.correlation_matrix
     
+    def update_correlations(self, prices: Dict[str, float], include_matrix: bool = False) -> Dict:
+        """
+        Atualiza as correlações com uma barra nova de preços (O(n²) em NumPy, sem recalcular o histórico)
+        """
+        if self.correlation_engine is None:
+            self.correlation_engine = StreamingCorrelationEngine(
+                list(prices), window=self.correlation_window, min_periods=self.correlation_min_periods,
+                groups=self._class_groups(prices))
+        known = len(self.correlation_engine.symbols)
+        self.correlation_engine.update_prices(prices)
+        if len(self.correlation_engine.symbols) != known:
+            self.correlation_engine.set_groups(self._class_groups(self.correlation_engine.symbols))
+        
+        self.correlation_matrix = self._correlation_snapshot(include_matrix)
+        return self.correlation_matrix
+    
+    def _class_groups(self, symbols) -> Dict[str, List[str]]:
+        symbols = set(symbols)
+        groups = {}
+        for symbol, config in self.supported_assets.items():
+            if symbol in symbols:
+                groups.setdefault(config.asset_class.value, []).append(symbol)
+        return groups
+    
+    def _correlation_snapshot(self, include_matrix: bool) -> Dict:
+        engine = self.correlation_engine
+        snapshot = {
+            # Pares com |ρ| > 0.7 e médias por classe de ativo, direto das matrizes do motor
+            "high_correlations": engine.high_correlations(threshold=0.7, high=0.8),
+            "class_correlations": engine.group_correlations(),
+            "assets_count": len(engine.symbols),
+            "calculation_date": datetime.now().isoformat()
+        }
+        if include_matrix:
+            snapshot["full_matrix"] = pd.DataFrame(engine.correlation(), index=engine.symbols,
+                                                   columns=engine.symbols).to_dict()
+        return snapshot
+    
     def optimize_multi_asset_portfolio(self, 
                                      available_capital: float,
-                                     risk_tolerance: str = "medium") -> Dict:
+                                     risk_tolerance: str = "medium",
+                                     method: Optional[str] = None,
+                                     expected_returns: Optional[Dict[str, float]] = None) -> Dict:
         """
         Otimiza portfólio multi-asset baseado em correlações e risco
+        
+        Com `method` ("risk_parity", "min_variance", "mean_variance") os pesos saem do PortfolioOptimizer
+        sobre a covariância do motor de correlação, com os tetos por classe de `risk_configs`; sem ele
+        (ou sem covariância ainda) mantém a alocação heurística por classe.
         """
         logger.info("🎯 Otimizando portfólio multi-asset...")
         
@@ -204,6 +233,14 @@ class MultiAssetScalingSystem:
         
         risk_mult = risk_multipliers.get(risk_tolerance, 1.0)
         
+        if method is not None:
+            if method not in METHODS:
+                raise ValueError(f"Método de otimização desconhecido: {method}")
+            if self.correlation_engine is not None and len(self.correlation_engine.symbols) > 1:
+                return self._optimize_with_covariance(available_capital, risk_tolerance, risk_mult, method,
+                                                      expected_returns)
+            logger.warning("⚠️ Sem covariância estimada: usando alocação heurística por classe")
+        
         # Alocação base por classe de ativo
         base_allocations = {}
         total_allocation = 0.0
@@ -233,6 +270,8 @@ class MultiAssetScalingSystem:
             if allocation["percentage"] > 0.01:  # Mínimo 1%
                 class_assets = [s for s, config in self.supported_assets.items() 
                               if config.asset_class == asset_class]
+                if not class_assets:  # classe sem ativos no universo (ex.: índices)
+                    continue
                 
                 # Selecionar top ativos da classe (simplificado)
                 num_assets = min(5, len(class_assets))  # Máximo 5 por classe
@@ -264,6 +303,76 @@ class MultiAssetScalingSystem:
         logger.info(f"✅ Portfolio otimizado: {len(selected_assets)} ativos em {portfolio['diversification_metrics']['num_asset_classes']} classes")
         return portfolio
     
+    def _optimize_with_covariance(self, available_capital: float, risk_tolerance: str, risk_mult: float,
+                                  method: str, expected_returns: Optional[Dict[str, float]]) -> Dict:
+        engine = self.correlation_engine
+        cov = engine.covariance()
+        usable = np.isfinite(np.diag(cov)) & (np.diag(cov) > 0)
+        symbols = [s for s, ok in zip(engine.symbols, usable) if ok]
+        cov = np.nan_to_num(cov[np.ix_(usable, usable)])  # pares sem sobreposição suficiente: covariância 0
+        cov += np.eye(len(symbols)) * 1e-10 * np.trace(cov) / max(len(symbols), 1)
+        
+        classes = [self.supported_assets[s].asset_class if s in self.supported_assets else None for s in symbols]
+        group_caps = {c.value: min(1.0, self.risk_configs[c]["max_allocation"] * risk_mult)
+                      for c in set(classes) if c is not None}
+        mu = None
+        if expected_returns is not None:
+            mu = np.array([expected_returns.get(s, 0.0) for s in symbols])
+        
+        # Tetos que somam menos de 100% (perfil conservador, poucas classes ou poucos ativos por classe sob o
+        # teto por ativo): o restante fica em caixa, como na alocação heurística. Cada classe investe no
+        # máximo min(teto da classe, n_ativos * teto por ativo); o otimizador resolve sobre a fração
+        # investida, com os dois tetos reescalados por ela
+        asset_cap = min(1.0, max(self.portfolio_optimizer.max_weight, 1.0 / max(len(symbols), 1)))
+        counts = Counter(c.value if c is not None else None for c in classes)
+        invested = min(1.0, sum(n * asset_cap if g is None else min(group_caps[g], n * asset_cap)
+                                for g, n in counts.items()))
+        weights, info = self.portfolio_optimizer.optimize(
+            cov, symbols, method, expected_returns=mu, risk_aversion=self.risk_aversion.get(risk_tolerance, 10.0),
+            groups=[c.value if c is not None else None for c in classes],
+            group_caps={k: v / invested for k, v in group_caps.items()},
+            max_weight=asset_cap / invested)
+        weights = weights * invested
+        
+        # Agregados por classe e ativos selecionados (mesmo formato da alocação heurística)
+        selected_assets = {}
+        class_allocations = {}
+        for symbol, asset_class, weight in zip(symbols, classes, weights):
+            if weight <= 1e-4:
+                continue
+            class_name = asset_class.value if asset_class is not None else "other"
+            risk_score = self.risk_configs[asset_class]["risk_multiplier"] if asset_class is not None else 1.0
+            selected_assets[symbol] = {
+                "allocation_amount": available_capital * weight,
+                "allocation_percentage": float(weight),
+                "asset_class": class_name,
+                "risk_score": risk_score
+            }
+            bucket = class_allocations.setdefault(class_name, {"percentage": 0.0, "amount": 0.0,
+                                                               "risk_score": risk_score})
+            bucket["percentage"] += float(weight)
+            bucket["amount"] += available_capital * weight
+        
+        portfolio = {
+            "total_capital": available_capital,
+            "risk_tolerance": risk_tolerance,
+            "method": method,
+            "cash_percentage": 1.0 - float(weights.sum()),
+            "class_allocations": class_allocations,
+            "selected_assets": selected_assets,
+            "diversification_metrics": {
+                "num_assets": len(selected_assets),
+                "num_asset_classes": len(class_allocations),
+                "concentration_risk": max([v["allocation_percentage"] for v in selected_assets.values()]),
+                "expected_volatility": info["expected_volatility"]
+            },
+            "solver": {k: info[k] for k in ("solver", "iterations", "converged", "warm_start")},
+            "optimization_date": datetime.now().isoformat()
+        }
+        
+        logger.info(f"✅ Portfolio otimizado ({method}): {len(selected_assets)} ativos em {len(class_allocations)} classes")
+        return portfolio
+    
     def get_market_schedule(self) -> Dict:
         """
         Retorna cronograma de mercados ativos
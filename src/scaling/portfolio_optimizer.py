@@ -0,0 +1,293 @@
+"""
+🎯 PORTFOLIO OPTIMIZER
+Alocação risk parity / mínima variância / média-variância sobre a covariância estimada, em NumPy
+"""
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+METHODS = ("risk_parity", "min_variance", "mean_variance")
+
+
+def _solve_shift(value, slope, target, low, high, start, iterations: int = 100):
+    """
+    Raiz de value(τ) = target para funções lineares por partes decrescentes (vetorizado por componente):
+    Newton com salvaguarda de bisseção no intervalo [low, high]; termina em poucos passos quando `start`
+    já está perto (caso típico entre iterações do gradiente projetado).
+    """
+    tau = np.clip(start, low, high)
+    for _ in range(iterations):
+        f = value(tau) - target
+        done = (np.abs(f) <= 1e-13) | (high - low <= 1e-15 * (1.0 + np.abs(tau)))
+        if done.all():
+            break
+        low = np.where(f > 0, tau, low)
+        high = np.where(f < 0, tau, high)
+        d = slope(tau)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = tau - f / d
+        inside = (d < 0) & (newton > low) & (newton < high)
+        tau = np.where(done, tau, np.where(inside, newton, 0.5 * (low + high)))
+    return tau
+
+
+def _project(v: np.ndarray, lo: np.ndarray, hi: np.ndarray, group_ids: np.ndarray, caps: np.ndarray,
+             start: float = 0.0) -> Tuple[np.ndarray, float]:
+    """
+    Projeção euclidiana em {Σw = 1, lo ≤ w ≤ hi, Σ_grupo w ≤ cap}; retorna (w, τ) para o próximo warm start.
+
+    KKT: w = clip(v - τ - t_g, lo, hi), t_g ≥ 0. Para um τ, cada grupo soma min(S_g(τ), cap_g): τ sai da
+    raiz da soma total e, nos grupos que estouram o teto, o deslocamento do grupo da raiz de S_g = cap_g.
+    """
+    n_groups = len(caps)
+
+    def sums(shift):
+        x = v - shift
+        inside = ((x > lo) & (x < hi)).astype(np.float64)
+        return (np.bincount(group_ids, weights=np.clip(x, lo, hi), minlength=n_groups),
+                np.bincount(group_ids, weights=inside, minlength=n_groups))
+
+    def total(tau):
+        s, _ = sums(tau)
+        return np.minimum(s, caps).sum()
+
+    def total_slope(tau):
+        s, free = sums(tau)
+        return -free[s < caps].sum()
+
+    low, high = float(np.min(v - hi)) - 1.0, float(np.max(v - lo)) + 1.0
+    tau = float(_solve_shift(total, total_slope, 1.0, low, high, start))
+
+    shift = np.full(n_groups, tau)
+    capped = sums(tau)[0] > caps
+    if capped.any():
+        g_low = np.where(capped, tau, high)
+        g_high = np.full(n_groups, high)
+        shift = _solve_shift(lambda sh: np.where(capped, sums(sh[group_ids])[0], 0.0),
+                             lambda sh: -sums(sh[group_ids])[1], np.where(capped, caps, 0.0),
+                             g_low, g_high, g_low)
+        shift = np.where(capped, shift, tau)
+    return np.clip(v - shift[group_ids], lo, hi), tau
+
+
+def _max_eigenvalue(cov: np.ndarray, start: Optional[np.ndarray] = None, steps: int = 30) -> float:
+    """Maior autovalor por iteração de potência (Σ simétrica PSD); só define o passo do gradiente."""
+    x = np.ones(len(cov)) if start is None or len(start) != len(cov) else np.abs(start) + 1e-3
+    for _ in range(steps):
+        y = cov @ x
+        norm = np.linalg.norm(y)
+        if norm == 0:
+            return 0.0
+        x = y / norm
+    return float(x @ cov @ x)
+
+
+class PortfolioOptimizer:
+    """
+    Otimizador de carteira long-only com warm start da solução anterior (por símbolo).
+
+    - risk_parity: contribuições de risco proporcionais a `budgets` (Newton amortecido na formulação
+      convexa de Spinu, ½yᵀΣy - Σ b·log y); tetos por ativo/classe aplicados por projeção no fim.
+    - min_variance / mean_variance: forma fechada quando as restrições não ficam ativas; senão gradiente
+      projetado acelerado (FISTA com reinício) no conjunto {Σw = 1, min ≤ w ≤ max, Σ_classe w ≤ teto},
+      fechado de forma exata pelo KKT do conjunto ativo assim que ele se estabiliza.
+    """
+
+    POLISH_EVERY = 10  # iterações do gradiente entre tentativas de fechar o KKT pelo conjunto ativo
+
+    def __init__(self, min_weight: float = 0.0, max_weight: float = 1.0, tol: float = 1e-9, max_iter: int = 2000):
+        self.min_weight = min_weight
+        self.max_weight = max_weight
+        self.tol = tol
+        self.max_iter = max_iter
+        self._previous: Dict[str, Dict[str, float]] = {}
+
+    def _warm_start(self, method: str, symbols: Sequence[str]) -> Optional[np.ndarray]:
+        previous = self._previous.get(method)
+        if not previous:
+            return None
+        w = np.array([previous.get(s, np.nan) for s in symbols])
+        if np.isnan(w).all():
+            return None
+        fill = np.nanmean(w) if np.isfinite(w).any() else 1.0 / len(w)
+        return np.where(np.isfinite(w), w, fill)
+
+    def _bounds(self, n: int, groups: Optional[Sequence[Optional[str]]], group_caps: Optional[Dict[str, float]],
+                max_weight: Optional[float] = None):
+        lo = np.full(n, float(self.min_weight))
+        max_weight = self.max_weight if max_weight is None else max_weight
+        hi = np.full(n, min(1.0, max(float(max_weight), 1.0 / n)))  # teto inviável com poucos ativos vira 1/n
+        names = sorted({g for g in groups if g is not None}) if groups is not None else []
+        index = {g: k for k, g in enumerate(names)}
+        group_ids = np.array([index.get(g, len(names)) for g in groups] if groups is not None else [0] * n,
+                             dtype=np.intp)
+        caps = np.array([min(1.0, (group_caps or {}).get(g, 1.0)) for g in names] + [np.inf])
+        present = np.bincount(group_ids, minlength=len(caps)) > 0
+        if np.minimum(np.bincount(group_ids, weights=hi, minlength=len(caps)), caps)[present].sum() < 1.0 - 1e-12:
+            raise ValueError("Restrições inviáveis: tetos por ativo/classe somam menos que 100%")
+        return lo, hi, group_ids, caps
+
+    @staticmethod
+    def _feasible(w, lo, hi, group_ids, caps, tol=1e-10) -> bool:
+        sums = np.bincount(group_ids, weights=w, minlength=len(caps))
+        return bool(np.all(w >= lo - tol) and np.all(w <= hi + tol) and np.all(sums <= caps + tol))
+
+    def optimize(self, cov: np.ndarray, symbols: Sequence[str], method: str = "risk_parity",
+                 expected_returns: Optional[np.ndarray] = None, risk_aversion: float = 1.0,
+                 budgets: Optional[np.ndarray] = None, groups: Optional[Sequence[Optional[str]]] = None,
+                 group_caps: Optional[Dict[str, float]] = None,
+                 max_weight: Optional[float] = None) -> Tuple[np.ndarray, Dict]:
+        """
+        Pesos (na ordem de `symbols`) e diagnóstico do solver; `groups[i]` é a classe do ativo i.
+        `max_weight` substitui o teto por ativo da instância nesta chamada (ex.: problema reescalado).
+        """
+        if method not in METHODS:
+            raise ValueError(f"Método desconhecido: {method} (use {', '.join(METHODS)})")
+        cov = np.asarray(cov, dtype=np.float64)
+        n = len(symbols)
+        if cov.shape != (n, n):
+            raise ValueError(f"Covariância {cov.shape} não bate com {n} ativos")
+        lo, hi, group_ids, caps = self._bounds(n, groups, group_caps, max_weight)
+        w0 = self._warm_start(method, symbols)
+
+        if method == "risk_parity":
+            b = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=np.float64) / np.sum(budgets)
+            w, info = self._risk_parity(cov, b, w0)
+            warm = w  # warm start guarda a solução sem os tetos (a projeção muda a cada barra)
+            if not self._feasible(w, lo, hi, group_ids, caps):
+                w, _ = _project(w, lo, hi, group_ids, caps)
+                info["projected"] = True
+        else:
+            mu = np.zeros(n) if method == "min_variance" or expected_returns is None else \
+                np.asarray(expected_returns, dtype=np.float64)
+            lam = 1.0 if method == "min_variance" else float(risk_aversion)
+            w, info = self._quadratic(cov, mu, lam, lo, hi, group_ids, caps, w0)
+            warm = w
+
+        self._previous[method] = dict(zip(symbols, warm.tolist()))
+        variance = float(w @ cov @ w)
+        info.update({"method": method, "warm_start": w0 is not None,
+                     "expected_volatility": float(np.sqrt(max(variance, 0.0))),
+                     "risk_contributions": (w * (cov @ w) / variance) if variance > 0 else np.zeros(n)})
+        if expected_returns is not None:
+            info["expected_return"] = float(np.dot(w, expected_returns))
+        return w, info
+
+    def _risk_parity(self, cov, b, w0):
+        y = np.sqrt(b / np.maximum(np.diag(cov), 1e-18)) if w0 is None else np.maximum(w0, 1e-12)
+        y = y * np.sqrt(b.sum() / max(float(y @ cov @ y), 1e-18))  # melhor escala ao longo do raio
+        converged = False
+        for it in range(1, self.max_iter + 1):
+            grad = cov @ y - b / y
+            hess = cov + np.diag(b / y ** 2)
+            step = np.linalg.solve(hess, grad)
+            decrement = float(grad @ step)
+            y = y - step / (1.0 + np.sqrt(decrement)) if decrement > 0.0625 else y - step
+            y = np.maximum(y, 1e-18)
+            if decrement < self.tol:
+                converged = True
+                break
+        return y / y.sum(), {"iterations": it, "converged": converged, "solver": "newton"}
+
+    def _quadratic(self, cov, mu, lam, lo, hi, group_ids, caps, w0):
+        # forma fechada com só a restrição de orçamento: w = Σ⁻¹(μ - γ1)/λ, γ tal que Σw = 1
+        try:
+            a = np.linalg.solve(cov, np.column_stack([mu, np.ones(len(mu))]))
+            gamma = (a[:, 0].sum() - lam) / a[:, 1].sum()
+            w = (a[:, 0] - gamma * a[:, 1]) / lam
+            if self._feasible(w, lo, hi, group_ids, caps):
+                return w, {"iterations": 0, "converged": True, "solver": "closed_form"}
+        except np.linalg.LinAlgError:
+            pass
+
+        w, tau = _project(w0 if w0 is not None else np.full(len(mu), 1.0 / len(mu)), lo, hi, group_ids, caps)
+        # warm start: com o mesmo conjunto ativo da barra anterior o KKT fecha sem nenhuma iteração
+        polished = self._polish(w, cov, mu, lam, lo, hi, group_ids, caps)
+        if polished is not None:
+            return polished, {"iterations": 0, "converged": True, "solver": "active_set"}
+
+        step = 1.0 / max(lam * _max_eigenvalue(cov, w0) * 1.05, 1e-18)
+        z, t = w.copy(), 1.0
+        converged, solver = False, "fista"
+        for it in range(1, self.max_iter + 1):
+            w_next, tau = _project(z - step * (lam * (cov @ z) - mu), lo, hi, group_ids, caps, start=tau)
+            if it % self.POLISH_EVERY == 0:
+                polished = self._polish(w_next, cov, mu, lam, lo, hi, group_ids, caps)
+                if polished is not None:
+                    w, converged, solver = polished, True, "fista+active_set"
+                    break
+            if np.max(np.abs(w_next - w)) < self.tol:
+                w, converged = w_next, True
+                break
+            if np.dot(z - w_next, w_next - w) > 0:  # reinício adaptativo do momento
+                t = 1.0
+            t_next = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * t * t))
+            z = w_next + ((t - 1.0) / t_next) * (w_next - w)
+            w, t = w_next, t_next
+        return w, {"iterations": it, "converged": converged, "solver": solver}
+
+    def _polish(self, w, cov, mu, lam, lo, hi, group_ids, caps, eps: float = 1e-5) -> Optional[np.ndarray]:
+        """
+        Resolve o KKT com o conjunto ativo sugerido por `w` (pesos nos limites fixos, classes no teto como
+        igualdade) e devolve a solução exata se ela for viável e os multiplicadores tiverem o sinal certo.
+        """
+        at_lo, at_hi = w <= lo + eps, w >= hi - eps
+        free = ~(at_lo | at_hi)
+        if not free.any():
+            return None
+        sums = np.bincount(group_ids, weights=w, minlength=len(caps))
+        binding = np.flatnonzero((sums >= caps - eps) & (np.bincount(group_ids, weights=free, minlength=len(caps)) > 0))
+        fixed = np.where(at_lo, lo, np.where(at_hi, hi, 0.0))
+        f_idx = np.flatnonzero(free)
+        # igualdades: orçamento + uma linha por classe no teto; se toda posição livre está numa classe no
+        # teto o orçamento é combinação das outras linhas e sai do sistema (γ = 0)
+        budget = not np.isin(group_ids[f_idx], binding).all()
+        rows = np.vstack(([np.ones(len(w))] if budget else []) +
+                         [(group_ids == g).astype(np.float64) for g in binding])
+        rhs = np.concatenate([[1.0] if budget else [], caps[binding]]) - rows @ fixed
+        a_free = rows[:, f_idx]
+        m = len(rhs)
+        kkt = np.zeros((len(f_idx) + m, len(f_idx) + m))
+        kkt[:len(f_idx), :len(f_idx)] = lam * cov[np.ix_(f_idx, f_idx)]
+        kkt[:len(f_idx), len(f_idx):] = a_free.T
+        kkt[len(f_idx):, :len(f_idx)] = a_free
+        b = np.concatenate([mu[f_idx] - lam * cov[np.ix_(f_idx, np.flatnonzero(~free))] @ fixed[~free], rhs])
+        try:
+            sol = np.linalg.solve(kkt, b)
+        except np.linalg.LinAlgError:
+            return None
+        candidate = fixed.copy()
+        candidate[f_idx] = sol[:len(f_idx)]
+        if abs(candidate.sum() - 1.0) > 1e-9 or not self._feasible(candidate, lo, hi, group_ids, caps, tol=1e-12):
+            return None
+        # multiplicadores: ∇f_i + γ + η_g = 0 nos livres com η_g ≥ 0; nos fixos em lo o lado esquerdo é ≥ 0,
+        # em hi é ≤ 0. Sem a linha de orçamento, γ só é conhecido a menos de uma constante (η_g = η'_g - γ).
+        grad = lam * (cov @ candidate) - mu
+        tol = 1e-8 * (1.0 + np.max(np.abs(grad)))
+        eta = np.zeros(len(caps))
+        eta[binding] = sol[len(f_idx) + 1:] if budget else sol[len(f_idx):]
+        lo_only, hi_only = at_lo & ~at_hi, at_hi & ~at_lo
+        in_binding = np.isin(group_ids, binding)
+        tight = (sums >= caps - eps) & ~np.isin(np.arange(len(caps)), binding)  # no teto só com posições fixas
+        plain = ~in_binding & ~tight[group_ids]
+        g_low = np.max(-grad[plain & lo_only], initial=-np.inf)
+        g_high = np.min(-grad[(plain | tight[group_ids]) & hi_only], initial=np.inf)
+        if budget:
+            gamma = sol[len(f_idx)]
+            if np.any(eta[binding] < -tol) or not g_low - tol <= gamma <= g_high + tol:
+                return None
+        else:
+            g_high = min(g_high, eta[binding].min())
+            if g_low > g_high + tol:
+                return None
+            gamma = g_high
+            eta[binding] -= gamma
+        reduced = grad + gamma + eta[group_ids]
+        if np.any(reduced[in_binding & lo_only] < -tol) or np.any(reduced[in_binding & hi_only] > tol):
+            return None
+        for g in np.flatnonzero(tight):  # existe η_g ≥ 0 que serve aos fixos em lo e em hi da classe
+            members = group_ids == g
+            if np.max(-grad[members & lo_only], initial=-np.inf) > np.min(-grad[members & hi_only], initial=np.inf) + tol:
+                return None
+        return candidate
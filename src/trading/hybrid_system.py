@@ -400,20 +400,20 @@ class HybridTradingSystem:
             'total_return_pct': float(((results_df['equity'].iloc[-1] / results_df['equity'].iloc[0]) - 1) * 100) if len(results_df) > 0 else 0.0
         }
         
-        # Salva histórico de sinais para retreinamento
-        signals_file = Path("out/hybrid_signals_history.json")
-        
+        # Histórico de sinais e trades em Parquet (tipado, com config/métricas nos metadados) para retreinamento
+        from src.utils.results_io import results_suffix, write_trades
+        suffix = results_suffix()
+        signals_file = Path(f"out/hybrid_signals_history{suffix}")
+        trades_file = Path(f"out/hybrid_trades{suffix}")
+        run_meta = {'config': self.config, 'metrics': performance_data['metrics']}
+        # Sem sinais/trades nada é gravado: o caminho só entra no JSON se o arquivo existir
+        signals_file = write_trades(signals_file, self.signals_history, metadata=run_meta)
+        trades_file = write_trades(trades_file, self.trades, metadata=run_meta)
+        performance_data['signals_file'] = str(signals_file) if signals_file else None
+        performance_data['trades_file'] = str(trades_file) if trades_file else None
+
         with open(performance_file, 'w') as f:
             json.dump(performance_data, f, indent=2)
-            
-        with open(signals_file, 'w') as f:
-            # Converte timestamps para strings
-            signals_serializable = []
-            for signal in self.signals_history:
-                signal_copy = signal.copy()
-                signal_copy['timestamp'] = signal_copy['timestamp'].isoformat()
-                signals_serializable.append(signal_copy)
-            json.dump(signals_serializable, f, indent=2)
         
         return performance_file, signals_file
 
@@ -466,13 +466,15 @@ async def main():
     print(f"   🧠 Sinais NN Processados: {hybrid_system.performance_metrics['total_signals']}")
     
     # Salva resultados
-    results_df.to_csv("out/hybrid_system_results.csv", index=False)
+    from src.utils.results_io import results_suffix, write_frame
+    results_file = write_frame(f"out/hybrid_system_results{results_suffix()}", results_df,
+                               metadata={'config': hybrid_system.config})
     perf_file, signals_file = hybrid_system.save_performance_data(results_df)
     
     print(f"\n💾 Arquivos salvos:")
-    print(f"   📊 Equity: out/hybrid_system_results.csv") 
+    print(f"   📊 Equity: {results_file}") 
     print(f"   📈 Performance: {perf_file}")
-    print(f"   🎯 Sinais: {signals_file}")
+    print(f"   🎯 Sinais: {signals_file or 'nenhum sinal gerado'}")
     
     # Comparação com resultados anteriores
     if total_return > 0:
@@ -16,6 +16,40 @@ import asyncio
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _ewm_mean(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Equivalente a DataFrame(values).ewm(span=span).mean() (adjust=True, ignore_na=False), com a mesma
+    recorrência e ordem de operações do pandas, mas avançando todas as colunas juntas linha a linha
+    (o pandas aplica a EWM coluna por coluna).
+    """
+    factor = 1 - 2.0 / (span + 1)
+    observed = values == values
+    started = np.zeros_like(observed)
+    started[1:] = np.maximum.accumulate(observed, axis=0)[:-1]  # coluna já tem média antes da linha i
+    decay = np.where(started, factor, 1.0)
+    update = started & observed
+    first = observed & ~started
+    
+    out = np.empty_like(values)
+    if not len(values):
+        return out
+    weighted = values[0].copy()
+    old_wt = np.ones(values.shape[1])
+    mixed = np.empty_like(weighted)
+    out[0] = weighted
+    with np.errstate(invalid='ignore'):
+        for i in range(1, len(values)):
+            cur = values[i]
+            old_wt *= decay[i]
+            np.multiply(old_wt, weighted, out=mixed)
+            mixed += cur
+            mixed /= old_wt + 1.0
+            np.copyto(weighted, mixed, where=update[i] & (weighted != cur))
+            np.copyto(weighted, cur, where=first[i])
+            old_wt += update[i]
+            out[i] = weighted
+    return out
+
 @dataclass
 class USMarketSignal:
     symbol: str
@@ -240,11 +274,17 @@ class USMarketAnalyzer:
             reasons=reasons
         )
     
-    def analyze_portfolio(self, symbols: List[str], market_data: Dict[str, pd.DataFrame]) -> List[USMarketSignal]:
+    def analyze_portfolio(self, symbols: List[str], market_data: Dict[str, pd.DataFrame],
+                          panel: bool = True) -> List[USMarketSignal]:
         """
         Analisa múltiplas ações americanas
         Retorna lista de sinais ordenados por confiança
+        panel=True calcula indicadores e scores de todos os símbolos de uma vez (analyze_portfolio_panel);
+        panel=False mantém o loop analyze_us_stock por símbolo.
         """
+        if panel:
+            return self.analyze_portfolio_panel(symbols, market_data)
+        
         signals = []
         
         for symbol in symbols:
@@ -264,6 +304,182 @@ class USMarketAnalyzer:
         
         return signals
 
+    @staticmethod
+    def build_panel(symbols: List[str], market_data: Dict[str, pd.DataFrame],
+                    columns: Tuple[str, ...] = ('close', 'volume')) -> Tuple[List[str], Dict[str, np.ndarray], np.ndarray]:
+        """
+        Monta arrays largos (tempo x símbolo) alinhados pelo fim: a última linha de cada símbolo fica
+        na última linha do painel e o início dos mais curtos é preenchido com NaN. Como todos os
+        indicadores são causais e por símbolo, cada coluna reproduz o cálculo feito no DataFrame isolado.
+        Retorna (símbolos usados, {coluna: array (T, N)}, comprimentos).
+        """
+        used, frames = [], []
+        for symbol in symbols:
+            df = market_data.get(symbol)
+            if df is None:
+                continue
+            missing = [c for c in columns if c not in df.columns]
+            if missing:
+                logger.error(f"❌ Erro analisando {symbol}: colunas ausentes {missing}")
+                continue
+            used.append(symbol)
+            frames.append(df)
+        
+        lengths = np.array([len(df) for df in frames], dtype=np.int64)
+        n_rows = int(lengths.max()) if len(frames) else 0
+        panel = {c: np.full((n_rows, len(frames)), np.nan) for c in columns}
+        for j, (df, length) in enumerate(zip(frames, lengths)):
+            for c in columns:
+                panel[c][n_rows - length:, j] = df[c].to_numpy(dtype=np.float64)
+        return used, panel, lengths
+    
+    @staticmethod
+    def _tail_rolling(values: np.ndarray, window: int, rows: int = 2, ddof: Optional[int] = None) -> np.ndarray:
+        """rolling(window).mean()/std() só nas últimas `rows` linhas (NaN se a janela tiver NaN ou não couber)."""
+        n_rows, n_cols = values.shape
+        out = np.full((rows, n_cols), np.nan)
+        for k in range(rows):
+            end = n_rows - rows + 1 + k
+            if end - window < 0:
+                continue
+            block = values[end - window:end]
+            out[k] = block.mean(axis=0) if ddof is None else block.std(axis=0, ddof=ddof)
+        return out
+    
+    def compute_panel_indicators(self, panel: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Indicadores de calculate_us_indicators para as duas últimas linhas (prev, latest) de todos os
+        símbolos: arrays (2, N). Só as EMAs (memória infinita) percorrem o histórico inteiro, coluna a coluna.
+        """
+        close, volume = panel['close'], panel['volume']
+        tail = close[-2:]
+        
+        # RSI: médias de ganhos/perdas das últimas `period` variações
+        delta = np.diff(close[-22:], axis=0, prepend=np.nan)  # basta para as duas janelas de 14 variações
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = self._tail_rolling(gain, 14) / self._tail_rolling(loss, 14)
+            rsi_14 = 100 - (100 / (1 + rs))
+        
+        # MACD (mesmas EMAs ajustadas do pandas, todas as colunas de uma vez)
+        macd_full = _ewm_mean(close, 12) - _ewm_mean(close, 26)
+        macd = macd_full[-2:]
+        macd_signal = _ewm_mean(macd_full, 9)[-2:]
+        
+        sma_20 = self._tail_rolling(close, 20)
+        sma_200 = self._tail_rolling(close, 200)
+        bb_std = self._tail_rolling(close, 20, ddof=1)
+        bb_upper, bb_lower = sma_20 + bb_std * 2, sma_20 - bb_std * 2
+        volume_sma_20 = self._tail_rolling(volume, 20)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bb_percent = (tail - bb_lower) / (bb_upper - bb_lower)
+            volume_ratio = volume[-2:] / volume_sma_20
+            price_change_5 = tail / close[-7:-5] - 1 if len(close) >= 7 else np.full_like(tail, np.nan)
+        
+        return {'close': tail, 'volume': volume[-2:], 'rsi_14': rsi_14, 'macd': macd, 'macd_signal': macd_signal,
+                'sma_20': sma_20, 'sma_200': sma_200, 'bb_percent': bb_percent,
+                'volume_ratio': volume_ratio, 'price_change_5': price_change_5}
+    
+    @staticmethod
+    def _panel_conditions(ind: Dict[str, np.ndarray]) -> Tuple[List[Tuple[np.ndarray, str, float]], List[Tuple[np.ndarray, str, float]]]:
+        """Mesmas regras (e mesma ordem de soma) de analyze_us_stock, como máscaras booleanas por símbolo."""
+        prev = {k: v[0] for k, v in ind.items()}
+        latest = {k: v[1] for k, v in ind.items()}
+        with np.errstate(invalid='ignore'):
+            buy = [
+                ((30 < latest['rsi_14']) & (latest['rsi_14'] < 45), "RSI favorável (30-45)", 0.15),
+                ((latest['macd'] > latest['macd_signal']) & (prev['macd'] <= prev['macd_signal']), "MACD cruzamento positivo", 0.20),
+                (latest['close'] > latest['sma_20'], "Acima SMA 20", 0.10),
+                (latest['volume_ratio'] > 1.2, "Volume elevado", 0.15),
+                (latest['bb_percent'] < 0.3, "Próximo banda inferior BB", 0.12),
+                (latest['price_change_5'] > 0.01, "Momentum positivo 5D", 0.10),
+                (latest['close'] > latest['sma_200'], "Tendência longo prazo positiva", 0.18),
+            ]
+            sell = [
+                (latest['rsi_14'] > 70, "RSI sobrecomprado", 0.15),
+                ((latest['macd'] < latest['macd_signal']) & (prev['macd'] >= prev['macd_signal']), "MACD cruzamento negativo", 0.20),
+                (latest['close'] < latest['sma_20'], "Abaixo SMA 20", 0.15),
+                (latest['bb_percent'] > 0.8, "Próximo banda superior BB", 0.12),
+                (latest['price_change_5'] < -0.01, "Momentum negativo", 0.15),
+                ((latest['close'] > prev['close']) & (latest['volume_ratio'] < 0.8), "Alta sem volume", 0.10),
+            ]
+        return buy, sell
+    
+    def analyze_portfolio_panel(self, symbols: List[str], market_data: Dict[str, pd.DataFrame]) -> List[USMarketSignal]:
+        """
+        Modo painel de analyze_portfolio: mesmos sinais de analyze_us_stock, calculados em uma passada
+        vetorizada sobre todos os símbolos. Só os sinais acima do limiar viram USMarketSignal.
+        """
+        used, panel, lengths = self.build_panel(symbols, market_data)
+        return self.score_panel(used, panel, lengths)
+    
+    def score_panel(self, symbols: List[str], panel: Dict[str, np.ndarray], lengths: np.ndarray) -> List[USMarketSignal]:
+        """
+        Sinais a partir de um painel já montado ({'close', 'volume'}: arrays (T, N) alinhados pelo fim,
+        colunas na ordem de `symbols`; `lengths` = linhas válidas de cada símbolo).
+        """
+        used = list(symbols)
+        if not used:
+            return []
+        ind = self.compute_panel_indicators(panel)
+        buy, sell = self._panel_conditions(ind)
+        
+        # Soma na mesma ordem do caminho por símbolo (resultados idênticos no limiar de 0.65)
+        buy_score = np.zeros(len(used))
+        for mask, _, weight in buy:
+            buy_score = buy_score + np.where(mask, weight, 0.0)
+        sell_score = np.zeros(len(used))
+        for mask, _, weight in sell:
+            sell_score = sell_score + np.where(mask, weight, 0.0)
+        
+        enough_data = lengths >= 50
+        is_buy = enough_data & (buy_score >= 0.65)
+        is_sell = enough_data & ~is_buy & (sell_score >= 0.65)
+        confidence = np.where(is_buy, np.minimum(buy_score, 0.95),
+                              np.where(is_sell, np.minimum(sell_score, 0.95), np.maximum(buy_score, sell_score)))
+        confidence = np.where(enough_data, confidence, 0.0)
+        selected = np.flatnonzero(confidence >= self.confidence_threshold)
+        
+        latest = {k: v[1] for k, v in ind.items()}
+        now = datetime.now(timezone.utc)
+        signals = []
+        for j in selected:
+            symbol = used[j]
+            conditions = buy if is_buy[j] else sell
+            sma_200 = latest['sma_200'][j]
+            volume = latest['volume'][j]  # NaN no último candle fica NaN, como em analyze_us_stock
+            indicators = {
+                'rsi_14': latest['rsi_14'][j],
+                'macd': latest['macd'][j],
+                'macd_signal': latest['macd_signal'][j],
+                'bb_percent': latest['bb_percent'][j],
+                'volume_ratio': latest['volume_ratio'][j],
+                'price_change_5': latest['price_change_5'][j],
+                'sma_20_distance': (latest['close'][j] - latest['sma_20'][j]) / latest['sma_20'][j],
+                'sma_200_distance': (latest['close'][j] - sma_200) / sma_200 if not pd.isna(sma_200) else None
+            }
+            signal = USMarketSignal(
+                symbol=symbol,
+                signal='BUY' if is_buy[j] else 'SELL' if is_sell[j] else 'HOLD',
+                confidence=float(confidence[j]),
+                price=latest['close'][j],
+                volume=int(volume) if not pd.isna(volume) else volume,
+                timestamp=now,
+                indicators=indicators,
+                reasons=[label for mask, label, _ in conditions if mask[j]] if (is_buy[j] or is_sell[j])
+                        else ['Confiança insuficiente para operação']
+            )
+            signals.append(signal)
+            logger.info(f"✅ {symbol}: {signal.signal} (conf: {signal.confidence:.2f})")
+        logger.info(f"⏸️ {len(used) - len(selected)} de {len(used)} símbolos abaixo do limiar")
+        
+        # Ordena por confiança (maior primeiro)
+        signals.sort(key=lambda x: x.confidence, reverse=True)
+        
+        return signals
+
 class USMarketStrategy:
     """
     Estratégia especializada para bolsa americana
@@ -0,0 +1,303 @@
+"""Typed, streaming output for backtest equity curves and trade logs (Parquet or Arrow IPC).
+
+CSV/JSON outputs lose dtypes (timestamps come back as strings, ints as floats), are slow to
+re-parse and large on disk. `ResultsWriter` buffers records and writes them in row groups (Parquet)
+or record batches (Arrow IPC), so a long backtest can stream rows as it produces them with bounded
+memory; the schema is fixed by the first batch (or given explicitly) and run metadata (ticker,
+params, summary metrics...) travels in the file's schema metadata. Files are written to a
+temporary name and renamed on close, so readers never see a half-written file.
+
+The format follows the suffix: `.parquet` (zstd) or `.arrow`/`.feather`/`.ipc`; `.csv` is still
+accepted by the readers so old outputs keep working. pyarrow is optional (requirements-optional.txt):
+without it `results_suffix()` falls back to `.csv`, so the scripts that pick their output suffix
+from it keep writing results.
+
+Usage:
+    with ResultsWriter('logs/run_equity.parquet', metadata={'ticker': 'ETH-USD'}) as w:
+        for ts, value in loop():
+            w.append({'timestamp': ts, 'equity': value})
+    equity = read_equity('logs/run_equity.parquet')        # pd.Series indexed by timestamp
+    meta = read_metadata('logs/run_equity.parquet')
+"""
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+RESULTS_FORMAT = os.getenv('RESULTS_FORMAT', 'parquet')
+SUFFIXES = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+_IPC_SUFFIXES = ('.arrow', '.feather', '.ipc')
+_METADATA_KEY = b'run_metadata'
+DEFAULT_ROW_GROUP = 65_536
+
+logger = logging.getLogger(__name__)
+_HAS_PYARROW: Optional[bool] = None
+
+
+def _pyarrow_available() -> bool:
+    global _HAS_PYARROW
+    if _HAS_PYARROW is None:
+        try:
+            import pyarrow  # noqa: F401
+            _HAS_PYARROW = True
+        except ImportError:
+            _HAS_PYARROW = False
+            logger.warning("pyarrow não instalado: resultados serão gravados em CSV "
+                           "(instale requirements-optional.txt para Parquet/Arrow)")
+    return _HAS_PYARROW
+
+
+def results_suffix(fmt: Optional[str] = None) -> str:
+    """Sufixo do formato configurado (RESULTS_FORMAT: parquet | arrow | csv); CSV se não houver pyarrow."""
+    fmt = (fmt or RESULTS_FORMAT).lower()
+    if fmt not in SUFFIXES:
+        raise ValueError(f"Formato de resultados desconhecido: {fmt}")
+    if fmt != 'csv' and not _pyarrow_available():
+        return SUFFIXES['csv']
+    return SUFFIXES[fmt]
+
+
+def _kind(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == '.parquet':
+        return 'parquet'
+    if suffix in _IPC_SUFFIXES:
+        return 'arrow'
+    if suffix == '.csv':
+        return 'csv'
+    raise ValueError(f"Formato não suportado: {path}")
+
+
+class ResultsWriter:
+    """Escrita incremental de registros em Parquet/Arrow com schema tipado e metadados da run."""
+
+    def __init__(self, path, schema=None, metadata: Optional[Dict] = None, row_group_size: int = DEFAULT_ROW_GROUP,
+                 compression: str = 'zstd'):
+        import pyarrow as pa
+        self._pa = pa
+        self.path = Path(path)
+        self.kind = _kind(self.path)
+        if self.kind == 'csv':
+            raise ValueError('ResultsWriter escreve apenas Parquet/Arrow; use .parquet ou .arrow')
+        self.metadata = dict(metadata or {})
+        self.row_group_size = int(row_group_size)
+        self.compression = compression
+        self.schema = self._with_metadata(schema) if schema is not None else None
+        self.rows_written = 0
+        self.written: Optional[Path] = None  # caminho final após close(); None se nada foi gravado
+        self._rows: List[Dict] = []
+        self._writer = None
+        self._tmp = self.path.with_name(self.path.name + '.tmp')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _with_metadata(self, schema):
+        payload = json.dumps(self.metadata, default=str).encode()
+        return schema.remove_metadata().with_metadata({_METADATA_KEY: payload})
+
+    def _open(self, schema):
+        self.schema = self._with_metadata(schema)
+        if self.kind == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(str(self._tmp), self.schema, compression=self.compression)
+        else:
+            self._sink = self._pa.OSFile(str(self._tmp), 'wb')
+            self._writer = self._pa.ipc.new_file(self._sink, self.schema)
+
+    def _to_table(self, data):
+        pa = self._pa
+        if isinstance(data, pa.Table):
+            table = data
+        elif isinstance(data, pd.DataFrame):
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        elif isinstance(data, dict):
+            table = pa.table(data)
+        else:
+            table = pa.Table.from_pylist(list(data))
+        if self.schema is not None:
+            table = table.select(self.schema.names).cast(self.schema.remove_metadata())
+        return table
+
+    def write(self, data) -> None:
+        """Grava um bloco (DataFrame, dict de arrays, lista de dicts ou pa.Table) em row groups."""
+        self._flush_rows()
+        self._write_table(self._to_table(data))
+
+    def _write_table(self, table) -> None:
+        if table.num_rows == 0:
+            if self.schema is None and table.num_columns:  # mantém o schema para um arquivo vazio tipado
+                self.schema = self._with_metadata(table.schema)
+            return
+        if self._writer is None:
+            self._open(table.schema)
+        table = table.replace_schema_metadata(self.schema.metadata)
+        if self.kind == 'parquet':
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            for batch in table.to_batches(max_chunksize=self.row_group_size):
+                self._writer.write_batch(batch)
+        self.rows_written += table.num_rows
+
+    def append(self, record: Dict) -> None:
+        """Acrescenta um registro; um row group é gravado a cada `row_group_size` registros."""
+        self._rows.append(record)
+        if len(self._rows) >= self.row_group_size:
+            self._flush_rows()
+
+    def _flush_rows(self):
+        if self._rows:
+            rows, self._rows = self._rows, []
+            self._write_table(self._to_table(rows))
+
+    def close(self) -> Optional[Path]:
+        """Finaliza o arquivo; retorna None se nada foi gravado (sem registros nem schema conhecido)."""
+        self._flush_rows()
+        if self._writer is None:  # nada escrito: arquivo vazio com o schema conhecido (ou nenhum)
+            if self.schema is None:
+                return None
+            self._open(self.schema.remove_metadata())
+        self._writer.close()
+        if self.kind == 'arrow':
+            self._sink.close()
+        os.replace(self._tmp, self.path)
+        self.written = self.path
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            try:
+                if self._writer is not None:
+                    self._writer.close()
+            finally:
+                self._tmp.unlink(missing_ok=True)
+
+
+def write_frame(path, df: pd.DataFrame, metadata: Optional[Dict] = None, index: bool = False) -> Optional[Path]:
+    """
+    DataFrame inteiro para Parquet/Arrow (ou CSV, pelo sufixo). `index=True` grava o índice como coluna.
+    Retorna o caminho gravado, ou None para um DataFrame sem colunas (nada a gravar).
+    """
+    path = Path(path)
+    if index:
+        df = df.reset_index()
+    if df.shape[1] == 0:
+        return None
+    if _kind(path) == 'csv':
+        path.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(path, index=False)
+        return path
+    with ResultsWriter(path, metadata=metadata) as writer:
+        writer.write(df)
+    return writer.written
+
+
+def write_equity(path, equity, metadata: Optional[Dict] = None, timestamps=None) -> Optional[Path]:
+    """Curva de equity como colunas (timestamp, equity); aceita pd.Series com DatetimeIndex ou array."""
+    if isinstance(equity, pd.Series):
+        if timestamps is None and isinstance(equity.index, pd.DatetimeIndex):
+            timestamps = equity.index
+        values = equity.to_numpy(dtype=np.float64)
+    else:
+        values = np.asarray(equity, dtype=np.float64)
+    columns = {'equity': values}
+    if timestamps is not None:
+        columns = {'timestamp': pd.DatetimeIndex(timestamps), **columns}
+    df = pd.DataFrame(columns)
+    if _kind(Path(path)) == 'csv' and timestamps is not None:  # layout antigo: índice de datas + coluna equity
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        df.set_index('timestamp').to_csv(path)
+        return Path(path)
+    return write_frame(path, df, metadata)
+
+
+def write_trades(path, trades, metadata: Optional[Dict] = None) -> Optional[Path]:
+    """
+    Trades (DataFrame ou lista de dicts); colunas ausentes em alguns registros viram nulos tipados.
+    Lista vazia: nada é gravado e o retorno é None.
+    """
+    df = trades if isinstance(trades, pd.DataFrame) else pd.DataFrame(list(trades))
+    return write_frame(path, df, metadata)
+
+
+def read_results(path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Lê um arquivo de resultados (Parquet, Arrow IPC ou CSV) para DataFrame, só com `columns` se dado."""
+    path = Path(path)
+    kind = _kind(path)
+    if kind == 'csv':
+        return pd.read_csv(path, usecols=columns)
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+        table = pq.read_table(path, columns=list(columns) if columns else None)
+    else:
+        import pyarrow as pa
+        with pa.memory_map(str(path), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns:
+            table = table.select(list(columns))
+    return table.to_pandas()
+
+
+def _read_schema(path: Path):
+    import pyarrow as pa
+    if _kind(path) == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path)
+    with pa.memory_map(str(path), 'r') as source:
+        return pa.ipc.open_file(source).schema
+
+
+def read_schema_names(path) -> List[str]:
+    """Nomes das colunas sem ler os dados (CSV: só a linha de cabeçalho)."""
+    path = Path(path)
+    if _kind(path) == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    return list(_read_schema(path).names)
+
+
+def read_metadata(path) -> Dict:
+    """Metadados da run gravados pelo ResultsWriter (lê só o footer/schema)."""
+    path = Path(path)
+    if _kind(path) == 'csv':
+        return {}
+    raw = (_read_schema(path).metadata or {}).get(_METADATA_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def count_rows(path) -> int:
+    path = Path(path)
+    kind = _kind(path)
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).metadata.num_rows
+    if kind == 'arrow':
+        import pyarrow as pa
+        with pa.memory_map(str(path), 'r') as source:
+            reader = pa.ipc.open_file(source)
+            return sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    with open(path, 'rb') as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def read_equity(path) -> pd.Series:
+    """Série de equity indexada por timestamp (quando houver); CSV antigo: coluna 'equity' ou a última."""
+    path = Path(path)
+    if _kind(path) == 'csv':
+        df = pd.read_csv(path)
+        column = 'equity' if 'equity' in df.columns else df.columns[-1]
+        series = pd.to_numeric(df[column], errors='coerce')
+        if df.columns[0] != column:
+            series.index = pd.to_datetime(df[df.columns[0]], utc=True, errors='coerce')
+        return series.rename('equity')
+    df = read_results(path)
+    series = df['equity'].astype(np.float64)
+    if 'timestamp' in df.columns:
+        series.index = pd.DatetimeIndex(df['timestamp'])
+    return series.rename('equity')
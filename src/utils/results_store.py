@@ -0,0 +1,248 @@
+"""Indexed store for backtest runs (one SQLite file, one row per run).
+
+Every run launched by the orchestrator (scripts/orchestrate_runs.py) is recorded with its matrix
+coordinates (asset, timeframe, strategy, params), its status and its summary metrics, next to the
+paths of the equity/trade outputs. Readers query the index instead of globbing and re-parsing
+output files.
+
+Writers that do not go through the orchestrator call `record_outputs()` right after saving their
+files (agents/backtest_eth_usd.py does); `sync_directory()` indexes files written by older code,
+stat-ing the directory and reading only equity files that are new or changed since the last sync.
+
+Usage:
+    store = ResultsStore('out/results.sqlite')
+    store.upsert_run({'run_id': ..., 'asset': 'crypto_eth', 'status': 'finished', 'end_capital': 123.4})
+    store.list_runs(strategy='momentum', status='finished', order_by='sharpe', limit=20)
+    store.sync_directory('logs')     # backtest_*_equity.{csv,parquet} escritos fora do índice
+"""
+import re
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_DB = 'out/results.sqlite'
+OUTPUT_SUFFIXES = ('.csv', '.parquet', '.arrow')
+
+# Column name -> SQLite type. Order defines the table layout.
+RUN_COLUMNS = {
+    'run_id': 'TEXT PRIMARY KEY',    # <sweep_id>:<run_key>
+    'run_key': 'TEXT',               # hash determinístico de ativo/timeframe/estratégia/params
+    'sweep_id': 'TEXT',
+    'asset': 'TEXT',
+    'ticker': 'TEXT',
+    'timeframe': 'TEXT',
+    'strategy': 'TEXT',
+    'params': 'TEXT',            # JSON
+    'status': 'TEXT',            # queued | running | finished | failed
+    'created_at': 'REAL',
+    'started_at': 'REAL',
+    'finished_at': 'REAL',
+    'duration_s': 'REAL',
+    'bars': 'INTEGER',
+    'start_capital': 'REAL',
+    'end_capital': 'REAL',
+    'total_return_pct': 'REAL',
+    'sharpe': 'REAL',
+    'max_drawdown_pct': 'REAL',
+    'trades': 'INTEGER',
+    'win_rate_pct': 'REAL',
+    'equity_path': 'TEXT',
+    'trades_path': 'TEXT',
+    'report_path': 'TEXT',
+    'source_mtime': 'REAL',      # mtime do equity indexado por record_outputs/sync_directory
+    'error': 'TEXT',
+}
+
+_INDEXES = {
+    'idx_runs_matrix': ('asset', 'timeframe', 'strategy'),
+    'idx_runs_sweep': ('sweep_id',),
+    'idx_runs_key': ('run_key',),
+    'idx_runs_finished': ('finished_at',),
+}
+
+PERIODS_PER_YEAR = {
+    '1m': 365 * 24 * 60, '5m': 365 * 24 * 12, '15m': 365 * 24 * 4, '30m': 365 * 24 * 2,
+    '1h': 365 * 24, '60m': 365 * 24, '4h': 365 * 6, '1d': 365, '1wk': 52,
+}
+
+
+# backtest_ethusd_2y_1h_tuned_20251017T221236Z_equity.parquet -> asset, period, timeframe, tag, stamp
+_OUTPUT_NAME = re.compile(r'^(?P<prefix>backtest_(?P<asset>[a-z0-9]+)_(?P<period>\d+[a-z]+)_(?P<timeframe>\d+[a-z]+)'
+                          r'(?:_(?P<tag>[a-z][a-z0-9_]*?))?)_(?P<stamp>\d{8}T\d{6}Z)$', re.IGNORECASE)
+
+
+def parse_output_name(stem: str) -> Dict:
+    """Coordenadas de um prefixo `backtest_<asset>_<period>_<tf>[_<tag>]_<stamp>` (vazio se não casar)."""
+    match = _OUTPUT_NAME.match(stem)
+    if not match:
+        return {}
+    return {'asset': match['asset'].lower(), 'timeframe': match['timeframe'], 'strategy': match['tag'] or 'default',
+            'sweep_id': match['prefix']}
+
+
+def _read_equity(path: Path) -> np.ndarray:
+    from src.utils.results_io import read_equity
+    return read_equity(path).to_numpy(dtype=np.float64)
+
+
+def _count_rows(path: Path) -> Optional[int]:
+    from src.utils.results_io import count_rows
+    try:
+        return count_rows(path)  # Parquet: contagem vem do footer, sem ler as linhas
+    except (OSError, ValueError):
+        return None
+
+
+def summarize_equity(equity, periods_per_year: float = PERIODS_PER_YEAR['1h'], risk_free_rate: float = 0.0) -> Dict:
+    """Métricas de resumo de uma curva de equity (sharpe anualizado sobre retornos por barra)."""
+    equity = np.asarray(equity, dtype=np.float64)
+    equity = equity[np.isfinite(equity)]
+    if len(equity) == 0:
+        return {'bars': 0, 'start_capital': None, 'end_capital': None, 'total_return_pct': None,
+                'sharpe': None, 'max_drawdown_pct': None}
+    returns = np.diff(equity) / np.where(equity[:-1] == 0, np.nan, equity[:-1])
+    returns = returns[np.isfinite(returns)]
+    std = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    running_max = np.maximum.accumulate(equity)
+    drawdown = (equity - running_max) / np.where(running_max == 0, np.nan, running_max)
+    return {
+        'bars': int(len(equity)),
+        'start_capital': float(equity[0]),
+        'end_capital': float(equity[-1]),
+        'total_return_pct': float((equity[-1] / equity[0] - 1) * 100) if equity[0] else None,
+        'sharpe': float((returns.mean() - risk_free_rate / periods_per_year) / std * np.sqrt(periods_per_year))
+        if std > 0 else 0.0,
+        'max_drawdown_pct': float(np.nanmin(drawdown) * 100) if np.isfinite(drawdown).any() else 0.0,
+    }
+
+
+class ResultsStore:
+    """SQLite index of runs. Safe to share between threads; use one writer process (the orchestrator)."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if self.path != ':memory:':
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS runs ('
+                               + ', '.join(f'{name} {kind}' for name, kind in RUN_COLUMNS.items()) + ')')
+            existing = {row[1] for row in self._conn.execute('PRAGMA table_info(runs)')}
+            for name, kind in RUN_COLUMNS.items():
+                if name not in existing:  # índice criado por uma versão anterior
+                    self._conn.execute(f'ALTER TABLE runs ADD COLUMN {name} {kind}')
+            for name, cols in _INDEXES.items():
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON runs ({', '.join(cols)})")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert_run(self, record: Dict) -> None:
+        """Insere ou atualiza (por run_id) apenas as colunas presentes em `record`."""
+        record = {k: v for k, v in record.items() if k in RUN_COLUMNS}
+        if 'params' in record and not isinstance(record['params'], str):
+            record['params'] = json.dumps(record['params'], sort_keys=True, default=str)
+        cols = list(record)
+        updates = ', '.join(f'{c}=excluded.{c}' for c in cols if c != 'run_id')
+        sql = (f"INSERT INTO runs ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+               f"ON CONFLICT(run_id) DO " + (f"UPDATE SET {updates}" if updates else "NOTHING"))
+        with self._lock, self._conn:
+            self._conn.execute(sql, [record[c] for c in cols])
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict:
+        out = dict(row)
+        if out.get('params'):
+            try:
+                out['params'] = json.loads(out['params'])
+            except ValueError:
+                pass
+        return out
+
+    def get_run(self, run_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def list_runs(self, order_by: str = 'finished_at', descending: bool = True, limit: Optional[int] = None,
+                  offset: int = 0, **filters) -> List[Dict]:
+        """Filtros por igualdade em qualquer coluna (valores None são ignorados)."""
+        filters = {k: v for k, v in filters.items() if v is not None}
+        unknown = [k for k in list(filters) + [order_by] if k not in RUN_COLUMNS]
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas: {unknown}")
+        where = ' AND '.join(f'{k} = ?' for k in filters)
+        sql = 'SELECT * FROM runs' + (f' WHERE {where}' if where else '')
+        direction = 'DESC' if descending else 'ASC'
+        sql += f" ORDER BY {order_by} IS NULL, {order_by} {direction}, run_id {direction}"
+        if limit is not None:
+            sql += f' LIMIT {int(limit)} OFFSET {int(offset)}'
+        with self._lock:
+            rows = self._conn.execute(sql, list(filters.values())).fetchall()
+        return [self._row(r) for r in rows]
+
+    def latest_run(self, **filters) -> Optional[Dict]:
+        runs = self.list_runs(order_by='finished_at', descending=True, limit=1, status='finished', **filters)
+        return runs[0] if runs else None
+
+    def record_outputs(self, equity_path, trades_path=None, report_path=None, run_id: Optional[str] = None,
+                       equity=None, **fields) -> Dict:
+        """
+        Indexa uma run a partir dos arquivos que ela acabou de escrever (chamar logo após salvar).
+        `equity` evita reler o arquivo quando o chamador já tem a série; campos extras vão direto para a linha.
+        """
+        equity_path = Path(equity_path)
+        stem = equity_path.name.rsplit('_equity', 1)[0]
+        record = {**parse_output_name(stem), 'run_id': run_id or stem, 'run_key': stem, 'status': 'finished',
+                  'equity_path': str(equity_path), 'source_mtime': equity_path.stat().st_mtime}
+        record['finished_at'] = record['source_mtime']
+        values = np.asarray(equity, dtype=np.float64) if equity is not None else _read_equity(equity_path)
+        record.update(summarize_equity(values, PERIODS_PER_YEAR.get(record.get('timeframe'), PERIODS_PER_YEAR['1h'])))
+        if trades_path is not None and Path(trades_path).exists():
+            record['trades_path'] = str(trades_path)
+            record['trades'] = _count_rows(Path(trades_path))
+        if report_path is not None and Path(report_path).exists():
+            record['report_path'] = str(report_path)
+        record.update(fields)
+        self.upsert_run(record)
+        return record
+
+    def sync_directory(self, directory, pattern: str = 'backtest_*_equity.*') -> int:
+        """Indexa os `*_equity.{csv,parquet,arrow}` novos ou alterados em `directory`; retorna quantos foram (re)lidos."""
+        directory = Path(directory)
+        if not directory.exists():
+            return 0
+        with self._lock:
+            known = dict(self._conn.execute(
+                'SELECT equity_path, source_mtime FROM runs WHERE source_mtime IS NOT NULL').fetchall())
+        indexed = 0
+        for path in directory.glob(pattern):
+            if path.suffix.lower() not in OUTPUT_SUFFIXES:
+                continue
+            mtime = path.stat().st_mtime
+            if known.get(str(path)) == mtime:
+                continue
+            prefix = str(path)[:-len('_equity' + path.suffix)]
+            try:
+                self.record_outputs(path, trades_path=prefix + '_trades' + path.suffix,
+                                    report_path=prefix + '_report.txt')
+            except Exception as e:
+                self.upsert_run({'run_id': path.name.rsplit('_equity', 1)[0], 'status': 'failed',
+                                 'equity_path': str(path), 'source_mtime': mtime, 'error': f"{type(e).__name__}: {e}"})
+            indexed += 1
+        return indexed
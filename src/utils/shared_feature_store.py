@@ -0,0 +1,240 @@
+"""Zero-copy feature matrix shared between vectorized environment workers.
+
+The parent process converts the multi-asset feature DataFrame once into a float32 feature matrix
+and a float64 price matrix and publishes both in a single block:
+- backend 'shm': one `multiprocessing.shared_memory` block, attached by name;
+- backend 'memmap': two `.npy` files in a directory, opened with `np.load(mmap_mode='r')`.
+
+Workers receive only a small picklable `FeatureStoreHandle` and attach read-only views, so N
+environments cost one dataset's worth of RAM instead of N pickled DataFrame copies.
+
+Usage:
+    store = SharedFeatureStore.from_dataframe(df, price_columns=[f"{a}_close" for a in assets])
+    factory = SharedEnvFactory(store.handle, env_file='new-rede-a/portfolio_environment.py',
+                               config_file='new-rede-a/config.py')
+    vec_env = SubprocVecEnv([factory] * 16)
+    ...
+    store.close()  # owner unlinks the block
+"""
+import os
+import sys
+import json
+import uuid
+import importlib.util
+from dataclasses import dataclass, field
+from pathlib import Path
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+import numpy as np
+
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class FeatureStoreHandle:
+    """Everything a worker needs to attach; small enough to pickle per env."""
+    backend: str                     # 'shm' | 'memmap'
+    location: str                    # shared memory name or directory
+    num_rows: int
+    feature_columns: List[str] = field(default_factory=list)
+    price_columns: List[str] = field(default_factory=list)
+    prices_offset: int = 0           # byte offset of the price matrix inside the shm block
+
+
+def _inherits_resource_tracker() -> bool:
+    """
+    multiprocessing children share the parent's resource tracker, so registering the block again
+    is harmless there. A process started some other way gets its own tracker, and on Python < 3.13
+    that tracker would unlink the attached block when the process exits.
+    """
+    try:
+        from multiprocessing import resource_tracker
+        return getattr(resource_tracker._resource_tracker, '_fd', None) is not None
+    except Exception:
+        return True
+
+
+def _untrack(shm: shared_memory.SharedMemory):
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+
+class AttachedFeatures:
+    """Read-only views over a published feature store."""
+
+    def __init__(self, handle: FeatureStoreHandle, features: np.ndarray, prices: np.ndarray, shm=None):
+        self.handle = handle
+        self.features = features
+        self.prices = prices
+        self._shm = shm
+
+    @property
+    def feature_columns(self) -> List[str]:
+        return self.handle.feature_columns
+
+    @property
+    def price_columns(self) -> List[str]:
+        return self.handle.price_columns
+
+    def close(self):
+        # drop the views before closing the mapping
+        self.features = self.prices = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+
+def attach_feature_store(handle: FeatureStoreHandle) -> AttachedFeatures:
+    n_rows, n_feat, n_price = handle.num_rows, len(handle.feature_columns), len(handle.price_columns)
+    if handle.backend == 'shm':
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=handle.location, track=False)
+        else:
+            own_tracker = not _inherits_resource_tracker()
+            shm = shared_memory.SharedMemory(name=handle.location)
+            if own_tracker:
+                _untrack(shm)  # only the owner may unlink
+        features = np.ndarray((n_rows, n_feat), dtype=np.float32, buffer=shm.buf)
+        prices = np.ndarray((n_rows, n_price), dtype=np.float64, buffer=shm.buf, offset=handle.prices_offset)
+        features.flags.writeable = False
+        prices.flags.writeable = False
+        return AttachedFeatures(handle, features, prices, shm)
+    if handle.backend == 'memmap':
+        features = np.load(os.path.join(handle.location, 'features.npy'), mmap_mode='r')
+        prices = np.load(os.path.join(handle.location, 'prices.npy'), mmap_mode='r')
+        return AttachedFeatures(handle, features, prices)
+    raise ValueError(f"Backend desconhecido: {handle.backend}")
+
+
+def dataframe_to_arrays(df, price_columns: List[str], drop_columns=('asset_id',)):
+    """
+    Numeric float32 feature matrix (non-numeric values -> 0, as PortfolioEnv did per window) and
+    float64 price matrix in `price_columns` order.
+    """
+    import pandas as pd
+    missing = [c for c in price_columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colunas de preço ausentes no DataFrame: {missing}")
+    numeric = df.drop(columns=[c for c in drop_columns if c in df.columns])
+    numeric = numeric.apply(pd.to_numeric, errors='coerce').fillna(0.0)
+    features = np.ascontiguousarray(numeric.to_numpy(dtype=np.float32))
+    prices = np.ascontiguousarray(df[price_columns].to_numpy(dtype=np.float64))
+    return features, prices, [str(c) for c in numeric.columns]
+
+
+class SharedFeatureStore:
+    """Owner side: publishes the arrays and unlinks/removes them on close()."""
+
+    def __init__(self, features: np.ndarray, prices: np.ndarray, feature_columns: List[str],
+                 price_columns: List[str], backend: str = 'shm', directory: Optional[str] = None):
+        if features.shape[0] != prices.shape[0]:
+            raise ValueError("features e prices precisam ter o mesmo número de linhas")
+        self._shm = None
+        self._directory = None
+        n_rows = int(features.shape[0])
+        if backend == 'shm':
+            prices_offset = -(-features.nbytes // _ALIGN) * _ALIGN
+            size = max(1, prices_offset + prices.nbytes)
+            self._shm = shared_memory.SharedMemory(create=True, size=size, name=f"feat_{uuid.uuid4().hex[:12]}")
+            np.ndarray(features.shape, dtype=np.float32, buffer=self._shm.buf)[...] = features
+            np.ndarray(prices.shape, dtype=np.float64, buffer=self._shm.buf, offset=prices_offset)[...] = prices
+            location = self._shm.name
+        elif backend == 'memmap':
+            if directory is None:
+                raise ValueError("backend 'memmap' requer `directory`")
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            np.save(os.path.join(directory, 'features.npy'), features.astype(np.float32, copy=False))
+            np.save(os.path.join(directory, 'prices.npy'), prices.astype(np.float64, copy=False))
+            self._directory = directory
+            location = str(directory)
+            prices_offset = 0
+        else:
+            raise ValueError(f"Backend desconhecido: {backend}")
+        self.handle = FeatureStoreHandle(backend, location, n_rows, list(feature_columns), list(price_columns),
+                                         prices_offset)
+        if backend == 'memmap':
+            Path(directory, 'handle.json').write_text(json.dumps(self.handle.__dict__))
+
+    @classmethod
+    def from_dataframe(cls, df, price_columns: List[str], backend: str = 'shm', directory: Optional[str] = None):
+        features, prices, feature_columns = dataframe_to_arrays(df, price_columns)
+        return cls(features, prices, feature_columns, price_columns, backend=backend, directory=directory)
+
+    @property
+    def nbytes(self) -> int:
+        n_rows = self.handle.num_rows
+        return n_rows * (4 * len(self.handle.feature_columns) + 8 * len(self.handle.price_columns))
+
+    def close(self, remove_files: bool = False):
+        if self._shm is not None:
+            self._shm.close()
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = None
+        if remove_files and self._directory is not None:
+            for name in ('features.npy', 'prices.npy', 'handle.json'):
+                try:
+                    os.remove(os.path.join(self._directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_ENV_MODULES = {}
+
+
+def _load_env_module(env_file: str, config_file: Optional[str]):
+    """Load an environment module by file path (once per process), optionally under its own `config`."""
+    key = (env_file, config_file)
+    if key in _ENV_MODULES:
+        return _ENV_MODULES[key]
+    original_config = sys.modules.get('config')
+    if config_file:
+        spec = importlib.util.spec_from_file_location('shared_env_config', config_file)
+        cfg = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cfg)
+        sys.modules['config'] = cfg
+    try:
+        module_name = 'shared_env_' + Path(env_file).stem
+        spec = importlib.util.spec_from_file_location(module_name, env_file)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    finally:
+        if config_file:
+            if original_config is not None:
+                sys.modules['config'] = original_config
+            else:
+                sys.modules.pop('config', None)
+    _ENV_MODULES[key] = module
+    return module
+
+
+class SharedEnvFactory:
+    """
+    Picklable env constructor for SubprocVecEnv: attaches to the store in the worker and builds
+    `env_class(feature_store=..., **env_kwargs)` from a module loaded by file path.
+    """
+
+    def __init__(self, handle: FeatureStoreHandle, env_file: str, env_class: str = 'PortfolioEnv',
+                 config_file: Optional[str] = None, env_kwargs: Optional[dict] = None):
+        self.handle = handle
+        self.env_file = str(env_file)
+        self.env_class = env_class
+        self.config_file = str(config_file) if config_file else None
+        self.env_kwargs = env_kwargs or {}
+
+    def __call__(self):
+        module = _load_env_module(self.env_file, self.config_file)
+        return getattr(module, self.env_class)(feature_store=attach_feature_store(self.handle), **self.env_kwargs)
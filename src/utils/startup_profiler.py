@@ -0,0 +1,212 @@
+"""Startup profiling and lazy loading helpers for the FastAPI apps.
+
+- `startup_profiler` records how long each module takes to import (first load only, with self and
+  cumulative time), named startup phases and background warm-up tasks. Importing this module has no
+  side effect: the apps call `install()` (no-op with STARTUP_PROFILE=0) and the original
+  `builtins.__import__` is restored by `finish()`, or by the end of the warm-up when it is profiled.
+- `lazy_import()` returns a module proxy that imports the real module on first attribute access, so
+  TensorFlow/torch/transformers/yfinance are only paid for by the code paths that use them.
+- `startup_profiler.warmup_in_background()` imports/initialises heavy stacks in a daemon thread
+  after the app is already answering /health.
+
+Report: `startup_profiler.report()` (exposed by the apps under /health/startup).
+"""
+import os
+import sys
+import time
+import builtins
+import importlib
+import threading
+import logging
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Module load time of this profiler: the apps import it first, so this is ~process start.
+_T0 = time.perf_counter()
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.t0 = _T0
+        self.import_times: Dict[str, Dict[str, float]] = {}
+        self.phases: List[Dict] = []
+        self.warmups: Dict[str, Dict] = {}
+        self.ready_at: Optional[float] = None
+        self._original_import = None
+        self._hook = None  # the bound method installed (a fresh `self._timed_import` would never compare `is`)
+        self._warmup_owns_hook = False
+        self._local = threading.local()  # per-thread stack of [module name, start, time in child imports]
+        self._lock = threading.Lock()
+
+    # --- import hook ---
+
+    def install(self):
+        if self._original_import is not None or os.environ.get('STARTUP_PROFILE', '1') == '0':
+            return
+        self._original_import = builtins.__import__
+        self._hook = self._timed_import
+        builtins.__import__ = self._hook
+
+    @property
+    def installed(self) -> bool:
+        return self._original_import is not None
+
+    def uninstall(self):
+        if self._original_import is not None and builtins.__import__ is self._hook:
+            builtins.__import__ = self._original_import
+        self._original_import = None
+        self._hook = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import or importlib.__import__
+        # Only first loads of absolute imports are timed; everything else goes straight through.
+        if level != 0 or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append([name, time.perf_counter(), 0.0])
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            mod_name, start, child = stack.pop()
+            elapsed = time.perf_counter() - start
+            if stack:
+                stack[-1][2] += elapsed
+            self.record_import(mod_name, elapsed, elapsed - child)
+
+    def record_import(self, name: str, cumulative: float, self_time: Optional[float] = None):
+        with self._lock:
+            entry = self.import_times.setdefault(name, {'cumulative_s': 0.0, 'self_s': 0.0})
+            entry['cumulative_s'] += cumulative
+            entry['self_s'] += cumulative if self_time is None else self_time
+
+    # --- phases / readiness ---
+
+    def mark(self, phase: str):
+        """Record that `phase` was reached (seconds since process start)."""
+        self.phases.append({'phase': phase, 'at_s': round(time.perf_counter() - self.t0, 4)})
+
+    def finish(self):
+        """Mark the app as ready to serve and stop timing imports (unless a profiled warm-up is running)."""
+        if self.ready_at is None:
+            self.ready_at = time.perf_counter()
+            self.mark('ready')
+        if not self._warmup_owns_hook:
+            self.uninstall()
+        logger.info(f"Startup: pronto em {self.ready_at - self.t0:.2f}s; "
+                    f"imports mais lentos: {[(m['module'], m['cumulative_s']) for m in self.top_imports(5)]}")
+
+    # --- background warm-up ---
+
+    def warmup_in_background(self, tasks: Dict[str, Callable], on_done: Optional[Callable] = None,
+                             profile_imports: bool = False) -> threading.Thread:
+        """
+        Run `tasks` (name -> callable) sequentially in a daemon thread, recording status and duration.
+        With `profile_imports` the import hook stays installed until the last task ends, so the modules
+        loaded by the warm-up are attributed too; the original `__import__` is restored afterwards.
+        """
+        for name in tasks:
+            self.warmups[name] = {'status': 'pending'}
+        if profile_imports:
+            self.install()
+            self._warmup_owns_hook = self.installed
+
+        def _run():
+            try:
+                _run_tasks()
+            finally:
+                if self._warmup_owns_hook:
+                    self._warmup_owns_hook = False
+                    self.uninstall()
+                    self.mark('warmup_done')
+
+        def _run_tasks():
+            for name, fn in tasks.items():
+                self.warmups[name] = {'status': 'running'}
+                start = time.perf_counter()
+                try:
+                    result = fn()
+                    self.warmups[name] = {'status': 'done', 'duration_s': round(time.perf_counter() - start, 4)}
+                    if on_done is not None:
+                        on_done(name, result)
+                except Exception as e:
+                    self.warmups[name] = {'status': 'error', 'error': str(e),
+                                          'duration_s': round(time.perf_counter() - start, 4)}
+                    logger.warning(f"Warm-up '{name}' falhou: {e}")
+
+        thread = threading.Thread(target=_run, name='startup-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def warmup_done(self, name: str) -> bool:
+        return self.warmups.get(name, {}).get('status') == 'done'
+
+    # --- report ---
+
+    def top_imports(self, n: int = 20, key: str = 'cumulative_s') -> List[Dict]:
+        with self._lock:
+            items = sorted(self.import_times.items(), key=lambda kv: kv[1][key], reverse=True)[:n]
+        return [{'module': name, 'cumulative_s': round(v['cumulative_s'], 4), 'self_s': round(v['self_s'], 4)}
+                for name, v in items]
+
+    def report(self, top: int = 20) -> Dict:
+        now = time.perf_counter()
+        return {
+            'uptime_s': round(now - self.t0, 4),
+            'ready_after_s': round(self.ready_at - self.t0, 4) if self.ready_at is not None else None,
+            'phases': list(self.phases),
+            'modules_timed': len(self.import_times),
+            'top_imports_cumulative': self.top_imports(top, 'cumulative_s'),
+            'top_imports_self': self.top_imports(top, 'self_s'),
+            'warmups': dict(self.warmups),
+        }
+
+
+class LazyModule:
+    """Module proxy: the real module is imported (and timed) on first attribute access."""
+
+    def __init__(self, name: str, profiler: Optional[StartupProfiler] = None):
+        self.__dict__['_lazy_name'] = name
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_profiler'] = profiler
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is not None:
+            return module
+        with self.__dict__['_lazy_lock']:
+            module = self.__dict__['_lazy_module']
+            if module is None:
+                name = self.__dict__['_lazy_name']
+                already = name in sys.modules
+                start = time.perf_counter()
+                module = importlib.import_module(name)
+                profiler = self.__dict__['_lazy_profiler']
+                if profiler is not None and not already:
+                    profiler.record_import(f"{name} (lazy)", time.perf_counter() - start)
+                self.__dict__['_lazy_module'] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__['_lazy_module'] is not None
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self._load(), key, value)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'not loaded'
+        return f"<lazy module '{self.__dict__['_lazy_name']}' ({state})>"
+
+
+startup_profiler = StartupProfiler()
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name, startup_profiler)
@@ -0,0 +1,214 @@
+"""Windowed dataset over one contiguous feature array, for supervised sequence models.
+
+`create_sequences`-style preprocessing copies every window into an N x window x features array,
+which is `window` times the size of the data. `WindowedDataset` keeps the (bars x features) array
+once plus an int64 array of valid window starts and gathers a batch of windows only when asked:
+
+    ds = WindowedDataset(features, targets, window_size=60)
+    X_batch, y_batch = ds.get_batch(np.arange(32))
+    train, test = ds.subset(train_idx), ds.subset(test_idx)   # share the same feature array
+    tf_ds = train.to_tf_dataset(batch_size=64, shuffle=True)   # reshuffled every epoch, prefetched
+    loader = train.torch_dataloader(batch_size=64, shuffle=True, num_workers=2)
+
+Label convention: the label of the window starting at `s` is `targets[s + window_size - 1 + label_offset]`
+(label_offset=0 -> last bar of the window, as rede-atencao/data_handler.py; label_offset=1 -> the bar
+after the window, as cnn_preprocessor.py and deep_mql_model.py).
+
+Independent series (e.g. one per ticker) are stacked in the same array with `from_segments`, so no
+window crosses a segment boundary. Optional on-the-fly scaling applies `x * scale + shift` per batch,
+either globally (F,) or per segment (S, F), e.g. from fitted MinMaxScalers via `affine_from_scaler`.
+"""
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def affine_from_scaler(scaler) -> Tuple[np.ndarray, np.ndarray]:
+    """(scale, shift) such that `x * scale + shift == scaler.transform(x)` for MinMax/Standard scalers."""
+    if hasattr(scaler, 'min_') and hasattr(scaler, 'scale_'):  # MinMaxScaler
+        return np.asarray(scaler.scale_, dtype=np.float32), np.asarray(scaler.min_, dtype=np.float32)
+    if hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_'):  # StandardScaler
+        scale = 1.0 / np.asarray(scaler.scale_, dtype=np.float64)
+        mean = np.asarray(scaler.mean_, dtype=np.float64) if scaler.mean_ is not None else 0.0
+        return scale.astype(np.float32), (-mean * scale).astype(np.float32)
+    raise TypeError(f"Scaler não suportado para escala on-the-fly: {type(scaler).__name__}")
+
+
+class WindowedDataset:
+    """Windows over `features` (T, F) indexed by start position; nothing is materialized up front."""
+
+    def __init__(self, features: np.ndarray, targets: Optional[np.ndarray] = None, window_size: int = 60,
+                 label_offset: int = 0, starts: Optional[np.ndarray] = None,
+                 scale: Optional[np.ndarray] = None, shift: Optional[np.ndarray] = None,
+                 segment_ids: Optional[np.ndarray] = None, dtype=np.float32):
+        features = np.asarray(features)
+        if features.ndim != 2:
+            raise ValueError(f"features deve ser 2D (barras, features), recebido shape {features.shape}")
+        if window_size < 1:
+            raise ValueError("window_size deve ser >= 1")
+        # no copy when the array is already contiguous in the requested dtype (memmaps included)
+        self.features = features if (features.dtype == dtype and features.flags.c_contiguous) \
+            else np.ascontiguousarray(features, dtype=dtype)
+        self.targets = None if targets is None else np.asarray(targets)
+        if self.targets is not None and len(self.targets) != len(self.features):
+            raise ValueError("targets precisa ter o mesmo número de linhas que features")
+        self.window_size = int(window_size)
+        self.label_offset = int(label_offset) if self.targets is not None else 0
+
+        if starts is None:
+            n_windows = max(0, len(self.features) - self.window_size - self.label_offset + 1)
+            starts = np.arange(n_windows, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        if len(self.starts) and self.starts.max() + self.window_size + self.label_offset > len(self.features):
+            raise ValueError("Há janelas (ou rótulos) que ultrapassam o fim de features")
+
+        self.segment_ids = None if segment_ids is None else np.asarray(segment_ids, dtype=np.int64)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+        self.shift = None if shift is None else np.asarray(shift, dtype=np.float32)
+        per_segment = any(a is not None and a.ndim == 2 for a in (self.scale, self.shift))
+        if per_segment and self.segment_ids is None:
+            raise ValueError("scale/shift por segmento exigem segment_ids")
+        self._offsets = np.arange(self.window_size, dtype=np.int64)
+
+    @classmethod
+    def from_segments(cls, features: np.ndarray, targets: Optional[np.ndarray], lengths: Sequence[int],
+                      window_size: int, label_offset: int = 0, **kwargs) -> 'WindowedDataset':
+        """`features` holds consecutive segments of the given lengths; windows never cross two segments."""
+        lengths = np.asarray(lengths, dtype=np.int64)
+        if lengths.sum() != len(features):
+            raise ValueError("A soma de lengths deve ser igual ao número de linhas de features")
+        offset = label_offset if targets is not None else 0
+        seg_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        per_segment = np.maximum(lengths - window_size - offset + 1, 0)
+        segment_ids = np.repeat(np.arange(len(lengths), dtype=np.int64), per_segment)
+        # start of window k of segment j = seg_starts[j] + k
+        first_of_segment = np.repeat(np.cumsum(per_segment) - per_segment, per_segment)
+        starts = np.repeat(seg_starts, per_segment) + (np.arange(per_segment.sum()) - first_of_segment)
+        return cls(features, targets, window_size=window_size, label_offset=label_offset,
+                   starts=starts, segment_ids=segment_ids, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def num_features(self) -> int:
+        return self.features.shape[1]
+
+    @property
+    def element_shape(self) -> Tuple[int, int]:
+        return self.window_size, self.num_features
+
+    @property
+    def labels(self) -> Optional[np.ndarray]:
+        """Label of every window, in dataset order (O(N), used for stratified splits and metrics)."""
+        if self.targets is None:
+            return None
+        return self.targets[self.starts + self.window_size - 1 + self.label_offset]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory actually held: the feature array plus the index arrays."""
+        total = self.features.nbytes + self.starts.nbytes
+        if self.targets is not None:
+            total += self.targets.nbytes
+        if self.segment_ids is not None:
+            total += self.segment_ids.nbytes
+        return int(total)
+
+    def subset(self, indices) -> 'WindowedDataset':
+        """Dataset over a selection of windows, sharing the same feature/target arrays."""
+        indices = np.asarray(indices)
+        clone = object.__new__(WindowedDataset)
+        clone.__dict__.update(self.__dict__)
+        clone.starts = self.starts[indices]
+        clone.segment_ids = None if self.segment_ids is None else self.segment_ids[indices]
+        return clone
+
+    def get_batch(self, indices):
+        """(X, y) for the windows at `indices`; X is a fresh (B, window, F) array, y is None without targets."""
+        indices = np.asarray(indices)
+        starts = self.starts[indices]
+        X = self.features[starts[:, None] + self._offsets]
+        if self.scale is not None or self.shift is not None:
+            seg = None if self.segment_ids is None else self.segment_ids[indices]
+            if self.scale is not None:
+                X *= self.scale[seg][:, None, :] if self.scale.ndim == 2 else self.scale
+            if self.shift is not None:
+                X += (self.shift[seg][:, None, :] if self.shift.ndim == 2 else self.shift)
+        y = None if self.targets is None else self.targets[starts + self.window_size - 1 + self.label_offset]
+        return X, y
+
+    def __getitem__(self, index: int):
+        X, y = self.get_batch(np.array([index]))
+        return (X[0], y[0]) if y is not None else X[0]
+
+    def iter_batches(self, batch_size: int, shuffle: bool = False, seed: Optional[int] = None,
+                     drop_remainder: bool = False, rng: Optional[np.random.Generator] = None) -> Iterator:
+        order = np.arange(len(self))
+        if shuffle:
+            (rng if rng is not None else np.random.default_rng(seed)).shuffle(order)
+        stop = len(order) - (len(order) % batch_size if drop_remainder else 0)
+        for begin in range(0, stop, batch_size):
+            X, y = self.get_batch(order[begin:begin + batch_size])
+            yield (X, y) if y is not None else X
+
+    def materialize(self):
+        """Full (X, y) copy, for callers that still need the old N x window x features arrays."""
+        return self.get_batch(np.arange(len(self)))
+
+    def to_tf_dataset(self, batch_size: int, shuffle: bool = False, seed: Optional[int] = None,
+                      drop_remainder: bool = False, prefetch: bool = True):
+        """tf.data pipeline of batches; with shuffle=True every pass (epoch) draws a new permutation."""
+        import tensorflow as tf
+
+        rng = np.random.default_rng(seed)
+
+        def generator():
+            yield from self.iter_batches(batch_size, shuffle=shuffle, drop_remainder=drop_remainder, rng=rng)
+
+        x_spec = tf.TensorSpec((None,) + self.element_shape, tf.as_dtype(self.features.dtype))
+        if self.targets is None:
+            signature = x_spec
+        else:
+            signature = (x_spec, tf.TensorSpec((None,) + self.targets.shape[1:], tf.as_dtype(self.targets.dtype)))
+        dataset = tf.data.Dataset.from_generator(generator, output_signature=signature)
+        if prefetch:
+            dataset = dataset.prefetch(tf.data.AUTOTUNE)
+        return dataset
+
+    def to_torch_dataset(self) -> 'TorchWindowedDataset':
+        return TorchWindowedDataset(self)
+
+    def torch_dataloader(self, batch_size: int, shuffle: bool = False, seed: Optional[int] = None,
+                         drop_last: bool = False, num_workers: int = 0, prefetch_factor: int = 2,
+                         pin_memory: bool = False):
+        """DataLoader that gathers a whole batch per __getitem__ call (BatchSampler + batch_size=None)."""
+        import torch
+        from torch.utils.data import BatchSampler, DataLoader, RandomSampler, SequentialSampler
+
+        dataset = self.to_torch_dataset()
+        generator = torch.Generator().manual_seed(seed) if seed is not None else None
+        sampler = RandomSampler(dataset, generator=generator) if shuffle else SequentialSampler(dataset)
+        return DataLoader(dataset, sampler=BatchSampler(sampler, batch_size, drop_last), batch_size=None,
+                          num_workers=num_workers, pin_memory=pin_memory,
+                          prefetch_factor=prefetch_factor if num_workers > 0 else None,
+                          persistent_workers=num_workers > 0)
+
+
+class TorchWindowedDataset:
+    """Map-style torch dataset; accepts an int or a list of indices (one gather per batch)."""
+
+    def __init__(self, dataset: WindowedDataset):
+        self.dataset = dataset
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def __getitem__(self, index):
+        import torch
+        batched = not np.isscalar(index)
+        X, y = self.dataset.get_batch(np.asarray(index if batched else [index]))
+        if not batched:
+            X, y = X[0], (None if y is None else y[0])
+        X = torch.from_numpy(np.ascontiguousarray(X))
+        return X if y is None else (X, torch.as_tensor(y))
@@ -0,0 +1,52 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+ae = importlib.import_module('scripts.analyze_equity')
+
+
+def test_batch_metrics_match_per_curve_pandas():
+    rng = np.random.default_rng(0)
+    curves = {f'run{i}': 1000 * np.cumprod(1 + rng.normal(0.0005, 0.01, n)) for i, n in enumerate((50, 400, 3))}
+    curves['flat'] = np.full(30, 500.0)
+    ragged = ae.RaggedEquity.from_series(curves, annual_factor=365 * 24)
+    table = ae.batch_metrics(ragged, rolling_window=20).set_index('file')
+
+    for name, values in curves.items():
+        s = pd.Series(values)
+        r = s.pct_change().fillna(0)
+        row = table.loc[name]
+        sharpe = r.mean() / r.std() * np.sqrt(365 * 24) if r.std() > 0 else np.nan
+        assert np.isclose(row['sharpe'], sharpe, equal_nan=True)
+        assert np.isclose(row['max_dd_pct'], ((s - s.cummax()) / s.cummax()).min() * 100)
+        rolling = (r.rolling(20).mean() / r.rolling(20).std() * np.sqrt(365 * 24)).dropna()
+        if len(rolling):
+            assert np.isclose(row['rolling_sharpe_20_last'], rolling.iloc[-1])
+            assert np.isclose(row['rolling_sharpe_20_min'], rolling.min())
+        else:
+            assert np.isnan(row['rolling_sharpe_20_last'])
+
+
+def test_drawdown_durations_and_calmar():
+    ragged = ae.RaggedEquity.from_series({'a': [100, 110, 99, 105, 111, 90, 95], 'b': [50, 60, 70]}, annual_factor=365)
+    table = ae.batch_metrics(ragged, rolling_window=5).set_index('file')
+
+    assert table.loc['a', 'max_dd_duration_bars'] == 2      # 110 -> 99, 105 -> new high at 111
+    assert table.loc['a', 'current_dd_duration_days'] == 2  # still below 111, two daily bars
+    assert table.loc['b', 'max_dd_duration_bars'] == 0 and np.isnan(table.loc['b', 'calmar'])
+    assert np.isclose(table.loc['a', 'calmar'], table.loc['a', 'cagr_pct'] / abs(table.loc['a', 'max_dd_pct']))
+
+
+def test_compare_reads_mixed_layouts(tmp_path):
+    index = pd.date_range('2024-01-01', periods=48, freq='h', tz='UTC')
+    pd.Series(np.linspace(100, 120, 48), index=index).to_csv(tmp_path / 'a_equity.csv', header=['equity'])
+    pd.DataFrame({'datetime': index, 'price': 1.0, 'equity': np.linspace(100, 90, 48)}).to_csv(
+        tmp_path / 'b_results.csv')
+    (tmp_path / 'bad_equity.csv').write_text('x\n1\n')
+
+    table = ae.compare([str(tmp_path / '*.csv')], rolling_window=10, workers=2, out=str(tmp_path / 'cmp.csv'))
+    assert list(table['file'].map(lambda p: p.rsplit('/', 1)[-1])) == ['a_equity.csv', 'b_results.csv']
+    assert np.isclose(table['end'].tolist(), [120, 90]).all()
+    assert np.isclose(table['years'].iloc[0], 48 / (365 * 24))
+    assert (tmp_path / 'cmp.csv').exists()
@@ -0,0 +1,57 @@
+import asyncio
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+
+status = importlib.import_module('endpoints.backtest_status')
+results_io = importlib.import_module('src.utils.results_io')
+
+
+def _write_run(logs, name, equity, mtime):
+    index = pd.date_range('2024-01-01', periods=len(equity), freq='h', tz='UTC')
+    path = logs / f'{name}_equity.csv'
+    pd.Series(equity, index=index).to_csv(path, header=['equity'])
+    pd.DataFrame({'side': ['buy', 'sell']}).to_csv(logs / f'{name}_trades.csv', index=False)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_status_and_listing_answer_from_the_index(tmp_path, monkeypatch):
+    logs = tmp_path / 'logs'
+    logs.mkdir()
+    _write_run(logs, 'backtest_ethusd_2y_1h_tuned_20251017T221236Z', np.linspace(100000, 21924.54, 50), 1_000)
+    _write_run(logs, 'backtest_ethusd_2y_1h_20251017T221233Z', np.linspace(100000, 90000, 50), 2_000)
+    monkeypatch.setattr(status, 'LOGS_DIR', logs)
+    monkeypatch.setattr(status, 'INDEX_PATH', str(tmp_path / 'results.sqlite'))
+    monkeypatch.setattr(status, '_STORE', None)
+    monkeypatch.setattr(status, '_last_sync', 0.0)
+
+    res = asyncio.run(status.backtest_status())
+    assert res['end_capital'] == 21924.54
+    assert res['message'].endswith('backtest_ethusd_2y_1h_tuned_20251017T221236Z_* . End capital: 21924.54')
+    assert res['max_drawdown_pct'] < -78
+
+    # a newer run written after the last sync is only picked up on the next (throttled) sync
+    _write_run(logs, 'backtest_ethusd_2y_1h_tuned_20251018T002954Z', np.linspace(100000, 123456.0, 50), 3_000)
+    assert asyncio.run(status.backtest_status())['end_capital'] == 21924.54
+    assert asyncio.run(status.backtest_status(refresh=True))['end_capital'] == 123456.0
+
+    listing = asyncio.run(status.list_backtest_runs(strategy='tuned', order_by='end_capital', descending=False))
+    assert [r['end_capital'] for r in listing['runs']] == [21924.54, 123456.0]
+    assert listing['runs'][0]['trades'] == 2
+    one = asyncio.run(status.get_backtest_run('backtest_ethusd_2y_1h_20251017T221233Z'))
+    assert one['strategy'] == 'default' and one['timeframe'] == '1h'
+
+    # saídas Parquet (src/utils/results_io.py) entram no mesmo índice e a curva sai pelo endpoint
+    name = 'backtest_ethusd_2y_1h_tuned_20251019T000000Z'
+    equity = pd.Series(np.linspace(100000, 150000.0, 300),
+                       index=pd.date_range('2024-01-01', periods=300, freq='h', tz='UTC'))
+    results_io.write_equity(logs / f'{name}_equity.parquet', equity, {'ticker': 'ETH-USD'})
+    results_io.write_trades(logs / f'{name}_trades.parquet', [{'side': 'buy'}, {'side': 'sell'}, {'side': 'buy'}])
+    assert asyncio.run(status.backtest_status(refresh=True))['end_capital'] == 150000.0
+    curve = asyncio.run(status.get_backtest_run_equity(name, max_points=100))
+    assert curve['points'] == 300 and curve['equity'][-1] == 150000.0 and len(curve['equity']) == 100
+    assert curve['metadata'] == {'ticker': 'ETH-USD'} and status.get_store().get_run(name)['trades'] == 3
+    status.get_store().close()
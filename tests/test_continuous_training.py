@@ -0,0 +1,108 @@
+import importlib
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+ct = importlib.import_module('src.ml.continuous_training')
+
+
+class _Network:
+    def __init__(self, weights):
+        self.weights = weights
+
+    def get_weights(self):
+        return [w.copy() for w in self.weights]
+
+    def set_weights(self, weights):
+        self.weights = [w.copy() for w in weights]
+
+
+class CountingAgent:
+    """Stand-in for NeuralTradingAgent: each replay step adds 1 to every weight."""
+
+    def __init__(self, state_size=4, action_size=3, **_):
+        self.state_size, self.action_size, self.epsilon = state_size, action_size, 1.0
+        self.q_network = _Network([np.zeros((state_size, action_size), np.float32), np.zeros(action_size, np.float32)])
+        self.memory = []
+
+    def remember(self, experience):
+        self.memory.append(experience)
+
+    def replay_training(self, batch_size):
+        self.q_network.weights = [w + 1 for w in self.q_network.weights]
+        return 0.5
+
+    def imitation_learning(self, batch_size):
+        pass
+
+    def update_target_network(self):
+        pass
+
+    def evaluate_performance(self):
+        return {'accuracy': 0.6, 'avg_reward': 0.01}
+
+    def calculate_reward(self, action, price_change, confidence):
+        return price_change if action == 1 else -price_change
+
+
+def test_weight_board_double_buffer_roundtrip():
+    weights = [np.arange(6, dtype=np.float32).reshape(2, 3), np.ones(3, np.float64)]
+    board = ct.WeightBoard.create(weights)
+    try:
+        reader = ct.WeightBoard.attach(board.handle)
+        version, read = reader.read()
+        assert version == 0 and read[1].dtype == np.float64
+        board.publish([w * 2 for w in weights])
+        version, read = reader.read()
+        assert version == 1
+        np.testing.assert_array_equal(read[0], weights[0] * 2)
+        reader.close()
+    finally:
+        board.close()
+
+
+def test_trainer_process_publishes_weights_adopted_between_requests():
+    server_agent = CountingAgent()
+    settings = ct.TrainerSettings(batch_size=4, train_every=4, steps_per_session=2, poll_interval=0.05, niceness=0)
+    system = ct.ContinuousLearningSystem(neural_agent=server_agent, agent_factory=CountingAgent,
+                                         agent_kwargs={'state_size': 4, 'action_size': 3}, settings=settings)
+    system.start_continuous_training()
+    try:
+        for i in range(8):
+            exp = SimpleNamespace(state=np.zeros(4), action=i % 3, reward=0.1, next_state=np.ones(4), done=False,
+                                  confidence=0.7, strategy_used='us_market')
+            assert system.submit_experience(exp)
+
+        deadline = time.time() + 60
+        while system.get_training_stats().get('total_experiences', 0) < 8 and time.time() < deadline:
+            time.sleep(0.05)
+        while not system.adopt_latest_weights() and time.time() < deadline:
+            time.sleep(0.05)
+        assert system.adopted_version >= 1
+        # weights move only in whole published versions: every entry equals 2 * sessions
+        value = server_agent.q_network.weights[0][0, 0]
+        assert value > 0 and value % 2 == 0
+        assert all((w == value).all() for w in server_agent.q_network.weights)
+    finally:
+        system.stop_continuous_training()
+    assert system.learning_metrics['total_experiences'] == 8
+    assert not system.learning_active
+
+
+def test_served_decisions_become_experiences_for_the_trainer():
+    settings = ct.TrainerSettings(batch_size=64, poll_interval=0.05, niceness=0)
+    system = ct.ContinuousLearningSystem(neural_agent=CountingAgent(), agent_factory=CountingAgent,
+                                         agent_kwargs={'state_size': 4, 'action_size': 3}, settings=settings)
+    assert not system.record_decision('AAPL', np.zeros(4), 1, 0.8, 'us_market', 100.0)  # treinador parado
+    system.start_continuous_training()
+    try:
+        assert not system.record_decision('AAPL', np.zeros(4), 1, 0.8, 'us_market', 100.0)  # nada a fechar ainda
+        assert not system.record_decision('MSFT', np.zeros(4), 2, 0.7, 'us_market', 50.0)
+        assert system.record_decision('AAPL', np.ones(4), 0, 0.6, 'neural', 101.0)
+        deadline = time.time() + 60
+        while system.get_training_stats().get('total_experiences', 0) < 1 and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        system.stop_continuous_training()
+    assert system.learning_metrics['total_experiences'] == 1
@@ -0,0 +1,72 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+engine_mod = importlib.import_module('src.scaling.correlation_engine')
+multi_asset = importlib.import_module('src.scaling.multi_asset_system')
+
+
+def _returns(T=600, n=10, seed=0):
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.01, (T, 1))
+    returns = rng.normal(0, 0.01, (T, n)) + market * np.linspace(0, 3, n)
+    returns[rng.random((T, n)) < 0.05] = np.nan
+    return returns
+
+
+def test_streaming_window_and_ewma_match_pandas():
+    returns = _returns()
+    cols = [f'a{i}' for i in range(returns.shape[1])]
+    window = engine_mod.StreamingCorrelationEngine(cols, window=100, min_periods=2)
+    for row in returns:  # passa várias vezes pelo rebuild periódico do buffer
+        window.update(row)
+    expected = pd.DataFrame(returns[-100:], columns=cols)
+    assert np.allclose(window.correlation(), expected.corr().values, equal_nan=True)
+    assert np.allclose(window.covariance(), expected.cov().values, equal_nan=True)
+
+    dense = np.nan_to_num(returns)
+    ewma = engine_mod.StreamingCorrelationEngine(cols, alpha=0.05, min_periods=2)
+    ewma.update_many(dense[:200])
+    for row in dense[200:]:
+        ewma.update(row)
+    expected = pd.DataFrame(dense, columns=cols).ewm(alpha=0.05).corr().iloc[-len(cols):].values
+    assert np.allclose(ewma.correlation(), expected)
+
+
+def test_ewma_min_periods_counts_real_observations():
+    returns = _returns(T=80, n=4)
+    cols = [f'a{i}' for i in range(returns.shape[1])]
+    ewma = engine_mod.StreamingCorrelationEngine(cols, alpha=0.1)  # min_periods=30 padrão, 1/alpha = 10
+    ewma.update_many(returns[:20])
+    assert np.isnan(ewma.correlation()).all()
+    for row in returns[20:]:
+        ewma.update(row)
+    observed = np.isfinite(returns).astype(int)
+    pairs = observed.T @ observed
+    corr = ewma.correlation()
+    assert np.isfinite(corr[pairs >= 30]).all() and np.isnan(corr[pairs < 30]).all()
+    assert np.isfinite(ewma.covariance()[pairs >= 30]).all()
+
+
+def test_multi_asset_system_batch_and_per_bar_updates():
+    system = multi_asset.MultiAssetScalingSystem()
+    symbols = ['AAPL', 'MSFT', 'NVDA', 'BTC-USD', 'ETH-USD']
+    returns = np.nan_to_num(_returns(T=400, n=len(symbols), seed=1))
+    prices = pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), columns=symbols)
+
+    result = system.calculate_cross_asset_correlations({s: prices[[s]].rename(columns={s: 'close'})[:300]
+                                                        for s in symbols})
+    expected = prices[:300].pct_change().dropna().tail(252).corr()
+    assert np.allclose(pd.DataFrame(result['full_matrix']).loc[symbols, symbols].values, expected.values)
+    pairs = {(p['asset1'], p['asset2']) for p in result['high_correlations']}
+    upper = expected.where(np.triu(np.ones(expected.shape, dtype=bool), k=1)).stack()
+    assert pairs == set(upper[upper.abs() > 0.7].index)
+
+    for _, row in prices[300:].iterrows():
+        snapshot = system.update_correlations(row.to_dict())
+    expected = prices.pct_change().tail(252).corr()
+    assert np.allclose(system.correlation_engine.correlation(), expected.values)
+    us = expected.loc[['AAPL', 'MSFT', 'NVDA'], ['AAPL', 'MSFT', 'NVDA']].values
+    assert np.isclose(snapshot['class_correlations']['stocks_us']['avg_correlation'], us[np.triu_indices(3, k=1)].mean())
+    assert 'full_matrix' not in snapshot
@@ -0,0 +1,40 @@
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+pytest.importorskip('transformers')
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _keras_module():
+    # DeepPortfolioAgent faz `from config import ...`: carrega com o config de new-rede-a, como o conversor
+    spec = importlib.util.spec_from_file_location('train_rl_portfolio_torch',
+                                                  str(REPO_ROOT / 'agents' / 'train_rl_portfolio_torch.py'))
+    trainer = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(trainer)
+    cfg = trainer._load_module('new_rede_a_config', trainer.NEW_REDE_A_DIR / 'config.py')
+    with trainer._vendored_config(cfg):
+        return trainer._load_module('new_rede_a_DeepPortfolioAgent', trainer.NEW_REDE_A_DIR / 'DeepPortfolioAgent.py')
+
+
+def test_network_retraces_for_training_flag_and_batch_size():
+    module = _keras_module()
+    num_assets, window, features = 3, 10, 4
+    net = module.DeepPortfolioAgentNetwork(
+        num_assets=num_assets, sequence_length=window, num_features_per_asset=features,
+        asset_cnn_filters1=8, asset_cnn_filters2=8, asset_lstm_units1=8, asset_lstm_units2=8,
+        final_dense_units1=16, final_dense_units2=8, use_sentiment_analysis=False)
+    rng = np.random.default_rng(0)
+    for batch in (2, 5):
+        x = rng.normal(size=(batch, window, num_assets * features)).astype(np.float32)
+        for training in (True, False):
+            out = net(x, training=training).numpy()
+            assert out.shape == (batch, num_assets)
+            np.testing.assert_allclose(out.sum(axis=1), 1.0, rtol=1e-5)
+    # a LayerNorm de saída do AssetProcessor é uma só (pesos rastreados e salvos com o modelo)
+    norm_ids = {id(w) for w in net.asset_processor.output_norm.weights}
+    assert len(norm_ids) == 2 and norm_ids <= {id(w) for w in net.asset_processor.trainable_weights}
@@ -0,0 +1,46 @@
+import asyncio
+import importlib
+import os
+
+import numpy as np
+
+pool_mod = importlib.import_module('src.model.inference_pool')
+
+
+def _scale_loader(scale=1.0):
+    # runs inside the spawned worker (spawn copies the parent's sys.path, so this module is importable)
+    def predict(x):
+        if x.ravel()[0] < 0:
+            os._exit(3)  # simulate a crashed worker
+        return (x * scale).sum(axis=(1, 2))[:, None]
+    return predict
+
+
+def test_worker_pool_predicts_and_recovers_from_crash():
+    async def scenario():
+        pool = pool_mod.ModelWorkerPool(num_workers=2, loader='test_inference_pool:_scale_loader',
+                                         loader_kwargs={'scale': 2.0}, health_interval=0.1)
+        await pool.start()
+        try:
+            x = np.ones((1, 60, 18), dtype=np.float32)
+            results = await asyncio.gather(*(pool.predict(x) for _ in range(8)))
+            assert all(r.shape == (1, 1) and r[0, 0] == 2160.0 for r in results)
+
+            try:
+                await pool.predict(-x)
+                assert False, 'expected WorkerError'
+            except pool_mod.WorkerError:
+                pass
+            # the surviving worker keeps serving while the crashed one is respawned
+            assert (await pool.predict(x))[0, 0] == 2160.0
+            for _ in range(100):
+                health = pool.health_check()
+                if all(w['alive'] and not w['restarting'] for w in health['workers']):
+                    break
+                await asyncio.sleep(0.1)
+            assert sum(w['restarts'] for w in health['workers']) == 1
+            assert all(w['alive'] for w in health['workers'])
+        finally:
+            await pool.close()
+
+    asyncio.run(scenario())
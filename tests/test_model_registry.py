@@ -0,0 +1,102 @@
+import asyncio
+import importlib
+
+import pytest
+
+registry_mod = importlib.import_module('src.model.model_registry')
+
+
+class FakePredictor:
+    def __init__(self, model_dir, model_filename, pv_scaler_filename, ind_scaler_filename, logger_instance=None,
+                 torchscript_path=None, vec_normalize_filename=None):
+        self.model_dir = model_dir
+        self.torchscript_path = torchscript_path
+        self.vec_normalize_filename = vec_normalize_filename
+        self.model = None
+        self.torchscript_policy = object()
+        self.price_volume_scaler = None
+        self.indicator_scaler = None
+        self.model_version = None
+
+    def _load_model_and_scalers(self):
+        self.price_volume_scaler = object()
+        self.indicator_scaler = object()
+
+    def _predict_with_torchscript(self, processed_input):
+        return processed_input
+
+
+def _make_source(tmp_path, tag):
+    src = tmp_path / f'src_{tag}'
+    src.mkdir()
+    for name in ('model.zip', 'pv.joblib', 'ind.joblib', 'vec_normalize_stats.pkl'):
+        (src / name).write_bytes(f'{tag}-{name}'.encode())
+    return src
+
+
+def test_register_activate_rollback(tmp_path):
+    swapped = []
+    registry = registry_mod.ModelRegistry(str(tmp_path / 'registry'), predictor_factory=FakePredictor,
+                                          on_activate=swapped.append)
+    v1 = registry.register_version(str(_make_source(tmp_path, 'a')), 'model.zip', 'pv.joblib', 'ind.joblib', version='v1')
+    v2 = registry.register_version(str(_make_source(tmp_path, 'b')), 'model.zip', 'pv.joblib', 'ind.joblib', version='v2')
+    assert [m['version'] for m in registry.list_versions()] == [v1, v2]
+    assert 'vec_normalize' in registry.read_bundle_manifest(v1)['files']
+    assert registry.verify_version(v1) == []
+
+    asyncio.run(registry.activate(v1))
+    asyncio.run(registry.activate(v2))
+    assert registry.active_version == 'v2'
+    assert registry.persisted_version == 'v2'
+    assert swapped[-1].model_version == 'v2'
+
+    asyncio.run(registry.rollback())
+    assert registry.active_version == 'v1'
+    assert registry.health_check()['active_version'] == 'v1'
+
+
+def test_corrupted_bundle_is_not_swapped_in(tmp_path):
+    registry = registry_mod.ModelRegistry(str(tmp_path / 'registry'), predictor_factory=FakePredictor)
+    v1 = registry.register_version(str(_make_source(tmp_path, 'a')), 'model.zip', 'pv.joblib', 'ind.joblib', version='v1')
+    v2 = registry.register_version(str(_make_source(tmp_path, 'b')), 'model.zip', 'pv.joblib', 'ind.joblib', version='v2')
+    asyncio.run(registry.activate(v1))
+
+    (registry.version_dir(v2) / 'pv.joblib').write_bytes(b'tampered')
+    assert registry.verify_version(v2) == ['pv_scaler']
+    with pytest.raises(ValueError):
+        asyncio.run(registry.activate(v2))
+    assert registry.active_version == 'v1'
+
+
+def test_activation_serves_torchscript_and_vec_normalize_from_bundle(tmp_path):
+    swapped = []
+    registry = registry_mod.ModelRegistry(str(tmp_path / 'registry'), predictor_factory=FakePredictor,
+                                          on_activate=swapped.append)
+    src = _make_source(tmp_path, 'a')
+    (src / 'policy.pt').write_bytes(b'a-policy')
+    v1 = registry.register_version(str(src), 'model.zip', 'pv.joblib', 'ind.joblib', version='v1',
+                                   torchscript_path='out/sb3_export/policy.pt')
+    v2 = registry.register_version(str(_make_source(tmp_path, 'b')), 'model.zip', 'pv.joblib', 'ind.joblib',
+                                   version='v2', torchscript_path=None)
+
+    asyncio.run(registry.activate(v1))
+    assert swapped[-1].torchscript_path == str(registry.version_dir(v1) / 'policy.pt')
+    assert swapped[-1].vec_normalize_filename == 'vec_normalize_stats.pkl'
+    asyncio.run(registry.activate(v2))
+    assert swapped[-1].torchscript_path == ''
+
+
+def test_async_on_activate_receives_bundle_kwargs(tmp_path):
+    served = []
+
+    async def rebuild_pool(predictor):
+        served.append((predictor.model_version, registry.predictor_kwargs(predictor.model_version)))
+
+    registry = registry_mod.ModelRegistry(str(tmp_path / 'registry'), predictor_factory=FakePredictor,
+                                          on_activate=rebuild_pool)
+
+    v1 = registry.register_version(str(_make_source(tmp_path, 'a')), 'model.zip', 'pv.joblib', 'ind.joblib', version='v1')
+    asyncio.run(registry.activate(v1))
+    version, kwargs = served[-1]
+    assert version == 'v1'
+    assert kwargs['model_dir'] == str(registry.version_dir(v1)) and kwargs['model_filename'] == 'model.zip'
@@ -0,0 +1,39 @@
+import importlib
+
+import numpy as np
+import pytest
+
+mc = importlib.import_module('src.optimization.monte_carlo')
+
+
+def test_mean_matches_closed_form_and_workers_do_not_change_result():
+    engine = mc.MonteCarloEngine(win_rate=0.55, win_return=0.01, loss_return=-0.01, size=0.5, ruin_level=0.0)
+    result = engine.run(100.0, 100_000, 100, seed=1)
+    expected = 100.0 * (1 + 0.5 * (0.55 * 0.01 - 0.45 * 0.01)) ** 100  # trades independentes: E[Π] = Π E
+    assert abs(result['final_mean'] / expected - 1) < 1e-3
+    assert result['steps'][0] == 0 and result['steps'][-1] == 100 and np.isclose(result['mean'][0], 100.0)
+
+    engine = mc.MonteCarloEngine(win_rate=mc.Dist.beta_mean(0.5, 50), win_return=mc.Dist.uniform(0.005, 0.03),
+                                 loss_return=mc.Dist.normal(-0.01, 0.005), size=mc.Dist.uniform(0.1, 0.3), fee=0.001)
+    single = engine.run(50.0, 20_000, 60, seed=3, block_size=4096, keep_paths=True)
+    pooled = engine.run(50.0, 20_000, 60, seed=3, block_size=4096, keep_paths=True, workers=2)
+    assert np.array_equal(single['final_equity'], pooled['final_equity'])
+    assert single['bands']['5'][-1] <= single['bands']['50'][-1] <= single['bands']['95'][-1]
+
+
+def test_gamblers_ruin_probability():
+    # aposta fixa de 1 com ganho/perda de 100%: saindo de 5, parar em 10 ou ao ficar sem saldo para apostar
+    engine = mc.MonteCarloEngine(win_rate=0.45, win_return=1.0, loss_return=-1.0, sizing='fixed', size=1.0,
+                                 min_trade=1.0, target=10, stop_at_target=True)
+    result = engine.run(5.0, 100_000, 2000, seed=2)
+    r = 0.55 / 0.45
+    expected = (r ** 5 - 1) / (r ** 10 - 1)
+    assert abs(result['prob_target'] - expected) < 0.01
+    assert np.isclose(result['prob_ruin'] + result['prob_target'], 1.0)
+    assert result['prob_ruin_curve'][0] == 0 and np.isclose(result['prob_ruin_curve'][-1], result['prob_ruin'])
+
+
+def test_run_rejects_empty_simulation():
+    engine = mc.MonteCarloEngine(win_rate=0.5, win_return=0.01, loss_return=-0.01)
+    with pytest.raises(ValueError, match='n_paths'):
+        engine.run(100.0, 0, 10)
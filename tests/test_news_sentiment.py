@@ -0,0 +1,53 @@
+import importlib
+
+import numpy as np
+import pytest
+
+ns = importlib.import_module('src.model.news_sentiment')
+
+
+class _CountingEmbedder:
+    """Deterministic 3-dim 'model' that records how many texts it embedded."""
+    dim = 3
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += len(texts)
+        return np.array([[len(t), t.count(' '), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_cache_hits_skip_the_model_and_aggregate_per_asset_timestep(tmp_path):
+    embedder = _CountingEmbedder()
+    store = ns.NewsEmbeddingStore(str(tmp_path), dim=3)
+    service = ns.NewsSentimentService(store, embedder)
+
+    texts = ['Apple beats estimates', 'apple  beats estimates', 'Oil falls', 'Bank rallies']
+    service.ensure_embedded(texts)
+    assert embedder.calls == 3 and len(store) == 3  # normalised duplicate embedded once
+    service.ensure_embedded(texts)
+    assert embedder.calls == 3
+
+    # a fresh reader (no model) serves the same vectors by lookup only
+    reader = ns.NewsSentimentService(ns.NewsEmbeddingStore(str(tmp_path)))
+    np.testing.assert_array_equal(reader.embed_texts(texts, embed_missing=False), service.embed_texts(texts))
+
+    timestamps = np.array(['2024-01-01T10', '2024-01-01T11', '2024-01-01T12'], dtype='datetime64[ns]')
+    published = np.array(['2024-01-01T09:30', '2024-01-01T10:15', '2024-01-01T10:45', '2024-01-01T09:00'],
+                         dtype='datetime64[ns]')
+    tensor, counts = reader.build_sentiment_tensor(texts, ['AAPL', 'AAPL', 'XOM', 'AAPL'], published, timestamps,
+                                                   ['AAPL', 'XOM'], forward_fill=True, embed_missing=False)
+    assert tensor.shape == (3, 2, 3)
+    np.testing.assert_array_equal(counts, [[2, 0], [1, 1], [0, 0]])
+    first = reader.embed_texts(texts, embed_missing=False)
+    np.testing.assert_allclose(tensor[0, 0], first[[0, 3]].mean(axis=0))
+    np.testing.assert_allclose(tensor[2, 1], first[2])  # forward-filled
+    np.testing.assert_array_equal(tensor[0, 1], 0.0)
+
+
+def test_store_records_output_mode_and_rejects_another(tmp_path):
+    ns.NewsEmbeddingStore(str(tmp_path), dim=3, model_name='m', output='probs')
+    assert ns.NewsEmbeddingStore(str(tmp_path), output='probs').meta['output'] == 'probs'
+    with pytest.raises(ValueError, match='output'):
+        ns.NewsEmbeddingStore(str(tmp_path), model_name='m', output='cls')
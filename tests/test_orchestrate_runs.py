@@ -0,0 +1,59 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+orch = importlib.import_module('scripts.orchestrate_runs')
+results_store = importlib.import_module('src.utils.results_store')
+results_io = importlib.import_module('src.utils.results_io')
+
+
+def _write_ohlcv(path, n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    pd.DataFrame({'open': close, 'high': close * 1.005, 'low': close * 0.995, 'close': close,
+                  'volume': rng.lognormal(5, 0.5, n)},
+                 index=pd.date_range('2024-01-01', periods=n, freq='h', tz='UTC')).to_csv(path)
+
+
+def test_matrix_is_deterministic_and_expands_grids():
+    strategies = {'vol_momentum': {'lookback': [24, 48], 'fee': 0.0005}, 'momentum': {}}
+    runs = orch.build_matrix({'b': 'B-USD', 'a': 'A-USD'}, ['1h'], strategies)
+    again = orch.build_matrix({'a': 'A-USD', 'b': 'B-USD'}, ['1h'], strategies)
+
+    assert [r.key for r in runs] == [r.key for r in again]
+    assert len(runs) == 6 and runs[0].asset == 'a'
+    assert len({r.key for r in runs}) == 6
+
+
+def test_run_matrix_records_every_run_in_the_index(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    _write_ohlcv(data_dir / 'crypto_eth_1h.csv', seed=1)
+    _write_ohlcv(data_dir / 'BTC-USD_1h.csv', seed=2)
+    runs = orch.build_matrix({'crypto_eth': 'ETH-USD', 'crypto_btc': 'BTC-USD', 'missing': 'NOPE'}, ['1h'],
+                             {'vol_momentum': {'lookback': [24, 48]}})
+    events = []
+
+    def loader(asset, ticker, timeframe, data_dir_, period):
+        if asset == 'missing':
+            raise FileNotFoundError(ticker)
+        return orch.load_ohlcv(asset, ticker, timeframe, data_dir_, period)
+
+    db = tmp_path / 'results.sqlite'
+    summary = orch.run_matrix(runs, data_dir=str(data_dir), workers=2, out_root=str(tmp_path / 'runs'),
+                              db_path=str(db), sweep_id='s1', loader=loader, on_event=events.append)
+
+    assert (summary['finished'], summary['failed']) == (4, 2)
+    assert sum(e['event'] == 'started' for e in events) == 4
+    with results_store.ResultsStore(str(db)) as store:
+        finished = store.list_runs(sweep_id='s1', status='finished', order_by='sharpe')
+        assert len(finished) == 4
+        best = finished[0]
+        assert best['run_id'] == f"s1:{best['run_key']}" and best['params']['lookback'] in (24, 48)
+        equity = results_io.read_equity(best['equity_path']).to_numpy()
+        assert results_io.read_metadata(best['equity_path'])['run_key'] == best['run_key']
+        assert np.isclose(best['end_capital'], equity[-1])
+        assert np.isclose(best['max_drawdown_pct'], results_store.summarize_equity(equity)['max_drawdown_pct'])
+        failed = store.list_runs(sweep_id='s1', status='failed')
+        assert {r['asset'] for r in failed} == {'missing'} and 'FileNotFoundError' in failed[0]['error']
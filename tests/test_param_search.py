@@ -0,0 +1,116 @@
+import sys
+import types
+import importlib
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ps = importlib.import_module('scripts.param_search')
+
+
+def _ohlcv(n=1500, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.012, n)))
+    open_ = close * np.exp(rng.normal(0, 0.01, n))
+    return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) * 1.005,
+                         'low': np.minimum(open_, close) * 0.995, 'close': close,
+                         'volume': rng.lognormal(5, 0.6, n)},
+                        index=pd.date_range('2024-01-01', periods=n, freq='h'))
+
+
+def _momentum_frame(df):
+    """Indicadores do momentum sem pandas_ta (médias simples no lugar de ATR/RSI/EMA)."""
+    close = df['close']
+    return pd.DataFrame({
+        'open': df['open'], 'close': close,
+        'atr': (df['high'] - df['low']).rolling(14).mean(),
+        'momentum_5': close.pct_change(5),
+        'volume_ratio': df['volume'] / df['volume'].rolling(20).mean(),
+        'rsi': 50 + 50 * close.pct_change(14).clip(-1, 1),
+        'high_20': df['high'].rolling(20).max(), 'low_20': df['low'].rolling(20).min(),
+        'trend': close.rolling(12).mean() / close.rolling(26).mean() - 1,
+    })
+
+
+def test_simulate_stop_target_and_reentry():
+    close = np.array([100, 100, 103, 103, 101, 99, 99, 98], dtype=float)
+    entry = np.array([1, 0, 0, 1, 0, 0, 0, 0], dtype=bool)
+    metrics, equity = ps.simulate(close, entry, np.zeros(8, dtype=bool), start=0, position_size=0.5,
+                                  take_profit=0.03, stop_frac=np.full(8, 0.02))
+    # long 100 -> target em 103 (+1500); long 103 -> stop em 99 (<= 100.94)
+    assert metrics['total_trades'] == 2
+    assert np.isclose(equity[2], 101500)
+    assert np.isclose(metrics['final_equity'], 101500 + (99 - 103) / 103 * 50750)
+    assert len(equity) == 8 and metrics['win_rate_pct'] == 50
+
+
+def test_run_search_ranks_configs_over_shared_frames():
+    spec = ps.STRATEGIES['momentum']
+    df = _ohlcv()
+    space = {'rsi_period': [14, 21], 'take_profit_pct': [2.0, 4.0], 'position_size': [0.1, 0.3]}
+    params = ps.grid_params(spec, space)
+    frames = {ps.indicator_key(spec, p): _momentum_frame(df) for p in params}
+
+    table = ps.run_search('momentum', frames, params, workers=2, early_stop_dd=0.05)
+    serial = ps.run_search('momentum', frames, params, workers=1, early_stop_dd=0.05)
+
+    assert len(table) == 8 and list(table['rank']) == list(range(1, 9))
+    pd.testing.assert_frame_equal(table, serial)
+    done = table[~table['early_stopped']]
+    assert done['total_return_pct'].is_monotonic_decreasing
+    assert table['early_stopped'].is_monotonic_increasing
+    assert len(ps.random_params(spec, 5, seed=0, space=space)) == 5
+
+
+def _momentum_indicators(df, rsi_period=14):
+    """Colunas de AggressiveMomentumStrategy.calculate_indicators em pandas puro (ATR/RSI de Wilder, EMAs)."""
+    df = df.copy()
+    close = df['close']
+    df['momentum_5'] = close.pct_change(5)
+    true_range = pd.concat([df['high'] - df['low'], (df['high'] - close.shift()).abs(),
+                            (df['low'] - close.shift()).abs()], axis=1).max(axis=1)
+    df['atr'] = true_range.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    df['volume_ratio'] = df['volume'] / df['volume'].rolling(20).mean()
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / rsi_period, adjust=False, min_periods=rsi_period).mean()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / rsi_period, adjust=False, min_periods=rsi_period).mean()
+    df['rsi'] = 100 - 100 / (1 + gain / loss)
+    df['high_20'] = df['high'].rolling(20).max()
+    df['low_20'] = df['low'].rolling(20).min()
+    ema_fast = close.ewm(span=12, adjust=False, min_periods=12).mean()
+    ema_slow = close.ewm(span=26, adjust=False, min_periods=26).mean()
+    df['trend'] = (ema_fast - ema_slow) / ema_slow
+    return df
+
+
+def _original_momentum_module(monkeypatch):
+    """scripts/momentum_strategy.py carregado pelo caminho; sem pandas_ta, `ta` fica vazio (os indicadores vêm
+    de _momentum_indicators, só o loop do backtest original é usado)."""
+    if importlib.util.find_spec('pandas_ta') is None:
+        monkeypatch.setitem(sys.modules, 'pandas_ta', types.ModuleType('pandas_ta'))
+    path = Path(__file__).resolve().parents[1] / 'scripts' / 'momentum_strategy.py'
+    spec = importlib.util.spec_from_file_location('_original_momentum_strategy', str(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('take_profit_pct', [2.0, 3.0])
+def test_vectorized_momentum_matches_original_backtest(monkeypatch, take_profit_pct):
+    module = _original_momentum_module(monkeypatch)
+    spec = ps.STRATEGIES['momentum']
+    df = _ohlcv(1000, seed=1)
+    params = {**spec.defaults, 'take_profit_pct': take_profit_pct}
+    strategy = module.AggressiveMomentumStrategy(**params)
+    strategy.calculate_indicators = lambda data: _momentum_indicators(data, params['rsi_period'])
+    results, trades, stats = strategy.backtest(df)
+
+    frame = _momentum_indicators(df, params['rsi_period'])
+    frame = {c: frame[c].to_numpy(dtype=float) for c in spec.columns}
+    metrics, equity = ps.simulate(frame['close'], **spec.rules(frame, params))
+    assert stats['total_trades'] > 5
+    assert metrics['total_trades'] == stats['total_trades']
+    np.testing.assert_allclose(equity, results['equity'].to_numpy())
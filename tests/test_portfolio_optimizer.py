@@ -0,0 +1,87 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+po = importlib.import_module('src.scaling.portfolio_optimizer')
+multi_asset = importlib.import_module('src.scaling.multi_asset_system')
+
+
+def _problem(n=40, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0, 0.01, (500, 2)) @ rng.normal(1, 0.5, (2, n)) + rng.normal(0, 0.01, (500, n))
+    groups = [('a', 'b', 'c', None)[i % 4] for i in range(n)]
+    return np.cov(returns.T), returns.mean(axis=0), [f's{i}' for i in range(n)], groups
+
+
+def test_constrained_solutions_match_long_gradient_run_and_warm_start():
+    cov, mu, symbols, groups = _problem()
+    caps = {'a': 0.2, 'b': 0.3}
+    for method in ('min_variance', 'mean_variance'):
+        optimizer = po.PortfolioOptimizer(max_weight=0.1)
+        w, info = optimizer.optimize(cov, symbols, method, expected_returns=mu, risk_aversion=20, groups=groups,
+                                     group_caps=caps)
+        sums = {g: w[[x == g for x in groups]].sum() for g in caps}
+        assert np.isclose(w.sum(), 1) and w.min() >= -1e-12 and w.max() <= 0.1 + 1e-12
+        assert all(sums[g] <= caps[g] + 1e-12 for g in caps)
+
+        reference = po.PortfolioOptimizer(max_weight=0.1, tol=1e-13, max_iter=20000)
+        reference.POLISH_EVERY = 10 ** 9  # só gradiente projetado
+        w_ref, _ = reference.optimize(cov, symbols, method, expected_returns=mu, risk_aversion=20, groups=groups,
+                                      group_caps=caps)
+        lam, m = (1.0, 0 * mu) if method == 'min_variance' else (20.0, mu)
+        objective = lambda x: 0.5 * lam * x @ cov @ x - m @ x  # noqa: E731
+        assert objective(w) <= objective(w_ref) + 1e-12
+
+        _, again = optimizer.optimize(cov * 1.001, symbols, method, expected_returns=mu, risk_aversion=20,
+                                      groups=groups, group_caps=caps)
+        assert again['warm_start'] and again['iterations'] == 0
+
+
+def test_risk_parity_and_closed_form():
+    cov, _, symbols, _ = _problem(n=15, seed=1)
+    w, info = po.PortfolioOptimizer().optimize(cov, symbols, 'risk_parity')
+    assert np.allclose(info['risk_contributions'], 1 / 15) and info['converged']
+
+    # correlação constante e vols próximas: a solução sem restrições já é long-only -> forma fechada
+    vols = np.random.default_rng(1).uniform(0.015, 0.02, 15)
+    cov = 0.3 * np.outer(vols, vols) + np.diag(0.7 * vols ** 2)
+    w, info = po.PortfolioOptimizer().optimize(cov, symbols, 'min_variance')
+    inv = np.linalg.solve(cov, np.ones(15))
+    assert info['solver'] == 'closed_form'
+    assert np.allclose(w, inv / inv.sum()) and np.isclose(w.sum(), 1)
+
+
+def test_system_uses_covariance_from_the_correlation_engine():
+    system = multi_asset.MultiAssetScalingSystem()
+    rng = np.random.default_rng(2)
+    symbols = list(system.supported_assets)[:30]
+    system.calculate_cross_asset_correlations(
+        {s: pd.DataFrame({'close': 100 * np.cumprod(1 + rng.normal(0, 0.01, 300))}) for s in symbols})
+
+    portfolio = system.optimize_multi_asset_portfolio(100000, risk_tolerance='conservative', method='min_variance')
+    weights = {s: a['allocation_percentage'] for s, a in portfolio['selected_assets'].items()}
+    assert np.isclose(sum(weights.values()) + portfolio['cash_percentage'], 1)  # tetos conservadores < 100%
+    assert portfolio['cash_percentage'] > 0 and max(weights.values()) <= 0.25 + 1e-9
+    for name, allocation in portfolio['class_allocations'].items():
+        cap = system.risk_configs[multi_asset.AssetClass(name)]['max_allocation'] * 0.5
+        assert allocation['percentage'] <= cap + 1e-9
+    assert len(system.optimize_multi_asset_portfolio(1000)['selected_assets']) > 0  # heurística continua
+
+
+def test_few_assets_per_class_keep_the_remainder_in_cash():
+    system = multi_asset.MultiAssetScalingSystem()
+    rng = np.random.default_rng(3)
+    symbols = ['AAPL', 'MSFT', 'BTC-USD', 'ETH-USD']
+    system.calculate_cross_asset_correlations(
+        {s: pd.DataFrame({'close': 100 * np.cumprod(1 + rng.normal(0, 0.01, 300))}) for s in symbols})
+
+    for risk_tolerance in ('conservative', 'medium', 'aggressive'):
+        for method in ('min_variance', 'risk_parity'):
+            portfolio = system.optimize_multi_asset_portfolio(1000, risk_tolerance, method=method)
+            weights = {s: a['allocation_percentage'] for s, a in portfolio['selected_assets'].items()}
+            assert portfolio['method'] == method and set(weights) == set(symbols)
+            assert max(weights.values()) <= 0.25 + 1e-9
+            assert np.isclose(sum(weights.values()) + portfolio['cash_percentage'], 1)
+    # agressivo: ações limitadas a 2 x 25% pelo teto por ativo, não pelo teto da classe (60%)
+    assert np.isclose(portfolio['class_allocations']['stocks_us']['percentage'], 0.5)
@@ -0,0 +1,65 @@
+import importlib
+
+import numpy as np
+
+rb = importlib.import_module('src.ml.replay_buffer')
+
+
+def _fill(buffer, n):
+    for i in range(n):
+        buffer.add(np.full(3, i), i % 3, float(i), np.full(3, i + 1), i % 5 == 0,
+                   confidence=i / n, is_expert=i % 2 == 0)
+
+
+def test_ring_buffer_overwrites_oldest_and_keeps_order():
+    buffer = rb.ReplayBuffer(capacity=8, state_size=3)
+    _fill(buffer, 13)
+
+    assert len(buffer) == 8
+    recent = buffer.recent_indices(4)
+    np.testing.assert_array_equal(buffer.rewards[recent], [9, 10, 11, 12])
+    batch = buffer.batch(buffer.recent_indices())
+    np.testing.assert_array_equal(batch['states'][:, 0], np.arange(5, 13))
+    np.testing.assert_array_equal(batch['next_states'][:, 0], np.arange(6, 14))
+    np.testing.assert_array_equal(batch['actions'], np.arange(5, 13) % 3)
+
+
+def test_masked_sampling_only_returns_candidates():
+    buffer = rb.ReplayBuffer(capacity=100, state_size=3)
+    _fill(buffer, 40)
+    rng = np.random.default_rng(0)
+
+    idx = buffer.sample_indices(10, rng, mask=buffer.is_expert)
+    assert len(set(idx.tolist())) == 10
+    assert buffer.is_expert[idx].all()
+    assert (idx < len(buffer)).all()
+    assert buffer.sample(64, rng)['states'].shape == (40, 3)
+
+
+def test_sum_tree_matches_cumulative_search():
+    rng = np.random.default_rng(1)
+    tree = rb.SumTree(13)
+    priorities = rng.random(13)
+    tree.update(np.arange(13), priorities)
+    tree.update([4, 4], [0.0, 0.0])  # repeated index, zero priority
+    priorities[4] = 0.0
+
+    assert np.isclose(tree.total, priorities.sum())
+    values = rng.random(1000) * tree.total
+    expected = np.searchsorted(np.cumsum(priorities), values, side='right')
+    np.testing.assert_array_equal(tree.find(values), expected)
+    assert not (tree.find(values) == 4).any()
+
+
+def test_prioritized_sampling_follows_td_errors():
+    buffer = rb.PrioritizedReplayBuffer(capacity=1000, state_size=3, alpha=1.0, beta=0.5)
+    _fill(buffer, 1000)
+    td_errors = np.full(1000, 0.01)
+    td_errors[:10] = 10.0
+    buffer.update_priorities(np.arange(1000), td_errors)
+
+    batch = buffer.sample(256, np.random.default_rng(0))
+    assert (batch['indices'] < 10).mean() > 0.8
+    assert batch['weights'].max() == 1.0
+    # rarely sampled transitions get the largest importance-sampling weights
+    assert batch['weights'][batch['indices'] >= 10].min() > batch['weights'][batch['indices'] < 10].max()
@@ -0,0 +1,56 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+results_io = importlib.import_module('src.utils.results_io')
+
+
+@pytest.mark.parametrize('suffix', ['.parquet', '.arrow'])
+def test_streamed_records_roundtrip_with_types_and_metadata(tmp_path, suffix):
+    path = tmp_path / f'run_trades{suffix}'
+    index = pd.date_range('2024-01-01', periods=2500, freq='min', tz='UTC')
+    with results_io.ResultsWriter(path, metadata={'ticker': 'ETH-USD', 'params': {'lookback': 24}},
+                                  row_group_size=1000) as writer:
+        for i, ts in enumerate(index):
+            writer.append({'timestamp': ts, 'side': 'buy' if i % 2 else 'sell', 'qty': i * 0.5, 'bar': i})
+        assert not path.exists()  # só aparece no close (tmp + rename)
+
+    df = results_io.read_results(path)
+    assert len(df) == results_io.count_rows(path) == 2500
+    assert isinstance(df['timestamp'].dtype, pd.DatetimeTZDtype) and df['bar'].dtype == np.int64
+    assert df['timestamp'].iloc[-1] == index[-1] and df['qty'].iloc[3] == 1.5
+    assert results_io.read_metadata(path) == {'ticker': 'ETH-USD', 'params': {'lookback': 24}}
+    assert list(results_io.read_results(path, columns=['bar']).columns) == ['bar']
+    if suffix == '.parquet':
+        assert pq.ParquetFile(path).metadata.num_row_groups == 3
+
+
+def test_equity_helpers_and_csv_compatibility(tmp_path):
+    equity = pd.Series(np.linspace(100, 120, 50), index=pd.date_range('2024-01-01', periods=50, freq='h', tz='UTC'))
+    parquet = results_io.write_equity(tmp_path / 'a_equity.parquet', equity, {'run': 'a'})
+    csv = results_io.write_equity(tmp_path / 'a_equity.csv', equity)
+
+    for path in (parquet, csv):
+        back = results_io.read_equity(path)
+        assert np.allclose(back.to_numpy(), equity.to_numpy()) and back.index[-1] == equity.index[-1]
+    assert results_io.read_metadata(csv) == {} and results_io.count_rows(csv) == 50
+
+    # trades com chaves diferentes por registro e arquivo vazio mantêm schema tipado
+    trades = results_io.write_trades(tmp_path / 't.parquet', [{'side': 'buy', 'alloc': 1.0},
+                                                               {'side': 'sell', 'reason': 'stop_loss'}])
+    assert results_io.read_results(trades)['reason'].isna().tolist() == [True, False]
+    empty = results_io.write_trades(tmp_path / 'e.parquet', pd.DataFrame({'side': pd.Series([], dtype=str)}))
+    assert results_io.count_rows(empty) == 0 and results_io.read_schema_names(empty) == ['side']
+
+
+def test_nothing_written_returns_none_and_csv_fallback_without_pyarrow(tmp_path, monkeypatch):
+    assert results_io.write_trades(tmp_path / 'none.parquet', []) is None
+    assert not (tmp_path / 'none.parquet').exists()
+
+    monkeypatch.setattr(results_io, '_HAS_PYARROW', False)
+    assert results_io.results_suffix('parquet') == '.csv'
+    path = results_io.write_trades(tmp_path / f"t{results_io.results_suffix()}", [{'side': 'buy'}])
+    assert results_io.read_results(path)['side'].tolist() == ['buy']
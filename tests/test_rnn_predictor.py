@@ -63,3 +63,60 @@ def test_align_window_to_scaler_and_preprocess():
     assert 'pv_n_features_in' in health
     assert 'ind_n_features_in' in health
     assert health['expected_scaled_features_for_model_len'] == len(EXPECTED_SCALED_FEATURES_FOR_MODEL)
+
+
+def test_compiled_scaler_pipeline_matches_sklearn():
+    from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+    cols = list(dict.fromkeys(rnn.API_PRICE_VOL_COLS_TO_SCALE + rnn.API_INDICATOR_COLS_TO_SCALE))
+    features = pd.DataFrame(np.random.randn(WINDOW_SIZE + 20, len(cols)), columns=cols)
+
+    for scaler_cls in (MinMaxScaler, StandardScaler):
+        pv_s = scaler_cls().fit(np.random.randn(50, len(rnn.API_PRICE_VOL_COLS_TO_SCALE)) * 3)
+        ind_s = scaler_cls().fit(np.random.randn(50, len(rnn.API_INDICATOR_COLS_TO_SCALE)) * 2)
+
+        pipeline = rnn.compile_scaler_pipeline(pv_s, ind_s, EXPECTED_SCALED_FEATURES_FOR_MODEL)
+        assert pipeline is not None
+
+        expected = rnn.preprocess_for_model_prediction(features, pv_s, ind_s, EXPECTED_SCALED_FEATURES_FOR_MODEL, WINDOW_SIZE, logger_instance=None)
+        fused = rnn.preprocess_for_model_prediction(features, pv_s, ind_s, EXPECTED_SCALED_FEATURES_FOR_MODEL, WINDOW_SIZE, logger_instance=None, scaler_pipeline=pipeline)
+        assert fused.shape == expected.shape == (1, WINDOW_SIZE, len(EXPECTED_SCALED_FEATURES_FOR_MODEL))
+        np.testing.assert_allclose(fused, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_compiled_scaler_pipeline_zero_filled_inputs_and_dtype():
+    from sklearn.preprocessing import StandardScaler
+
+    cols = list(dict.fromkeys(rnn.API_PRICE_VOL_COLS_TO_SCALE + rnn.API_INDICATOR_COLS_TO_SCALE))
+    features = pd.DataFrame(np.random.randn(WINDOW_SIZE + 20, len(cols)), columns=cols)
+    # first PV scaler input has no API column: both paths must zero-fill it (no NaN)
+    pv_names = ['crypto_btc_unmapped_input'] + list(rnn.API_PRICE_VOL_COLS_TO_SCALE)
+    pv_s = StandardScaler().fit(pd.DataFrame(np.random.randn(50, len(pv_names)), columns=pv_names))
+    ind_s = StandardScaler().fit(np.random.randn(50, len(rnn.API_INDICATOR_COLS_TO_SCALE)))
+
+    pipeline = rnn.compile_scaler_pipeline(pv_s, ind_s, EXPECTED_SCALED_FEATURES_FOR_MODEL)
+    expected = rnn.preprocess_for_model_prediction(features, pv_s, ind_s, EXPECTED_SCALED_FEATURES_FOR_MODEL, WINDOW_SIZE, logger_instance=None)
+    fused = rnn.preprocess_for_model_prediction(features, pv_s, ind_s, EXPECTED_SCALED_FEATURES_FOR_MODEL, WINDOW_SIZE, logger_instance=None, scaler_pipeline=pipeline)
+    assert fused.dtype == expected.dtype == np.float64
+    assert np.isfinite(fused).all()
+    np.testing.assert_allclose(fused, expected)
+
+
+def test_vec_normalize_stats_applied_in_preprocessing(tmp_path):
+    import pickle
+    from sklearn.preprocessing import StandardScaler
+
+    cols = list(dict.fromkeys(rnn.API_PRICE_VOL_COLS_TO_SCALE + rnn.API_INDICATOR_COLS_TO_SCALE))
+    features = pd.DataFrame(np.random.randn(WINDOW_SIZE + 5, len(cols)), columns=cols)
+    pv_s = StandardScaler().fit(np.random.randn(50, len(rnn.API_PRICE_VOL_COLS_TO_SCALE)))
+    ind_s = StandardScaler().fit(np.random.randn(50, len(rnn.API_INDICATOR_COLS_TO_SCALE)))
+    n_features = len(EXPECTED_SCALED_FEATURES_FOR_MODEL)
+    mean, var = np.full(n_features, 0.5), np.full(n_features, 4.0)
+    path = tmp_path / 'vec_normalize_stats.pkl'
+    path.write_bytes(pickle.dumps({'mean': mean, 'var': var, 'clip_obs': 1.0}))
+
+    normalizer = rnn.ObservationNormalizer.load(str(path))
+    assert normalizer.compatible_with((WINDOW_SIZE, n_features))
+    raw = rnn.preprocess_for_model_prediction(features, pv_s, ind_s, EXPECTED_SCALED_FEATURES_FOR_MODEL, WINDOW_SIZE, logger_instance=None)
+    normed = rnn.preprocess_for_model_prediction(features, pv_s, ind_s, EXPECTED_SCALED_FEATURES_FOR_MODEL, WINDOW_SIZE, logger_instance=None, obs_normalizer=normalizer)
+    np.testing.assert_allclose(normed, np.clip((raw - 0.5) / np.sqrt(4.0 + 1e-8), -1.0, 1.0))
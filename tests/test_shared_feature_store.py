@@ -0,0 +1,46 @@
+import importlib
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+import pytest
+
+store_mod = importlib.import_module('src.utils.shared_feature_store')
+
+
+def _child_sum(handle, queue):
+    attached = store_mod.attach_feature_store(handle)
+    queue.put((float(attached.features.sum()), float(attached.prices.sum())))
+    attached.close()
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(50, 4)), columns=['a_f0', 'a_close', 'b_f0', 'b_close'])
+    df['asset_id'] = 'x'  # non-numeric column is dropped, as PortfolioEnv does
+    return df
+
+
+@pytest.mark.parametrize('backend', ['shm', 'memmap'])
+def test_feature_store_roundtrip_read_only(backend, tmp_path):
+    df = _frame()
+    store = store_mod.SharedFeatureStore.from_dataframe(df, ['a_close', 'b_close'], backend=backend,
+                                                        directory=str(tmp_path))
+    try:
+        attached = store_mod.attach_feature_store(store.handle)
+        assert attached.feature_columns == ['a_f0', 'a_close', 'b_f0', 'b_close']
+        np.testing.assert_array_equal(attached.features, df.drop(columns='asset_id').to_numpy(np.float32))
+        np.testing.assert_array_equal(attached.prices, df[['a_close', 'b_close']].to_numpy())
+        with pytest.raises(ValueError):
+            attached.features[0, 0] = 1.0
+
+        queue = mp.get_context('spawn').Queue()
+        proc = mp.get_context('spawn').Process(target=_child_sum, args=(store.handle, queue))
+        proc.start()
+        feat_sum, price_sum = queue.get(timeout=60)
+        proc.join()
+        assert feat_sum == pytest.approx(float(attached.features.sum()))
+        assert price_sum == pytest.approx(float(attached.prices.sum()))
+        attached.close()
+    finally:
+        store.close(remove_files=True)
@@ -0,0 +1,50 @@
+import importlib
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+sp = importlib.import_module('src.data.sp500_parquet')
+
+
+def test_zip_to_partitioned_parquet_with_pushdown(tmp_path):
+    dates = pd.date_range('2018-01-01', '2021-12-31', freq='B')
+    frames = [pd.DataFrame({'Ticker': t, 'Date': dates.strftime('%Y-%m-%d'), 'Close': np.arange(len(dates)) + i,
+                            'Sector': 'Tech'}) for i, t in enumerate(['AAA', 'BRK.B', 'CCC'])]
+    df = pd.concat(frames).sample(frac=1, random_state=0)
+    csv_path = tmp_path / 'ratios.csv'
+    df.to_csv(csv_path, index=False)
+    zip_path = tmp_path / 'ratios.zip'
+    with zipfile.ZipFile(zip_path, 'w') as z:
+        z.write(csv_path, 'ratios.csv')
+
+    meta = sp.convert_csv_to_parquet(zip_path, tmp_path / 'pq', chunksize=500)
+    assert meta['rows'] == len(df) and meta['ticker_col'] == 'Ticker'
+    assert sp.list_tickers(tmp_path / 'pq') == ['AAA', 'BRK.B', 'CCC']
+    assert (tmp_path / 'pq' / 'Ticker=AAA' / 'year=2019').is_dir()
+
+    out = sp.load_parquet_dataset(tmp_path / 'pq', columns=['Close'], tickers=['BRK.B'],
+                                  start='2019-03-01', end='2020-02-28')
+    expected = frames[1][(frames[1].Date >= '2019-03-01') & (frames[1].Date <= '2020-02-28')]
+    assert out.columns.tolist() == ['Ticker', 'Date', 'Close']
+    np.testing.assert_array_equal(out['Close'].to_numpy(), expected['Close'].to_numpy())
+    assert out['Date'].dtype == 'datetime64[ns]'
+
+
+def test_column_types_come_from_the_whole_file(tmp_path):
+    df = pd.DataFrame({'Ticker': ['AAA'] * 8, 'Date': pd.date_range('2020-01-01', periods=8).strftime('%Y-%m-%d'),
+                       'Close': [1.0, 2, 3, 4, None, 6, 7, 8],
+                       'Note': [None] * 4 + ['split', 'x', None, '12']})
+    csv_path = tmp_path / 'news.csv'
+    df.to_csv(csv_path, index=False)
+
+    meta = sp.convert_csv_to_parquet(csv_path, tmp_path / 'pq', chunksize=4)
+    assert meta['numeric_columns'] == ['Close']
+    out = sp.load_parquet_dataset(tmp_path / 'pq')
+    assert out['Note'].iloc[[4, 5, 7]].tolist() == ['split', 'x', '12'] and out['Note'].iloc[:4].isna().all()
+    np.testing.assert_array_equal(out['Close'].to_numpy(), df['Close'].to_numpy())
+
+    with pytest.raises(ValueError, match='Note'):
+        sp.convert_csv_to_parquet(csv_path, tmp_path / 'pq2', chunksize=4, numeric_columns=['Close', 'Note'])
@@ -0,0 +1,21 @@
+import builtins
+import importlib
+import sys
+
+profiler_mod = importlib.import_module('src.utils.startup_profiler')
+
+
+def test_import_has_no_side_effect_and_warmup_restores_hook():
+    original = builtins.__import__
+    profiler = profiler_mod.StartupProfiler()
+    assert builtins.__import__ is original and not profiler.installed
+
+    sys.modules.pop('colorsys', None)
+    thread = profiler.warmup_in_background({'stdlib': lambda: __import__('colorsys')}, profile_imports=True)
+    profiler.finish()  # pronto para servir; o hook continua até o fim do warm-up
+    thread.join(5)
+
+    assert builtins.__import__ is original and not profiler.installed
+    assert profiler.warmup_done('stdlib')
+    assert 'colorsys' in profiler.import_times
+    assert [p['phase'] for p in profiler.phases][-1] == 'warmup_done'
@@ -0,0 +1,65 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+po = importlib.import_module('src.optimization.performance_optimizer')
+
+
+def _history(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    confidence = rng.random(n)
+    outcome = rng.random(n) < confidence  # higher confidence -> more hits
+    pnl = np.where(outcome, 0.02, -0.015) * rng.random(n)
+    symbols = rng.choice(['AAPL', 'MSFT', 'NVDA'], n)
+    return pd.DataFrame({'symbol': symbols, 'confidence': confidence, 'outcome': outcome, 'pnl': pnl})
+
+
+def test_sweep_matches_brute_force_per_group():
+    df = _history()
+    thresholds = np.linspace(0, 1, 41)
+    sweep = po.sweep_confidence_thresholds(df['confidence'], df['outcome'], df['pnl'], thresholds,
+                                           groups=df['symbol'])
+    for row in sweep.sample(40, random_state=0).itertuples():
+        taken = df[(df['symbol'] == row.group) & (df['confidence'] >= row.threshold)]
+        assert row.trades == len(taken)
+        assert row.wins == taken['outcome'].sum()
+        assert np.isclose(row.pnl, taken['pnl'].sum())
+        if len(taken):
+            assert np.isclose(row.accuracy, taken['outcome'].mean())
+
+
+def test_optimize_uses_history_and_falls_back_without_it():
+    optimizer = po.PerformanceOptimizer()
+    result = optimizer.optimize_confidence_thresholds(_history(), min_trades=100)
+    assert result['optimal_metrics']['trades'] >= 100
+    assert result['optimal_threshold'] > optimizer.confidence_threshold
+    assert result['expected_improvement'] > 0
+    assert set(result['per_group_thresholds']) == {'AAPL', 'MSFT', 'NVDA'}
+
+    simulated = optimizer.optimize_confidence_thresholds(pd.DataFrame())
+    assert len(simulated['all_results']) == 8
+
+
+def test_nan_confidence_is_dropped_and_no_trades_keeps_current_threshold():
+    sweep = po.sweep_confidence_thresholds([0.7, np.nan, 0.9, np.inf], [1, 1, 0, 1], pnl=[0.1, 5.0, -0.2, 5.0],
+                                           thresholds=[0.0, 0.8], groups=['A', 'A', 'B', 'C'])
+    by_key = sweep.set_index(['group', 'threshold'])
+    assert by_key.loc[('A', 0.0), 'trades'] == 1 and np.isclose(by_key.loc[('A', 0.0), 'pnl'], 0.1)
+    assert by_key.loc[('B', 0.8), 'trades'] == 1
+    assert by_key.loc[('C', 0.0), 'trades'] == 0  # grupo só com confiança inválida
+
+    optimizer = po.PerformanceOptimizer()
+    result = optimizer.optimize_confidence_thresholds(pd.DataFrame({'confidence': [0.5, 0.6], 'outcome': [1, 0]}),
+                                                      thresholds=[0.9])
+    assert result['status'] == 'no_trades'
+    assert result['optimal_threshold'] == optimizer.confidence_threshold
+    assert result['expected_improvement'] == 0.0
+
+
+def test_trades_without_outcome_are_not_counted_as_wins():
+    sweep = po.sweep_confidence_thresholds([0.6, 0.7, 0.8, 0.9], [1, np.nan, 0, None], pnl=[0.1, 0.2, -0.1, np.nan],
+                                           thresholds=[0.5])
+    row = sweep.iloc[0]
+    assert (row['trades'], row['wins']) == (2, 1)
+    assert np.isclose(row['accuracy'], 0.5) and np.isclose(row['pnl'], 0.0)
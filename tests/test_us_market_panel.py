@@ -0,0 +1,66 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+
+us = importlib.import_module('src.trading.us_market_system')
+
+
+def _market_data(n_symbols=40, seed=3):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(n_symbols):
+        n = int(rng.integers(30, 320))  # includes symbols below 50 and below 200 rows
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        data[f'S{i}'] = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                                      'volume': rng.integers(100_000, 1_000_000, n)},
+                                     index=pd.date_range('2020-01-01', periods=n, freq='D'))
+    return data
+
+
+def test_ewm_matches_pandas_with_leading_and_inner_gaps():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(120, 30)).cumsum(axis=0)
+    for j in range(30):
+        values[:rng.integers(0, 100), j] = np.nan
+    values[rng.random(values.shape) < 0.02] = np.nan
+    expected = pd.DataFrame(values).ewm(span=12).mean().to_numpy()
+    np.testing.assert_array_equal(us._ewm_mean(values, 12), expected)
+
+
+def test_panel_mode_returns_same_signals_as_per_symbol_loop():
+    data = _market_data()
+    analyzer = us.USMarketAnalyzer()
+    analyzer.confidence_threshold = 0.3  # keep HOLD/BUY/SELL mixes in the comparison
+    symbols = list(data) + ['MISSING']
+
+    loop = analyzer.analyze_portfolio(symbols, {k: v.copy() for k, v in data.items()}, panel=False)
+    panel = analyzer.analyze_portfolio(symbols, data)
+
+    assert [s.symbol for s in panel] == [s.symbol for s in loop]
+    assert len(loop) > 5
+    for expected, got in zip(loop, panel):
+        assert (got.signal, got.confidence, got.reasons) == (expected.signal, expected.confidence, expected.reasons)
+        assert (got.price, got.volume) == (expected.price, expected.volume)
+        for key, value in expected.indicators.items():
+            if value is None:
+                assert got.indicators[key] is None
+            else:
+                np.testing.assert_allclose(got.indicators[key], value, rtol=1e-9)
+
+
+def test_nan_last_volume_does_not_abort_the_panel():
+    data = _market_data(n_symbols=12)
+    for symbol in ('S0', 'S5'):
+        data[symbol] = data[symbol].astype({'volume': 'float64'})
+        data[symbol].iloc[-1, data[symbol].columns.get_loc('volume')] = np.nan
+    analyzer = us.USMarketAnalyzer()
+    analyzer.confidence_threshold = 0.0  # every symbol with enough data becomes a signal
+
+    loop = analyzer.analyze_portfolio(list(data), {k: v.copy() for k, v in data.items()}, panel=False)
+    panel = analyzer.analyze_portfolio(list(data), data)
+
+    assert [s.symbol for s in panel] == [s.symbol for s in loop]
+    by_symbol = {s.symbol: s for s in panel}
+    assert np.isnan(by_symbol['S0'].volume) and np.isnan(by_symbol['S5'].volume)
+    assert all(isinstance(s.volume, int) for s in panel if s.symbol not in ('S0', 'S5'))
@@ -0,0 +1,65 @@
+import importlib
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+wd = importlib.import_module('src.utils.windowed_dataset')
+
+
+def _loop_sequences(values, targets, window, label_offset):
+    X, y = [], []
+    for i in range(len(values) - window - label_offset + 1):
+        X.append(values[i:i + window])
+        y.append(targets[i + window - 1 + label_offset])
+    return np.array(X), np.array(y)
+
+
+@pytest.mark.parametrize('label_offset', [0, 1])
+def test_windows_match_materialized_sequences(label_offset):
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(200, 5)).astype(np.float32)
+    targets = rng.integers(0, 2, size=200)
+    ds = wd.WindowedDataset(values, targets, window_size=30, label_offset=label_offset)
+    X_ref, y_ref = _loop_sequences(values, targets, 30, label_offset)
+
+    X, y = ds.materialize()
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+    np.testing.assert_array_equal(ds.labels, y_ref)
+    assert ds.features is values  # no copy of the underlying array
+
+    sub = ds.subset([5, 3, 40])
+    Xs, ys = sub.get_batch(np.arange(3))
+    np.testing.assert_array_equal(Xs, X_ref[[5, 3, 40]])
+    np.testing.assert_array_equal(ys, y_ref[[5, 3, 40]])
+
+    batches = list(ds.iter_batches(64, shuffle=True, seed=1))
+    assert sum(len(b[0]) for b in batches) == len(ds)
+    assert sorted(np.concatenate([b[1] for b in batches]).tolist()) == sorted(y_ref.tolist())
+
+
+def test_segments_and_per_segment_scaling():
+    rng = np.random.default_rng(1)
+    lengths = [50, 8, 40]
+    values = rng.normal(size=(sum(lengths), 3)).astype(np.float32) * 10
+    targets = np.arange(sum(lengths), dtype=np.float64)
+    scalers, X_ref, y_ref = [], [], []
+    begin = 0
+    for length in lengths:
+        seg = values[begin:begin + length]
+        scaler = MinMaxScaler().fit(seg)
+        scalers.append(scaler)
+        X_seg, y_seg = _loop_sequences(scaler.transform(seg), targets[begin:begin + length], 10, 1)
+        X_ref.extend(X_seg)
+        y_ref.extend(y_seg)
+        begin += length
+    affine = [wd.affine_from_scaler(s) for s in scalers]
+    ds = wd.WindowedDataset.from_segments(values, targets, lengths, window_size=10, label_offset=1,
+                                          scale=np.stack([a[0] for a in affine]),
+                                          shift=np.stack([a[1] for a in affine]))
+    assert len(ds) == len(X_ref) == 40 + 0 + 30
+    X, y = ds.materialize()
+    np.testing.assert_allclose(X, np.array(X_ref), atol=1e-5)
+    np.testing.assert_array_equal(y, y_ref)
+    assert set(ds.segment_ids.tolist()) == {0, 2}
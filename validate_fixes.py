@@ -122,7 +122,7 @@ try:
         "status": "healthy",
         "system_ready": neural_trading_system.system_ready,
         "neural_agent_available": neural_trading_system.neural_agent is not None,
-        "learning_active": neural_trading_system.learning_thread is not None
+        "learning_active": neural_trading_system.learning_system.learning_active
     }
     print(f"   {health_response}")
     